@@ -4,6 +4,14 @@ File I/O utilities for MediaWiki analysis tools.
 
 import os
 import sys
+import atexit
+import bz2
+import gzip
+import hashlib
+import io
+import shutil
+import subprocess
+import tempfile
 from pathlib import Path
 
 # Import site-specific config from project root
@@ -61,6 +69,10 @@ def get_latest_xml_info():
     return None
 
 
+# Compressed dump formats accepted by open_dump()
+COMPRESSED_SUFFIXES = ('.7z', '.gz', '.bz2', '.zst')
+
+
 def find_xml_file():
     """
     Find the XML file based on the latest fetch log, falling back to directory search.
@@ -81,16 +93,30 @@ def find_xml_file():
         return None
     
     # First check data root directory for backward compatibility
-    xml_files = list(data_dir.glob('*.xml'))
-    if xml_files:
-        return str(xml_files[0])
+    xml_file = _find_dump_in_dir(data_dir)
+    if xml_file:
+        return xml_file
     
     # Then check subdirectories
     for subdir in data_dir.iterdir():
         if subdir.is_dir():
-            xml_files = list(subdir.glob('*.xml'))
-            if xml_files:
-                return str(xml_files[0])
+            xml_file = _find_dump_in_dir(subdir)
+            if xml_file:
+                return xml_file
+    
+    return None
+
+
+def _find_dump_in_dir(directory: Path):
+    """Find a plain XML dump in a directory, falling back to a compressed one."""
+    xml_files = sorted(directory.glob('*.xml'))
+    if xml_files:
+        return str(xml_files[0])
+    
+    for suffix in COMPRESSED_SUFFIXES:
+        xml_files = sorted(directory.glob(f'*.xml{suffix}'))
+        if xml_files:
+            return str(xml_files[0])
     
     return None
 
@@ -145,4 +171,267 @@ def check_xml_exists() -> bool:
         print("The file may have been moved or deleted.")
         return False
     
-    return True
\ No newline at end of file
+    return True
+
+
+class HashingReader:
+    """
+    Binary file wrapper that computes a SHA-256 of everything read through it.
+    
+    Lets a parser fingerprint the dump during the same pass that parses it.
+    """
+    
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.file_obj.read(size)
+        self.sha256.update(data)
+        self.bytes_read += len(data)
+        return data
+    
+    def hexdigest(self) -> str:
+        """Return the SHA-256 of the bytes read so far."""
+        return self.sha256.hexdigest()
+
+
+def compute_file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file in fixed-size blocks.
+    
+    Args:
+        file_path: Path to the file
+        block_size: Read block size in bytes
+        
+    Returns:
+        Hex digest string
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_dump_fingerprint(xml_file_path: str, sha256: str = None) -> dict:
+    """
+    Get the fingerprint used to key files derived from a dump (size, mtime, hash).
+    
+    Args:
+        xml_file_path: Path to the dump file
+        sha256: Precomputed SHA-256 (computed from the file if None)
+        
+    Returns:
+        dict: Dictionary with keys: name, size, mtime, sha256
+    """
+    stat = os.stat(xml_file_path)
+    return {
+        'name': os.path.basename(xml_file_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': sha256 or compute_file_sha256(xml_file_path)
+    }
+
+
+def fingerprint_matches(xml_file_path: str, fingerprint: dict) -> bool:
+    """
+    Check whether a stored fingerprint still describes the dump file.
+    
+    Size and mtime are compared first; the SHA-256 is only recomputed when the
+    size matches but the mtime differs (e.g. the dump was copied or touched).
+    
+    Args:
+        xml_file_path: Path to the dump file
+        fingerprint: Fingerprint from get_dump_fingerprint()
+        
+    Returns:
+        True if the fingerprint matches the file
+    """
+    if not fingerprint or not os.path.exists(xml_file_path):
+        return False
+    
+    stat = os.stat(xml_file_path)
+    if stat.st_size != fingerprint.get('size'):
+        return False
+    if stat.st_mtime == fingerprint.get('mtime'):
+        return True
+    return compute_file_sha256(xml_file_path) == fingerprint.get('sha256')
+
+
+def is_compressed(file_path: str) -> bool:
+    """
+    Check whether a dump path refers to a compressed file.
+    
+    Args:
+        file_path: Path to the dump
+        
+    Returns:
+        True if the file name ends with a supported compression suffix
+    """
+    return str(file_path).lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def strip_compression_suffix(file_path: str) -> str:
+    """
+    Remove a compression suffix from a dump path (dump.xml.7z -> dump.xml).
+    
+    Args:
+        file_path: Path to the dump
+        
+    Returns:
+        Path without the compression suffix (unchanged if not compressed)
+    """
+    file_path = str(file_path)
+    for suffix in COMPRESSED_SUFFIXES:
+        if file_path.lower().endswith(suffix):
+            return file_path[:-len(suffix)]
+    return file_path
+
+
+class _ProcessStream(io.RawIOBase):
+    """
+    Raw binary stream over the stdout of a decompression subprocess.
+    
+    stderr is kept in a temporary file so that a corrupt archive or a missing
+    codec is reported with the tool's own message once the output ends, rather
+    than as an XML parse error or silently short output.
+    """
+    
+    def __init__(self, args):
+        super().__init__()
+        self.args = args
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=self.stderr)
+        self.finished = False
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        count = self.process.stdout.readinto(buffer)
+        if count == 0 and not self.finished:
+            self.finished = True
+            self._check_exit_status()
+        return count
+    
+    def _check_exit_status(self) -> None:
+        """Raise if the process exited non-zero after writing all its output."""
+        if self.process.wait() != 0:
+            self.stderr.seek(0)
+            message = self.stderr.read().decode('utf-8', errors='replace').strip()
+            raise IOError(f"{os.path.basename(self.args[0])} exited with status "
+                          f"{self.process.returncode}: {message or 'no error output'}")
+    
+    def close(self) -> None:
+        if not self.closed:
+            self.process.stdout.close()
+            try:
+                if self.process.poll() is None and not self.finished:
+                    # Stopped early (e.g. after the namespace header): don't wait for the whole archive
+                    self.process.terminate()
+                    self.process.wait()
+                elif not self.finished:
+                    self.finished = True
+                    self._check_exit_status()
+            finally:
+                self.stderr.close()
+                super().close()
+
+
+# Archives extracted by py7zr in this process: absolute path -> (size, mtime, temp dir, extracted file)
+_extracted_7z = {}
+
+
+def _remove_extracted_7z() -> None:
+    """Remove the temporary directories of archives extracted by py7zr."""
+    for _, _, temp_dir, _ in _extracted_7z.values():
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    _extracted_7z.clear()
+
+
+atexit.register(_remove_extracted_7z)
+
+
+def _extract_7z_once(file_path: str) -> str:
+    """
+    Extract the first file of a 7z archive with py7zr, once per process.
+    
+    py7zr cannot stream, so the archive is extracted to a temporary directory
+    next to it. Later opens of the same unchanged archive reuse that copy; the
+    directory is removed when the process exits.
+    
+    Args:
+        file_path: Path to the .7z archive
+        
+    Returns:
+        Path to the extracted file
+    """
+    try:
+        import py7zr
+    except ImportError:
+        raise ImportError("Reading .7z dumps requires the 7z command or py7zr (pip install py7zr)")
+    
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    cached = _extracted_7z.get(key)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime) and os.path.exists(cached[3]):
+        return cached[3]
+    if cached:
+        shutil.rmtree(cached[2], ignore_errors=True)
+    
+    print("⚠ 7z command not found, extracting with py7zr to a temporary directory (once per run)")
+    temp_dir = tempfile.mkdtemp(prefix='dump_', dir=os.path.dirname(key))
+    try:
+        with py7zr.SevenZipFile(key, mode='r') as archive:
+            names = [name for name in archive.getnames() if not name.endswith('/')]
+            archive.extract(path=temp_dir, targets=names[:1])
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    extracted = os.path.join(temp_dir, names[0])
+    _extracted_7z[key] = (stat.st_size, stat.st_mtime, temp_dir, extracted)
+    return extracted
+
+
+def _open_7z(file_path: str):
+    """Stream the first file of a 7z archive, preferring the 7z command line tool."""
+    for command in ('7z', '7zz', '7za'):
+        executable = shutil.which(command)
+        if executable:
+            return io.BufferedReader(_ProcessStream([executable, 'x', '-so', str(file_path)]))
+    return open(_extract_7z_once(file_path), 'rb')
+
+
+def open_dump(file_path: str):
+    """
+    Open a dump for binary reading, decompressing on the fly if needed.
+    
+    Supports plain XML and .7z (7z command, falling back to py7zr), .gz, .bz2
+    and .zst (requires the zstandard package). The returned object supports
+    read() and close() and can be used as a context manager or passed to
+    ET.iterparse().
+    
+    Args:
+        file_path: Path to the dump
+        
+    Returns:
+        Binary file-like object yielding the XML bytes
+    """
+    lower_path = str(file_path).lower()
+    
+    if lower_path.endswith('.gz'):
+        return gzip.open(file_path, 'rb')
+    if lower_path.endswith('.bz2'):
+        return bz2.open(file_path, 'rb')
+    if lower_path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst dumps requires zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'))
+    if lower_path.endswith('.7z'):
+        return _open_7z(file_path)
+    
+    return open(file_path, 'rb')
@@ -0,0 +1,277 @@
+"""
+Persistent columnar page catalog for MediaWiki XML exports.
+
+The catalog stores the per-page facts that analysis tools keep rebuilding
+from XML (id, namespace, title, text length, timestamp, contributor) as NumPy
+arrays plus string tables next to the dump. It is built during the first scan
+of a dump, keyed by the dump's size, mtime and SHA-256, and memory-mapped by
+later tools so they can finish without touching the XML.
+"""
+
+import json
+import os
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from .io_utils import get_dump_fingerprint, fingerprint_matches
+from .scan import Analyzer, ScanContext, ScanStats
+
+CATALOG_VERSION = 1
+CATALOG_DIRNAME = 'page_catalog'
+MANIFEST_FILE = 'manifest.json'
+
+# Numeric columns: name -> dtype
+NUMERIC_COLUMNS = {
+    'ids': np.int64,
+    'ns': np.int32,
+    'revision_ids': np.int64,
+    'text_chars': np.int64,
+    'text_bytes': np.int64,
+    'timestamps': np.int64,
+    'contributor_idx': np.int32,
+}
+
+
+def get_catalog_dir(xml_file_path: str) -> Path:
+    """
+    Get the catalog directory for a dump (stored next to the dump).
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+
+    Returns:
+        Path to the catalog directory
+    """
+    return Path(xml_file_path).parent / CATALOG_DIRNAME
+
+
+def _parse_timestamp(timestamp: Optional[str]) -> int:
+    """Convert a MediaWiki timestamp (2020-01-01T00:00:00Z) to epoch seconds, -1 if missing."""
+    if not timestamp:
+        return -1
+    try:
+        return int(datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return -1
+
+
+def _to_int(value: Optional[str]) -> int:
+    """Convert an optional numeric string to int, -1 if missing or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _write_string_table(catalog_dir: Path, name: str, strings: List[str]) -> None:
+    """Write strings as one UTF-8 blob plus an offsets array."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    with open(catalog_dir / f'{name}.bin', 'wb') as f:
+        position = 0
+        for i, string in enumerate(strings):
+            data = string.encode('utf-8')
+            f.write(data)
+            position += len(data)
+            offsets[i + 1] = position
+    np.save(catalog_dir / f'{name}_offsets.npy', offsets)
+
+
+class StringTable:
+    """Memory-mapped UTF-8 string table (blob + offsets)."""
+
+    def __init__(self, catalog_dir: Path, name: str):
+        self.offsets = np.load(catalog_dir / f'{name}_offsets.npy', mmap_mode='r')
+        blob_path = catalog_dir / f'{name}.bin'
+        # np.memmap cannot map an empty file
+        if os.path.getsize(blob_path) > 0:
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.blob[start:end].tobytes().decode('utf-8')
+
+
+class PageCatalog:
+    """
+    Read-only, memory-mapped view of a page catalog.
+
+    Columns are NumPy arrays indexed by page position in the dump:
+    ids, ns, revision_ids, text_chars (-1 when a page has no text),
+    text_bytes, timestamps (epoch seconds, -1 when missing) and
+    contributor_idx (-1 when missing). Titles and contributor names are
+    available through get_title() and get_contributor().
+    """
+
+    def __init__(self, catalog_dir: Path):
+        self.catalog_dir = Path(catalog_dir)
+        with open(self.catalog_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        for column in NUMERIC_COLUMNS:
+            setattr(self, column, np.load(self.catalog_dir / f'{column}.npy', mmap_mode='r'))
+
+        self.titles = StringTable(self.catalog_dir, 'titles')
+        self.contributors = StringTable(self.catalog_dir, 'contributors')
+
+    @classmethod
+    def open(cls, xml_file_path: str) -> Optional['PageCatalog']:
+        """
+        Open the catalog for a dump if it exists and matches the dump.
+
+        Args:
+            xml_file_path: Path to the MediaWiki XML export file
+
+        Returns:
+            PageCatalog instance, or None if missing or stale
+        """
+        catalog_dir = get_catalog_dir(xml_file_path)
+        manifest_path = catalog_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get('version') != CATALOG_VERSION:
+            return None
+
+        dump = manifest.get('dump', {})
+        if dump.get('name') != os.path.basename(xml_file_path) or not fingerprint_matches(xml_file_path, dump):
+            return None
+
+        return cls(catalog_dir)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def namespace_map(self) -> Dict[str, str]:
+        """Namespace ID to name mapping parsed from the dump."""
+        return self.manifest.get('namespaces', {})
+
+    def get_title(self, index: int) -> str:
+        return self.titles[index]
+
+    def get_contributor(self, index: int) -> Optional[str]:
+        contributor_index = int(self.contributor_idx[index])
+        return self.contributors[contributor_index] if contributor_index >= 0 else None
+
+    def get_timestamp(self, index: int) -> Optional[str]:
+        """Return the revision timestamp in MediaWiki format, or None."""
+        timestamp = int(self.timestamps[index])
+        if timestamp < 0:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def iter_pages(self) -> Iterator[Dict[str, Optional[str]]]:
+        """
+        Iterate over catalog rows as dicts shaped like extract_page_elements() (without text).
+
+        Yields:
+            Dictionary with id, title, ns, revision_id, timestamp, contributor, text_chars, text_bytes
+        """
+        for i in range(self.page_count):
+            yield {
+                'id': str(int(self.ids[i])) if self.ids[i] >= 0 else None,
+                'title': self.get_title(i),
+                'ns': str(int(self.ns[i])),
+                'revision_id': str(int(self.revision_ids[i])) if self.revision_ids[i] >= 0 else None,
+                'timestamp': self.get_timestamp(i),
+                'contributor': self.get_contributor(i),
+                'text_chars': int(self.text_chars[i]),
+                'text_bytes': int(self.text_bytes[i]),
+            }
+
+    def title_to_id(self) -> Dict[str, str]:
+        """Build a mapping from page titles to page IDs."""
+        title_to_id = {}
+        for i in range(self.page_count):
+            title = self.get_title(i)
+            if title and self.ids[i] >= 0:
+                title_to_id[title] = str(int(self.ids[i]))
+        return title_to_id
+
+
+class CatalogBuilder(Analyzer):
+    """Scan engine plugin that writes the page catalog during a scan."""
+
+    name = 'page-catalog'
+
+    def __init__(self, catalog_dir: Optional[Path] = None):
+        self.catalog_dir = catalog_dir
+        self.namespace_map = {}
+        self.columns = {
+            'ids': array('q'),
+            'ns': array('i'),
+            'revision_ids': array('q'),
+            'text_chars': array('q'),
+            'text_bytes': array('q'),
+            'timestamps': array('q'),
+            'contributor_idx': array('i'),
+        }
+        self.titles = []
+        self.contributor_names = []
+        self.contributor_index = {}
+
+    def start(self, context: ScanContext) -> None:
+        self.namespace_map = dict(context.namespace_map)
+        if self.catalog_dir is None:
+            self.catalog_dir = get_catalog_dir(context.xml_file_path)
+
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        text = elements['text']
+        contributor = elements['contributor']
+        if contributor is None:
+            contributor_index = -1
+        else:
+            contributor_index = self.contributor_index.get(contributor)
+            if contributor_index is None:
+                contributor_index = len(self.contributor_names)
+                self.contributor_index[contributor] = contributor_index
+                self.contributor_names.append(contributor)
+
+        self.columns['ids'].append(_to_int(elements['id']))
+        self.columns['ns'].append(_to_int(elements['ns']) if elements['ns'] is not None else 0)
+        self.columns['revision_ids'].append(_to_int(elements.get('revision_id')))
+        self.columns['text_chars'].append(len(text) if text is not None else -1)
+        self.columns['text_bytes'].append(len(text.encode('utf-8')) if text else 0)
+        self.columns['timestamps'].append(_parse_timestamp(elements['timestamp']))
+        self.columns['contributor_idx'].append(contributor_index)
+        self.titles.append(elements['title'] or '')
+
+    def finish(self, stats: ScanStats) -> None:
+        catalog_dir = Path(self.catalog_dir)
+        catalog_dir.mkdir(parents=True, exist_ok=True)
+
+        # Remove the manifest first so a half-written catalog is never considered valid
+        manifest_path = catalog_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            manifest_path.unlink()
+
+        for column, dtype in NUMERIC_COLUMNS.items():
+            np.save(catalog_dir / f'{column}.npy', np.frombuffer(self.columns[column], dtype=dtype))
+        _write_string_table(catalog_dir, 'titles', self.titles)
+        _write_string_table(catalog_dir, 'contributors', self.contributor_names)
+
+        manifest = {
+            'version': CATALOG_VERSION,
+            'dump': get_dump_fingerprint(stats.xml_file_path, sha256=stats.sha256),
+            'page_count': len(self.titles),
+            'namespaces': self.namespace_map,
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        print(f"Page catalog saved: {catalog_dir} ({len(self.titles):,} pages)")
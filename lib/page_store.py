@@ -0,0 +1,269 @@
+"""
+Byte-offset page index and random page access for MediaWiki XML exports.
+
+The index records the byte offset and length of every <page> element in the
+raw XML, so a single page can be fetched by curid with one seek and a parse
+of just that fragment instead of streaming the whole dump. It is stored in
+page_index/ next to the dump and keyed by the dump fingerprint, like the
+page catalog.
+"""
+
+import json
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+from .io_utils import get_dump_fingerprint, fingerprint_matches, is_compressed
+from .xml_parser import extract_page_elements, read_root_namespace
+
+INDEX_VERSION = 1
+INDEX_DIRNAME = 'page_index'
+MANIFEST_FILE = 'manifest.json'
+
+PAGE_START = b'<page>'
+PAGE_END = b'</page>'
+# First <id> inside a page is the page ID (revision IDs come after <revision>)
+PAGE_ID_PATTERN = re.compile(rb'<id>(\d+)</id>')
+
+
+def get_index_dir(xml_file_path: str) -> Path:
+    """
+    Get the page index directory for a dump (stored next to the dump).
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+
+    Returns:
+        Path to the index directory
+    """
+    return Path(xml_file_path).parent / INDEX_DIRNAME
+
+
+def scan_page_offsets(xml_file_path: str) -> Iterator[Tuple[int, int, int]]:
+    """
+    Scan the raw bytes of a dump for <page> elements.
+
+    Text inside a page is XML-escaped, so the literal byte strings <page> and
+    </page> only occur as element tags and no XML parsing is needed.
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+
+    Yields:
+        Tuples of (page_id, offset, length); page_id is -1 if the page has no ID
+    """
+    if os.path.getsize(xml_file_path) == 0:
+        return
+
+    with open(xml_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = data.find(PAGE_START)
+            while position != -1:
+                end = data.find(PAGE_END, position)
+                if end == -1:
+                    break
+                end += len(PAGE_END)
+
+                # Page ID precedes <revision>, so only the page header needs to be searched
+                header_end = data.find(b'<revision', position, end)
+                match = PAGE_ID_PATTERN.search(data, position, header_end if header_end != -1 else end)
+                page_id = int(match.group(1)) if match else -1
+
+                yield page_id, position, end - position
+                position = data.find(PAGE_START, end)
+
+
+def build_page_index(xml_file_path: str, index_dir: Optional[Path] = None) -> Path:
+    """
+    Build the byte-offset page index for a dump.
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        index_dir: Output directory (default: page_index/ next to the dump)
+
+    Returns:
+        Path to the index directory
+    """
+    index_dir = Path(index_dir) if index_dir is not None else get_index_dir(xml_file_path)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"Building page index for {xml_file_path}...")
+    rows = list(scan_page_offsets(xml_file_path))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    offsets = np.array([row[1] for row in rows], dtype=np.int64)
+    lengths = np.array([row[2] for row in rows], dtype=np.int64)
+
+    # Remove the manifest first so a half-written index is never considered valid
+    manifest_path = index_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+    np.save(index_dir / 'ids.npy', ids)
+    np.save(index_dir / 'offsets.npy', offsets)
+    np.save(index_dir / 'lengths.npy', lengths)
+
+    manifest = {
+        'version': INDEX_VERSION,
+        'dump': get_dump_fingerprint(xml_file_path),
+        'page_count': len(rows),
+        'xmlns': read_root_namespace(xml_file_path),
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"Page index saved: {index_dir} ({len(rows):,} pages)")
+    return index_dir
+
+
+def is_index_valid(xml_file_path: str, index_dir: Optional[Path] = None) -> bool:
+    """
+    Check whether the page index exists and matches the dump.
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        index_dir: Index directory (default: page_index/ next to the dump)
+
+    Returns:
+        True if the index can be used
+    """
+    index_dir = Path(index_dir) if index_dir is not None else get_index_dir(xml_file_path)
+    manifest_path = index_dir / MANIFEST_FILE
+    if not manifest_path.exists():
+        return False
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get('version') != INDEX_VERSION:
+        return False
+
+    dump = manifest.get('dump', {})
+    return dump.get('name') == os.path.basename(xml_file_path) and fingerprint_matches(xml_file_path, dump)
+
+
+class PageStore:
+    """
+    Random access to single pages of a dump by curid.
+
+    Pages are read lazily: get() seeks to the page's byte offset, reads just
+    that <page> element and parses it, so only the pages actually requested
+    are held in memory. The index is built on first use and rebuilt when the
+    dump changes.
+    """
+
+    def __init__(self, xml_file_path: str, index_dir: Optional[Path] = None, build: bool = True):
+        """
+        Open a page store for a dump.
+
+        Args:
+            xml_file_path: Path to the MediaWiki XML export file
+            index_dir: Index directory (default: page_index/ next to the dump)
+            build: Build the index if it is missing or stale
+        """
+        if is_compressed(xml_file_path):
+            raise ValueError(f"PageStore requires an uncompressed dump: {xml_file_path}")
+
+        self.xml_file_path = xml_file_path
+        self.index_dir = Path(index_dir) if index_dir is not None else get_index_dir(xml_file_path)
+
+        if not is_index_valid(xml_file_path, self.index_dir):
+            if not build:
+                raise FileNotFoundError(f"Page index not found or stale: {self.index_dir}")
+            build_page_index(xml_file_path, self.index_dir)
+
+        with open(self.index_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        self.ids = np.load(self.index_dir / 'ids.npy', mmap_mode='r')
+        self.offsets = np.load(self.index_dir / 'offsets.npy', mmap_mode='r')
+        self.lengths = np.load(self.index_dir / 'lengths.npy', mmap_mode='r')
+        self.xmlns = self.manifest.get('xmlns', '')
+
+        # curid -> row; built once on first lookup
+        self._rows = None
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, curid) -> bool:
+        return self._row(curid) is not None
+
+    def __enter__(self) -> 'PageStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying dump file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _row(self, curid) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {int(page_id): row for row, page_id in enumerate(self.ids) if page_id >= 0}
+        try:
+            return self._rows.get(int(curid))
+        except (TypeError, ValueError):
+            return None
+
+    def get_raw(self, curid) -> Optional[bytes]:
+        """
+        Read the raw <page> element bytes for a page.
+
+        Args:
+            curid: Page ID (int or numeric string)
+
+        Returns:
+            Raw XML bytes of the page, or None if not found
+        """
+        row = self._row(curid)
+        if row is None:
+            return None
+
+        if self._file is None:
+            self._file = open(self.xml_file_path, 'rb')
+        self._file.seek(int(self.offsets[row]))
+        return self._file.read(int(self.lengths[row]))
+
+    def get(self, curid) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Fetch one page by curid.
+
+        Args:
+            curid: Page ID (int or numeric string)
+
+        Returns:
+            Dictionary returned by extract_page_elements(), or None if not found
+        """
+        raw = self.get_raw(curid)
+        if raw is None:
+            return None
+
+        # Re-declare the dump's default namespace so tag names match config.MEDIAWIKI_NS
+        if self.xmlns:
+            raw = raw.replace(PAGE_START, f'<page xmlns="{self.xmlns}">'.encode('utf-8'), 1)
+        return extract_page_elements(ET.fromstring(raw))
+
+    def get_text(self, curid) -> Optional[str]:
+        """
+        Fetch the wikitext of one page by curid.
+
+        Args:
+            curid: Page ID (int or numeric string)
+
+        Returns:
+            Page text, or None if the page is not found or has no text
+        """
+        elements = self.get(curid)
+        return elements['text'] if elements else None
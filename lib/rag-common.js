@@ -499,14 +499,198 @@ function getRepresentativeChunksContext(chunks, representativeChunk, contextSize
     return mergeDocumentChunks(selectedChunks);
 }
 
-// Convert base64-encoded float32 binary to float array
-function base64ToFloat32Array(base64String) {
+// Convert base64 to raw bytes
+function base64ToBytes(base64String) {
     const binaryString = atob(base64String);
     const bytes = new Uint8Array(binaryString.length);
     for (let i = 0; i < binaryString.length; i++) {
         bytes[i] = binaryString.charCodeAt(i);
     }
-    return new Float32Array(bytes.buffer);
+    return bytes;
+}
+
+// Convert base64-encoded float32 binary to float array
+function base64ToFloat32Array(base64String) {
+    return new Float32Array(base64ToBytes(base64String).buffer);
+}
+
+// Convert an IEEE half-precision bit pattern to a number
+function float16ToNumber(bits) {
+    const sign = bits & 0x8000 ? -1 : 1;
+    const exponent = (bits >> 10) & 0x1f;
+    const fraction = bits & 0x3ff;
+    if (exponent === 0) {
+        return sign * Math.pow(2, -14) * (fraction / 1024);
+    }
+    if (exponent === 0x1f) {
+        return fraction ? NaN : sign * Infinity;
+    }
+    return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+}
+
+// Decoder from the bytes of one embedding in the vector_format of a vector_store_meta.json
+// (float32, float16, int8 with per-dimension offset and scale, or PQ codes; see tools/rag/vec2json.py)
+function createEmbeddingDecoder(metadata) {
+    const format = (metadata && metadata.vector_format) || 'float32';
+    const quantization = (metadata && metadata.quantization) || {};
+    
+    if (format === 'float16') {
+        return (bytes) => {
+            const bits = new Uint16Array(bytes.buffer, bytes.byteOffset, bytes.byteLength / 2);
+            const vector = new Float32Array(bits.length);
+            for (let i = 0; i < bits.length; i++) {
+                vector[i] = float16ToNumber(bits[i]);
+            }
+            return vector;
+        };
+    }
+    if (format === 'int8') {
+        const offset = base64ToFloat32Array(quantization.offset);
+        const scale = base64ToFloat32Array(quantization.scale);
+        return (bytes) => {
+            const codes = new Int8Array(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+            const vector = new Float32Array(codes.length);
+            for (let i = 0; i < codes.length; i++) {
+                vector[i] = offset[i] + (codes[i] + 128) * scale[i];
+            }
+            return vector;
+        };
+    }
+    if (format === 'pq') {
+        // Centroids are (pq_m, 2^pq_bits, dimension / pq_m); each code byte selects one sub-vector
+        const centroids = base64ToFloat32Array(quantization.centroids);
+        const subDimension = metadata.embedding_dimension / quantization.pq_m;
+        const codebookSize = 1 << quantization.pq_bits;
+        return (codes) => {
+            const vector = new Float32Array(metadata.embedding_dimension);
+            for (let m = 0; m < codes.length; m++) {
+                const start = (m * codebookSize + codes[m]) * subDimension;
+                vector.set(centroids.subarray(start, start + subDimension), m * subDimension);
+            }
+            return vector;
+        };
+    }
+    return (bytes) => new Float32Array(bytes.buffer, bytes.byteOffset, bytes.byteLength / 4);
+}
+
+// Embedding of a document: its row of the part's vector blob (binary layout) or its base64/array field (JSON layout)
+function documentEmbedding(part, doc, docIndex, decode) {
+    if (part.vectors) {
+        return decode(part.vectors.subarray(docIndex * part.bytesPerVector, (docIndex + 1) * part.bytesPerVector));
+    }
+    if (doc.embedding_binary) {
+        return decode(base64ToBytes(doc.embedding_binary));
+    }
+    if (doc.embedding && Array.isArray(doc.embedding)) {
+        return doc.embedding;
+    }
+    return null;
+}
+
+// Path of a part file; binary parts (vec2json.py --layout binary) are .bin.gz next to the .json.gz template
+function partFilePath(template, partIndex, metadata) {
+    const path = template.replace('{}', String(partIndex).padStart(2, '0'));
+    return metadata.layout === 'binary' ? path.replace(/\.json\.gz$/, '.bin.gz') : path;
+}
+
+// Build a part from an inflated binary part file: typed-array views on the sections listed in the metadata file
+function parseBinaryPart(bytes, metadata, partIndex) {
+    const partInfo = metadata.parts[partIndex];
+    const section = (name) => {
+        const offset = partInfo.offsets[name];
+        return offset ? bytes.subarray(offset[0], offset[0] + offset[1]) : null;
+    };
+    const int32Section = (name) => {
+        const offset = partInfo.offsets[name];
+        return offset ? new Int32Array(bytes.buffer, bytes.byteOffset + offset[0], offset[1] / 4) : null;
+    };
+    
+    const records = JSON.parse(new TextDecoder().decode(section('records')));
+    const curids = int32Section('curid');
+    const chunkIndex = int32Section('chunk_index');
+    const chunkStart = int32Section('chunk_start');
+    const chunkEnd = int32Section('chunk_end');
+    
+    const documents = new Array(partInfo.documents);
+    for (let row = 0; row < partInfo.documents; row++) {
+        const doc = { id: records.ids[row] };
+        if (curids[row] >= 0) {
+            doc.curid = String(curids[row]);
+        }
+        if (chunkIndex) {
+            doc.chunk_index = chunkIndex[row];
+            doc.chunk_start = chunkStart[row];
+            doc.chunk_end = chunkEnd[row];
+        }
+        if (records.section_titles && records.section_titles[row] !== undefined) {
+            doc.section_titles = records.section_titles[row];
+        }
+        if (records.duplicates && records.duplicates[row] !== undefined) {
+            doc.duplicates = records.duplicates[row];
+        }
+        documents[row] = doc;
+    }
+    
+    const vectors = section('vectors');
+    return {
+        part_index: partIndex,
+        part_documents: partInfo.documents,
+        embedding_dimension: metadata.embedding_dimension,
+        documents: documents,
+        vectors: vectors,
+        bytesPerVector: partInfo.documents ? vectors.length / partInfo.documents : 0,
+        signatures: section('signatures')
+    };
+}
+
+// Bits set in each byte value, for Hamming distances between sign-bit signatures
+const POPCOUNT = new Uint8Array(256);
+for (let i = 1; i < 256; i++) {
+    POPCOUNT[i] = POPCOUNT[i >> 1] + (i & 1);
+}
+
+// Sign bit of every dimension, 8 per byte with the first dimension in the high bit (as vec2json.py packs them)
+function signBits(vector) {
+    const bits = new Uint8Array(Math.ceil(vector.length / 8));
+    for (let i = 0; i < vector.length; i++) {
+        if (vector[i] > 0) {
+            bits[i >> 3] |= 0x80 >> (i & 7);
+        }
+    }
+    return bits;
+}
+
+// Concatenate the signatures of a part's documents (vec2json.py --binary-signatures) into one array
+function packPartSignatures(documents, bytesPerVector) {
+    const signatures = new Uint8Array(documents.length * bytesPerVector);
+    documents.forEach((doc, docIndex) => {
+        if (doc.signature) {
+            signatures.set(base64ToBytes(doc.signature), docIndex * bytesPerVector);
+        }
+    });
+    return signatures;
+}
+
+// Indices of the `count` documents whose signatures are closest to the query's in Hamming distance
+function hammingCandidates(queryBits, signatures, count) {
+    const bytesPerVector = queryBits.length;
+    const documentCount = signatures.length / bytesPerVector;
+    const order = Array.from({ length: documentCount }, (_, i) => i);
+    if (documentCount <= count) {
+        return order;
+    }
+    
+    const distances = new Uint16Array(documentCount);
+    for (let docIndex = 0; docIndex < documentCount; docIndex++) {
+        const offset = docIndex * bytesPerVector;
+        let distance = 0;
+        for (let i = 0; i < bytesPerVector; i++) {
+            distance += POPCOUNT[queryBits[i] ^ signatures[offset + i]];
+        }
+        distances[docIndex] = distance;
+    }
+    order.sort((a, b) => distances[a] - distances[b]);
+    return order.slice(0, count);
 }
 
 // Vector math utilities
@@ -555,6 +739,29 @@ function cosineSimilarity(vecA, vecB) {
     return similarity;
 }
 
+// Dot product of two vectors; equals the cosine similarity when both are unit length
+function dotSimilarity(vecA, vecB) {
+    if (!vecA || !vecB || vecA.length !== vecB.length) {
+        return 0;
+    }
+    
+    let sum = 0;
+    for (let i = 0; i < vecA.length; i++) {
+        sum += vecA[i] * vecB[i];
+    }
+    return sum;
+}
+
+// Similarity function for the embeddings described by a metadata file.
+// Exports marked normalized hold unit-length vectors, and the query embedding is normalized,
+// so float32/float16 embeddings are scored by a plain dot product. int8 and PQ codes do not
+// decode to exactly unit length and older exports may not be normalized: both keep the cosine.
+function createSimilarity(metadata) {
+    const format = (metadata && metadata.vector_format) || 'float32';
+    const exact = format === 'float32' || format === 'float16';
+    return metadata && metadata.normalized && exact ? dotSimilarity : cosineSimilarity;
+}
+
 // Load and parse compressed JSONL file
 async function loadCompressedJSONL(jsonlGzPath, updateProgress) {
     try {
@@ -1119,7 +1326,7 @@ async function loadVectorStore(elements) {
                 `Loading part ${partIndex}/${metadata.num_parts}...`;
             elements.loadingStatus.textContent = loadingMessage;
             
-            const partPath = CONFIG.VECTOR_STORE_PART_PATH_TEMPLATE.replace('{}', String(partIndex).padStart(2, '0'));
+            const partPath = partFilePath(CONFIG.VECTOR_STORE_PART_PATH_TEMPLATE, partIndex, metadata);
             
             const response = await fetch(partPath);
             if (!response.ok) {
@@ -1127,8 +1334,9 @@ async function loadVectorStore(elements) {
             }
             
             const arrayBuffer = await response.arrayBuffer();
-            const decompressed = pako.inflate(arrayBuffer, { to: 'string' });
-            const partData = JSON.parse(decompressed);
+            const partData = metadata.layout === 'binary' ?
+                parseBinaryPart(pako.inflate(arrayBuffer), metadata, partIndex - 1) :
+                JSON.parse(pako.inflate(arrayBuffer, { to: 'string' }));
             
             parts.push(partData);
             
@@ -1146,16 +1354,18 @@ async function loadVectorStore(elements) {
                 for (let partIndex = 1; partIndex <= titleMetadata.num_parts; partIndex++) {
                     elements.loadingStatus.textContent = `Loading title part ${partIndex}/${titleMetadata.num_parts}...`;
                     
-                    const titlePartPath = CONFIG.VECTOR_STORE_PART_PATH_TEMPLATE
-                        .replace('vector_store_part', 'vector_store_titles_part')
-                        .replace('{}', String(partIndex).padStart(2, '0'));
+                    const titlePartPath = partFilePath(
+                        CONFIG.VECTOR_STORE_PART_PATH_TEMPLATE.replace('vector_store_part', 'vector_store_titles_part'),
+                        partIndex, titleMetadata
+                    );
                     
                     try {
                         const response = await fetch(titlePartPath);
                         if (response.ok) {
                             const arrayBuffer = await response.arrayBuffer();
-                            const decompressed = pako.inflate(arrayBuffer, { to: 'string' });
-                            const titlePartData = JSON.parse(decompressed);
+                            const titlePartData = titleMetadata.layout === 'binary' ?
+                                parseBinaryPart(pako.inflate(arrayBuffer), titleMetadata, partIndex - 1) :
+                                JSON.parse(pako.inflate(arrayBuffer, { to: 'string' }));
                             titleParts.push(titlePartData);
                         }
                     } catch (error) {
@@ -1189,6 +1399,24 @@ async function loadVectorStore(elements) {
         // PCA model for title transformations is currently disabled
         // (Client-side PCA implementation not available)
         let pcaModel = null;
+        
+        // Embeddings are stored in the vector_format recorded in each metadata file
+        const decodeBodyEmbedding = createEmbeddingDecoder(metadata);
+        const decodeTitleEmbedding = createEmbeddingDecoder(titleMetadata);
+        const scoreBodyEmbedding = createSimilarity(metadata);
+        const scoreTitleEmbedding = createSimilarity(titleMetadata);
+        
+        // Sign-bit signatures for the binary prefilter (binary parts carry them as one section already)
+        if (metadata.binary_signatures) {
+            parts.forEach(part => {
+                part.signatures = part.signatures || packPartSignatures(part.documents, metadata.binary_signatures.bytes_per_vector);
+            });
+        }
+        if (titleMetadata && titleMetadata.binary_signatures) {
+            titleParts.forEach(part => {
+                part.signatures = part.signatures || packPartSignatures(part.documents, titleMetadata.binary_signatures.bytes_per_vector);
+            });
+        }
 
         // Create vector store object with preliminary-final search functionality
         vectorStore = {
@@ -1229,25 +1457,27 @@ async function loadVectorStore(elements) {
                 // Phase 1: Preliminary search in each part (optimized parallel processing)
                 const preliminaryResults = [];
                 
+                // Binary prefilter: only the documents closest in Hamming distance are decoded and reranked
+                const queryBits = metadata.binary_signatures ? signBits(queryEmbedding) : null;
+                
                 // Process parts in parallel for better performance
                 const partSearchPromises = this.parts.map(async (part, partIndex) => {
                     const partSimilarities = [];
+                    const docIndices = part.signatures ?
+                        hammingCandidates(queryBits, part.signatures, metadata.binary_signatures.rerank_candidates) :
+                        part.documents.keys();
                     
                     // Search in this part
-                    for (let docIndex = 0; docIndex < part.documents.length; docIndex++) {
+                    for (const docIndex of docIndices) {
                         const doc = part.documents[docIndex];
                         
-                        // Handle both binary and array formats
-                        let embedding;
-                        if (doc.embedding_binary && doc.embedding_format === 'float32_base64') {
-                            embedding = Array.from(base64ToFloat32Array(doc.embedding_binary));
-                        } else if (doc.embedding && Array.isArray(doc.embedding)) {
-                            embedding = doc.embedding;
-                        } else {
+                        // Handle binary parts, base64 and array formats
+                        const embedding = documentEmbedding(part, doc, docIndex, decodeBodyEmbedding);
+                        if (!embedding) {
                             continue;
                         }
                         
-                        const similarity = cosineSimilarity(queryEmbedding, embedding);
+                        const similarity = scoreBodyEmbedding(queryEmbedding, embedding);
                         if (!isNaN(similarity)) {
                             // Debug: Log redirect pages found in search
                             if (doc.curid === '1641' || doc.curid === '8984' || doc.curid === '7919') {
@@ -1475,21 +1705,23 @@ async function loadVectorStore(elements) {
                     let nanSimilarityCount = 0;
                     let validSimilarityCount = 0;
                     
+                    const titleQueryBits = titleMetadata && titleMetadata.binary_signatures ? signBits(queryEmbedding) : null;
+                    
                     for (let partIndex = 0; partIndex < this.titleParts.length; partIndex++) {
                         const titlePart = this.titleParts[partIndex];
+                        const docIndices = titlePart.signatures ?
+                            hammingCandidates(titleQueryBits, titlePart.signatures, titleMetadata.binary_signatures.rerank_candidates) :
+                            titlePart.documents.keys();
                         
-                        for (let docIndex = 0; docIndex < titlePart.documents.length; docIndex++) {
+                        for (const docIndex of docIndices) {
                             processedCount++;
                             const doc = titlePart.documents[docIndex];
                             
                             // Handle both binary and array formats
                             let embedding;
                             try {
-                                if (doc.embedding_binary && doc.embedding_format === 'float32_base64') {
-                                    embedding = Array.from(base64ToFloat32Array(doc.embedding_binary));
-                                } else if (doc.embedding && Array.isArray(doc.embedding)) {
-                                    embedding = doc.embedding;
-                                } else {
+                                embedding = documentEmbedding(titlePart, doc, docIndex, decodeTitleEmbedding);
+                                if (!embedding) {
                                     noEmbeddingCount++;
                                     continue;
                                 }
@@ -1507,7 +1739,7 @@ async function loadVectorStore(elements) {
                             }
                             seenDocuments.add(docId);
                             
-                            const titleSimilarity = cosineSimilarity(queryEmbedding, embedding);
+                            const titleSimilarity = scoreTitleEmbedding(queryEmbedding, embedding);
                             
                             // Debug log for specific document (ペア数列の停止性)
                             if (doc.curid === "3659" || (doc.metadata && doc.metadata.curid === "3659")) {
@@ -1518,12 +1750,8 @@ async function loadVectorStore(elements) {
                                 const xmlPageData = getPageFromXML(doc.curid);
                                 //console.log(`🎯 DEBUG: グラハム数 (curid=345) - Similarity: ${titleSimilarity.toFixed(6)}, Title from metadata: "${doc.metadata?.title}", Title from XML: "${xmlPageData?.title}"`);
                                 // Decode embedding from binary if not already done
-                                let docEmbedding;
-                                if (doc.embedding_binary && doc.embedding_format === 'float32_base64') {
-                                    docEmbedding = Array.from(base64ToFloat32Array(doc.embedding_binary));
-                                } else if (doc.embedding && Array.isArray(doc.embedding)) {
-                                    docEmbedding = doc.embedding;
-                                } else {
+                                const docEmbedding = documentEmbedding(titlePart, doc, docIndex, decodeTitleEmbedding);
+                                if (!docEmbedding) {
                                     //console.log('🚨 No embedding data available for Graham number');
                                     return;
                                 }
@@ -1536,12 +1764,8 @@ async function loadVectorStore(elements) {
                                 const xmlPageData = getPageFromXML(doc.curid);
                                 //console.log(`🚨 DEBUG: High score page (curid=${doc.curid}) - Similarity: ${titleSimilarity.toFixed(6)}, Title: "${xmlPageData?.title}"`);
                                 // Decode embedding from binary if not already done
-                                let docEmbedding;
-                                if (doc.embedding_binary && doc.embedding_format === 'float32_base64') {
-                                    docEmbedding = Array.from(base64ToFloat32Array(doc.embedding_binary));
-                                } else if (doc.embedding && Array.isArray(doc.embedding)) {
-                                    docEmbedding = doc.embedding;
-                                } else {
+                                const docEmbedding = documentEmbedding(titlePart, doc, docIndex, decodeTitleEmbedding);
+                                if (!docEmbedding) {
                                     //console.log('🚨 No embedding data available for high score page');
                                     return;
                                 }
@@ -1579,7 +1803,8 @@ async function loadVectorStore(elements) {
                             // Calculate title similarity by embedding the title
                             const titleOutput = await embedder(doc.metadata.title, { pooling: 'mean', normalize: true });
                             const titleEmbedding = Array.from(titleOutput.data);
-                            const titleSimilarity = cosineSimilarity(queryEmbedding, titleEmbedding);
+                            // Both embeddings are normalized by the embedder
+                            const titleSimilarity = dotSimilarity(queryEmbedding, titleEmbedding);
                             
                             if (!isNaN(titleSimilarity)) {
                                 const docId = doc.metadata ? doc.metadata.id : doc.id;
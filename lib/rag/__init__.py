@@ -1,11 +1,12 @@
 """RAG (Retrieval-Augmented Generation) utilities for MediaWiki XML processing."""
 
-from .loader import load_mediawiki_documents
+from .loader import load_mediawiki_documents, lazy_load_mediawiki_documents
 from .splitter import split_documents
 from .vectorstore import create_vector_store, search_documents
 
 __all__ = [
     'load_mediawiki_documents',
+    'lazy_load_mediawiki_documents',
     'split_documents', 
     'create_vector_store',
     'search_documents'
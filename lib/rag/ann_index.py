@@ -0,0 +1,188 @@
+"""Approximate and compressed FAISS index types (IVF-Flat, IVF-PQ, HNSW, int8, float16, PQ) built from exact vectors."""
+
+import math
+import time
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ('flat', 'ivf-flat', 'ivf-pq', 'hnsw', 'int8', 'float16', 'pq')
+DEFAULT_NPROBE = 16
+DEFAULT_PQ_BITS = 8
+DEFAULT_HNSW_M = 32
+DEFAULT_EF_CONSTRUCTION = 200
+DEFAULT_EF_SEARCH = 64
+MIN_POINTS_PER_CENTROID = 39  # k-means needs this many training points per list (faiss warns below it)
+TRAIN_POINTS_PER_CENTROID = 256  # Training sample size per list (faiss' own maximum)
+UNIT_NORM_TOLERANCE = 1e-3  # Largest |norm - 1| accepted as unit length (float32 output of normalizing models)
+
+
+def unit_normalize(vectors: np.ndarray):
+    """
+    Scale the rows that are not unit length to L2 norm 1, so inner products are cosine similarities.
+
+    Returns:
+        (float32 vectors, number of rows rescaled); the input is returned as is if every row is unit length
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1)
+    rescale = np.abs(norms - 1) > UNIT_NORM_TOLERANCE
+    if not rescale.any():
+        return vectors, 0
+    vectors = vectors.copy()
+    vectors[rescale] /= np.where(norms[rescale] > 0, norms[rescale], 1)[:, None]
+    return vectors, int(rescale.sum())
+
+
+def similarity_from_score(score, metric: int):
+    """
+    Cosine similarity of unit vectors from a FAISS score: inner products as they are,
+    squared L2 distances d (stores built before inner-product indexes) as 1 - d / 2.
+    """
+    if metric == faiss.METRIC_L2:
+        return 1 - score / 2
+    return score
+
+
+def default_nlist(count: int) -> int:
+    """Number of inverted lists for `count` vectors: 4 * sqrt(n), capped so every list gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(count)), count // MIN_POINTS_PER_CENTROID))
+
+
+def default_pq_m(dimension: int) -> int:
+    """PQ sub-quantizers: 8 dimensions each (the largest divisor of the dimension up to dimension / 8)."""
+    for m in range(max(1, dimension // 8), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def index_params(
+    index_type: str,
+    count: int,
+    dimension: int,
+    nlist: Optional[int] = None,
+    pq_m: Optional[int] = None,
+    pq_bits: int = DEFAULT_PQ_BITS,
+    hnsw_m: int = DEFAULT_HNSW_M,
+    ef_construction: int = DEFAULT_EF_CONSTRUCTION,
+    nprobe: int = DEFAULT_NPROBE,
+    ef_search: int = DEFAULT_EF_SEARCH
+) -> dict:
+    """
+    Resolve the build and search parameters of an index type, filling in defaults for the corpus size.
+
+    Returns:
+        Parameter dictionary (stored with the index and passed to build_index())
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type} (choose from {', '.join(INDEX_TYPES)})")
+    if index_type in ('ivf-flat', 'ivf-pq'):
+        lists = nlist or default_nlist(count)
+        params = {'nlist': lists, 'nprobe': min(nprobe, lists)}
+        if index_type == 'ivf-pq':
+            m = pq_m or default_pq_m(dimension)
+            if dimension % m:
+                raise ValueError(f"--pq-m {m} must divide the embedding dimension {dimension}")
+            params.update(pq_m=m, pq_bits=pq_bits)
+        return params
+    if index_type == 'pq':
+        m = pq_m or default_pq_m(dimension)
+        if dimension % m:
+            raise ValueError(f"--pq-m {m} must divide the embedding dimension {dimension}")
+        return {'pq_m': m, 'pq_bits': pq_bits}
+    if index_type == 'hnsw':
+        return {'hnsw_m': hnsw_m, 'ef_construction': ef_construction, 'ef_search': ef_search}
+    return {}
+
+
+def build_index(vectors: np.ndarray, index_type: str, params: dict, metric: int = faiss.METRIC_INNER_PRODUCT, seed: int = 0):
+    """
+    Build and fill a FAISS index of the given type from exact float32 vectors.
+
+    IVF and PQ indexes are trained on a random sample of
+    TRAIN_POINTS_PER_CENTROID vectors per list or codebook entry, the int8
+    scalar quantizer on every vector (its per-dimension ranges); flat, float16
+    and HNSW indexes need no training. Search parameters (nprobe, efSearch)
+    are applied with set_search_params().
+
+    Args:
+        vectors: float32 matrix (n, dimension); row i becomes index position i
+        index_type: One of INDEX_TYPES
+        params: From index_params()
+        metric: faiss.METRIC_INNER_PRODUCT (unit vectors) or faiss.METRIC_L2 (older stores)
+
+    Returns:
+        The filled index
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dimension = vectors.shape[1]
+
+    if index_type == 'flat':
+        index = faiss.IndexFlat(dimension, metric)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, params['hnsw_m'], metric)
+        index.hnsw.efConstruction = params['ef_construction']
+    elif index_type in ('int8', 'float16'):
+        qtype = faiss.ScalarQuantizer.QT_8bit if index_type == 'int8' else faiss.ScalarQuantizer.QT_fp16
+        index = faiss.IndexScalarQuantizer(dimension, qtype, metric)
+        index.train(vectors)
+    elif index_type == 'pq':
+        index = faiss.IndexPQ(dimension, params['pq_m'], params['pq_bits'], metric)
+        _train_on_sample(index, vectors, (1 << params['pq_bits']) * TRAIN_POINTS_PER_CENTROID, seed)
+    else:
+        quantizer = faiss.IndexFlat(dimension, metric)
+        if index_type == 'ivf-flat':
+            index = faiss.IndexIVFFlat(quantizer, dimension, params['nlist'], metric)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, params['nlist'], params['pq_m'], params['pq_bits'], metric)
+        _train_on_sample(index, vectors, params['nlist'] * TRAIN_POINTS_PER_CENTROID, seed)
+
+    index.add(vectors)
+    set_search_params(index, params)
+    return index
+
+
+def _train_on_sample(index, vectors: np.ndarray, sample_size: int, seed: int):
+    """Train an index on a seeded random sample of at most `sample_size` vectors."""
+    sample_size = min(len(vectors), sample_size)
+    index.train(vectors[np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False)])
+
+
+def set_search_params(index, params: dict):
+    """Apply nprobe (IVF) or efSearch (HNSW) from a parameter dictionary to an index."""
+    space = faiss.ParameterSpace()
+    if 'nprobe' in params:
+        space.set_index_parameter(index, 'nprobe', params['nprobe'])
+    if 'ef_search' in params:
+        space.set_index_parameter(index, 'efSearch', params['ef_search'])
+
+
+def index_type_of(index) -> str:
+    """INDEX_TYPES name of a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVFPQ):
+        return 'ivf-pq'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf-flat'
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return 'int8' if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit else 'float16'
+    if isinstance(index, faiss.IndexPQ):
+        return 'pq'
+    return 'flat'
+
+
+def describe_index(index_type: str, params: dict, build_seconds: Optional[float] = None) -> str:
+    """One-line summary of an index type and its parameters."""
+    details = ', '.join(f"{key}={value}" for key, value in params.items())
+    timing = f" in {build_seconds:.1f}s" if build_seconds is not None else ''
+    return f"{index_type}{f' ({details})' if details else ''}{timing}"
+
+
+def timed_build_index(vectors: np.ndarray, index_type: str, params: dict, metric: int = faiss.METRIC_INNER_PRODUCT):
+    """build_index() plus its elapsed seconds."""
+    start = time.perf_counter()
+    index = build_index(vectors, index_type, params, metric)
+    return index, time.perf_counter() - start
@@ -0,0 +1,110 @@
+"""Sign-bit binary signatures of embeddings: Hamming-distance first stage with an exact float rerank."""
+
+from typing import Optional
+
+import faiss
+import numpy as np
+
+DEFAULT_RERANK_CANDIDATES = 300
+SIGNATURE_BLOCK_SIZE = 65536  # Vectors converted per block, so large stores are never copied whole
+
+
+def sign_bits(vectors: np.ndarray) -> np.ndarray:
+    """
+    Pack one bit per dimension (set where the component is positive).
+
+    The first dimension is the high bit of byte 0 (np.packbits order), the
+    same layout the web search decodes.
+
+    Returns:
+        uint8 matrix (n, ceil(dimension / 8))
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+def vector_signatures(vectors: np.ndarray, block_size: int = SIGNATURE_BLOCK_SIZE) -> np.ndarray:
+    """Signatures of a (possibly memory-mapped) vector matrix, converted block by block."""
+    blocks = [sign_bits(vectors[start:start + block_size]) for start in range(0, len(vectors), block_size)]
+    return np.concatenate(blocks) if blocks else np.zeros((0, (vectors.shape[1] + 7) // 8), dtype=np.uint8)
+
+
+def index_signatures(index, block_size: int = SIGNATURE_BLOCK_SIZE) -> np.ndarray:
+    """Signatures of every vector of a FAISS index with exact reconstruction (flat, HNSW-Flat)."""
+    blocks = [
+        sign_bits(index.reconstruct_n(start, min(block_size, index.ntotal - start)))
+        for start in range(0, index.ntotal, block_size)
+    ]
+    return np.concatenate(blocks) if blocks else np.zeros((0, (index.d + 7) // 8), dtype=np.uint8)
+
+
+class BinaryPrefilterIndex:
+    """
+    Two-stage search behind the FAISS index interface.
+
+    search() ranks every row by the Hamming distance between sign-bit
+    signatures (faiss.IndexBinaryFlat), then scores the closest `candidates`
+    rows with their exact vectors and the float index's metric, so the
+    returned distances are those the float index would return. Every other
+    attribute (d, ntotal, metric_type, reconstruct, ...) is the float
+    index's, so it can replace the .index of a LangChain FAISS store or a
+    NativeVectorStore.
+    """
+
+    def __init__(
+        self,
+        index,
+        signatures: np.ndarray,
+        vectors: Optional[np.ndarray] = None,
+        candidates: int = DEFAULT_RERANK_CANDIDATES
+    ):
+        """
+        Args:
+            index: Float FAISS index the results are scored like
+            signatures: From sign_bits(), one row per index position
+            vectors: Exact vectors by index position (default: reconstructed from the index)
+            candidates: Rows reranked with exact vectors per query
+        """
+        if len(signatures) != index.ntotal:
+            raise ValueError(f"{len(signatures)} binary signatures for an index of {index.ntotal} vectors")
+        self.float_index = index
+        self.binary_index = faiss.IndexBinaryFlat(signatures.shape[1] * 8)
+        self.binary_index.add(np.ascontiguousarray(signatures, dtype=np.uint8))
+        self.vectors = vectors
+        self.candidates = candidates
+
+    def __getattr__(self, name):
+        if name == 'float_index':
+            raise AttributeError(name)
+        return getattr(self.float_index, name)
+
+    def _exact_vectors(self, positions: np.ndarray) -> np.ndarray:
+        if self.vectors is not None:
+            return np.asarray(self.vectors[positions], dtype=np.float32)
+        return self.float_index.reconstruct_batch(positions)
+
+    def search(self, queries: np.ndarray, k: int):
+        """
+        Returns:
+            (distances, positions) like faiss Index.search(), padded with -1 positions
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        _, candidates = self.binary_index.search(sign_bits(queries), min(max(k, self.candidates), self.ntotal))
+
+        inner_product = self.float_index.metric_type == faiss.METRIC_INNER_PRODUCT
+        padding = -np.finfo(np.float32).max if inner_product else np.finfo(np.float32).max
+        distances = np.full((len(queries), k), padding, dtype=np.float32)
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = np.sort(found[found >= 0])  # Ascending positions read memory-mapped vectors in file order
+            if not len(found):
+                continue
+            vectors = self._exact_vectors(found)
+            if inner_product:
+                scores = vectors @ query
+                order = np.argsort(-scores, kind='stable')[:k]
+            else:
+                scores = np.sum((vectors - query) ** 2, axis=1)
+                order = np.argsort(scores, kind='stable')[:k]
+            distances[row, :len(order)] = scores[order]
+            positions[row, :len(order)] = found[order]
+        return distances, positions
@@ -0,0 +1,128 @@
+"""Append-only embedding checkpoints for resuming interrupted vector store builds."""
+
+import json
+import os
+import pickle
+import shutil
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+CHECKPOINT_VERSION = 1
+PROGRESS_FILE = 'progress.json'
+
+
+def get_checkpoint_dir(output_path: str) -> str:
+    """Get the checkpoint directory for a vector store (vector_store.pkl -> vector_store_checkpoint/)."""
+    return output_path.replace('.pkl', '_checkpoint')
+
+
+def dump_source(xml_path: str) -> dict:
+    """Identify the dump a checkpoint was embedded from (path, size and modification time)."""
+    stat = os.stat(xml_path)
+    return {'path': os.path.abspath(xml_path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+class EmbeddingCheckpoint:
+    """
+    Shard files of embedded batches plus a progress manifest, one shard per index writer.
+
+    Every IndexWriter.flush() appends one record (docstore IDs, documents,
+    float32 vectors) to its shard file `<name>.shard`, fsyncs it, and then
+    atomically rewrites progress.json with the shard's new length and
+    document count. A record is therefore only counted once it is fully on
+    disk; on resume, a shard is cut back to the length in progress.json,
+    which drops a record that was being written when the build died.
+
+    The progress manifest also holds the build settings and the dump's
+    path, size and modification time; a checkpoint is only resumed if both
+    match, since the stream must yield the same chunks in the same order.
+    """
+
+    def __init__(self, directory: str, settings: dict, resume: bool = False):
+        self.directory = directory
+        self.settings = settings
+        self.shards = {}
+        self.resumed = False
+
+        progress = self._load_progress()
+        if resume and progress is not None and progress['settings'] == settings:
+            self.shards = progress['shards']
+            self.resumed = True
+        else:
+            if resume:
+                reason = "no checkpoint found" if progress is None else "settings or dump changed"
+                print(f"⚠ Cannot resume from {directory} ({reason}), starting over")
+            elif progress is not None:
+                print(f"Discarding previous checkpoint: {directory} (use --resume to continue it)")
+            shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        self._save_progress()
+
+    def _progress_path(self) -> str:
+        return os.path.join(self.directory, PROGRESS_FILE)
+
+    def _shard_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.shard")
+
+    def _load_progress(self) -> Optional[dict]:
+        path = self._progress_path()
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        return progress if progress.get('version') == CHECKPOINT_VERSION else None
+
+    def _save_progress(self):
+        temporary = self._progress_path() + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CHECKPOINT_VERSION,
+                'settings': self.settings,
+                'shards': self.shards
+            }, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._progress_path())
+
+    def count(self, name: str) -> int:
+        """Number of documents of a shard that are completely on disk."""
+        return self.shards.get(name, {}).get('count', 0)
+
+    def append(self, name: str, ids: List[str], documents: List[Document], vectors: np.ndarray):
+        """Append one embedded batch to a shard and record it in the progress manifest."""
+        shard = self.shards.setdefault(name, {'bytes': 0, 'count': 0, 'records': 0})
+        with open(self._shard_path(name), 'ab') as f:
+            f.truncate(shard['bytes'])  # Drop a partial record left by a crash
+            pickle.dump((ids, documents, np.asarray(vectors, dtype=np.float32)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+            shard['bytes'] = f.tell()
+        shard['count'] += len(ids)
+        shard['records'] += 1
+        self._save_progress()
+
+    def restore(self, name: str) -> Tuple[List[str], List[Document], Optional[np.ndarray]]:
+        """
+        Read back the completed records of a shard.
+
+        Returns:
+            (docstore IDs, documents, vectors); vectors is None if the shard is empty
+        """
+        shard = self.shards.get(name)
+        if not shard or not shard['records']:
+            return [], [], None
+
+        ids, documents, blocks = [], [], []
+        with open(self._shard_path(name), 'rb') as f:
+            for _ in range(shard['records']):
+                record_ids, record_documents, vectors = pickle.load(f)
+                ids.extend(record_ids)
+                documents.extend(record_documents)
+                blocks.append(vectors)
+        return ids, documents, np.concatenate(blocks)
+
+    def remove(self):
+        """Delete the checkpoint once the vector stores are saved."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,11 +1,53 @@
 """Custom MediaWiki loader with enhanced metadata extraction."""
 
 import xml.etree.ElementTree as ET
-from typing import List, Optional, Iterator
+from functools import partial
+from typing import Dict, List, Optional, Iterator
 from langchain_core.documents import Document
 from langchain_community.document_loaders import MWDumpLoader
-import mwparserfromhell
 import config
+from ..formatting import generate_curid_url, generate_wiki_url
+from ..io_utils import open_dump
+from ..xml_parser import iterate_pages_parallel
+from .strip_cache import ParallelStripper, StripCache, strip_sections, strip_wikitext
+
+
+def _page_data_from_elements(
+    elements: Dict[str, Optional[str]],
+    namespaces: Optional[List[int]],
+    skip_redirects: bool
+) -> Optional[dict]:
+    """
+    Convert extract_page_elements() output to the loader's page dict, applying its filters.
+    
+    Module-level so it can run inside iterate_pages_parallel() worker processes.
+    
+    Returns:
+        Page dict, or None if the page is filtered out
+    """
+    if not elements['title'] or not elements['text']:
+        return None
+    
+    namespace = int(elements['ns'] or 0)
+    if namespaces is not None and namespace not in namespaces:
+        return None
+    
+    if skip_redirects and elements['text'].strip().startswith("#REDIRECT"):
+        return None
+    
+    page_data = {
+        "title": elements['title'],
+        "namespace": namespace,
+        "page_id": elements['id'],
+        "content": elements['text'],
+    }
+    if elements['timestamp'] is not None:
+        page_data["timestamp"] = elements['timestamp']
+    if elements['revision_id'] is not None:
+        page_data["revision_id"] = elements['revision_id']
+    if elements['sha1'] is not None:
+        page_data["sha1"] = elements['sha1']
+    return page_data
 
 
 class EnhancedMWDumpLoader(MWDumpLoader):
@@ -14,70 +56,96 @@ class EnhancedMWDumpLoader(MWDumpLoader):
     def __init__(
         self,
         file_path: str,
+        encoding: str = "utf8",
         namespaces: Optional[List[int]] = None,
         skip_redirects: bool = True,
         stop_on_error: bool = True,
+        workers: int = 1,
+        ordered: bool = True,
+        strip_workers: int = 1,
+        strip_cache: Optional[StripCache] = None,
+        sections: bool = False,
     ):
-        super().__init__(file_path, namespaces, skip_redirects, stop_on_error)
+        super().__init__(
+            file_path,
+            encoding=encoding,
+            namespaces=namespaces,
+            skip_redirects=skip_redirects,
+            stop_on_error=stop_on_error
+        )
         self.site_base_url = config.SITE_BASE_URL
         self.ns = config.MEDIAWIKI_NS  # MediaWiki namespace
+        self.workers = workers  # >1 parses byte ranges of the dump in worker processes
+        self.ordered = ordered
+        self.strip_workers = strip_workers  # >1 strips wikitext in a process pool
+        self.strip_cache = strip_cache  # Reuses stripped text of unchanged revisions
+        self.sections = sections  # Strip section by section and keep section spans in metadata
     
     def _load_pages(self) -> Iterator[tuple]:
         """Override to extract more metadata from pages."""
+        if self.workers > 1:
+            yield from self._load_pages_parallel()
+            return
         
         def _ns(tag):
-            """Get namespaced tag."""
-            return f"{{{self.ns}}}{tag}"
+            """Get namespaced tag (config.MEDIAWIKI_NS already includes the braces)."""
+            return f"{self.ns}{tag}"
         
         try:
-            for event, elem in ET.iterparse(self.file_path, events=("start", "end")):
-                if event == "start":
-                    if elem.tag == _ns("page"):
-                        page_data = {}
+            with open_dump(self.file_path) as xml_file:
+                for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+                    if event == "start":
+                        if elem.tag == _ns("page"):
+                            page_data = {}
                 
-                elif event == "end":
-                    if elem.tag == _ns("title"):
-                        page_data["title"] = elem.text
+                    elif event == "end":
+                        if elem.tag == _ns("title"):
+                            page_data["title"] = elem.text
                     
-                    elif elem.tag == _ns("ns"):
-                        page_data["namespace"] = int(elem.text or 0)
+                        elif elem.tag == _ns("ns"):
+                            page_data["namespace"] = int(elem.text or 0)
                     
-                    elif elem.tag == _ns("id") and "page_id" not in page_data:
-                        # First ID is page ID
-                        page_data["page_id"] = elem.text
+                        elif elem.tag == _ns("id") and "page_id" not in page_data:
+                            # First ID is page ID
+                            page_data["page_id"] = elem.text
                     
-                    elif elem.tag == _ns("revision"):
-                        # Get revision data
-                        revision_elem = elem
+                        elif elem.tag == _ns("revision"):
+                            # Get revision data
+                            revision_elem = elem
                         
-                        # Extract text content
-                        text_elem = revision_elem.find(_ns("text"))
-                        if text_elem is not None and text_elem.text:
-                            page_data["content"] = text_elem.text
+                            # Extract text content
+                            text_elem = revision_elem.find(_ns("text"))
+                            if text_elem is not None and text_elem.text:
+                                page_data["content"] = text_elem.text
                         
-                        # Extract timestamp
-                        timestamp_elem = revision_elem.find(_ns("timestamp"))
-                        if timestamp_elem is not None:
-                            page_data["timestamp"] = timestamp_elem.text
+                            # Extract timestamp
+                            timestamp_elem = revision_elem.find(_ns("timestamp"))
+                            if timestamp_elem is not None:
+                                page_data["timestamp"] = timestamp_elem.text
                         
-                        # Extract revision ID
-                        rev_id_elem = revision_elem.find(_ns("id"))
-                        if rev_id_elem is not None:
-                            page_data["revision_id"] = rev_id_elem.text
+                            # Extract revision ID
+                            rev_id_elem = revision_elem.find(_ns("id"))
+                            if rev_id_elem is not None:
+                                page_data["revision_id"] = rev_id_elem.text
+                            
+                            # Extract content hash (strip cache key when there is no revision ID)
+                            sha1_elem = revision_elem.find(_ns("sha1"))
+                            if sha1_elem is not None and sha1_elem.text:
+                                page_data["sha1"] = sha1_elem.text
                     
-                    elif elem.tag == _ns("page"):
-                        # Page processing complete
-                        if "title" in page_data and "content" in page_data:
-                            # Filter by namespace
-                            if self.namespaces is None or page_data.get("namespace", 0) in self.namespaces:
-                                # Skip redirects if requested
-                                if self.skip_redirects and page_data["content"].strip().startswith("#REDIRECT"):
-                                    elem.clear()
-                                    continue
+                        elif elem.tag == _ns("page"):
+                            # Page processing complete
+                            if "title" in page_data and "content" in page_data:
+                                # Filter by namespace
+                                if self.namespaces is None or page_data.get("namespace", 0) in self.namespaces:
+                                    # Skip redirects if requested
+                                    if self.skip_redirects and page_data["content"].strip().startswith("#REDIRECT"):
+                                        elem.clear()
+                                        continue
                                 
-                                yield page_data
+                                    yield page_data
                         
-                        elem.clear()
+                            elem.clear()
                         
         except Exception as e:
             if self.stop_on_error:
@@ -85,33 +153,80 @@ class EnhancedMWDumpLoader(MWDumpLoader):
             else:
                 print(f"Error parsing XML: {e}")
     
-    def load(self) -> List[Document]:
-        """Load documents with enhanced metadata."""
-        documents = []
+    def _load_pages_parallel(self) -> Iterator[dict]:
+        """Parse the dump in worker processes, yielding the same page dicts as _load_pages()."""
+        page_func = partial(
+            _page_data_from_elements,
+            namespaces=list(self.namespaces) if self.namespaces is not None else None,
+            skip_redirects=self.skip_redirects
+        )
         
-        for page in self._load_pages():
-            # Create document with full metadata
-            metadata = {
-                "title": page.get("title", "Unknown"),
-                "id": page.get("page_id", "N/A"),
-                "url": f"{self.site_base_url}/wiki/{page.get('title', '').replace(' ', '_')}" if page.get("title") else "N/A",
-                "namespace": page.get("namespace", 0),
-                "timestamp": page.get("timestamp", "N/A"),
-                "revision_id": page.get("revision_id", "N/A"),
-                "source": page.get("title", "Unknown")  # Keep for compatibility
-            }
-            
-            # Clean wiki markup if possible
-            try:
-                parsed = mwparserfromhell.parse(page["content"])
-                content = parsed.strip_code()
-            except:
-                content = page["content"]
-            
-            document = Document(
-                page_content=content,
-                metadata=metadata
-            )
-            documents.append(document)
+        try:
+            for _, page_data in iterate_pages_parallel(
+                self.file_path,
+                workers=self.workers,
+                ordered=self.ordered,
+                show_progress=False,
+                page_func=page_func
+            ):
+                yield page_data
+        except Exception as e:
+            if self.stop_on_error:
+                raise e
+            else:
+                print(f"Error parsing XML: {e}")
+    
+    def _page_to_document(self, page: dict, content: Optional[str] = None) -> Document:
+        """Build a Document with full metadata from a page dict (content: already stripped text)."""
+        title = page.get("title", "Unknown")
+        page_id = page.get("page_id")
+        
+        if page_id:
+            url = generate_curid_url(page_id)
+        elif page.get("title"):
+            url = generate_wiki_url(page["title"])
+        else:
+            url = "N/A"
+        
+        metadata = {
+            "title": title,
+            "id": page_id or "N/A",
+            "curid": page_id,  # For XML/JSONL content lookup
+            "url": url,
+            "namespace": page.get("namespace", 0),
+            "timestamp": page.get("timestamp", "N/A"),
+            "revision_id": page.get("revision_id", "N/A"),
+            "source": title  # Keep for compatibility
+        }
+        if page.get("sha1"):
+            metadata["sha1"] = page["sha1"]  # Revision key for the build manifest when there is no revision ID
+        
+        # Clean wiki markup unless the stripper already did
+        if content is None:
+            if self.sections:
+                content, page["sections"] = strip_sections(page["content"])
+            else:
+                content = strip_wikitext(page["content"])
+        if page.get("sections"):
+            metadata["section_spans"] = page["sections"]  # [start, end, title] of each section in content
+        
+        return Document(
+            page_content=content,
+            metadata=metadata
+        )
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """Yield documents with enhanced metadata one page at a time."""
+        if self.strip_workers <= 1 and self.strip_cache is None:
+            for page in self._load_pages():
+                yield self._page_to_document(page)
+            return
         
-        return documents
\ No newline at end of file
+        stripper = ParallelStripper(workers=self.strip_workers, cache=self.strip_cache, sections=self.sections)
+        for page, content in stripper.strip_pages(self._load_pages()):
+            yield self._page_to_document(page, content)
+        print(stripper.report())
+    
+    def load(self) -> List[Document]:
+        """Load documents with enhanced metadata."""
+        return list(self.lazy_load())
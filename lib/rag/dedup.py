@@ -0,0 +1,176 @@
+"""Near-duplicate chunk detection (MinHash/LSH) between splitting and embedding."""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 similarity become candidates
+DEFAULT_SHINGLE_SIZE = 9  # Characters; works for text without spaces (Japanese)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_SHINGLE_BASE = np.uint64(1000003)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingle_hashes(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the character shingles (k-grams) of a text.
+
+    Args:
+        text: Chunk text
+        size: Shingle length in characters
+
+    Returns:
+        Unique 32-bit shingle hashes as uint64
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(1, dtype=np.uint64)
+    if len(codes) < size:
+        size = len(codes)
+
+    # Polynomial rolling hash of each window (uint64 arithmetic wraps)
+    hashes = np.zeros(len(codes) - size + 1, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * _SHINGLE_BASE + codes[offset:len(codes) - size + 1 + offset]
+    return np.unique(hashes & _MAX_HASH)
+
+
+class MinHasher:
+    """
+    MinHash signatures from hash permutations ((a * x + b) mod p) mod 2^32.
+
+    a and b range over the whole field of p. a * x wraps in uint64, which
+    scrambles the order of the shingle hashes; with a small enough not to
+    wrap, a * x mod p stays nearly monotone in x and every permutation picks
+    almost the same minimum.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """MinHash signature of a set of shingle hashes."""
+        permuted = ((np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class ChunkDeduplicator:
+    """
+    Collapses near-duplicate chunks onto one embedded representative.
+
+    Each chunk's MinHash signature is split into `bands` bands; chunks that
+    share a band are candidates, and a candidate counts as a duplicate when
+    the signatures agree on at least `threshold` of their positions (the
+    estimated Jaccard similarity of their shingle sets). The first chunk seen
+    becomes the representative; later duplicates are not embedded but are
+    listed in the representative's 'duplicates' metadata as
+    [curid, chunk_start, chunk_end] references.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE
+    ):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+
+        self._buckets: List[Dict[bytes, int]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self._doc_ids: List[str] = []
+        self._references: Dict[int, List[list]] = {}
+
+        self.chunks = 0
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+
+    def _signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(shingle_hashes(text, self.shingle_size))
+
+    def _bands(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, chunk: Document) -> Optional[np.ndarray]:
+        """
+        Check a chunk against the representatives seen so far.
+
+        Returns:
+            The chunk's signature if it is new (pass it to register() once embedded),
+            or None if it was collapsed onto an existing representative
+        """
+        self.chunks += 1
+        signature = self._signature(chunk.page_content)
+
+        checked = set()
+        for band, key in self._bands(signature):
+            candidate = self._buckets[band].get(key)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                self._add_reference(candidate, chunk)
+                return None
+        return signature
+
+    def register(self, signature: np.ndarray, doc_id: str):
+        """Make an embedded chunk a representative for later duplicates."""
+        representative = len(self._signatures)
+        self._signatures.append(signature)
+        self._doc_ids.append(doc_id)
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, representative)
+
+    def _add_reference(self, representative: int, chunk: Document):
+        metadata = chunk.metadata
+        self._references.setdefault(representative, []).append(
+            [metadata.get('curid'), metadata.get('chunk_start'), metadata.get('chunk_end')]
+        )
+        self.duplicates += 1
+        self.duplicate_bytes += len(chunk.page_content.encode('utf-8'))
+
+    def apply(self, vector_store) -> int:
+        """
+        Write the collected references into the representatives' 'duplicates' metadata.
+
+        Returns:
+            Number of representatives updated
+        """
+        updated = 0
+        for representative, references in self._references.items():
+            doc = vector_store.docstore.search(self._doc_ids[representative])
+            if isinstance(doc, Document):
+                doc.metadata.setdefault('duplicates', []).extend(references)
+                updated += 1
+        return updated
+
+    def report(self, embedding_dimension: Optional[int] = None) -> str:
+        """Summarize the chunks collapsed and the embedding work and bytes saved."""
+        lines = [
+            f"Near-duplicate chunks: {self.duplicates:,} of {self.chunks:,} collapsed "
+            f"onto {len(self._references):,} representatives (threshold {self.threshold}, "
+            f"{self.bands} bands x {self.rows} rows)"
+        ]
+        if self.chunks:
+            lines.append(f"  Embeddings saved: {self.duplicates:,} ({self.duplicates / self.chunks:.1%})")
+        lines.append(f"  Chunk text not embedded: {self.duplicate_bytes / 1024 / 1024:.1f} MB")
+        if embedding_dimension:
+            # float32 vectors, base64-encoded in the part files
+            vector_bytes = self.duplicates * embedding_dimension * 4
+            lines.append(f"  Vector bytes saved: {vector_bytes / 1024 / 1024:.1f} MB "
+                         f"(~{vector_bytes * 4 / 3 / 1024 / 1024:.1f} MB base64 in part files)")
+        return '\n'.join(lines)
@@ -0,0 +1,212 @@
+"""Persistent embedding cache keyed by model, normalization and text hash."""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+import config
+
+EMBEDDING_CACHE_FILE = 'embedding_cache.sqlite'
+DEFAULT_MAX_MB = 2048
+EVICT_TO = 0.9  # Eviction frees space down to this fraction of the limit
+_LOOKUP_BATCH = 500  # Hashes per SELECT (SQLite host parameter limit)
+
+
+def get_embedding_cache_path() -> Path:
+    """Get the default embedding cache path for the current site (data/<site>/embedding_cache.sqlite)."""
+    return config.DATA_DIR / EMBEDDING_CACHE_FILE
+
+
+def text_hash(text: str) -> bytes:
+    """SHA-256 digest of a text (cache key)."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+def cache_key(embeddings) -> Tuple[str, bool]:
+    """
+    Get the (model name, normalization flag) part of the cache key for an embeddings instance.
+
+    Args:
+        embeddings: HuggingFaceEmbeddings or another LangChain Embeddings instance
+
+    Returns:
+        (model, normalize) tuple
+    """
+    model_name = getattr(embeddings, 'model_name', None)
+    if model_name:
+        encode_kwargs = getattr(embeddings, 'encode_kwargs', None) or {}
+        return model_name, bool(encode_kwargs.get('normalize_embeddings', False))
+    return f"{type(embeddings).__name__}:{getattr(embeddings, 'model', '')}", False
+
+
+class EmbeddingCache:
+    """
+    SQLite store of float32 embedding vectors, content-addressed by (model, normalize, sha256(text)).
+
+    Every lookup or insert stamps the rows it touches with an increasing
+    clock value (persisted in the rows themselves); once the vectors exceed
+    max_mb, the least recently used rows are deleted until the cache is
+    back under EVICT_TO of the limit. Hit and miss counts cover all
+    CachedEmbeddings sharing the cache.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_mb: float = DEFAULT_MAX_MB):
+        self.db_path = Path(db_path) if db_path else get_embedding_cache_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'model TEXT NOT NULL, normalize INTEGER NOT NULL, text_hash BLOB NOT NULL, '
+            'vector BLOB NOT NULL, last_used INTEGER NOT NULL, '
+            'PRIMARY KEY (model, normalize, text_hash))'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)')
+        self.conn.commit()
+
+        clock, total_bytes = self.conn.execute(
+            'SELECT MAX(last_used), SUM(LENGTH(vector)) FROM embeddings'
+        ).fetchone()
+        self._clock = clock or 0
+        self.total_bytes = total_bytes or 0
+
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+        self.evicted = 0
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, model: str, normalize: bool, hashes: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up vectors by text hash, marking the hits as recently used.
+
+        Returns:
+            Dictionary of text hash -> float32 vector for the hashes found
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[start:start + _LOOKUP_BATCH]
+            rows = self.conn.execute(
+                f'SELECT text_hash, vector FROM embeddings WHERE model = ? AND normalize = ? '
+                f'AND text_hash IN ({",".join("?" * len(batch))})',
+                [model, int(normalize), *batch]
+            ).fetchall()
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32)
+
+        if found:
+            clock = self._tick()
+            self.conn.executemany(
+                'UPDATE embeddings SET last_used = ? WHERE model = ? AND normalize = ? AND text_hash = ?',
+                [(clock, model, int(normalize), key) for key in found]
+            )
+            self.conn.commit()
+
+        self.hits += sum(1 for key in hashes if key in found)
+        self.misses += sum(1 for key in hashes if key not in found)
+        return found
+
+    def put_many(self, model: str, normalize: bool, entries: Iterable[Tuple[bytes, np.ndarray]]):
+        """Store (text hash, vector) entries, then evict least recently used rows if over the size limit."""
+        clock = self._tick()
+        rows = [
+            (model, int(normalize), key, np.asarray(vector, dtype=np.float32).tobytes(), clock)
+            for key, vector in entries
+        ]
+        if not rows:
+            return
+        cursor = self.conn.executemany(
+            'INSERT OR IGNORE INTO embeddings (model, normalize, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+        self.added += cursor.rowcount
+        self.total_bytes += cursor.rowcount * len(rows[0][3])
+        self.conn.commit()
+
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        target = self.max_bytes * EVICT_TO
+        while self.total_bytes > target:
+            oldest = self.conn.execute(
+                'SELECT model, normalize, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000'
+            ).fetchall()
+            if not oldest:
+                self.total_bytes = 0
+                break
+            doomed = []
+            for model, normalize, key, size in oldest:
+                doomed.append((model, normalize, key))
+                self.total_bytes -= size
+                if self.total_bytes <= target:
+                    break
+            self.conn.executemany(
+                'DELETE FROM embeddings WHERE model = ? AND normalize = ? AND text_hash = ?',
+                doomed
+            )
+            self.evicted += len(doomed)
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+    def report(self) -> str:
+        """Summarize hit rate, new and evicted vectors, and cache size."""
+        lookups = self.hits + self.misses
+        hit_rate = f"{self.hits / lookups:.1%}" if lookups else "n/a"
+        return (
+            f"Embedding cache: {self.hits:,}/{lookups:,} hits ({hit_rate}), {self.added:,} vectors added, "
+            f"{self.evicted:,} evicted; {self.total_bytes / 1024 / 1024:.1f} of {self.max_bytes / 1024 / 1024:.0f} MB "
+            f"({self.db_path})"
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves vectors from an EmbeddingCache and embeds only the misses.
+
+    Misses are embedded in one call to the wrapped embeddings (duplicates
+    within a call are embedded once) and written back. Queries are cached
+    under "<model>#query", since some models embed queries differently.
+    Vector stores built through add_to_faiss_store() keep the wrapped
+    embeddings, so saved stores do not depend on the cache.
+    """
+
+    def __init__(self, underlying, cache: EmbeddingCache, model: Optional[str] = None, normalize: Optional[bool] = None):
+        self.underlying = underlying
+        self.cache = cache
+        default_model, default_normalize = cache_key(underlying)
+        self.model = model or default_model
+        self.normalize = default_normalize if normalize is None else normalize
+
+    def _embed(self, texts: List[str], model: str, embed_func) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        found = self.cache.get_many(model, self.normalize, hashes)
+
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = np.asarray(embed_func(list(missing.values())), dtype=np.float32)
+            self.cache.put_many(model, self.normalize, zip(missing, vectors))
+            found.update(zip(missing, vectors))
+
+        return [found[key].tolist() for key in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, self.model, self.underlying.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], f"{self.model}#query", lambda texts: [self.underlying.embed_query(texts[0])])[0]
@@ -0,0 +1,166 @@
+"""Multi-process CPU embedding pool with per-worker core pinning."""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Per-process state of a pool worker (set by _init_worker)
+_worker_index = None
+_worker_model = None
+_worker_normalize = False
+
+
+def available_cores() -> List[int]:
+    """CPU cores this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(cores: List[int], workers: int) -> List[List[int]]:
+    """Split cores into `workers` contiguous groups of (nearly) equal size (fewer if there are fewer cores)."""
+    return [list(map(int, group)) for group in np.array_split(cores, max(1, min(workers, len(cores))))]
+
+
+def _init_worker(model_name: str, normalize: bool, core_groups: List[List[int]], indexes, encoder: Optional[type]):
+    """Pin the worker to its core group and load the encoder with one thread per core."""
+    global _worker_index, _worker_model, _worker_normalize
+    _worker_index = indexes.get()
+    cores = core_groups[_worker_index % len(core_groups)]
+    threads = str(max(1, len(cores)))
+
+    # Thread counts must be set before torch is imported in this process
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = threads
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    if hasattr(os, 'sched_setaffinity') and cores:
+        os.sched_setaffinity(0, cores)
+
+    if encoder is None:
+        import torch
+        from sentence_transformers import SentenceTransformer
+        torch.set_num_threads(int(threads))
+        encoder = SentenceTransformer
+
+    _worker_model = encoder(model_name, device='cpu')
+    _worker_normalize = normalize
+
+
+def _encode(texts: List[str]):
+    """Encode one batch in a worker; returns (worker index, vectors, seconds)."""
+    start = time.perf_counter()
+    # HuggingFaceEmbeddings replaces newlines before encoding; do the same for identical vectors
+    texts = [text.replace("\n", " ") for text in texts]
+    vectors = _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=_worker_normalize,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    ).astype(np.float32)
+    return _worker_index, vectors, time.perf_counter() - start
+
+
+class EmbeddingPool(Embeddings):
+    """
+    Shards embedding batches across a pool of sentence-transformers encoder processes.
+
+    The available cores are split into one contiguous group per worker;
+    each worker is pinned to its group (sched_setaffinity) and runs torch
+    with one thread per core of the group, so the workers do not compete
+    for cores. embed_documents() cuts its texts into batches of
+    `batch_size`, spreads them over the workers and reassembles the
+    vectors in input order. Chunks and busy time are counted per worker.
+
+    `underlying` is an in-process HuggingFaceEmbeddings for the same model,
+    created on first use: it is what vector stores keep for query
+    embedding, and what the token-budget splitter reads the tokenizer from.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        batch_size: int,
+        normalize: bool = True,
+        make_local: Optional[Callable[[], Embeddings]] = None,
+        encoder: Optional[type] = None
+    ):
+        """
+        Args:
+            model_name: sentence-transformers model loaded in every worker
+            workers: Number of worker processes
+            batch_size: Texts per batch sent to a worker
+            normalize: Normalize the vectors to unit length
+            make_local: Creates the in-process embeddings returned by `underlying`
+            encoder: SentenceTransformer-compatible class instantiated in each worker
+                (default: sentence_transformers.SentenceTransformer); must be importable by
+                the spawned workers
+        """
+        self.model_name = model_name
+        self.encode_kwargs = {'normalize_embeddings': normalize}  # Same cache key as HuggingFaceEmbeddings
+        self.workers = workers
+        self.batch_size = batch_size
+        self._make_local = make_local
+        self._local = None
+
+        self.core_groups = split_cores(available_cores(), workers)  # Workers share groups if cores < workers
+
+        context = multiprocessing.get_context('spawn')  # torch is not fork-safe
+        indexes = context.Queue()
+        for index in range(workers):
+            indexes.put(index)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_name, normalize, self.core_groups, indexes, encoder)
+        )
+
+        self.worker_chunks = [0] * workers
+        self.worker_seconds = [0.0] * workers
+        self.wall_seconds = 0.0
+
+    @property
+    def underlying(self) -> Embeddings:
+        if self._local is None:
+            self._local = self._make_local()
+        return self._local
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        vectors = []
+        for worker, batch_vectors, seconds in self._executor.map(_encode, batches):
+            self.worker_chunks[worker] += len(batch_vectors)
+            self.worker_seconds[worker] += seconds
+            vectors.append(batch_vectors)
+
+        self.wall_seconds += time.perf_counter() - start
+        return np.concatenate(vectors).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def report(self) -> str:
+        """Per-worker chunks, cores and throughput, plus the pool's overall throughput."""
+        total = sum(self.worker_chunks)
+        lines = [f"Embedding pool: {total:,} chunks in {self.wall_seconds:.1f}s "
+                 f"({total / max(self.wall_seconds, 1e-9):.1f} chunks/s, {self.workers} workers)"]
+        for worker, (chunks, seconds) in enumerate(zip(self.worker_chunks, self.worker_seconds)):
+            cores = self.core_groups[worker % len(self.core_groups)]
+            lines.append(f"  Worker {worker}: cores {cores[0]}-{cores[-1]}, {chunks:,} chunks, "
+                         f"{chunks / max(seconds, 1e-9):.1f} chunks/s")
+        return '\n'.join(lines)
+
+    def close(self):
+        """Shut down the worker processes."""
+        self._executor.shutdown()
@@ -0,0 +1,180 @@
+"""Build manifest for incremental re-indexing between dump refreshes."""
+
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+from langchain_core.documents import Document
+
+MANIFEST_VERSION = 1
+
+
+def get_manifest_path(body_output: str) -> str:
+    """Get the manifest path for a body vector store (vector_store.pkl -> vector_store_manifest.json)."""
+    return body_output.replace('.pkl', '_manifest.json')
+
+
+def document_revision_key(metadata: dict) -> Optional[str]:
+    """
+    Get the key identifying the indexed revision of a page: revision ID, else the dump's <sha1>.
+
+    Returns:
+        Key string, or None if the document carries neither
+    """
+    revision_id = metadata.get('revision_id')
+    if revision_id and revision_id != 'N/A':
+        return f"rev:{revision_id}"
+    if metadata.get('sha1'):
+        return f"sha1:{metadata['sha1']}"
+    return None
+
+
+class IndexManifest:
+    """
+    Records which revision of each page is in the body and title indexes, and under which docstore IDs.
+
+    Docstore IDs include the revision key, so a changed page's new chunks
+    never collide with its old ones; all stale IDs are collected while the
+    new dump streams past and deleted from the indexes in one batch.
+    """
+
+    def __init__(self, settings: dict, pages: Optional[Dict[str, dict]] = None):
+        self.settings = settings
+        self.pages = pages or {}
+
+        self.unchanged = 0
+        self.changed = 0
+        self.added = 0
+        self._seen: Set[str] = set()
+        self._stale_chunk_ids: List[str] = []
+        self._stale_title_ids: List[str] = []
+
+    @classmethod
+    def load(cls, path: str) -> Optional['IndexManifest']:
+        """Load a manifest, or return None if it is missing or from another manifest version."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != MANIFEST_VERSION:
+            return None
+        return cls(data['settings'], data['pages'])
+
+    def save(self, path: str):
+        """Write the manifest as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'settings': self.settings,
+                'pages': self.pages
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    def is_compatible(self, settings: dict) -> bool:
+        """Whether indexes built with this manifest's settings can be patched with `settings`."""
+        return self.settings == settings
+
+    def is_current(self, document: Document) -> bool:
+        """
+        Check whether a page is already indexed at this revision (marks the page as present in the dump).
+
+        Pages without a page ID or revision key are always re-indexed.
+        """
+        page_id = document.metadata.get('curid')
+        if not page_id:
+            return False
+        self._seen.add(page_id)
+
+        entry = self.pages.get(page_id)
+        key = document_revision_key(document.metadata)
+        if entry is not None and key is not None and entry['revision'] == key:
+            self.unchanged += 1
+            return True
+        return False
+
+    def chunk_id(self, document: Document, chunk_index: int) -> Optional[str]:
+        """
+        Docstore ID for a body chunk (None lets FAISS assign a random one).
+
+        Pages without a page ID or revision key get random IDs: they are
+        re-indexed by every build, so an ID derived from the page alone
+        would collide with the copy still in the store.
+        """
+        page_key = self._page_key(document)
+        return f"{page_key}:{chunk_index}" if page_key else None
+
+    def title_id(self, document: Document) -> Optional[str]:
+        """Docstore ID for a page's title document (None for a random one, as in chunk_id())."""
+        page_key = self._page_key(document)
+        return f"{page_key}:title" if page_key else None
+
+    @staticmethod
+    def _page_key(document: Document) -> Optional[str]:
+        page_id = document.metadata.get('curid')
+        key = document_revision_key(document.metadata)
+        if not page_id or key is None:
+            return None
+        return f"{page_id}:{key}"
+
+    def record(self, document: Document, chunk_ids: List[str], title_id: Optional[str]):
+        """Record the newly indexed revision of a page, marking its previous IDs stale."""
+        page_id = document.metadata.get('curid')
+        if not page_id:
+            return
+        self._seen.add(page_id)
+
+        old = self.pages.get(page_id)
+        if old is not None:
+            self._stale_chunk_ids.extend(old['chunk_ids'])
+            if old['title_id']:
+                self._stale_title_ids.append(old['title_id'])
+            self.changed += 1
+        else:
+            self.added += 1
+
+        self.pages[page_id] = {
+            'revision': document_revision_key(document.metadata),
+            'chunk_ids': chunk_ids,
+            'title_id': title_id
+        }
+
+    def finish(self) -> dict:
+        """
+        Drop pages that were not in the new dump and return everything to delete from the indexes.
+
+        Returns:
+            Dictionary with 'chunk_ids' and 'title_ids' lists of stale docstore IDs and
+            'unchanged', 'changed', 'added', 'deleted' page counts
+        """
+        deleted = [page_id for page_id in self.pages if page_id not in self._seen]
+        for page_id in deleted:
+            entry = self.pages.pop(page_id)
+            self._stale_chunk_ids.extend(entry['chunk_ids'])
+            if entry['title_id']:
+                self._stale_title_ids.append(entry['title_id'])
+
+        return {
+            'chunk_ids': self._stale_chunk_ids,
+            'title_ids': self._stale_title_ids,
+            'unchanged': self.unchanged,
+            'changed': self.changed,
+            'added': self.added,
+            'deleted': len(deleted)
+        }
+
+
+def delete_from_store(vector_store, ids: List[str]) -> int:
+    """
+    Delete docstore IDs from a FAISS vector store in one batch.
+
+    IDs missing from the store are ignored.
+
+    Returns:
+        Number of vectors deleted
+    """
+    if vector_store is None:
+        return 0
+    present = set(vector_store.index_to_docstore_id.values())
+    ids = [doc_id for doc_id in ids if doc_id in present]
+    if ids:
+        vector_store.delete(ids)
+    return len(ids)
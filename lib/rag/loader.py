@@ -1,27 +1,64 @@
 """MediaWiki XML document loading utilities."""
 
-from typing import List, Dict
+import io
+import time
+from typing import Dict, Iterator, List, Optional
 from langchain_core.documents import Document
 from langchain_community.document_loaders import MWDumpLoader
 import config
 from ..config_loader import get_site_config
-from ..xml_parser import parse_namespaces, iterate_pages
+from ..io_utils import open_dump
+from ..xml_parser import parse_namespaces, iterate_pages, iterate_pages_parallel
+from .custom_loader import EnhancedMWDumpLoader
+from .strip_cache import StripCache
 
 
-def build_title_to_page_id_mapping(xml_path: str) -> Dict[str, str]:
+class StreamingMWDumpLoader(MWDumpLoader):
+    """MWDumpLoader that reads plain or compressed (.7z, .gz, .bz2, .zst) dumps via open_dump()."""
+    
+    def _load_dump_file(self):
+        import mwxml
+        return mwxml.Dump.from_file(io.TextIOWrapper(open_dump(self.file_path), encoding=self.encoding))
+
+
+def _open_page_catalog(xml_path: str):
+    """Open the page catalog for a dump, or return None if unavailable or stale."""
+    try:
+        from ..page_catalog import PageCatalog
+    except ImportError:
+        return None
+    return PageCatalog.open(xml_path)
+
+
+def build_title_to_page_id_mapping(xml_path: str, workers: int = 1) -> Dict[str, str]:
     """
-    Build a mapping from page titles to page IDs by parsing XML directly.
+    Build a mapping from page titles to page IDs.
+    
+    Uses the page catalog when a valid one exists for the dump, otherwise
+    parses the XML directly.
     
     Args:
         xml_path: Path to the MediaWiki XML dump file
+        workers: Number of worker processes for the XML parse (1 = single process)
         
     Returns:
         Dictionary mapping page titles to page IDs
     """
+    catalog = _open_page_catalog(xml_path)
+    if catalog is not None:
+        title_to_id = catalog.title_to_id()
+        print(f"Loaded mapping for {len(title_to_id):,} pages from page catalog")
+        return title_to_id
+    
     title_to_id = {}
     
     print("Building title-to-page-ID mapping...")
-    for page_count, elements in iterate_pages(xml_path, show_progress=False):
+    if workers > 1:
+        pages = iterate_pages_parallel(xml_path, workers=workers, show_progress=False)
+    else:
+        pages = iterate_pages(xml_path, show_progress=False)
+    
+    for page_count, elements in pages:
         if elements.get('id') and elements.get('title'):
             title_to_id[elements['title']] = elements['id']
             
@@ -72,17 +109,160 @@ def build_reverse_title_mapping(title_to_id: Dict[str, str]) -> Dict[str, str]:
     return source_to_full
 
 
-def load_mediawiki_documents(xml_path: str, namespace_filter: List[int] = None) -> List[Document]:
+def get_included_namespaces(namespace_mapping: Dict[str, str], excluded_namespaces: List[str]) -> List[int]:
+    """
+    Get the namespace IDs to index: every non-negative namespace not excluded by name.
+    
+    Args:
+        namespace_mapping: Namespace ID to name mapping parsed from the dump
+        excluded_namespaces: Namespace names excluded by the site configuration
+        
+    Returns:
+        List of included namespace IDs
+    """
+    excluded_namespaces = set(excluded_namespaces)
+    
+    # Get all namespace IDs that don't match excluded namespace names
+    included_ns_ids = []
+    for ns_id, ns_name in namespace_mapping.items():
+        try:
+            ns_id_int = int(ns_id)
+            # Skip negative namespace IDs (Media, Special) - they never contain pages
+            if ns_id_int < 0:
+                continue
+            # Include if namespace name is not in excluded list
+            if ns_name not in excluded_namespaces:
+                included_ns_ids.append(ns_id_int)
+        except ValueError:
+            continue  # Skip non-numeric namespace IDs
+    
+    print(f"Including namespaces: {sorted(included_ns_ids)}")
+    print(f"Excluded namespaces: {excluded_namespaces}")
+    return included_ns_ids
+
+
+def _peak_memory_mb() -> float:
+    """Peak resident set size of this process in MB, or 0 if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def lazy_load_mediawiki_documents(
+    xml_path: str,
+    namespace_filter: List[int] = None,
+    workers: int = 1,
+    strip_workers: int = 1,
+    strip_cache: Optional[StripCache] = None,
+    sections: bool = True
+) -> Iterator[Document]:
     """
-    Load documents from MediaWiki XML dump file.
+    Stream documents from a MediaWiki XML dump in a single pass.
+    
+    Each page is read once by EnhancedMWDumpLoader, which takes the full title,
+    page ID, namespace, revision ID and timestamp straight from the XML, so no
+    title-to-ID mapping or namespace prefix reconstruction is needed. Only the
+    namespace header is read up front (parsing stops at the first page).
+    
+    With sections=True the wikitext is stripped section by section and each
+    document carries 'section_spans' metadata ([start, end, heading path]),
+    which split_documents() uses to chunk along section boundaries.
+    
+    Args:
+        xml_path: Path to the MediaWiki XML dump file (plain or compressed)
+        namespace_filter: List of namespace IDs to include (default: None = all except excluded)
+        workers: Number of worker processes for XML parsing (1 = single process)
+        strip_workers: Number of worker processes for wikitext stripping (1 = in-process)
+        strip_cache: Cache of stripped text for unchanged revisions (optional)
+        sections: Keep the section structure of the wikitext (default: True)
+        
+    Yields:
+        Document objects with page content and metadata
+    """
+    import config as global_config
+    site_config = get_site_config(global_config.CURRENT_SITE)
+    
+    if namespace_filter is None:
+        namespace_mapping = parse_namespaces(xml_path)
+        print(f"Parsed {len(namespace_mapping)} namespaces from XML")
+        namespace_filter = get_included_namespaces(namespace_mapping, site_config.EXCLUDED_NAMESPACES)
+    
+    loader = EnhancedMWDumpLoader(
+        file_path=xml_path,
+        namespaces=namespace_filter,
+        skip_redirects=False,  # Include redirects
+        workers=workers,
+        strip_workers=strip_workers,
+        strip_cache=strip_cache,
+        sections=sections
+    )
+    
+    # Titles can still carry an excluded prefix outside its namespace (e.g. pseudo-namespaces in main)
+    excluded_prefixes = [ns + ':' for ns in site_config.EXCLUDED_NAMESPACES]
+    
+    for doc in loader.lazy_load():
+        if any(doc.metadata['title'].startswith(prefix) for prefix in excluded_prefixes):
+            continue
+        yield doc
+
+
+def load_mediawiki_documents(
+    xml_path: str,
+    namespace_filter: List[int] = None,
+    workers: int = 1,
+    strip_workers: int = 1,
+    strip_cache: Optional[StripCache] = None,
+    sections: bool = True
+) -> List[Document]:
+    """
+    Load documents from MediaWiki XML dump file in a single pass.
+    
+    Args:
+        xml_path: Path to the MediaWiki XML dump file (plain or compressed)
+        namespace_filter: List of namespace IDs to include (default: None = all except excluded)
+        workers: Number of worker processes for XML parsing (1 = single process)
+        strip_workers: Number of worker processes for wikitext stripping (1 = in-process)
+        strip_cache: Cache of stripped text for unchanged revisions (optional)
+        sections: Keep the section structure of the wikitext (default: True)
+        
+    Returns:
+        List of Document objects with page content and metadata
+    """
+    print("Loading documents (single pass)...")
+    start = time.perf_counter()
+    
+    documents = []
+    for doc in lazy_load_mediawiki_documents(xml_path, namespace_filter, workers, strip_workers, strip_cache, sections):
+        documents.append(doc)
+        if len(documents) % 1000 == 0:
+            print(f"Loaded {len(documents):,} documents...", end='\r')
+    
+    elapsed = time.perf_counter() - start
+    print(f"Loaded {len(documents):,} documents in {elapsed:.1f}s (peak memory {_peak_memory_mb():.0f} MB)")
+    return documents
+
+
+def load_mediawiki_documents_legacy(xml_path: str, namespace_filter: List[int] = None, workers: int = 1) -> List[Document]:
+    """
+    Load documents with MWDumpLoader plus a separate title-to-ID pass (legacy loader).
+    
+    Parses the dump twice and reconstructs namespace prefixes heuristically,
+    which can pick the wrong page for same-named titles in different
+    namespaces. Kept for comparison with load_mediawiki_documents().
     
     Args:
         xml_path: Path to the MediaWiki XML dump file
         namespace_filter: List of namespace IDs to include (default: None = all except excluded)
+        workers: Number of worker processes for XML parsing done by this module (1 = single process)
         
     Returns:
         List of Document objects with page content and metadata
     """
+    start = time.perf_counter()
+    
     # Parse namespaces from XML file
     namespace_mapping = parse_namespaces(xml_path)
     print(f"Parsed {len(namespace_mapping)} namespaces from XML")
@@ -92,28 +272,9 @@ def load_mediawiki_documents(xml_path: str, namespace_filter: List[int] = None)
     site_config = get_site_config(global_config.CURRENT_SITE)
     
     if namespace_filter is None:
-        # Build list of included namespaces by excluding the ones in EXCLUDED_NAMESPACES
-        excluded_namespaces = set(site_config.EXCLUDED_NAMESPACES)
+        namespace_filter = get_included_namespaces(namespace_mapping, site_config.EXCLUDED_NAMESPACES)
         
-        # Get all namespace IDs that don't match excluded namespace names
-        included_ns_ids = []
-        for ns_id, ns_name in namespace_mapping.items():
-            try:
-                ns_id_int = int(ns_id)
-                # Skip negative namespace IDs (Media, Special) - MWDumpLoader has issues with them
-                if ns_id_int < 0:
-                    continue
-                # Include if namespace name is not in excluded list
-                if ns_name not in excluded_namespaces:
-                    included_ns_ids.append(ns_id_int)
-            except ValueError:
-                continue  # Skip non-numeric namespace IDs
-        
-        namespace_filter = included_ns_ids
-        print(f"Including namespaces: {sorted(namespace_filter)}")
-        print(f"Excluded namespaces: {excluded_namespaces}")
-        
-    loader = MWDumpLoader(
+    loader = StreamingMWDumpLoader(
         file_path=xml_path,
         namespaces=namespace_filter,
         skip_redirects=False  # Include redirects
@@ -124,7 +285,7 @@ def load_mediawiki_documents(xml_path: str, namespace_filter: List[int] = None)
     print(f"Loaded {len(documents)} documents before filtering")
     
     # Build title-to-page-ID mapping
-    title_to_id = build_title_to_page_id_mapping(xml_path)
+    title_to_id = build_title_to_page_id_mapping(xml_path, workers=workers)
     
     # Build reverse mapping for source title -> full title resolution
     source_to_full_title = build_reverse_title_mapping(title_to_id)
@@ -182,4 +343,7 @@ def load_mediawiki_documents(xml_path: str, namespace_filter: List[int] = None)
             filtered_documents.append(doc)
     
     print(f"\nFiltered to {len(filtered_documents)} documents")
+    
+    elapsed = time.perf_counter() - start
+    print(f"Legacy load took {elapsed:.1f}s (peak memory {_peak_memory_mb():.0f} MB)")
     return filtered_documents
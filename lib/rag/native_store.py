@@ -0,0 +1,440 @@
+"""Memory-mapped vector store: native FAISS index plus columnar metadata and a text blob."""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .ann_index import build_index, describe_index, index_params, set_search_params
+from .binary_index import index_signatures, sign_bits
+
+NATIVE_STORE_VERSION = 1
+STORE_FILE = 'store.json'
+INDEX_FILE = 'index.faiss'
+VECTORS_FILE = 'vectors.npy'  # Exact vectors, written when index.faiss is an approximate index
+SIGNATURES_FILE = 'signatures.npy'  # Sign-bit signatures for the binary prefilter (optional)
+TEXT_COLUMN = 'text'
+ID_COLUMN = 'ids'
+META_DIR = 'meta'
+
+
+def get_native_store_path(output_path: str) -> str:
+    """Get the native store directory for a vector store path (vector_store.pkl -> vector_store_native/)."""
+    return output_path.replace('.pkl', '_native')
+
+
+def is_native_store(path: str) -> bool:
+    """Whether a path is a native store directory."""
+    return os.path.isfile(os.path.join(path, STORE_FILE))
+
+
+def find_native_store(path: str) -> Optional[str]:
+    """The native store for a path given as either the store directory or the pickle path, or None."""
+    for candidate in (path, get_native_store_path(path)):
+        if is_native_store(candidate):
+            return candidate
+    return None
+
+
+def embedding_info(embeddings) -> dict:
+    """
+    Describe the query embedding model of a store, so it can be recreated without pickling it.
+
+    Returns:
+        Dictionary with backend, model and the (model, normalize) embedding cache key
+    """
+    from .embedding_cache import cache_key
+    from .onnx_embeddings import OnnxEmbeddings
+    from .vectorstore import base_embeddings
+
+    if isinstance(embeddings, LazyEmbeddings):  # Store loaded from a native store
+        return embeddings.info
+    base = base_embeddings(embeddings)
+    model, normalize = cache_key(base)
+    info = {'cache_model': model, 'normalize': normalize}
+    if isinstance(base, OnnxEmbeddings):
+        info.update(backend='onnx', model_dir=base.model_dir, quantized=base.quantized)
+    elif getattr(base, 'model_name', None):
+        info.update(backend='torch', model=base.model_name)
+    else:
+        info.update(backend='openai', model=getattr(base, 'model', None))
+    return info
+
+
+def create_embeddings_from_info(info: dict) -> Embeddings:
+    """Create the query embedding model described by embedding_info()."""
+    if info['backend'] == 'onnx':
+        from .onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(info['model_dir'], quantized=info['quantized'], normalize=info['normalize'])
+    from .vectorstore import create_embeddings
+    return create_embeddings(info['model'], use_openai=info['backend'] == 'openai')
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Query embeddings whose model is only loaded on the first embed call.
+
+    model_name and encode_kwargs come from the store's embedding info, so a
+    CachedEmbeddings wrapper gets its cache key without loading the model
+    and queries served from the cache never load it at all.
+    """
+
+    def __init__(self, info: dict):
+        self.info = info
+        self.model_name = info['cache_model']
+        self.encode_kwargs = {'normalize_embeddings': info['normalize']}
+        self._embeddings = None
+
+    @property
+    def underlying(self) -> Embeddings:
+        if self._embeddings is None:
+            self._embeddings = create_embeddings_from_info(self.info)
+        return self._embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+
+class _StringColumnWriter:
+    """Writes strings as one UTF-8 blob plus an int64 offsets array (n + 1 entries)."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._file = open(prefix + '.bin', 'wb')
+        self._offsets = [0]
+
+    def add(self, value: str):
+        self._offsets.append(self._offsets[-1] + self._file.write(value.encode('utf-8')))
+
+    def close(self):
+        self._file.close()
+        np.save(self.prefix + '.offsets.npy', np.asarray(self._offsets, dtype=np.int64))
+
+
+class _StringColumn:
+    """Read side of _StringColumnWriter: memory-mapped blob and offsets, decoded per row."""
+
+    def __init__(self, prefix: str):
+        self.offsets = np.load(prefix + '.offsets.npy', mmap_mode='r')
+        size = int(self.offsets[-1]) if len(self.offsets) else 0
+        self.blob = np.memmap(prefix + '.bin', dtype=np.uint8, mode='r') if size else np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[int(self.offsets[row]):int(self.offsets[row + 1])].tobytes().decode('utf-8')
+
+
+def _column_type(values: List[Any]) -> str:
+    """'int' if every row has an int, 'str' if every row has a str, else 'json' (JSON text, null when missing)."""
+    if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return 'int'
+    if all(isinstance(value, str) for value in values):
+        return 'str'
+    return 'json'
+
+
+def save_native_store(
+    vector_store,
+    directory: str,
+    embeddings=None,
+    index_type: str = 'flat',
+    params: Optional[dict] = None,
+    binary_signatures: bool = False
+) -> dict:
+    """
+    Write a LangChain FAISS store as a native store directory.
+
+    Layout: index.faiss (faiss.write_index), text.bin/text.offsets.npy
+    (chunk texts), ids.bin/ids.offsets.npy (docstore IDs) and one column
+    per metadata key in meta/: <key>.npy for integers, otherwise
+    <key>.bin/<key>.offsets.npy (JSON-encoded unless every value is a
+    string). Row i of every file belongs to index position i. store.json
+    lists the columns, the index type and the query embedding model.
+
+    With an approximate index type, index.faiss is built from the store's
+    exact vectors (see ann_index.build_index()) and the exact vectors are
+    kept in vectors.npy for exports and rebuilds. With binary_signatures,
+    signatures.npy holds the packed sign bits of every vector
+    (binary_index.sign_bits()).
+
+    Args:
+        vector_store: LangChain FAISS store (flat index)
+        directory: Output directory (replaced files are overwritten)
+        embeddings: Embeddings used for the store (default: the store's embedding_function)
+        index_type: One of ann_index.INDEX_TYPES
+        params: Index parameters (default: ann_index.index_params() defaults for the store size)
+        binary_signatures: Also write signatures.npy for the Hamming-distance prefilter
+
+    Returns:
+        The store.json contents
+    """
+    os.makedirs(os.path.join(directory, META_DIR), exist_ok=True)
+    if os.path.exists(os.path.join(directory, STORE_FILE)):
+        os.remove(os.path.join(directory, STORE_FILE))  # A half-rewritten store is not opened
+    count = vector_store.index.ntotal
+    documents = [vector_store.docstore.search(vector_store.index_to_docstore_id[i]) for i in range(count)]
+
+    if params is None:
+        params = index_params(index_type, count, vector_store.index.d)
+    vectors_path = os.path.join(directory, VECTORS_FILE)
+    if index_type == 'flat':
+        faiss.write_index(vector_store.index, os.path.join(directory, INDEX_FILE))
+        if os.path.exists(vectors_path):
+            os.remove(vectors_path)
+    else:
+        vectors = vector_store.index.reconstruct_n(0, count)
+        start = time.perf_counter()
+        index = build_index(vectors, index_type, params, vector_store.index.metric_type)
+        print(f"  Built {describe_index(index_type, params, time.perf_counter() - start)}")
+        faiss.write_index(index, os.path.join(directory, INDEX_FILE))
+        np.save(vectors_path, vectors)
+
+    signatures_path = os.path.join(directory, SIGNATURES_FILE)
+    if binary_signatures:
+        np.save(signatures_path, sign_bits(vectors) if index_type != 'flat' else index_signatures(vector_store.index))
+    elif os.path.exists(signatures_path):
+        os.remove(signatures_path)
+
+    texts = _StringColumnWriter(os.path.join(directory, TEXT_COLUMN))
+    ids = _StringColumnWriter(os.path.join(directory, ID_COLUMN))
+    for i, doc in enumerate(documents):
+        texts.add(doc.page_content)
+        ids.add(vector_store.index_to_docstore_id[i])
+    texts.close()
+    ids.close()
+
+    keys = list(dict.fromkeys(key for doc in documents for key in doc.metadata))
+    columns = {}
+    for key in keys:
+        values = [doc.metadata.get(key) for doc in documents]
+        column_type = _column_type(values)
+        prefix = os.path.join(directory, META_DIR, key)
+        if column_type == 'int':
+            np.save(prefix + '.npy', np.asarray(values, dtype=np.int64))
+        else:
+            writer = _StringColumnWriter(prefix)
+            for value in values:
+                writer.add(value if column_type == 'str' else json.dumps(value, ensure_ascii=False))
+            writer.close()
+        columns[key] = column_type
+
+    info = {
+        'version': NATIVE_STORE_VERSION,
+        'count': count,
+        'dimension': vector_store.index.d,
+        'index_type': index_type,
+        'index_params': params,
+        'binary_signatures': binary_signatures,
+        'columns': columns,
+        'embeddings': embedding_info(embeddings if embeddings is not None else vector_store.embedding_function)
+    }
+    with open(os.path.join(directory, STORE_FILE), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+
+class _IndexToDocstoreId(Mapping):
+    """Index position -> docstore ID, read from the memory-mapped ID column."""
+
+    def __init__(self, column: _StringColumn):
+        self._column = column
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self._column):
+            raise KeyError(position)
+        return self._column[position]
+
+    def __iter__(self):
+        return iter(range(len(self._column)))
+
+    def __len__(self) -> int:
+        return len(self._column)
+
+
+class _Docstore:
+    """docstore.search() by docstore ID; the ID -> position map is built on first use."""
+
+    def __init__(self, store: 'NativeVectorStore'):
+        self._store = store
+        self._positions = None
+
+    def search(self, doc_id: str):
+        if self._positions is None:
+            ids = self._store.index_to_docstore_id
+            self._positions = {ids[i]: i for i in range(len(ids))}
+        position = self._positions.get(doc_id)
+        if position is None:
+            return f"ID {doc_id} not found."  # Same as InMemoryDocstore
+        return self._store.document(position)
+
+
+class NativeVectorStore:
+    """
+    Read-only vector store over a native store directory, memory-mapped instead of unpickled.
+
+    The FAISS index is read with IO_FLAG_MMAP; text, IDs and metadata
+    columns are numpy memmaps, so loading only reads store.json and file
+    headers, and a search touches just the pages of the rows it returns.
+    Documents are assembled per result. The query model is loaded on the
+    first query that is not served from an embedding cache. Approximate
+    indexes search with the nprobe/efSearch stored in store.json unless
+    set_search_params() overrides them; exact vectors come from
+    vectors.npy (also memory-mapped) for them. signatures holds the
+    memory-mapped sign-bit signatures if the store was saved with them.
+
+    index, docstore and index_to_docstore_id mirror the LangChain FAISS
+    attributes for read-only users (vec2json); to_faiss() builds a mutable
+    LangChain store.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, STORE_FILE), 'r', encoding='utf-8') as f:
+            self.info = json.load(f)
+        if self.info.get('version') != NATIVE_STORE_VERSION:
+            raise ValueError(f"Unsupported native store version in {directory}: {self.info.get('version')}")
+
+        self.index = read_index_mmap(os.path.join(directory, INDEX_FILE))
+        self.index_type = self.info.get('index_type', 'flat')
+        self.index_params = dict(self.info.get('index_params', {}))
+        set_search_params(self.index, self.index_params)
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        self.vectors = np.load(vectors_path, mmap_mode='r') if os.path.exists(vectors_path) else None
+        signatures_path = os.path.join(directory, SIGNATURES_FILE)
+        self.signatures = np.load(signatures_path, mmap_mode='r') if os.path.exists(signatures_path) else None
+        self._texts = _StringColumn(os.path.join(directory, TEXT_COLUMN))
+        self.index_to_docstore_id = _IndexToDocstoreId(_StringColumn(os.path.join(directory, ID_COLUMN)))
+        self.docstore = _Docstore(self)
+
+        self._columns = {}
+        for key, column_type in self.info['columns'].items():
+            prefix = os.path.join(directory, META_DIR, key)
+            if column_type == 'int':
+                self._columns[key] = (column_type, np.load(prefix + '.npy', mmap_mode='r'))
+            else:
+                self._columns[key] = (column_type, _StringColumn(prefix))
+
+        self.embedding_function: Embeddings = LazyEmbeddings(self.info['embeddings'])
+
+    @classmethod
+    def load(cls, directory: str) -> 'NativeVectorStore':
+        return cls(directory)
+
+    def __len__(self) -> int:
+        return self.info['count']
+
+    def metadata(self, position: int) -> Dict[str, Any]:
+        """Metadata of the row at an index position (keys that were missing for it are left out)."""
+        metadata = {}
+        for key, (column_type, column) in self._columns.items():
+            if column_type == 'int':
+                metadata[key] = int(column[position])
+            elif column_type == 'str':
+                metadata[key] = column[position]
+            else:
+                value = json.loads(column[position])
+                if value is not None:
+                    metadata[key] = value
+        return metadata
+
+    def set_search_params(self, **params):
+        """Override search parameters (nprobe, ef_search); parameters the index type lacks are ignored."""
+        applicable = {key: value for key, value in params.items() if value is not None and key in self.index_params}
+        self.index_params.update(applicable)
+        set_search_params(self.index, applicable)
+
+    def reconstruct(self, position: int) -> np.ndarray:
+        """Exact vector of the row at an index position."""
+        if self.vectors is not None:
+            return np.asarray(self.vectors[position], dtype=np.float32)
+        return self.index.reconstruct(position)
+
+    def reconstruct_n(self, start: int, count: int) -> np.ndarray:
+        """Exact vectors of count rows from an index position, read in one slice."""
+        if self.vectors is not None:
+            return np.asarray(self.vectors[start:start + count], dtype=np.float32)
+        return self.index.reconstruct_n(start, count)
+
+    def exact_vectors(self) -> np.ndarray:
+        """All exact vectors in index order (memory-mapped for approximate indexes)."""
+        if self.vectors is not None:
+            return self.vectors
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    def document(self, position: int) -> Document:
+        """The document at an index position."""
+        return Document(page_content=self._texts[position], metadata=self.metadata(position))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        vector = np.asarray([embedding], dtype=np.float32)
+        scores, positions = self.index.search(vector, k)
+        return [
+            (self.document(int(position)), float(score))
+            for score, position in zip(scores[0], positions[0])
+            if position != -1
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Same results and scores as LangChain FAISS.similarity_search_with_score() on the original store."""
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def to_faiss(self):
+        """Load everything into a mutable LangChain FAISS store with a flat index (e.g. for incremental builds)."""
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        ids = [self.index_to_docstore_id[i] for i in range(len(self))]
+        if self.vectors is not None:
+            index = faiss.IndexFlat(self.index.d, self.index.metric_type)
+            index.add(np.ascontiguousarray(self.vectors, dtype=np.float32))
+        else:
+            index = faiss.read_index(os.path.join(self.directory, INDEX_FILE))
+        return FAISS(
+            embedding_function=self.embedding_function,
+            index=index,
+            docstore=InMemoryDocstore({doc_id: self.document(i) for i, doc_id in enumerate(ids)}),
+            index_to_docstore_id=dict(enumerate(ids)),
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT if index.metric_type == faiss.METRIC_INNER_PRODUCT
+            else DistanceStrategy.EUCLIDEAN_DISTANCE
+        )
+
+
+def read_index_mmap(path: str):
+    """
+    Read a FAISS index memory-mapped where the index type supports it, else into memory.
+
+    IO_FLAG_MMAP_IFC maps the code storage of flat, scalar-quantized, PQ and
+    HNSW indexes (without it a flat index.faiss is read whole); IVF indexes
+    reject it together with IO_FLAG_MMAP and map their inverted lists with
+    IO_FLAG_MMAP alone.
+    """
+    read_only = getattr(faiss, 'IO_FLAG_READ_ONLY', 0)
+    for flags in (faiss.IO_FLAG_MMAP | getattr(faiss, 'IO_FLAG_MMAP_IFC', 0), faiss.IO_FLAG_MMAP):
+        try:
+            return faiss.read_index(path, flags | read_only)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+
+def load_native_store(directory: str) -> NativeVectorStore:
+    """Open a native store and report how long it took."""
+    start = time.perf_counter()
+    store = NativeVectorStore.load(directory)
+    print(f"✓ Opened native vector store: {directory} ({len(store):,} chunks, {time.perf_counter() - start:.3f}s)")
+    return store
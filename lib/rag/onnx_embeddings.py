@@ -0,0 +1,159 @@
+"""ONNX Runtime embedding backend for sentence-transformers models exported to ONNX."""
+
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+ONNX_MODEL_FILE = 'model.onnx'
+ONNX_QUANTIZED_FILE = 'model_quantized.onnx'  # Name used by the Xenova exports the browser loads
+DEFAULT_ONNX_BATCH_SIZE = 32
+DEFAULT_MAX_SEQ_LENGTH = 128
+
+
+def find_onnx_file(model_dir: Path, quantized: bool = False) -> Path:
+    """
+    Locate the ONNX graph in an export directory (the directory itself or its onnx/ subdirectory).
+
+    Raises:
+        FileNotFoundError: If the export has no such file
+    """
+    name = ONNX_QUANTIZED_FILE if quantized else ONNX_MODEL_FILE
+    for candidate in (model_dir / 'onnx' / name, model_dir / name):
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(
+        f"{name} not found in {model_dir} or {model_dir / 'onnx'}"
+        + (" (create it with quantize_onnx_model())" if quantized else "")
+    )
+
+
+def quantize_onnx_model(model_dir: str) -> Path:
+    """
+    Write an int8 dynamically quantized copy of the export's model.onnx next to it.
+
+    Returns:
+        Path of model_quantized.onnx
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = find_onnx_file(Path(model_dir))
+    target = source.with_name(ONNX_QUANTIZED_FILE)
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    return target
+
+
+def _read_max_seq_length(model_dir: Path) -> int:
+    """max_seq_length from the export's sentence_bert_config.json, else the model's sentence-transformers default."""
+    config_path = model_dir / 'sentence_bert_config.json'
+    if config_path.exists():
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('max_seq_length', DEFAULT_MAX_SEQ_LENGTH)
+    return DEFAULT_MAX_SEQ_LENGTH
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Mean-pooled sentence embeddings computed with onnxruntime from a local ONNX export.
+
+    The export directory holds the tokenizer files and onnx/model.onnx
+    (and onnx/model_quantized.onnx for int8), e.g. a download of
+    Xenova/paraphrase-multilingual-mpnet-base-v2, the model the browser
+    runs. Texts are tokenized in batches with the fast tokenizer, padded to
+    the longest text of the batch and truncated to max_seq_length; the
+    token embeddings are mean-pooled over the attention mask and
+    L2-normalized, as sentence-transformers does for this model.
+
+    The inference session is not pickled; it is re-created from model_dir
+    on first use after loading a pickled vector store.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        normalize: bool = True,
+        batch_size: int = DEFAULT_ONNX_BATCH_SIZE,
+        threads: Optional[int] = None,
+        max_seq_length: Optional[int] = None
+    ):
+        self.model_dir = str(model_dir)
+        self.quantized = quantized
+        self.batch_size = batch_size
+        self.threads = threads
+        self.max_seq_length = max_seq_length or _read_max_seq_length(Path(model_dir))
+        # Cache key (see embedding_cache.cache_key); ONNX vectors are not mixed with torch ones
+        self.model_name = f"onnx{'-int8' if quantized else ''}:{Path(model_dir).name}"
+        self.encode_kwargs = {'normalize_embeddings': normalize}
+        self._session = None
+        self._tokenizer = None
+        self._input_names = None
+        self._load()
+
+    def _load(self):
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(f"The ONNX embedding backend requires onnxruntime and transformers ({e})") from e
+
+        options = onnxruntime.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        path = find_onnx_file(Path(self.model_dir), self.quantized)
+        self._session = onnxruntime.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir, use_fast=True)
+
+    @property
+    def tokenizer(self):
+        """Fast tokenizer of the export (read by the token-budget splitter)."""
+        if self._tokenizer is None:
+            self._load()
+        return self._tokenizer
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors='np'
+        )
+        feed = {name: inputs[name].astype(np.int64) for name in ('input_ids', 'attention_mask', 'token_type_ids')
+                if name in self._input_names}
+        token_embeddings = self._session.run(None, feed)[0]
+
+        # Mean pooling over real tokens
+        mask = inputs['attention_mask'][..., None].astype(np.float32)
+        vectors = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.encode_kwargs['normalize_embeddings']:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a float32 matrix, batch_size texts per session run."""
+        if self._session is None:
+            self._load()
+        # HuggingFaceEmbeddings replaces newlines before encoding; do the same for comparable vectors
+        texts = [text.replace("\n", " ") for text in texts]
+        batches = [self._embed_batch(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_session'] = None
+        state['_tokenizer'] = None
+        state['_input_names'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
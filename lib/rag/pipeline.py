@@ -0,0 +1,352 @@
+"""Bounded-memory streaming pipeline from MediaWiki XML to vector indexes."""
+
+import gzip
+import json
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from .checkpoint import EmbeddingCheckpoint
+from .dedup import ChunkDeduplicator
+from .index_manifest import IndexManifest
+from .loader import _peak_memory_mb
+from .vectorstore import DEFAULT_EMBED_BATCH_SIZE, add_to_faiss_store, embed_texts, embedding_pool
+
+DEFAULT_INFLIGHT_WINDOW = 256  # Documents buffered between the loader and the embedders
+SORT_WINDOW_BATCHES = 16  # Pending documents are length-sorted across this many batches
+
+_END = object()
+
+
+class _ProducerError:
+    """Carries an exception raised in the producer thread to the consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def bounded_prefetch(iterable: Iterable, window: int = DEFAULT_INFLIGHT_WINDOW) -> Iterator:
+    """
+    Iterate over an iterable in a background thread through a bounded queue.
+
+    The producer blocks once `window` items are waiting, so a slow consumer
+    (embedding) applies backpressure to a fast producer (XML parsing) instead
+    of letting parsed pages pile up in memory. Exceptions raised by the
+    producer are re-raised in the consumer.
+
+    Args:
+        iterable: Source of items, consumed in the background thread
+        window: Maximum number of items in flight between producer and consumer
+
+    Yields:
+        Items of the iterable, in order
+    """
+    items = queue.Queue(maxsize=max(1, window))
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        # Poll so the producer notices when the consumer stops early
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for item in iterable:
+                if not _put(item):
+                    return
+        except BaseException as e:
+            _put(_ProducerError(e))
+            return
+        _put(_END)
+
+    producer = threading.Thread(target=_produce, name='document-producer', daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+class IndexWriter:
+    """
+    Embeds streamed documents into one float32 matrix and indexes them in a single step on close().
+
+    Pending documents are embedded once SORT_WINDOW_BATCHES batches (per
+    pool worker) have queued up, sorted by length so each batch pads to a similar sequence
+    length. Vectors are written into a preallocated matrix that doubles
+    when full; close() adds all rows to the index with one index.add() and
+    fills the docstore once, instead of growing the store batch by batch.
+
+    With a checkpoint, every flushed batch is also appended to the writer's
+    shard. A resumed writer starts from the documents and vectors in its
+    shard; the first documents added to it are checked against them and
+    not embedded again, so the build continues after the last completed
+    batch and the index is assembled from the shards plus the new batches.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+        vector_store: Optional[FAISS] = None,
+        checkpoint: Optional[EmbeddingCheckpoint] = None,
+        name: str = 'body'
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.vector_store = vector_store
+        self.checkpoint = checkpoint
+        self.name = name
+        self.count = 0
+        self.embed_seconds = 0.0
+        self.index_seconds = 0.0
+        self._pending: List[Document] = []
+        self._documents: List[Document] = []
+        self._ids: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._restored = 0  # Documents restored from the checkpoint
+        self._replayed = 0  # Restored documents matched by add() so far
+
+        if checkpoint is not None:
+            self._ids, self._documents, self._vectors = checkpoint.restore(name)
+            self.count = self._restored = len(self._ids)
+            if self.count:
+                print(f"✓ Resumed {self.count:,} embedded {name} documents from {checkpoint.directory}")
+
+        # Enough pending documents to keep every pool worker busy
+        pool = embedding_pool(embeddings)
+        self._flush_size = batch_size * SORT_WINDOW_BATCHES * (pool.workers if pool is not None else 1)
+
+    def add(self, document: Document, doc_id: Optional[str] = None) -> str:
+        """
+        Queue a document, embedding the pending documents once enough have queued up.
+
+        Returns:
+            The document's docstore ID (doc_id, or a random one)
+        """
+        if self._replayed < self._restored:
+            return self._replay(document, doc_id)
+
+        doc_id = doc_id or str(uuid.uuid4())
+        self._pending.append(document)
+        self._ids.append(doc_id)
+        if len(self._pending) >= self._flush_size:
+            self.flush()
+        return doc_id
+
+    def _replay(self, document: Document, doc_id: Optional[str]) -> str:
+        """Match a re-streamed document against the next restored one instead of embedding it."""
+        position = self._replayed
+        restored = self._documents[position]
+        if restored.page_content != document.page_content or (doc_id and doc_id != self._ids[position]):
+            raise ValueError(
+                f"Document {position} of the {self.name} stream differs from the checkpoint "
+                f"(the dump or chunking changed); rebuild without --resume"
+            )
+        self._documents[position] = document  # Fresh metadata (e.g. duplicates are attached later)
+        self._replayed += 1
+        return self._ids[position]
+
+    def flush(self):
+        """Embed the pending documents into the vector matrix."""
+        if not self._pending:
+            return
+
+        start = time.perf_counter()
+        vectors = embed_texts(self.embeddings, [doc.page_content for doc in self._pending], self.batch_size)
+        self.embed_seconds += time.perf_counter() - start
+        if self.checkpoint is not None:
+            self.checkpoint.append(self.name, self._ids[self.count:], self._pending, vectors)
+
+        needed = self.count + len(vectors)
+        if self._vectors is None or needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors) if self._vectors is not None else 0)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:self.count] = self._vectors[:self.count]
+            self._vectors = grown
+        self._vectors[self.count:needed] = vectors
+
+        self.count = needed
+        self._documents.extend(self._pending)
+        self._pending = []
+
+    def close(self) -> Optional[FAISS]:
+        """Embed the last pending documents, index everything and return the vector store (None if nothing was added)."""
+        self.flush()
+        if self._replayed < self._restored:
+            raise ValueError(
+                f"The {self.name} stream ended after {self._replayed:,} of {self._restored:,} checkpointed documents; "
+                f"rebuild without --resume"
+            )
+        if self.count:
+            start = time.perf_counter()
+            self.vector_store = add_to_faiss_store(
+                self.embeddings, self._documents, self._ids, self._vectors[:self.count], self.vector_store
+            )
+            self.index_seconds += time.perf_counter() - start
+            self._documents, self._ids, self._vectors = [], [], None
+        return self.vector_store
+
+
+class JsonlPageWriter:
+    """Writes one JSONL.gz entry per page (curid, title, text, timestamp) as documents stream past."""
+
+    def __init__(self, jsonl_gz_path: str):
+        self.path = jsonl_gz_path
+        self.count = 0
+        self._seen = set()  # curids only; page text is written out immediately
+        self._file = gzip.open(jsonl_gz_path, 'wt', encoding='utf-8')
+
+    def add(self, document: Document):
+        """Write the page for a document, keeping the first document per curid."""
+        curid = document.metadata.get('curid')
+        if not curid or curid in self._seen:
+            return
+        self._seen.add(curid)
+
+        jsonl_entry = {
+            'curid': curid,
+            'title': document.metadata.get('title', 'Unknown'),
+            'text': document.page_content  # Full page content
+        }
+
+        # Revision timestamp from the single-pass loader (used by getPageFromXML in rag-common.js)
+        timestamp = document.metadata.get('timestamp')
+        if timestamp and timestamp != 'N/A':
+            jsonl_entry['timestamp'] = timestamp
+
+        self._file.write(json.dumps(jsonl_entry, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        """Close the JSONL.gz file."""
+        self._file.close()
+
+
+def title_document(document: Document) -> Document:
+    """Build the title-only document used for the title index."""
+    metadata = document.metadata.copy()
+    metadata.pop('section_spans', None)  # Only needed for chunking the body
+    return Document(
+        page_content=document.metadata['title'],  # Use title only for accurate matching
+        metadata=metadata
+    )
+
+
+def run_streaming_pipeline(
+    documents: Iterable[Document],
+    split_func: Optional[Callable[[Document], List[Document]]] = None,
+    body_writer: Optional[IndexWriter] = None,
+    title_writer: Optional[IndexWriter] = None,
+    page_writer: Optional[JsonlPageWriter] = None,
+    window: int = DEFAULT_INFLIGHT_WINDOW,
+    manifest: Optional[IndexManifest] = None,
+    deduplicator: Optional[ChunkDeduplicator] = None
+) -> dict:
+    """
+    Stream documents through the JSONL writer, the splitter and the index writers.
+
+    Loading runs in a background thread and is decoupled from embedding by a
+    bounded queue of `window` documents, so the loader, splitter and embedders
+    overlap while the number of parsed-but-unindexed pages stays fixed. Every
+    sink is fed from the same stream: each document is written to the JSONL
+    file, split into body chunks and turned into a title document before the
+    next one is taken from the queue.
+
+    With a manifest, pages already indexed at the same revision still go to
+    the JSONL writer but are not split or embedded again; every (re)indexed
+    page is recorded in the manifest with its docstore IDs. With a
+    deduplicator, body chunks that nearly duplicate an already embedded
+    chunk are not embedded; call deduplicator.apply() on the body store
+    afterwards to attach their references.
+
+    Args:
+        documents: Document stream (e.g. lazy_load_mediawiki_documents())
+        split_func: Splits one document into body chunks (required with body_writer)
+        body_writer: Index writer for body chunks (optional)
+        title_writer: Index writer for title documents (optional)
+        page_writer: JSONL.gz page writer (optional)
+        window: Maximum number of documents in flight between loader and embedders
+        manifest: Build manifest to skip unchanged pages and record indexed ones (optional)
+        deduplicator: Near-duplicate filter for body chunks (optional)
+
+    Returns:
+        Dictionary with document/chunk/title/page counts, elapsed seconds and peak memory in MB
+    """
+    start = time.perf_counter()
+    document_count = 0
+
+    try:
+        for doc in bounded_prefetch(documents, window):
+            document_count += 1
+
+            if page_writer is not None:
+                page_writer.add(doc)
+
+            if document_count % 100 == 0:
+                chunk_count = body_writer.count if body_writer is not None else 0
+                print(f"Processed {document_count:,} documents ({chunk_count:,} chunks embedded)...", end='\r')
+
+            if manifest is not None and manifest.is_current(doc):
+                continue
+
+            chunk_ids = []
+            if body_writer is not None:
+                for chunk_index, chunk in enumerate(split_func(doc)):
+                    signature = None
+                    if deduplicator is not None:
+                        signature = deduplicator.find(chunk)
+                        if signature is None:
+                            continue  # Collapsed onto an embedded chunk
+                    chunk_id = manifest.chunk_id(doc, chunk_index) if manifest is not None else None
+                    chunk_id = body_writer.add(chunk, chunk_id)
+                    chunk_ids.append(chunk_id)
+                    if signature is not None:
+                        deduplicator.register(signature, chunk_id)
+
+            title_id = None
+            if title_writer is not None and doc.metadata and 'title' in doc.metadata:
+                title_id = manifest.title_id(doc) if manifest is not None else None
+                title_id = title_writer.add(title_document(doc), title_id)
+
+            if manifest is not None:
+                manifest.record(doc, chunk_ids, title_id)
+
+        for writer in (body_writer, title_writer):
+            if writer is not None:
+                writer.flush()
+    finally:
+        if page_writer is not None:
+            page_writer.close()
+
+    stats = {
+        'documents': document_count,
+        'chunks': body_writer.count if body_writer is not None else 0,
+        'titles': title_writer.count if title_writer is not None else 0,
+        'pages': page_writer.count if page_writer is not None else 0,
+        'elapsed': time.perf_counter() - start,
+        'peak_memory_mb': _peak_memory_mb()
+    }
+    print(f"\nStreamed {stats['documents']:,} documents in {stats['elapsed']:.1f}s "
+          f"(peak memory {stats['peak_memory_mb']:.0f} MB)")
+    return stats
@@ -0,0 +1,181 @@
+"""Scalar (int8, float16) and product quantization of embedding vectors for the JSON export."""
+
+import base64
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from .ann_index import default_pq_m
+
+VECTOR_FORMATS = ('float32', 'float16', 'int8', 'pq')
+PQ_BITS = 8  # One byte per sub-quantizer code, which is what the JavaScript decoder reads
+SAMPLE_SIZE = 32768  # Vectors sampled to fit the quantizer and measure its recall
+RECALL_QUERIES = 200
+RECALL_K = 10
+
+
+def encode_base64(array: np.ndarray) -> str:
+    """Little-endian bytes of an array as base64 (the JSON export's binary encoding)."""
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+
+
+class Float32Quantizer:
+    """Exact float32 vectors (the original export format)."""
+
+    vector_format = 'float32'
+
+    def fit(self, sample: np.ndarray):
+        pass
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype='<f4')
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32)
+
+    def meta(self) -> dict:
+        return {}
+
+
+class Float16Quantizer(Float32Quantizer):
+    """IEEE half precision: 2 bytes per dimension."""
+
+    vector_format = 'float16'
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype='<f2')
+
+
+class Int8Quantizer(Float32Quantizer):
+    """
+    One signed byte per dimension with a per-dimension offset and scale.
+
+    The sample's range of each dimension is split into 256 steps:
+    x ≈ offset + (code + 128) * scale. Values outside the sampled range are
+    clipped to its ends.
+    """
+
+    vector_format = 'int8'
+
+    def __init__(self):
+        self.offset = None
+        self.scale = None
+
+    def fit(self, sample: np.ndarray):
+        minimum = sample.min(axis=0)
+        spread = sample.max(axis=0) - minimum
+        self.offset = minimum.astype(np.float32)
+        self.scale = np.where(spread > 0, spread / 255, 1).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        steps = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale)
+        return (np.clip(steps, 0, 255) - 128).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.offset + (codes.astype(np.float32) + 128) * self.scale
+
+    def meta(self) -> dict:
+        return {'offset': encode_base64(self.offset.astype('<f4')), 'scale': encode_base64(self.scale.astype('<f4'))}
+
+
+class PQQuantizer(Float32Quantizer):
+    """
+    Product quantization: the vector is cut into pq_m sub-vectors, each stored
+    as the one-byte index of its nearest centroid in a codebook of 256.
+    """
+
+    vector_format = 'pq'
+
+    def __init__(self, dimension: int, pq_m: Optional[int] = None):
+        self.pq_m = pq_m or default_pq_m(dimension)
+        if dimension % self.pq_m:
+            raise ValueError(f"--pq-m {self.pq_m} must divide the embedding dimension {dimension}")
+        self.pq = faiss.ProductQuantizer(dimension, self.pq_m, PQ_BITS)
+
+    def __getstate__(self):
+        # faiss objects do not pickle; the trained codebooks travel as an array (export worker processes)
+        return {'dimension': self.pq.d, 'pq_m': self.pq_m, 'centroids': faiss.vector_to_array(self.pq.centroids)}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state['dimension'], state['pq_m'])
+        faiss.copy_array_to_vector(state['centroids'], self.pq.centroids)
+
+    def fit(self, sample: np.ndarray):
+        if len(sample) < self.pq.ksub:
+            raise ValueError(f"PQ needs at least {self.pq.ksub} vectors to train its codebooks, got {len(sample)}")
+        self.pq.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return self.pq.compute_codes(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.pq.decode(codes)
+
+    def meta(self) -> dict:
+        # Centroids as (pq_m, 256, dimension / pq_m) float32
+        return {
+            'pq_m': self.pq_m,
+            'pq_bits': PQ_BITS,
+            'centroids': encode_base64(faiss.vector_to_array(self.pq.centroids).astype('<f4'))
+        }
+
+
+def create_quantizer(vector_format: str, dimension: int, pq_m: Optional[int] = None):
+    """
+    Quantizer for one of VECTOR_FORMATS (call fit() with sample_vectors() before encoding).
+    """
+    if vector_format == 'float32':
+        return Float32Quantizer()
+    if vector_format == 'float16':
+        return Float16Quantizer()
+    if vector_format == 'int8':
+        return Int8Quantizer()
+    if vector_format == 'pq':
+        return PQQuantizer(dimension, pq_m)
+    raise ValueError(f"Unknown vector format: {vector_format} (choose from {', '.join(VECTOR_FORMATS)})")
+
+
+def sample_vectors(reconstruct, count: int, size: int = SAMPLE_SIZE, seed: int = 0) -> np.ndarray:
+    """
+    Seeded random sample of stored vectors.
+
+    Args:
+        reconstruct: Function returning the vector at an index position
+        count: Number of vectors to sample from (positions 0..count-1)
+
+    Returns:
+        float32 matrix of min(count, size) rows
+    """
+    positions = np.sort(np.random.default_rng(seed).choice(count, min(count, size), replace=False))
+    return np.stack([reconstruct(int(position)) for position in positions]).astype(np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def quantization_recall(sample: np.ndarray, quantizer, k: int = RECALL_K, queries: int = RECALL_QUERIES,
+                        seed: int = 0) -> dict:
+    """
+    Recall@k of cosine search over quantized vectors against float32, as the web search ranks them.
+
+    Rows of the sample are held out as float32 queries and searched against
+    the rest, once exactly and once with the rest encoded and decoded.
+
+    Returns:
+        {'k', 'queries', 'corpus', 'recall'}
+    """
+    held_out = np.random.default_rng(seed).choice(len(sample), min(queries, max(1, len(sample) // 10)), replace=False)
+    keep = np.ones(len(sample), dtype=bool)
+    keep[held_out] = False
+    query_vectors = _normalize(sample[held_out])
+    corpus = sample[keep]
+    k = min(k, len(corpus))
+
+    exact = np.argsort(-(query_vectors @ _normalize(corpus).T), axis=1)[:, :k]
+    decoded = _normalize(quantizer.decode(quantizer.encode(corpus)))
+    approximate = np.argsort(-(query_vectors @ decoded.T), axis=1)[:, :k]
+    recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(approximate, exact)])
+    return {'k': k, 'queries': len(held_out), 'corpus': len(corpus), 'recall': round(float(recall), 4)}
@@ -1,83 +1,439 @@
 """Document splitting utilities for RAG processing."""
 
-from typing import List
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Wiki-aware separator hierarchy, tried in order
+WIKI_SEPARATORS = [
+    "\n\n# ",          # Major headings
+    "\n\n## ",         # Section headings
+    "\n\n### ",        # Subsection headings
+    "\n\n#### ",       # Minor headings
+    "\n\n",            # Paragraph breaks
+    "\n* ",            # List items
+    "\n- ",            # List items (alt)
+    "\n",              # Line breaks
+    ". ",              # Sentences
+    ", ",              # Clauses
+    " ",               # Words
+    ""                 # Characters (text without spaces, e.g. Japanese)
+]
+
+
+def _char_length(start: int, end: int) -> int:
+    return end - start
+
+
+class OffsetTextSplitter:
+    """
+    Recursive character splitter that tracks each chunk's exact position in the source text.
+
+    Follows RecursiveCharacterTextSplitter (separators kept at the start of
+    the following piece, whitespace stripped from merged chunks), but works
+    on (start, end) spans of the original text instead of substrings, so
+    offsets come straight from the cut points. Nothing is re-searched, each
+    recursion level scans its span once per separator tried, and merging is
+    linear in the number of pieces.
+
+    Lengths are characters by default; split_spans() also accepts a span
+    length function, e.g. a token count (see TokenBudgetSplitter).
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1200,
+        chunk_overlap: int = 300,
+        separators: Optional[List[str]] = None
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators if separators is not None else WIKI_SEPARATORS
+
+    def split_spans(self, text: str, length: Optional[Callable[[int, int], int]] = None) -> List[Tuple[int, int]]:
+        """
+        Split text into chunks.
+
+        Args:
+            text: Text to split
+            length: Length of the span text[start:end] in chunk_size units (default: characters)
+
+        Returns:
+            List of (start, end) spans; text[start:end] is the chunk text
+        """
+        return self._split(text, 0, len(text), self.separators, length or _char_length)
+
+    def split_sections(
+        self,
+        text: str,
+        sections: Sequence[Sequence],
+        length: Optional[Callable[[int, int], int]] = None
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Split text into chunks that follow section boundaries.
+
+        Consecutive sections are packed into one chunk while they fit in
+        chunk_size; a section larger than chunk_size is split on its own with
+        the separator hierarchy (overlap applies inside it). No chunk spans a
+        boundary inside a section it does not fully contain.
+
+        Args:
+            text: Text to split
+            sections: [start, end, title] section spans of text in order (see strip_sections())
+            length: Length of the span text[start:end] in chunk_size units (default: characters)
+
+        Returns:
+            List of (start, end, first_section, last_section) tuples; the section
+            indexes are the sections the chunk covers
+        """
+        length = length or _char_length
+        chunks = []
+        packed = None  # [start, end, first_section, last_section]
+
+        def flush():
+            spans = []
+            self._append_stripped(text, packed[0], packed[1], spans)
+            chunks.extend((start, end, packed[2], packed[3]) for start, end in spans)
+
+        for i, (start, end, _) in enumerate(sections):
+            if packed is not None and length(packed[0], end) > self.chunk_size:
+                flush()
+                packed = None
+
+            if length(start, end) > self.chunk_size:
+                chunks.extend((chunk_start, chunk_end, i, i)
+                              for chunk_start, chunk_end in self._split(text, start, end, self.separators, length))
+            elif packed is None:
+                packed = [start, end, i, i]
+            else:
+                packed[1], packed[3] = end, i
+
+        if packed is not None:
+            flush()
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunk strings."""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def _cut(self, text: str, start: int, end: int, separator: str) -> List[Tuple[int, int]]:
+        """Cut a span at each separator occurrence, keeping the separator at the start of the next piece."""
+        if separator == "":
+            return [(i, i + 1) for i in range(start, end)]
+
+        pieces = []
+        piece_start = start
+        pos = text.find(separator, start, end)
+        while pos != -1:
+            if pos > piece_start:
+                pieces.append((piece_start, pos))
+            piece_start = pos
+            pos = text.find(separator, pos + len(separator), end)
+        if end > piece_start:
+            pieces.append((piece_start, end))
+        return pieces
+
+    def _split(self, text: str, start: int, end: int, separators: List[str], length) -> List[Tuple[int, int]]:
+        # Use the first separator that occurs in the span
+        separator = separators[-1]
+        remaining = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[i + 1:]
+                break
+
+        chunks = []
+        good_pieces = []
+        for piece in self._cut(text, start, end, separator):
+            piece_length = length(*piece)
+            if piece_length < self.chunk_size:
+                good_pieces.append((piece, piece_length))
+                continue
+
+            if good_pieces:
+                chunks.extend(self._merge(text, good_pieces))
+                good_pieces = []
+            if remaining:
+                chunks.extend(self._split(text, piece[0], piece[1], remaining, length))
+            else:
+                chunks.append(piece)
+
+        if good_pieces:
+            chunks.extend(self._merge(text, good_pieces))
+        return chunks
+
+    def _merge(self, text: str, pieces: List[Tuple[Tuple[int, int], int]]) -> List[Tuple[int, int]]:
+        """Merge adjacent (span, length) pieces into chunks of at most chunk_size, carrying up to chunk_overlap into the next."""
+        chunks = []
+        current = deque()
+        total = 0
+
+        for piece, length in pieces:
+            if total + length > self.chunk_size and current:
+                self._append_stripped(text, current[0][0][0], current[-1][0][1], chunks)
+                while current and (total > self.chunk_overlap or total + length > self.chunk_size):
+                    total -= current.popleft()[1]
+            current.append((piece, length))
+            total += length
+
+        if current:
+            self._append_stripped(text, current[0][0][0], current[-1][0][1], chunks)
+        return chunks
+
+    @staticmethod
+    def _append_stripped(text: str, start: int, end: int, chunks: List[Tuple[int, int]]):
+        """Append the span with surrounding whitespace trimmed, dropping it if nothing is left."""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            chunks.append((start, end))
+
+
+def document_spans(
+    splitter: OffsetTextSplitter,
+    document: Document,
+    length: Optional[Callable[[int, int], int]] = None
+) -> List[Tuple[int, int, Optional[List[str]]]]:
+    """
+    Chunk spans of a document, following its 'section_spans' metadata when the loader provided it.
+
+    Returns:
+        List of (start, end, section_titles) tuples; section_titles lists the
+        heading paths of the sections the chunk covers ('' for the lead section),
+        or is None for documents without section spans
+    """
+    text = document.page_content
+    sections = document.metadata.get('section_spans')
+    if not sections:
+        return [(start, end, None) for start, end in splitter.split_spans(text, length)]
+    return [
+        (start, end, [title for _, _, title in sections[first:last + 1]])
+        for start, end, first, last in splitter.split_sections(text, sections, length)
+    ]
+
+
+def chunk_metadata(document: Document, chunk_index: int, chunk_start: int, chunk_end: int,
+                   section_titles: Optional[List[str]]) -> dict:
+    """Copy a document's metadata for one chunk, replacing the page's section spans with the chunk's titles."""
+    metadata = document.metadata.copy()
+    metadata.pop('section_spans', None)
+    metadata['chunk_index'] = chunk_index
+    metadata['chunk_start'] = chunk_start
+    metadata['chunk_end'] = chunk_end
+    if section_titles is not None:
+        metadata['section_titles'] = section_titles
+    return metadata
 
 
 def split_documents(
-    documents: List[Document],
+    documents: Iterable[Document],
     chunk_size: int = 1200,
     chunk_overlap: int = 300
 ) -> List[Document]:
     """
     Split documents into smaller chunks for vector processing.
-    
+
     Optimized for Googology Wiki content:
     - Larger chunks (1200 chars) to preserve mathematical definitions
     - Higher overlap (300 chars/25%) to maintain concept continuity
     - Wiki-aware separators for better semantic boundaries
-    
+
+    Each chunk carries chunk_index, chunk_start and chunk_end metadata;
+    page_content[chunk_start:chunk_end] of the source document is exactly
+    the chunk text. Documents with 'section_spans' metadata (from the
+    section-aware loader) are chunked along section boundaries, and each
+    chunk lists the titles of its sections in 'section_titles'.
+
     Args:
-        documents: List of Document objects to split
+        documents: Document objects to split
         chunk_size: Maximum size of each chunk in characters (default: 1200)
         chunk_overlap: Number of overlapping characters between chunks (default: 300)
-        
+
     Returns:
         List of Document objects representing chunks
     """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        is_separator_regex=False,
-        separators=[
-            "\n\n# ",          # Major headings
-            "\n\n## ",         # Section headings  
-            "\n\n### ",        # Subsection headings
-            "\n\n#### ",       # Minor headings
-            "\n\n",            # Paragraph breaks
-            "\n* ",            # List items
-            "\n- ",            # List items (alt)
-            "\n",              # Line breaks
-            ". ",              # Sentences
-            ", ",              # Clauses
-            " "                # Words
-        ]
-    )
-    
-    # Split documents and track character positions
+    text_splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
     all_chunks = []
-    
     for doc in documents:
-        # Split the document text
-        text_chunks = text_splitter.split_text(doc.page_content)
-        
-        # Track character position in original document
-        current_pos = 0
-        
-        for chunk_index, chunk_text in enumerate(text_chunks):
-            # Find the actual position of this chunk in the original text
-            chunk_start = doc.page_content.find(chunk_text, current_pos)
-            if chunk_start == -1:
-                # Fallback if exact match not found (shouldn't happen)
-                chunk_start = current_pos
-            
-            chunk_end = chunk_start + len(chunk_text)
-            
+        text = doc.page_content
+        spans = document_spans(text_splitter, doc)
+        for chunk_index, (chunk_start, chunk_end, section_titles) in enumerate(spans):
             # Create chunk document with position metadata
-            chunk_metadata = doc.metadata.copy()
-            chunk_metadata['chunk_index'] = chunk_index
-            chunk_metadata['chunk_start'] = chunk_start
-            chunk_metadata['chunk_end'] = chunk_end
-            
-            chunk_doc = Document(
-                page_content=chunk_text,
-                metadata=chunk_metadata
+            all_chunks.append(Document(
+                page_content=text[chunk_start:chunk_end],
+                metadata=chunk_metadata(doc, chunk_index, chunk_start, chunk_end, section_titles)
+            ))
+
+    return all_chunks
+
+
+def get_model_tokenizer(embeddings):
+    """
+    Get the fast tokenizer and max sequence length of a sentence-transformers embedding model.
+
+    Args:
+        embeddings: HuggingFaceEmbeddings or OnnxEmbeddings instance, possibly behind CachedEmbeddings/EmbeddingPool (from create_embeddings())
+
+    Returns:
+        (tokenizer, max_seq_length) tuple
+
+    Raises:
+        ValueError: If the embeddings are not backed by a sentence-transformers model with a fast tokenizer
+    """
+    while hasattr(embeddings, 'underlying'):  # CachedEmbeddings, EmbeddingPool
+        embeddings = embeddings.underlying
+    # OnnxEmbeddings carries tokenizer and max_seq_length itself
+    client = getattr(embeddings, '_client', None) or getattr(embeddings, 'client', None) or embeddings
+    tokenizer = getattr(client, 'tokenizer', None)
+    if tokenizer is None or not getattr(tokenizer, 'is_fast', False):
+        raise ValueError("Token-based chunking requires a HuggingFace embedding model with a fast tokenizer")
+    return tokenizer, client.max_seq_length
+
+
+def token_starts(tokenizer, texts: List[str]) -> List[List[int]]:
+    """
+    Get the character offset where each token starts, for a batch of texts in one tokenizer call.
+
+    Args:
+        tokenizer: HuggingFace fast tokenizer
+        texts: Texts to tokenize
+
+    Returns:
+        Per text, the sorted start offsets of its tokens (special tokens excluded)
+    """
+    encoded = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        verbose=False
+    )
+    return [[start for start, _ in offsets] for offsets in encoded['offset_mapping']]
+
+
+def _token_length(starts: Sequence[int]) -> Callable[[int, int], int]:
+    """Span length in tokens: the number of tokens starting inside text[start:end]."""
+    def length(start: int, end: int) -> int:
+        return bisect_left(starts, end) - bisect_left(starts, start)
+    return length
+
+
+class TokenBudgetSplitter:
+    """
+    Splits documents into chunks that fit the embedding model's max sequence length.
+
+    Each batch of documents is tokenized once with the model's fast tokenizer
+    (offset mapping); chunk lengths are then token counts looked up by bisect
+    on the token start offsets, so no piece is ever re-tokenized. For
+    comparison, the same text is also cut into character-based chunks and
+    the tokens those chunks would have lost to truncation are counted.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_seq_length: int,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap_tokens: Optional[int] = None,
+        char_chunk_size: int = 1200,
+        char_chunk_overlap: int = 300
+    ):
+        """
+        Args:
+            tokenizer: HuggingFace fast tokenizer of the embedding model
+            max_seq_length: Model input limit in tokens, including special tokens
+            chunk_tokens: Token budget per chunk (default: max_seq_length minus special tokens)
+            chunk_overlap_tokens: Overlap between chunks in tokens (default: a quarter of the budget)
+            char_chunk_size: Character chunk size to compare against
+            char_chunk_overlap: Character chunk overlap to compare against
+        """
+        self.tokenizer = tokenizer
+        special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
+        self.token_limit = max_seq_length - special_tokens
+        self.chunk_tokens = min(chunk_tokens or self.token_limit, self.token_limit)
+        if chunk_overlap_tokens is None:
+            chunk_overlap_tokens = self.chunk_tokens // 4
+        self.splitter = OffsetTextSplitter(chunk_size=self.chunk_tokens, chunk_overlap=chunk_overlap_tokens)
+        self.char_splitter = OffsetTextSplitter(chunk_size=char_chunk_size, chunk_overlap=char_chunk_overlap)
+
+        self.chunks = 0
+        self.tokens = 0
+        self.char_chunks = 0
+        self.char_tokens = 0
+        self.char_truncated_chunks = 0
+        self.char_truncated_tokens = 0
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents into token-budget chunks.
+
+        Args:
+            documents: Document objects to split (tokenized in one batch)
+
+        Returns:
+            Chunk documents with chunk_index, chunk_start, chunk_end and chunk_tokens
+            metadata (and section_titles for documents with section spans)
+        """
+        all_chunks = []
+        batch_starts = token_starts(self.tokenizer, [doc.page_content for doc in documents])
+
+        for doc, starts in zip(documents, batch_starts):
+            text = doc.page_content
+            length = _token_length(starts)
+            self._count_char_truncation(text, length)
+
+            spans = document_spans(self.splitter, doc, length)
+            for chunk_index, (chunk_start, chunk_end, section_titles) in enumerate(spans):
+                chunk_tokens = length(chunk_start, chunk_end)
+                self.chunks += 1
+                self.tokens += chunk_tokens
+
+                metadata = chunk_metadata(doc, chunk_index, chunk_start, chunk_end, section_titles)
+                metadata['chunk_tokens'] = chunk_tokens
+
+                all_chunks.append(Document(
+                    page_content=text[chunk_start:chunk_end],
+                    metadata=metadata
+                ))
+
+        return all_chunks
+
+    def _count_char_truncation(self, text: str, length: Callable[[int, int], int]):
+        for start, end in self.char_splitter.split_spans(text):
+            tokens = length(start, end)
+            self.char_chunks += 1
+            self.char_tokens += tokens
+            if tokens > self.token_limit:
+                self.char_truncated_chunks += 1
+                self.char_truncated_tokens += tokens - self.token_limit
+
+    def report(self) -> str:
+        """Compare token-budget chunks with the character chunks they replace."""
+        lines = [f"Token-budget chunks: {self.chunks:,} chunks, budget {self.chunk_tokens} tokens "
+                 f"(model limit {self.token_limit})"]
+        if self.chunks:
+            lines.append(f"  Mean tokens per chunk: {self.tokens / self.chunks:.1f}")
+        if self.char_chunks:
+            char = self.char_splitter
+            lines.append(
+                f"Character chunks ({char.chunk_size}/{char.chunk_overlap} chars) would have been "
+                f"{self.char_chunks:,} chunks, {self.char_tokens / self.char_chunks:.1f} tokens per chunk"
+            )
+            lines.append(
+                f"  {self.char_truncated_chunks:,} chunks ({self.char_truncated_chunks / self.char_chunks:.1%}) exceeded "
+                f"the model limit; {self.char_truncated_tokens:,} tokens truncated "
+                f"({self.char_truncated_tokens / self.char_chunks:.1f} per chunk, "
+                f"{self.char_truncated_tokens / max(1, self.char_tokens):.1%} of all tokens)"
             )
-            all_chunks.append(chunk_doc)
-            
-            # Update position for next search
-            current_pos = chunk_start + 1
-    
-    return all_chunks
\ No newline at end of file
+        return '\n'.join(lines)
@@ -0,0 +1,311 @@
+"""Parallel, cached wikitext-to-plaintext stripping for MediaWiki pages."""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import mwparserfromhell
+from mwparserfromhell.wikicode import Wikicode
+import config
+
+STRIP_CACHE_FILE = 'strip_cache.sqlite'
+DEFAULT_CHUNKSIZE = 16  # Pages per task sent to a worker process
+DEFAULT_OUTLIER_SECONDS = 1.0
+TOP_OUTLIERS = 10
+SECTION_PATH_SEPARATOR = ' > '
+
+
+def get_strip_cache_path() -> Path:
+    """Get the default strip cache path for the current site (data/<site>/strip_cache.sqlite)."""
+    return config.DATA_DIR / STRIP_CACHE_FILE
+
+
+def strip_wikitext(content: str) -> str:
+    """
+    Convert wikitext to plain text with mwparserfromhell.
+
+    Args:
+        content: Raw wikitext
+
+    Returns:
+        Plain text, or the raw wikitext if parsing fails
+    """
+    try:
+        return mwparserfromhell.parse(content).strip_code()
+    except Exception:
+        return content
+
+
+def strip_sections(content: str) -> Tuple[str, List[list]]:
+    """
+    Convert wikitext to plain text section by section, keeping the section structure.
+
+    Sections come from mwparserfromhell's get_sections() on the raw wikitext,
+    since strip_code() leaves only the bare heading titles. Each section is
+    stripped separately to "Heading title\n<body>" and sections are joined
+    with blank lines.
+
+    Args:
+        content: Raw wikitext
+
+    Returns:
+        (text, sections) tuple; sections is a list of [start, end, title] spans
+        of text in page order, where title is the heading path joined with
+        " > " ('' for the lead section). Falls back to (strip_wikitext(content), [])
+        if parsing fails.
+    """
+    try:
+        sections = mwparserfromhell.parse(content).get_sections(flat=True, include_lead=True)
+    except Exception:
+        return strip_wikitext(content), []
+
+    pieces = []
+    spans = []
+    path = []  # (level, title) of the enclosing headings
+    offset = 0
+    for section in sections:
+        nodes = section.nodes
+        title = ''
+        if nodes and isinstance(nodes[0], mwparserfromhell.nodes.Heading):
+            heading = nodes[0]
+            title = heading.title.strip_code().strip()
+            while path and path[-1][0] >= heading.level:
+                path.pop()
+            path.append((heading.level, title))
+            nodes = nodes[1:]
+        body = Wikicode(nodes).strip_code().strip()
+
+        piece = '\n'.join(part for part in (title, body) if part)
+        if not piece:
+            continue
+        if pieces:
+            offset += 2  # '\n\n' between sections
+        pieces.append(piece)
+        spans.append([offset, offset + len(piece), SECTION_PATH_SEPARATOR.join(t for _, t in path if t) if title else ''])
+        offset += len(piece)
+
+    return '\n\n'.join(pieces), spans
+
+
+def _strip_timed(content: str, sections: bool = False) -> Tuple[str, Optional[list], float]:
+    """Strip one page and measure the time taken (runs in worker processes)."""
+    start = time.perf_counter()
+    if sections:
+        text, spans = strip_sections(content)
+    else:
+        text, spans = strip_wikitext(content), None
+    return text, spans, time.perf_counter() - start
+
+
+def revision_key(page: dict) -> Optional[str]:
+    """
+    Get the cache key identifying a page's revision: revision ID, else the dump's <sha1>.
+
+    Returns:
+        Key string, or None if the page has neither (such pages are not cached)
+    """
+    if page.get('revision_id'):
+        return f"rev:{page['revision_id']}"
+    if page.get('sha1'):
+        return f"sha1:{page['sha1']}"
+    return None
+
+
+class StripCache:
+    """
+    On-disk cache of stripped page text, keyed by page ID and revision.
+
+    One row is kept per page; a new revision of the page replaces the old
+    row, so the cache stays the size of the wiki across dump refreshes.
+    Rows stripped section by section also hold the section spans (JSON);
+    they only match lookups for sectioned text, and plain rows only plain
+    lookups, since the two texts differ.
+
+    The cache is usually opened in the main thread and read by the loader
+    in the pipeline's producer thread, so the connection is shared across
+    threads and every statement runs under a lock.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else get_strip_cache_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS stripped ('
+            'page_id TEXT PRIMARY KEY, revision_key TEXT NOT NULL, text TEXT NOT NULL, sections TEXT)'
+        )
+        # Caches created before section spans were stored
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(stripped)')]
+        if 'sections' not in columns:
+            self.conn.execute('ALTER TABLE stripped ADD COLUMN sections TEXT')
+        self.conn.commit()
+
+    def get(self, page_id: str, rev_key: str, sections: bool = False) -> Optional[Tuple[str, Optional[list]]]:
+        """
+        Return the cached (text, section spans) for this revision of the page, or None.
+
+        Args:
+            sections: Look up text stripped by strip_sections() instead of strip_wikitext()
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT text, sections FROM stripped WHERE page_id = ? AND revision_key = ?',
+                (page_id, rev_key)
+            ).fetchone()
+        if row is None or (row[1] is not None) != sections:
+            return None
+        return row[0], json.loads(row[1]) if row[1] is not None else None
+
+    def put_many(self, entries: List[Tuple[str, str, str, Optional[list]]]):
+        """Store (page_id, revision_key, text, section spans or None) entries, replacing older revisions."""
+        if entries:
+            rows = [(page_id, rev_key, text, json.dumps(spans, ensure_ascii=False) if spans is not None else None)
+                    for page_id, rev_key, text, spans in entries]
+            with self._lock:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO stripped (page_id, revision_key, text, sections) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+                self.conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM stripped').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class ParallelStripper:
+    """
+    Strips page wikitext in a process pool, skipping pages found in the StripCache.
+
+    Pages are taken from the input stream in blocks; cache misses in a block
+    are dispatched to the pool in chunks of `chunksize` pages, and results
+    are yielded in input order. Per-page strip times are recorded so slow
+    outliers (huge, template-heavy pages) can be reported.
+
+    With sections=True pages are stripped by strip_sections() and the
+    section spans are stored in each page dict under 'sections'.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        cache: Optional[StripCache] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        outlier_seconds: float = DEFAULT_OUTLIER_SECONDS,
+        sections: bool = False
+    ):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.cache = cache
+        self.sections = sections
+        self.chunksize = chunksize
+        self.outlier_seconds = outlier_seconds
+        self.block_pages = max(1, self.workers * chunksize * 4)
+
+        self.pages = 0
+        self.cache_hits = 0
+        self.stripped = 0
+        self.strip_seconds = 0.0
+        self.outlier_count = 0
+        self._slowest = []  # min-heap of (seconds, title, chars)
+
+    def _record(self, page: dict, seconds: float):
+        self.stripped += 1
+        self.strip_seconds += seconds
+        if seconds >= self.outlier_seconds:
+            self.outlier_count += 1
+        entry = (seconds, page.get('title') or '', len(page['content']))
+        if len(self._slowest) < TOP_OUTLIERS:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def _strip_block(self, block: List[dict], executor) -> List[str]:
+        texts: List[Optional[str]] = [None] * len(block)
+        misses = []
+
+        for i, page in enumerate(block):
+            rev_key = revision_key(page)
+            if self.cache is not None and page.get('page_id') and rev_key:
+                cached = self.cache.get(page['page_id'], rev_key, self.sections)
+                if cached is not None:
+                    texts[i], spans = cached
+                    if self.sections:
+                        page['sections'] = spans
+                    self.cache_hits += 1
+                    continue
+            misses.append(i)
+
+        strip = partial(_strip_timed, sections=self.sections)
+        contents = [block[i]['content'] for i in misses]
+        if executor is not None:
+            results = executor.map(strip, contents, chunksize=self.chunksize)
+        else:
+            results = map(strip, contents)
+
+        new_entries = []
+        for i, (text, spans, seconds) in zip(misses, results):
+            page = block[i]
+            texts[i] = text
+            if self.sections:
+                page['sections'] = spans
+            self._record(page, seconds)
+            rev_key = revision_key(page)
+            if page.get('page_id') and rev_key:
+                new_entries.append((page['page_id'], rev_key, text, spans))
+
+        if self.cache is not None:
+            self.cache.put_many(new_entries)
+        return texts
+
+    def strip_pages(self, pages: Iterable[dict]) -> Iterator[Tuple[dict, str]]:
+        """
+        Strip a stream of page dicts (with 'content', 'page_id', 'revision_id'/'sha1').
+
+        Args:
+            pages: Page dicts from EnhancedMWDumpLoader._load_pages()
+
+        Yields:
+            (page, plain_text) tuples in input order
+        """
+        pages = iter(pages)
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            while True:
+                block = list(islice(pages, self.block_pages))
+                if not block:
+                    break
+                self.pages += len(block)
+                yield from zip(block, self._strip_block(block, executor))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def report(self) -> str:
+        """Summarize cache hits, strip time and the slowest pages."""
+        lines = [
+            f"Stripped {self.stripped:,} pages in {self.strip_seconds:.1f}s CPU "
+            f"({self.cache_hits:,}/{self.pages:,} from cache, {self.workers} worker(s))"
+        ]
+        if self.stripped:
+            lines.append(f"  Mean strip time: {self.strip_seconds / self.stripped * 1000:.1f} ms/page")
+        if self.outlier_count:
+            lines.append(f"  ⚠ {self.outlier_count:,} pages took ≥ {self.outlier_seconds:.1f}s to strip")
+        slowest = sorted(self._slowest, reverse=True)
+        if slowest:
+            lines.append("  Slowest pages:")
+            for seconds, title, chars in slowest:
+                lines.append(f"    {seconds * 1000:8.1f} ms  {chars:>10,} chars  {title}")
+        return '\n'.join(lines)
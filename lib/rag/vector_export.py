@@ -0,0 +1,267 @@
+"""Part files of the vector store export (tools/rag/vec2json.py): each written once, in parallel worker processes."""
+
+import codecs
+import gzip
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .ann_index import unit_normalize
+from .binary_index import sign_bits
+from .native_store import NativeVectorStore
+from .quantization import encode_base64
+
+BINARY_SECTION_ALIGNMENT = 8  # Every section starts at a multiple of 8 bytes, so typed-array views need no copy
+LAYOUTS = ('binary', 'json')
+
+_export_store = None  # Vector store the parts of this process are read from
+
+
+class TeeWriter:
+    """
+    Binary file that writes every chunk to a plain file and its .gz in the same pass.
+
+    tell() is the position in the uncompressed stream, so the section offsets
+    of a binary part hold for both files.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._plain = open(self.path, 'wb')
+        self._compressed = gzip.open(self.path + '.gz', 'wb')
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._plain.write(data)
+        self._compressed.write(data)
+        size = memoryview(data).nbytes
+        self._position += size
+        return size
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        self._plain.close()
+        self._compressed.close()
+
+    def __enter__(self) -> 'TeeWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def part_rows(vector_store, start: int, end: int):
+    """
+    Docstore IDs, documents and exact vectors of the index positions start..end-1, vectors read in one slice.
+
+    Positions without a document are left out.
+
+    Returns:
+        (ids, documents, float32 vector matrix)
+    """
+    index_to_docstore_id = vector_store.index_to_docstore_id
+    # Native stores keep the exact vectors next to an approximate index and read documents by position
+    if isinstance(vector_store, NativeVectorStore):
+        vectors = vector_store.reconstruct_n(start, end - start)
+        ids = [index_to_docstore_id[position] for position in range(start, end)]
+        documents = [vector_store.document(position) for position in range(start, end)]
+    else:
+        vectors = vector_store.index.reconstruct_n(start, end - start)
+        ids = [index_to_docstore_id.get(position) for position in range(start, end)]
+        documents = [vector_store.docstore.search(doc_id) if doc_id is not None else None for doc_id in ids]
+
+    # docstore.search() returns a message string for unknown IDs
+    keep = [row for row, doc in enumerate(documents) if hasattr(doc, 'metadata')]
+    if len(keep) < len(documents):
+        ids = [ids[row] for row in keep]
+        documents = [documents[row] for row in keep]
+        vectors = vectors[keep]
+    return ids, documents, np.asarray(vectors, dtype=np.float32)
+
+
+def chunk_fields(doc) -> dict:
+    """Chunk offsets (body chunks only), section headings and collapsed duplicates of a JSON layout entry."""
+    fields = {}
+    if 'chunk_index' in doc.metadata:
+        fields['chunk_index'] = doc.metadata.get('chunk_index', 0)
+        fields['chunk_start'] = doc.metadata.get('chunk_start', 0)
+        fields['chunk_end'] = doc.metadata.get('chunk_end', len(doc.page_content))
+    # Heading paths of the wikitext sections the chunk covers
+    if 'section_titles' in doc.metadata:
+        fields['section_titles'] = doc.metadata['section_titles']
+    # Near-duplicate chunks collapsed onto this one: [curid, chunk_start, chunk_end]
+    if 'duplicates' in doc.metadata:
+        fields['duplicates'] = doc.metadata['duplicates']
+    return fields
+
+
+def json_part_documents(ids, documents, vectors, quantizer, use_binary: bool, binary_signatures: bool) -> list:
+    """
+    Entries of a JSON layout part; content is fetched from the XML by curid.
+
+    With use_binary, embeddings are base64 in the quantizer's format,
+    otherwise float lists (legacy support).
+    """
+    if use_binary:
+        codes = quantizer.encode(vectors)
+        signatures = sign_bits(vectors) if binary_signatures else None
+    entries = []
+    for row, (doc_id, doc) in enumerate(zip(ids, documents)):
+        entry = {'id': doc_id, 'curid': doc.metadata.get('curid')}
+        if use_binary:
+            entry['embedding_binary'] = encode_base64(codes[row])
+            entry['embedding_format'] = f'{quantizer.vector_format}_base64'
+            # Sign bit of every dimension, packed 8 per byte (first dimension in the high bit)
+            if signatures is not None:
+                entry['signature'] = encode_base64(signatures[row])
+        else:
+            entry['embedding'] = vectors[row].tolist()
+        entry.update(chunk_fields(doc))
+        entries.append(entry)
+    return entries
+
+
+def curid_number(curid) -> int:
+    """Numeric curid of the binary layout: -1 (no curid) for missing or non-numeric values."""
+    try:
+        return int(curid)
+    except (TypeError, ValueError):
+        return -1
+
+
+def binary_part_sections(ids, documents, vectors, quantizer, binary_signatures: bool) -> list:
+    """
+    Sections of a binary part file, in file order.
+
+    Args:
+        ids, documents, vectors: From part_rows()
+        quantizer: Encoder of the vector format (quantization.create_quantizer())
+        binary_signatures: Include the packed sign bits of every vector
+
+    Returns:
+        [(name, array)]: vectors (one encoded row per chunk), signatures,
+        int32 columns curid, chunk_index, chunk_start and chunk_end (body
+        chunks only), and records: UTF-8 JSON with the docstore IDs plus
+        section_titles and duplicates by row number
+    """
+    sections = [('vectors', quantizer.encode(vectors))]
+    if binary_signatures:
+        sections.append(('signatures', sign_bits(vectors)))
+
+    sections.append(('curid', np.array([curid_number(doc.metadata.get('curid')) for doc in documents], dtype='<i4')))
+    # Chunk offsets only for body chunks (same defaults as the JSON layout)
+    if any('chunk_index' in doc.metadata for doc in documents):
+        sections.append(('chunk_index', np.array([doc.metadata.get('chunk_index', 0) for doc in documents], dtype='<i4')))
+        sections.append(('chunk_start', np.array([doc.metadata.get('chunk_start', 0) for doc in documents], dtype='<i4')))
+        sections.append(('chunk_end', np.array(
+            [doc.metadata.get('chunk_end', len(doc.page_content)) for doc in documents], dtype='<i4')))
+
+    records = {'ids': list(ids)}
+    for key in ('section_titles', 'duplicates'):
+        values = {str(row): doc.metadata[key] for row, doc in enumerate(documents) if key in doc.metadata}
+        if values:
+            records[key] = values
+    record_bytes = json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    sections.append(('records', np.frombuffer(record_bytes, dtype=np.uint8)))
+    return sections
+
+
+def write_binary_part(f, sections) -> dict:
+    """
+    Write sections back to back, each aligned to BINARY_SECTION_ALIGNMENT bytes.
+
+    Args:
+        f: Binary file object with tell() (TeeWriter)
+
+    Returns:
+        {section name: [byte offset, byte length]} for the metadata file
+    """
+    offsets = {}
+    for name, array in sections:
+        f.write(b'\0' * (-f.tell() % BINARY_SECTION_ALIGNMENT))
+        data = np.ascontiguousarray(array)
+        offsets[name] = [f.tell(), data.nbytes]
+        f.write(memoryview(data).cast('B'))
+    return offsets
+
+
+def export_part(task: dict) -> dict:
+    """
+    Read one part's rows from the process's store and write its file and .gz in a single pass.
+
+    Vectors are checked for unit length and rescaled where they are not, so
+    the export can be scored by dot product.
+
+    Args:
+        task: part_index, start, end, path (without .gz), layout ('binary' or 'json'),
+            use_binary, quantizer, binary_signatures, site and embedding_dimension
+
+    Returns:
+        {'part_index', 'file', 'documents', 'rescaled', 'size_mb', 'gz_size_mb'} plus 'offsets' for the
+        binary layout; 'rescaled' counts the vectors that were not unit length
+    """
+    ids, documents, vectors = part_rows(_export_store, task['start'], task['end'])
+    vectors, rescaled = unit_normalize(vectors)
+    result = {
+        'part_index': task['part_index'],
+        'file': os.path.basename(task['path']),
+        'documents': len(ids),
+        'rescaled': rescaled
+    }
+
+    with TeeWriter(task['path']) as f:
+        if task['layout'] == 'binary':
+            sections = binary_part_sections(ids, documents, vectors, task['quantizer'], task['binary_signatures'])
+            result['offsets'] = write_binary_part(f, sections)
+        else:
+            part_json_data = {
+                'site': task['site'],
+                'part_index': task['part_index'],
+                'part_documents': len(ids),  # Keep key name for backward compatibility
+                'embedding_dimension': task['embedding_dimension'],
+                'documents': json_part_documents(  # Keep key name for backward compatibility
+                    ids, documents, vectors, task['quantizer'], task['use_binary'], task['binary_signatures'])
+            }
+            # No indentation for smaller file size
+            json.dump(part_json_data, codecs.getwriter('utf-8')(f), ensure_ascii=False, separators=(',', ':'))
+
+    result['size_mb'] = os.path.getsize(task['path']) / 1024 / 1024
+    result['gz_size_mb'] = os.path.getsize(task['path'] + '.gz') / 1024 / 1024
+    return result
+
+
+def _open_export_store(directory: str):
+    """Worker initializer: memory-map the native store once per process."""
+    global _export_store
+    _export_store = NativeVectorStore.load(directory)
+
+
+def export_parts(tasks: list, vector_store, native_store_path: str = None, workers: int = 1):
+    """
+    Write the part files of tasks, yielding export_part() results in part order.
+
+    With workers > 1 and a native store, each worker process memory-maps the
+    store and writes whole parts, so memory grows with the part size and the
+    worker count, not the store. A store that is only pickled is exported in
+    this process.
+    """
+    global _export_store
+    if workers > 1 and native_store_path:
+        # spawn: FAISS's OpenMP threads do not survive fork() in a child
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_open_export_store, initargs=(native_store_path,)) as executor:
+            yield from executor.map(export_part, tasks)
+        return
+
+    _export_store = vector_store
+    try:
+        for task in tasks:
+            yield export_part(task)
+    finally:
+        _export_store = None
@@ -1,8 +1,16 @@
 """Vector store creation and search utilities."""
 
-from typing import List, Tuple, Optional, Dict, Any
+import time
+import uuid
+from functools import partial
+from typing import List, Sequence, Tuple, Optional, Dict, Any
+
+import faiss
+import numpy as np
 from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_openai import OpenAIEmbeddings
 try:
     from langchain_huggingface import HuggingFaceEmbeddings
@@ -10,55 +18,253 @@ except ImportError:
     # Fallback to old import for compatibility
     from langchain_community.embeddings import HuggingFaceEmbeddings
 
+from .ann_index import similarity_from_score, unit_normalize
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_pool import EmbeddingPool
+from .onnx_embeddings import OnnxEmbeddings
+
 # Note: Direct multilingual model usage (no morphological analysis wrapper needed)
 
+DEFAULT_EMBED_BATCH_SIZE = 100
+EMBEDDING_BACKENDS = ('torch', 'onnx')
+
+
+def _huggingface_embeddings(embedding_model: str) -> HuggingFaceEmbeddings:
+    # Normalize embeddings to match JavaScript behavior
+    return HuggingFaceEmbeddings(
+        model_name=embedding_model,
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+
+def create_embeddings(
+    embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
+    use_openai: bool = False,
+    cache: Optional[EmbeddingCache] = None,
+    workers: int = 1,
+    batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    backend: str = 'torch',
+    onnx_model_dir: Optional[str] = None,
+    onnx_quantized: bool = False
+):
+    """
+    Create the embedding function used for indexing and search.
+    
+    Args:
+        embedding_model: Model name for embeddings (for HuggingFace)
+        use_openai: Whether to use OpenAI embeddings (requires API key)
+        cache: Embedding cache to serve previously embedded texts from (optional)
+        workers: Encoder processes for HuggingFace models (>1 starts an EmbeddingPool)
+        batch_size: Texts per batch sent to a pool worker
+        backend: 'torch' (sentence-transformers) or 'onnx' (onnxruntime on a local ONNX export)
+        onnx_model_dir: ONNX export of embedding_model (required for the onnx backend)
+        onnx_quantized: Use the export's int8 model_quantized.onnx
+        
+    Returns:
+        LangChain Embeddings instance (CachedEmbeddings when a cache is given)
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (choose from {', '.join(EMBEDDING_BACKENDS)})")
+    
+    if use_openai:
+        embeddings = OpenAIEmbeddings()
+    elif backend == 'onnx':
+        if not onnx_model_dir:
+            raise ValueError("The onnx embedding backend requires onnx_model_dir")
+        print(f"Using ONNX embedding model: {onnx_model_dir} ({'int8' if onnx_quantized else 'fp32'}, onnxruntime)")
+        embeddings = OnnxEmbeddings(onnx_model_dir, quantized=onnx_quantized, normalize=True)
+    elif workers > 1:
+        print(f"Using multilingual embedding model: {embedding_model} ({workers} encoder processes)")
+        embeddings = EmbeddingPool(
+            embedding_model,
+            workers=workers,
+            batch_size=batch_size,
+            normalize=True,
+            make_local=partial(_huggingface_embeddings, embedding_model)
+        )
+    else:
+        # Use the base embeddings directly (multilingual model handles Japanese internally)
+        print(f"Using multilingual embedding model: {embedding_model}")
+        embeddings = _huggingface_embeddings(embedding_model)
+    
+    if cache is not None:
+        embeddings = CachedEmbeddings(embeddings, cache)
+    return embeddings
+
+
+def base_embeddings(embeddings):
+    """Follow wrappers (CachedEmbeddings, EmbeddingPool) down to the in-process embeddings."""
+    while hasattr(embeddings, 'underlying'):
+        embeddings = embeddings.underlying
+    return embeddings
+
+
+def embedding_pool(embeddings) -> Optional[EmbeddingPool]:
+    """The EmbeddingPool behind an embeddings instance, or None (does not create in-process embeddings)."""
+    while not isinstance(embeddings, EmbeddingPool):
+        if isinstance(embeddings, CachedEmbeddings):
+            embeddings = embeddings.underlying
+        else:
+            return None
+    return embeddings
+
+
+def embed_texts(
+    embeddings,
+    texts: Sequence[str],
+    batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    show_progress: bool = False
+) -> np.ndarray:
+    """
+    Embed texts into one preallocated float32 matrix, in length-sorted batches.
+    
+    Texts are embedded shortest first, so each batch holds texts of similar
+    length and the model pads every batch to a similar sequence length.
+    Each batch is written straight into its rows of the result; no
+    per-batch arrays or lists are kept. With an EmbeddingPool, one batch
+    per worker is passed in each call so the workers run side by side.
+    
+    Args:
+        embeddings: LangChain Embeddings instance
+        texts: Texts to embed
+        batch_size: Texts per embed_documents() call
+        show_progress: Print a progress line after each batch
+        
+    Returns:
+        float32 array of shape (len(texts), dimension), rows in input order
+    """
+    order = np.argsort([len(text) for text in texts], kind='stable')
+    matrix = None
+    pool = embedding_pool(embeddings)
+    call_size = batch_size * (pool.workers if pool is not None else 1)
+    
+    for start in range(0, len(texts), call_size):
+        rows = order[start:start + call_size]
+        vectors = np.asarray(embeddings.embed_documents([texts[i] for i in rows]), dtype=np.float32)
+        if matrix is None:
+            # Dimension is known after the first batch
+            matrix = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        matrix[rows] = vectors
+        
+        if show_progress:
+            print(f"Embedded {min(start + call_size, len(texts)):,}/{len(texts):,} documents...", end='\r')
+    
+    if matrix is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return matrix
+
+
+def add_to_faiss_store(
+    embeddings,
+    documents: Sequence[Document],
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    vector_store: Optional[FAISS] = None
+) -> FAISS:
+    """
+    Add embedded documents to a FAISS store with one index.add() and one docstore update.
+    
+    Vectors are stored at unit length (rows the model did not normalize are
+    rescaled), so the inner-product index scores cosine similarity with a
+    single matrix product.
+    
+    Args:
+        embeddings: Embedding function stored with a new vector store (used for queries;
+            wrappers are unwrapped so the saved store references neither the cache nor the pool)
+        documents: Documents in the same order as the vector rows
+        ids: Docstore IDs, one per document
+        vectors: float32 matrix of shape (len(documents), dimension)
+        vector_store: Existing store to extend (default: create one with an IndexFlatIP
+            and the MAX_INNER_PRODUCT distance strategy)
+        
+    Returns:
+        The vector store
+    """
+    if vector_store is None:
+        vector_store = FAISS(
+            embedding_function=base_embeddings(embeddings),
+            index=faiss.IndexFlatIP(vectors.shape[1]),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+    
+    vectors, rescaled = unit_normalize(vectors)
+    if rescaled:
+        print(f"⚠ Rescaled {rescaled:,} of {len(vectors):,} embeddings to unit length")
+    
+    offset = vector_store.index.ntotal
+    vector_store.index.add(np.ascontiguousarray(vectors))
+    vector_store.docstore.add(dict(zip(ids, documents)))
+    vector_store.index_to_docstore_id.update((offset + i, doc_id) for i, doc_id in enumerate(ids))
+    return vector_store
+
+
+def convert_to_inner_product(vector_store: FAISS) -> bool:
+    """
+    Replace the IndexFlatL2 of a store built before inner-product indexes with an IndexFlatIP of its unit-length vectors.
+    
+    Positions and docstore IDs are unchanged. Stores with another index are left as they are.
+    
+    Returns:
+        Whether the store was converted
+    """
+    index = vector_store.index
+    if index.metric_type != faiss.METRIC_L2 or not isinstance(index, faiss.IndexFlat):
+        return False
+    vectors, _ = unit_normalize(index.reconstruct_n(0, index.ntotal))
+    vector_store.index = faiss.IndexFlatIP(index.d)
+    vector_store.index.add(np.ascontiguousarray(vectors))
+    vector_store.distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+    return True
+
 
 def create_vector_store(
     documents: List[Document],
     embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
-    use_openai: bool = False
+    use_openai: bool = False,
+    batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    cache: Optional[EmbeddingCache] = None,
+    workers: int = 1
 ) -> FAISS:
     """
     Create a FAISS vector store from documents.
     
+    All documents are embedded into one float32 matrix (length-sorted
+    batches), then added to a single index and docstore in one step instead
+    of building and merging a store per batch.
+    
     Args:
         documents: List of Document objects to index
         embedding_model: Model name for embeddings (for HuggingFace)
         use_openai: Whether to use OpenAI embeddings (requires API key)
+        batch_size: Documents per embedding batch
+        cache: Embedding cache to serve previously embedded chunks from (optional)
+        workers: Encoder processes (>1 shards the batches across an EmbeddingPool)
         
     Returns:
         FAISS vector store instance
     """
-    # Initialize base embeddings
-    if use_openai:
-        base_embeddings = OpenAIEmbeddings()
-    else:
-        # Normalize embeddings to match JavaScript behavior
-        base_embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            encode_kwargs={'normalize_embeddings': True}
-        )
-    
-    # Use the base embeddings directly (multilingual model handles Japanese internally)
-    print(f"Using multilingual embedding model: {embedding_model}")
-    embeddings = base_embeddings
+    if not documents:
+        return None
+    embeddings = create_embeddings(embedding_model, use_openai, cache, workers, batch_size)
     
     print(f"Creating embeddings for {len(documents):,} documents...")
-    # Create vector store with progress tracking
-    vector_store = None
-    batch_size = 100
-    
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
-        if i == 0:
-            vector_store = FAISS.from_documents(batch, embeddings)
-        else:
-            batch_store = FAISS.from_documents(batch, embeddings)
-            vector_store.merge_from(batch_store)
-        
-        print(f"Embedded {min(i + batch_size, len(documents)):,}/{len(documents):,} documents...", end='\r')
+    start = time.perf_counter()
+    vectors = embed_texts(embeddings, [doc.page_content for doc in documents], batch_size, show_progress=True)
+    embed_seconds = time.perf_counter() - start
+    
+    ids = [str(uuid.uuid4()) for _ in documents]
+    vector_store = add_to_faiss_store(embeddings, documents, ids, vectors)
     
-    print(f"\nFinished creating embeddings for {len(documents):,} documents")
+    print(f"\nFinished creating embeddings for {len(documents):,} documents "
+          f"(embedding {embed_seconds:.1f}s, indexing {time.perf_counter() - start - embed_seconds:.1f}s)")
+    pool = embedding_pool(embeddings)
+    if pool is not None:
+        print(pool.report())
+        pool.close()
+    if cache is not None:
+        print(cache.report())
     return vector_store
 
 
@@ -75,12 +281,17 @@ def search_documents(
         vector_store: FAISS vector store to search
         query: Search query string
         k: Number of results to return
-        score_threshold: Minimum similarity score (optional)
+        score_threshold: Minimum cosine similarity (optional)
         
     Returns:
-        List of tuples containing (Document, similarity_score)
+        List of tuples containing (Document, similarity_score), most similar first;
+        squared L2 distances of older stores are converted to the same cosine similarity
     """
-    results = vector_store.similarity_search_with_score(query, k=k)
+    metric = vector_store.index.metric_type
+    results = [
+        (doc, float(similarity_from_score(score, metric)))
+        for doc, score in vector_store.similarity_search_with_score(query, k=k)
+    ]
     
     if score_threshold is not None:
         results = [(doc, score) for doc, score in results if score >= score_threshold]
@@ -4,19 +4,55 @@ Report generation utilities for Googology Wiki analysis tools.
 
 from datetime import datetime
 from .io_utils import get_fetch_date
+from .formatting import format_bytes
 
 
-def generate_license_footer(tool_name: str) -> str:
+def format_scan_cost(scan_stats) -> str:
+    """
+    Format the parse cost of a scan as a markdown section.
+    
+    Args:
+        scan_stats: ScanStats returned by the scan engine (None for no section)
+        
+    Returns:
+        Markdown section string, or an empty string if no stats are given
+    """
+    if scan_stats is None:
+        return ''
+    
+    analyzers = ', '.join(scan_stats.analyzer_names)
+    if getattr(scan_stats, 'source', 'xml') == 'catalog':
+        return f"""
+## Parse Cost
+
+- **Pages read**: {scan_stats.page_count:,} (from the page catalog, XML not parsed)
+- **XML size**: {format_bytes(scan_stats.file_size)}
+- **Total scan time**: {scan_stats.elapsed:.1f}s
+- **Analyzers sharing this scan**: {len(scan_stats.analyzer_names)} ({analyzers})
+"""
+    
+    return f"""
+## Parse Cost
+
+- **Pages parsed**: {scan_stats.page_count:,}
+- **XML size**: {format_bytes(scan_stats.file_size)}
+- **Total scan time**: {scan_stats.elapsed:.1f}s (XML parsing {scan_stats.parse_seconds:.1f}s, analyzers {scan_stats.analyzer_seconds:.1f}s)
+- **Analyzers sharing this parse**: {len(scan_stats.analyzer_names)} ({analyzers})
+"""
+
+
+def generate_license_footer(tool_name: str, scan_stats=None) -> str:
     """
     Generate standard license and attribution footer for reports.
     
     Args:
         tool_name: Name of the tool generating the report
+        scan_stats: Optional ScanStats to report the shared parse cost
         
     Returns:
         Formatted license footer as markdown string
     """
-    return f"""---
+    return format_scan_cost(scan_stats) + f"""---
 
 ## License and Attribution
 
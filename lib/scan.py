@@ -0,0 +1,278 @@
+"""
+Single-pass scan engine for MediaWiki XML exports.
+
+The engine parses the dump once and hands every page to a set of registered
+analyzer plugins, so running several analysis tools costs one XML parse.
+The same pass builds the page catalog (see page_catalog.py); when every
+analyzer can work from the catalog, later runs skip the XML entirely.
+"""
+
+import os
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+from .xml_parser import extract_page_elements
+from .io_utils import HashingReader, open_dump, is_compressed
+
+
+class ScanContext:
+    """Information about the dump that is available before the first page."""
+
+    def __init__(self, xml_file_path: str, namespace_map: Dict[str, str]):
+        self.xml_file_path = xml_file_path
+        self.namespace_map = namespace_map
+
+
+class ScanStats:
+    """Parse cost of one scan, shared by every analyzer that took part in it."""
+
+    def __init__(self, xml_file_path: str, analyzer_names: List[str]):
+        self.xml_file_path = xml_file_path
+        self.analyzer_names = analyzer_names
+        self.file_size = os.path.getsize(xml_file_path)
+        self.page_count = 0
+        self.elapsed = 0.0
+        self.analyzer_times = {name: 0.0 for name in analyzer_names}
+        # 'xml' for a full parse, 'catalog' when served from the page catalog
+        self.source = 'xml'
+        self.sha256 = None
+
+    @property
+    def analyzer_seconds(self) -> float:
+        """Total time spent inside analyzer callbacks."""
+        return sum(self.analyzer_times.values())
+
+    @property
+    def parse_seconds(self) -> float:
+        """Time spent parsing XML, excluding analyzer callbacks."""
+        return max(0.0, self.elapsed - self.analyzer_seconds)
+
+
+class Analyzer:
+    """
+    Base class for analyzer plugins run by ScanEngine.
+
+    Subclasses override process_page() and usually start() and finish().
+    Analyzers that only need the per-page facts stored in the page catalog set
+    supports_catalog and implement process_catalog(), so the XML can be skipped.
+    """
+
+    name = 'analyzer'
+    supports_catalog = False
+
+    def start(self, context: ScanContext) -> None:
+        """
+        Called once after the namespace definitions have been parsed.
+
+        Args:
+            context: Dump information (path and namespace map)
+        """
+        pass
+
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        """
+        Called for every page in the dump.
+
+        Args:
+            elements: Dictionary returned by extract_page_elements()
+            page_elem: The raw <page> element, valid only during this call
+        """
+        raise NotImplementedError
+
+    def process_catalog(self, catalog) -> None:
+        """
+        Called after start(), instead of process_page(), when the scan is served from the page catalog.
+
+        Args:
+            catalog: PageCatalog for the dump
+        """
+        raise NotImplementedError
+
+    def finish(self, stats: ScanStats) -> None:
+        """
+        Called once after the last page, typically to write the report.
+
+        Args:
+            stats: Parse cost of the scan
+        """
+        pass
+
+
+class ScanEngine:
+    """Parses a MediaWiki XML dump once and feeds every page to all registered analyzers."""
+
+    def __init__(self, show_progress: bool = True, use_catalog: bool = True, build_catalog: bool = True):
+        self.show_progress = show_progress
+        self.use_catalog = use_catalog
+        self.build_catalog = build_catalog
+        self.analyzers = []
+
+    def register(self, analyzer: Analyzer) -> Analyzer:
+        """
+        Register an analyzer plugin.
+
+        Args:
+            analyzer: Analyzer instance to run during the scan
+
+        Returns:
+            The registered analyzer
+        """
+        self.analyzers.append(analyzer)
+        return analyzer
+
+    def run(self, xml_file_path: str) -> ScanStats:
+        """
+        Scan the dump once, calling every registered analyzer.
+
+        If every analyzer supports the page catalog and a valid catalog exists,
+        the analyzers are served from the catalog and the XML is not parsed.
+        Otherwise the XML is parsed once and the catalog is (re)built in the same pass.
+
+        Args:
+            xml_file_path: Path to the MediaWiki XML export file
+
+        Returns:
+            ScanStats describing the parse cost
+        """
+        catalog_module = _import_page_catalog()
+        serve_from_catalog = (self.use_catalog and bool(self.analyzers)
+                              and all(analyzer.supports_catalog for analyzer in self.analyzers))
+
+        # Opened once per run: checking a dump whose mtime changed hashes the whole file
+        catalog = None
+        if catalog_module is not None and (serve_from_catalog or self.build_catalog):
+            catalog = catalog_module.PageCatalog.open(xml_file_path)
+
+        if serve_from_catalog and catalog is not None:
+            return self._run_from_catalog(xml_file_path, catalog)
+
+        analyzers = list(self.analyzers)
+        if self.build_catalog and catalog_module is not None and catalog is None:
+            analyzers.append(catalog_module.CatalogBuilder())
+
+        return self._run_xml(xml_file_path, analyzers)
+
+    def _run_from_catalog(self, xml_file_path: str, catalog) -> ScanStats:
+        """Serve every analyzer from the page catalog without parsing XML."""
+        names = [analyzer.name for analyzer in self.analyzers]
+        stats = ScanStats(xml_file_path, names)
+        stats.source = 'catalog'
+        stats.page_count = catalog.page_count
+
+        print(f"Using page catalog {catalog.catalog_dir} for {len(self.analyzers)} analyzer(s): {', '.join(names)}")
+        scan_start = time.perf_counter()
+
+        self._start_analyzers(self.analyzers, stats, ScanContext(xml_file_path, catalog.namespace_map))
+        for analyzer in self.analyzers:
+            analyzer_start = time.perf_counter()
+            analyzer.process_catalog(catalog)
+            stats.analyzer_times[analyzer.name] += time.perf_counter() - analyzer_start
+
+        stats.elapsed = time.perf_counter() - scan_start
+        print(f"Catalog scan complete: {stats.page_count:,} pages in {stats.elapsed:.1f}s (no XML parse)")
+
+        for analyzer in self.analyzers:
+            analyzer.finish(stats)
+
+        return stats
+
+    def _run_xml(self, xml_file_path: str, analyzers: List[Analyzer]) -> ScanStats:
+        """Parse the XML once, feeding every page to the given analyzers."""
+        names = [analyzer.name for analyzer in analyzers]
+        stats = ScanStats(xml_file_path, names)
+        namespace_map = {}
+        started = False
+
+        print(f"Scanning {xml_file_path} once for {len(analyzers)} analyzer(s): {', '.join(names)}")
+        scan_start = time.perf_counter()
+
+        compressed = is_compressed(xml_file_path)
+        with open_dump(xml_file_path) as raw_file:
+            # Hash the dump while parsing so the page catalog can be keyed without a second read.
+            # For compressed dumps the hash must cover the file on disk, so it is computed later.
+            reader = raw_file if compressed else HashingReader(raw_file)
+
+            for event, elem in ET.iterparse(reader, events=('start', 'end')):
+                if event == 'start':
+                    if not started and elem.tag.endswith('}page'):
+                        # Namespace definitions precede the first page
+                        started = True
+                        self._start_analyzers(analyzers, stats, ScanContext(xml_file_path, namespace_map))
+                    continue
+
+                if elem.tag.endswith('}namespace'):
+                    key = elem.get('key')
+                    if key is not None:
+                        name = elem.text
+                        namespace_map[key] = 'Main' if name is None or name.strip() == '' else name
+                    elem.clear()
+
+                elif elem.tag.endswith('}page'):
+                    stats.page_count += 1
+                    if self.show_progress and stats.page_count % config.PROGRESS_INTERVAL == 0:
+                        print(f"Processed {stats.page_count:,} pages...")
+
+                    elements = extract_page_elements(elem)
+                    for analyzer in analyzers:
+                        analyzer_start = time.perf_counter()
+                        analyzer.process_page(elements, elem)
+                        stats.analyzer_times[analyzer.name] += time.perf_counter() - analyzer_start
+
+                    # Clear element to save memory
+                    elem.clear()
+
+            if not compressed:
+                # Drain anything the parser did not need so the hash covers the whole file
+                while reader.read(1 << 20):
+                    pass
+                stats.sha256 = reader.hexdigest()
+
+        if not started:
+            self._start_analyzers(analyzers, stats, ScanContext(xml_file_path, namespace_map))
+
+        stats.elapsed = time.perf_counter() - scan_start
+        print(f"Scan complete: {stats.page_count:,} pages in {stats.elapsed:.1f}s "
+              f"(parse {stats.parse_seconds:.1f}s, analyzers {stats.analyzer_seconds:.1f}s)")
+
+        for analyzer in analyzers:
+            analyzer.finish(stats)
+
+        return stats
+
+    def _start_analyzers(self, analyzers: List[Analyzer], stats: ScanStats, context: ScanContext) -> None:
+        """Call start() on every analyzer, charging the time to that analyzer."""
+        for analyzer in analyzers:
+            analyzer_start = time.perf_counter()
+            analyzer.start(context)
+            stats.analyzer_times[analyzer.name] += time.perf_counter() - analyzer_start
+
+
+def _import_page_catalog():
+    """Import the page catalog module, or return None if NumPy is unavailable."""
+    try:
+        from . import page_catalog
+        return page_catalog
+    except ImportError:
+        return None
+
+
+def run_analyzers(xml_file_path: str, analyzers: List[Analyzer], show_progress: bool = True) -> ScanStats:
+    """
+    Convenience wrapper that registers analyzers and runs a single scan.
+
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        analyzers: Analyzer instances to run
+        show_progress: Whether to show progress messages
+
+    Returns:
+        ScanStats describing the parse cost
+    """
+    engine = ScanEngine(show_progress=show_progress)
+    for analyzer in analyzers:
+        engine.register(analyzer)
+    return engine.run(xml_file_path)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Debug PageStore: fetch pages by curid from the XML dump"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.io_utils import find_xml_file
+from lib.page_store import PageStore
+
+
+def debug_page_store(curids):
+    xml_path = find_xml_file()
+    print(f"Using XML: {xml_path}")
+    
+    start = time.perf_counter()
+    store = PageStore(xml_path)
+    print(f"Index ready: {len(store):,} pages in {time.perf_counter() - start:.2f}s")
+    
+    # Default to the first few pages in the index
+    if not curids:
+        curids = [str(int(page_id)) for page_id in store.ids[:3]]
+    
+    for curid in curids:
+        start = time.perf_counter()
+        page = store.get(curid)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"\n--- curid {curid} ({elapsed_ms:.2f} ms) ---")
+        if page is None:
+            print("   ❌ Not found")
+            continue
+        
+        for key, value in page.items():
+            if key == 'text' and value:
+                preview = value[:200].replace('\n', ' ')
+                print(f"   {key}: {len(value):,} chars: {preview}...")
+            else:
+                print(f"   {key}: {value}")
+    
+    store.close()
+
+
+if __name__ == "__main__":
+    debug_page_store(sys.argv[1:])
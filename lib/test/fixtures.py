@@ -0,0 +1,96 @@
+"""Shared fixtures of the lib/test scripts"""
+
+import hashlib
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+import config
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text."""
+
+    model_name = 'test/hash-embeddings'
+    encode_kwargs = {'normalize_embeddings': True}
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.random.default_rng(zlib.crc32(text.encode('utf-8'))).standard_normal(16)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+
+class HashEncoder:
+    """SentenceTransformer stand-in encoding with HashEmbeddings (for EmbeddingPool workers)."""
+
+    def __init__(self, model_name, device=None):
+        self.model_name = model_name
+
+    def encode(self, texts, **kwargs):
+        return np.asarray(HashEmbeddings().embed_documents(texts), dtype=np.float32)
+
+
+def clustered_vectors(count, dimension, centers=64, noise=0.3, seed=0):
+    """Unit float32 vectors scattered around random cluster centers, like the neighbourhoods of real embeddings."""
+    rng = np.random.default_rng(seed)
+    center_vectors = rng.standard_normal((centers, dimension))
+    vectors = center_vectors[rng.integers(0, centers, count)] + noise * rng.standard_normal((count, dimension))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def write_dump(path, pages, namespaces=None):
+    """
+    Write a small MediaWiki XML export in the layout of the site's dumps.
+
+    Args:
+        path: File to write
+        pages: Dicts with title, ns, id and text, optionally revision_id,
+            timestamp and sha1 (None leaves the element out)
+        namespaces: {key: name} of the siteinfo header (default: main, User, Template)
+    """
+    if namespaces is None:
+        namespaces = {'0': '', '2': 'User', '10': 'Template'}
+    xmlns = config.MEDIAWIKI_NS.strip('{}')
+
+    lines = [
+        f'<mediawiki xmlns="{xmlns}" version="0.11" xml:lang="en">',
+        '  <siteinfo>',
+        '    <sitename>Test Wiki</sitename>',
+        '    <namespaces>',
+    ]
+    for key, name in namespaces.items():
+        if name:
+            lines.append(f'      <namespace key="{key}" case="first-letter">{escape(name)}</namespace>')
+        else:
+            lines.append(f'      <namespace key="{key}" case="first-letter" />')
+    lines += ['    </namespaces>', '  </siteinfo>']
+
+    for page in pages:
+        text = page['text']
+        revision_id = page.get('revision_id', page['id'] * 10)
+        sha1 = page.get('sha1', hashlib.sha1(text.encode('utf-8')).hexdigest())
+        lines += [
+            '  <page>',
+            f'    <title>{escape(page["title"])}</title>',
+            f'    <ns>{page["ns"]}</ns>',
+            f'    <id>{page["id"]}</id>',
+            '    <revision>',
+        ]
+        if revision_id is not None:
+            lines.append(f'      <id>{revision_id}</id>')
+        lines += [
+            f'      <timestamp>{page.get("timestamp", "2024-01-01T00:00:00Z")}</timestamp>',
+            '      <contributor><username>Tester</username><id>1</id></contributor>',
+            f'      <text bytes="{len(text.encode("utf-8"))}" xml:space="preserve">{escape(text)}</text>',
+        ]
+        if sha1 is not None:
+            lines.append(f'      <sha1>{sha1}</sha1>')
+        lines += ['    </revision>', '  </page>']
+    lines.append('</mediawiki>')
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
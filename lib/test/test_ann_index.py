@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test that every index type round-trips through a native store and keeps the neighbours of the flat index"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lib.rag.ann_index import INDEX_TYPES, default_nlist, default_pq_m, index_params, index_type_of
+from lib.rag.native_store import NativeVectorStore, save_native_store
+from lib.rag.vectorstore import add_to_faiss_store
+from lib.test.fixtures import HashEmbeddings, clustered_vectors
+
+# Minimum recall@10 against the flat index on clustered vectors
+MIN_RECALL = {'flat': 1.0, 'float16': 0.99, 'int8': 0.9, 'hnsw': 0.9, 'ivf-flat': 0.9, 'ivf-pq': 0.4, 'pq': 0.2}
+K = 10
+
+
+def test_defaults():
+    assert default_nlist(100_000) == 1264 and default_nlist(4000) == 4000 // 39 and default_nlist(10) == 1
+    assert default_pq_m(384) == 48 and default_pq_m(100) == 10 and default_pq_m(7) == 1
+
+    params = index_params('ivf-pq', 4000, 64)
+    assert params == {'nlist': 102, 'nprobe': 16, 'pq_m': 8, 'pq_bits': 8}
+    assert index_params('ivf-flat', 100, 64) == {'nlist': 2, 'nprobe': 2}  # nprobe never exceeds nlist
+    assert index_params('pq', 4000, 64, pq_m=16)['pq_m'] == 16
+    assert index_params('flat', 4000, 64) == index_params('int8', 4000, 64) == {}
+
+    for index_type in ('pq', 'ivf-pq'):
+        try:
+            index_params(index_type, 4000, 64, pq_m=7)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            assert str(e) == "--pq-m 7 must divide the embedding dimension 64"
+    try:
+        index_params('lsh', 4000, 64)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✓ Default nlist/pq_m and --pq-m divisibility errors")
+
+
+def test_index_types():
+    vectors = clustered_vectors(4000, 64)
+    queries = clustered_vectors(100, 64, seed=1)
+    documents = [Document(page_content=f"Chunk {i}", metadata={'curid': str(i)}) for i in range(len(vectors))]
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    vector_store = add_to_faiss_store(HashEmbeddings(), documents, ids, vectors)
+    _, expected = vector_store.index.search(queries, K)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index_type in INDEX_TYPES:
+            directory = os.path.join(tmp_dir, index_type)
+            info = save_native_store(vector_store, directory, index_type=index_type)
+            assert info['index_params'] == index_params(index_type, len(vectors), 64)
+
+            store = NativeVectorStore.load(directory)
+            assert store.index_type == index_type_of(store.index) == index_type
+            assert store.index.ntotal == len(vectors)
+            # Exact vectors are kept for exports and rebuilds
+            assert np.array_equal(store.reconstruct_n(0, 50), vectors[:50])
+
+            _, positions = store.index.search(queries, K)
+            recall = np.mean([len(set(found) & set(exact)) / K for found, exact in zip(positions, expected)])
+            assert recall >= MIN_RECALL[index_type], (index_type, recall)
+            assert store.document(int(positions[0][0])).page_content == f"Chunk {positions[0][0]}"
+            print(f"✓ {index_type}: reloaded as {index_type_of(store.index)}, recall@{K} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    test_defaults()
+    test_index_types()
+    print("\nAll tests passed!")
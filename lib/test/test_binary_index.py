@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Test that the sign-bit prefilter with exact rerank returns the flat index's top results and scores"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import faiss
+import numpy as np
+
+from lib.rag.binary_index import BinaryPrefilterIndex, index_signatures, sign_bits, vector_signatures
+from lib.test.fixtures import clustered_vectors
+
+
+def test_binary_prefilter():
+    vectors = clustered_vectors(5000, 96, centers=100, noise=0.5)
+    queries = vectors[:50] + 0.05 * np.random.default_rng(1).standard_normal((50, 96)).astype(np.float32)
+
+    signatures = sign_bits(vectors)
+    assert signatures.shape == (5000, 12) and signatures.dtype == np.uint8
+    assert np.unpackbits(signatures[0])[:8].tolist() == (vectors[0, :8] > 0).astype(int).tolist()
+    assert np.array_equal(vector_signatures(vectors, block_size=700), signatures)
+    print("✓ Signatures pack one bit per dimension, first dimension in the high bit")
+
+    for metric in (faiss.METRIC_L2, faiss.METRIC_INNER_PRODUCT):
+        flat = faiss.IndexFlat(96, metric)
+        flat.add(vectors)
+        assert np.array_equal(index_signatures(flat, block_size=700), signatures)
+
+        for prefilter in (BinaryPrefilterIndex(flat, signatures), BinaryPrefilterIndex(flat, signatures, vectors=vectors)):
+            assert prefilter.ntotal == 5000 and prefilter.d == 96 and prefilter.metric_type == metric
+            expected_scores, expected_positions = flat.search(queries, 10)
+            scores, positions = prefilter.search(queries, 10)
+            recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(positions, expected_positions)])
+            assert recall >= 0.95, recall
+            assert np.array_equal(positions[:, 0], expected_positions[:, 0])
+            assert np.allclose(scores[:, 0], expected_scores[:, 0], atol=1e-5)
+        print(f"✓ {'L2' if metric == faiss.METRIC_L2 else 'inner product'}: recall@10 {recall:.3f}, same top result and scores")
+
+    # Fewer rows than requested results are padded like faiss
+    flat = faiss.IndexFlatL2(96)
+    flat.add(vectors[:5])
+    scores, positions = BinaryPrefilterIndex(flat, signatures[:5]).search(queries[:1], 8)
+    assert sorted(positions[0, :5]) == list(range(5)) and (positions[0, 5:] == -1).all()
+    print("✓ Missing results are padded with -1")
+
+
+if __name__ == '__main__':
+    test_binary_prefilter()
+    print("\nAll tests passed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test that compressed dumps are parsed the same as the plain XML"""
+
+import sys
+import os
+import bz2
+import gzip
+import io
+import shutil
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import lib.io_utils
+from lib.io_utils import _ProcessStream, is_compressed, open_dump, strip_compression_suffix
+from lib.xml_parser import iterate_pages, parse_namespaces
+from lib.test.fixtures import write_dump
+
+PAGES = [
+    {'title': f'巨大数 {i}' if i % 4 else f'User:Tester {i}', 'ns': 0 if i % 4 else 2, 'id': i,
+     'text': f"Text of page {i}. " * (i % 7 + 1)}
+    for i in range(1, 51)
+]
+
+
+def write_compressed_copies(xml_path, out_dir):
+    """Write .gz, .bz2 and, when zstandard and py7zr are installed, .zst and .7z copies of the dump."""
+    paths = []
+    for suffix, opener in (('.gz', gzip.open), ('.bz2', bz2.open)):
+        path = os.path.join(out_dir, 'dump.xml' + suffix)
+        with open(xml_path, 'rb') as f_in, opener(path, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        paths.append(path)
+    
+    try:
+        import zstandard
+        path = os.path.join(out_dir, 'dump.xml.zst')
+        with open(xml_path, 'rb') as f_in, open(path, 'wb') as f_out:
+            f_out.write(zstandard.ZstdCompressor().compress(f_in.read()))
+        paths.append(path)
+    except ImportError:
+        print("⚠ zstandard not installed, skipping .zst")
+    
+    # The format fetch.py --keep-compressed keeps
+    try:
+        import py7zr
+        path = os.path.join(out_dir, 'dump.xml.7z')
+        with py7zr.SevenZipFile(path, 'w') as archive:
+            archive.write(xml_path, 'dump.xml')
+        paths.append(path)
+    except ImportError:
+        print("⚠ py7zr not installed, skipping .7z")
+    
+    return paths
+
+
+def test_compressed_dump():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, PAGES)
+        print(f"Testing compressed dumps with: {xml_path}")
+        
+        expected_pages = [elements for _, elements in iterate_pages(xml_path, show_progress=False)]
+        expected_namespaces = parse_namespaces(xml_path)
+        assert len(expected_pages) == len(PAGES)
+        
+        out_dir = os.path.join(tmp_dir, 'compressed')
+        os.mkdir(out_dir)
+        for path in write_compressed_copies(xml_path, out_dir):
+            assert is_compressed(path)
+            assert strip_compression_suffix(path) == os.path.join(out_dir, 'dump.xml')
+            
+            pages = [elements for _, elements in iterate_pages(path, show_progress=False)]
+            assert pages == expected_pages, f"Pages differ for {path}"
+            assert parse_namespaces(path) == expected_namespaces
+            
+            print(f"✓ {os.path.basename(path)}: {len(pages):,} pages match the XML")
+        
+        # Without the 7z command, py7zr extracts each archive once per run and later opens reuse the copy
+        if os.path.basename(path) == 'dump.xml.7z' and not any(map(shutil.which, ('7z', '7zz', '7za'))):
+            assert len(lib.io_utils._extracted_7z) == 1
+            extracted = lib.io_utils._extracted_7z[os.path.abspath(path)][3]
+            with open_dump(path) as f:
+                assert f.name == extracted
+            assert [name for name in os.listdir(out_dir) if name.startswith('dump_')] == [
+                os.path.basename(os.path.dirname(extracted))]
+            lib.io_utils._remove_extracted_7z()
+            assert not os.path.exists(extracted)
+            print("✓ py7zr extracts a .7z once per run")
+
+
+def test_process_stream_errors():
+    # A decompressor that fails after part of its output is reported, not parsed as short XML
+    stream = io.BufferedReader(_ProcessStream([
+        sys.executable, '-c',
+        "import sys; sys.stdout.write('<mediawiki>'); sys.stderr.write('Data Error'); sys.exit(2)"
+    ]))
+    try:
+        stream.read()
+        assert False, "expected IOError"
+    except IOError as e:
+        assert 'status 2' in str(e) and 'Data Error' in str(e), e
+    stream.close()
+    
+    # Closing after a partial read stops the process without an error
+    stream = io.BufferedReader(_ProcessStream([sys.executable, '-c', "print('x' * 10_000_000)"]))
+    assert stream.read(4096) == b'x' * 4096
+    stream.close()
+    print("✓ Decompressor failures raise with the tool's error output")
+
+
+if __name__ == "__main__":
+    test_compressed_dump()
+    test_process_stream_errors()
+    print("\nAll tests passed!")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Test that near-duplicate chunks collapse onto one embedded representative"""
+
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lib.rag.dedup import ChunkDeduplicator, MinHasher, shingle_hashes
+from lib.rag.vectorstore import add_to_faiss_store
+from lib.test.fixtures import HashEmbeddings
+
+WORDS = ["googol", "Graham's", "number", "is", "a", "large", "function", "ordinal", "巨大数", "の", "定義", "growing"]
+
+
+def random_paragraph(rng, words=120):
+    return " ".join(rng.choice(WORDS) + str(rng.randint(0, 99)) for _ in range(words))
+
+
+def chunk(text, curid, chunk_start=0):
+    return Document(page_content=text, metadata={
+        'curid': curid, 'chunk_index': 0, 'chunk_start': chunk_start, 'chunk_end': chunk_start + len(text)
+    })
+
+
+def deduplicate(deduplicator, chunks):
+    """Find and register chunks as run_streaming_pipeline() does; returns the embedded ones and their IDs."""
+    embedded, ids = [], []
+    for i, doc in enumerate(chunks):
+        signature = deduplicator.find(doc)
+        if signature is None:
+            continue
+        embedded.append(doc)
+        ids.append(f"chunk-{i}")
+        deduplicator.register(signature, ids[-1])
+    return embedded, ids
+
+
+def jaccard(first, second):
+    first, second = set(shingle_hashes(first).tolist()), set(shingle_hashes(second).tolist())
+    return len(first & second) / len(first | second)
+
+
+def test_minhash_estimate():
+    rng = random.Random(0)
+    hasher = MinHasher(num_perm=256)
+    base = random_paragraph(rng)
+    for other in (base.replace(WORDS[0], "googolplex", 1), base[:len(base) // 2] + random_paragraph(rng, 60),
+                  random_paragraph(rng)):
+        estimate = np.mean(hasher.signature(shingle_hashes(base)) == hasher.signature(shingle_hashes(other)))
+        assert abs(estimate - jaccard(base, other)) < 0.1, (estimate, jaccard(base, other))
+    print("✓ MinHash signatures estimate the Jaccard similarity of the shingle sets")
+
+
+def test_chunk_deduplicator():
+    rng = random.Random(1)
+    boilerplate = random_paragraph(rng)
+    distinct = [random_paragraph(rng) for _ in range(20)]
+    # Half shared: similar, but below the threshold
+    half = boilerplate[:len(boilerplate) // 2] + random_paragraph(rng, 60)
+
+    chunks = [chunk(boilerplate, '1')]
+    chunks += [chunk(text, str(10 + i)) for i, text in enumerate(distinct)]
+    chunks.append(chunk(boilerplate, '2', 500))  # exact copy
+    chunks.append(chunk(boilerplate.replace(" ", "  ", 1), '3', 40))  # one character added
+    chunks.append(chunk(half, '4'))
+    assert jaccard(boilerplate, boilerplate.replace(" ", "  ", 1)) > 0.9 > jaccard(boilerplate, half)
+
+    deduplicator = ChunkDeduplicator(threshold=0.9)
+    embedded, ids = deduplicate(deduplicator, chunks)
+    assert [doc.metadata['curid'] for doc in embedded] == ['1'] + [str(10 + i) for i in range(20)] + ['4']
+    assert deduplicator.chunks == len(chunks) and deduplicator.duplicates == 2
+    print("✓ Near-identical chunks collapse; distinct and half-similar chunks are kept")
+
+    # The first chunk seen is the representative and carries the references after apply()
+    vectors = np.asarray(HashEmbeddings().embed_documents([doc.page_content for doc in embedded]), dtype=np.float32)
+    vector_store = add_to_faiss_store(HashEmbeddings(), embedded, ids, vectors)
+    assert deduplicator.apply(vector_store) == 1
+    representative = vector_store.docstore.search(ids[0])
+    assert representative.metadata['duplicates'] == [['2', 500, 500 + len(boilerplate)],
+                                                     ['3', 40, 41 + len(boilerplate)]]
+    assert all('duplicates' not in vector_store.docstore.search(doc_id).metadata for doc_id in ids[1:])
+    print("✓ apply() lists the duplicates on their representative")
+
+    # A chunk only becomes a representative once it is registered
+    deduplicator = ChunkDeduplicator(threshold=0.9)
+    first = deduplicator.find(chunk(boilerplate, '1'))
+    assert deduplicator.find(chunk(boilerplate, '2')) is not None
+    deduplicator.register(first, 'chunk-0')
+    assert deduplicator.find(chunk(boilerplate, '3')) is None
+    assert deduplicator.duplicates == 1 and deduplicator._references == {0: [['3', 0, len(boilerplate)]]}
+    print("✓ find() only matches chunks passed to register()")
+
+
+if __name__ == "__main__":
+    test_minhash_estimate()
+    test_chunk_deduplicator()
+    print("\nAll tests passed!")
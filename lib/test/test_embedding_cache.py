@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test that the embedding cache serves repeated texts, keeps queries apart and evicts least recently used vectors"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from lib.rag.embedding_cache import CachedEmbeddings, EmbeddingCache, text_hash
+from lib.test.fixtures import HashEmbeddings
+
+VECTOR_BYTES = 16 * 4  # HashEmbeddings vectors are 16 float32 values
+
+
+class CountingEmbeddings(HashEmbeddings):
+    """HashEmbeddings that records every text it embeds."""
+
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return HashEmbeddings().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return HashEmbeddings().embed_query(text)
+
+
+def stored_bytes(cache):
+    return cache.conn.execute('SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings').fetchone()[0]
+
+
+def test_hits_and_misses():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'embedding_cache.sqlite')
+        underlying = CountingEmbeddings()
+        embeddings = CachedEmbeddings(underlying, EmbeddingCache(db_path))
+        assert (embeddings.model, embeddings.normalize) == ('test/hash-embeddings', True)
+
+        # Misses are embedded in one call, duplicates within the call once
+        vectors = embeddings.embed_documents(['a', 'b', 'a'])
+        assert underlying.documents == ['a', 'b']
+        assert vectors == HashEmbeddings().embed_documents(['a', 'b', 'a'])
+        assert (embeddings.cache.hits, embeddings.cache.misses, embeddings.cache.added) == (0, 3, 2)
+
+        assert embeddings.embed_documents(['b', 'c', 'a']) == HashEmbeddings().embed_documents(['b', 'c', 'a'])
+        assert underlying.documents == ['a', 'b', 'c']
+        assert (embeddings.cache.hits, embeddings.cache.misses) == (2, 4)
+        print("✓ Repeated texts are served from the cache; only misses are embedded")
+
+        # Queries are cached under '<model>#query' and never served from document vectors
+        query = embeddings.embed_query('a')
+        assert underlying.queries == ['a'] and query == vectors[0]
+        assert embeddings.embed_query('a') == query and underlying.queries == ['a']
+        models = {row[0] for row in embeddings.cache.conn.execute('SELECT model FROM embeddings')}
+        assert models == {'test/hash-embeddings', 'test/hash-embeddings#query'}
+        print("✓ Query vectors are cached apart from document vectors")
+        embeddings.cache.close()
+
+        # Vectors persist; the byte count is read back from the file
+        cache = EmbeddingCache(db_path)
+        assert len(cache) == 4 and cache.total_bytes == stored_bytes(cache) == 4 * VECTOR_BYTES
+        underlying = CountingEmbeddings()
+        assert CachedEmbeddings(underlying, cache).embed_documents(['c']) == HashEmbeddings().embed_documents(['c'])
+        assert underlying.documents == []
+        print("✓ A reopened cache serves the stored vectors")
+        cache.close()
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        limit = 10 * VECTOR_BYTES
+        cache = EmbeddingCache(os.path.join(tmp_dir, 'embedding_cache.sqlite'), max_mb=limit / 1024 / 1024)
+        assert cache.max_bytes == limit
+        embeddings = CachedEmbeddings(CountingEmbeddings(), cache)
+
+        for i in range(10):
+            embeddings.embed_documents([f'text {i}'])
+        assert cache.total_bytes == stored_bytes(cache) == limit and cache.evicted == 0
+
+        # Existing keys are not stored (or counted) twice
+        cache.put_many(embeddings.model, embeddings.normalize, [(text_hash('text 0'), np.zeros(16))])
+        assert cache.total_bytes == limit and cache.added == 10
+
+        # 'text 0' is used again, so the next-oldest vectors go when the limit is passed
+        embeddings.embed_documents(['text 0'])
+        embeddings.embed_documents(['text 10'])
+        assert cache.evicted == 2 and len(cache) == 9
+        assert cache.total_bytes == stored_bytes(cache) == 9 * VECTOR_BYTES <= limit * 0.9
+        remaining = set(cache.get_many(embeddings.model, embeddings.normalize,
+                                       [text_hash(f'text {i}') for i in range(11)]))
+        assert remaining == {text_hash(f'text {i}') for i in [0] + list(range(3, 11))}
+        print("✓ Least recently used vectors are evicted down to 90% of the limit")
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_hits_and_misses()
+    test_lru_eviction()
+    print("\nAll tests passed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test that an interrupted IndexWriter run resumes from its checkpoint without re-embedding"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from lib.rag.checkpoint import EmbeddingCheckpoint
+from lib.rag.pipeline import IndexWriter
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic vectors derived from the text; counts the texts embedded."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        rng = np.random.default_rng(sum(map(ord, text)) + len(text))
+        return rng.standard_normal(8).astype(np.float32).tolist()
+
+
+def make_documents(count):
+    return [Document(page_content=f"chunk {i} " + "x" * (i % 50), metadata={'curid': str(i)}) for i in range(count)]
+
+
+def stored_vectors(vector_store):
+    """Vectors by docstore ID."""
+    return {
+        doc_id: vector_store.index.reconstruct(position)
+        for position, doc_id in vector_store.index_to_docstore_id.items()
+    }
+
+
+def test_resume():
+    documents = make_documents(1000)
+    settings = {'mode': 'body', 'chunk_size': 1200}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint_dir = os.path.join(tmp_dir, 'vector_store_checkpoint')
+
+        # Reference: one uninterrupted run
+        reference = IndexWriter(CountingEmbeddings(), batch_size=10)
+        for i, doc in enumerate(documents):
+            reference.add(doc, f"id-{i}")
+        expected = stored_vectors(reference.close())
+
+        # Run that dies after 700 documents (flushes happen every 160)
+        embeddings = CountingEmbeddings()
+        writer = IndexWriter(embeddings, batch_size=10, checkpoint=EmbeddingCheckpoint(checkpoint_dir, settings), name='body')
+        for i, doc in enumerate(documents[:700]):
+            writer.add(doc, f"id-{i}")
+        completed = writer.checkpoint.count('body')
+        assert completed == 640, completed
+
+        # A torn record at the end of the shard is dropped on resume
+        with open(os.path.join(checkpoint_dir, 'body.shard'), 'ab') as f:
+            f.write(b'partial record')
+
+        embeddings = CountingEmbeddings()
+        checkpoint = EmbeddingCheckpoint(checkpoint_dir, settings, resume=True)
+        assert checkpoint.resumed
+        writer = IndexWriter(embeddings, batch_size=10, checkpoint=checkpoint, name='body')
+        for i, doc in enumerate(documents):
+            writer.add(doc, f"id-{i}")
+        resumed = stored_vectors(writer.close())
+        assert embeddings.embedded == len(documents) - completed, embeddings.embedded
+        assert resumed.keys() == expected.keys()
+        assert all(np.array_equal(resumed[doc_id], expected[doc_id]) for doc_id in expected)
+        print(f"✓ Resumed after {completed} checkpointed documents, embedded only the remaining "
+              f"{embeddings.embedded}; index matches an uninterrupted run")
+
+        # Other settings start over
+        checkpoint = EmbeddingCheckpoint(checkpoint_dir, dict(settings, chunk_size=800), resume=True)
+        assert not checkpoint.resumed and checkpoint.count('body') == 0
+        print("✓ Changed settings discard the checkpoint")
+
+        # A different stream is rejected instead of mixing vectors
+        checkpoint = EmbeddingCheckpoint(checkpoint_dir, settings)
+        writer = IndexWriter(CountingEmbeddings(), batch_size=10, checkpoint=checkpoint, name='body')
+        for i, doc in enumerate(documents[:200]):
+            writer.add(doc, f"id-{i}")
+        writer = IndexWriter(CountingEmbeddings(), batch_size=10,
+                             checkpoint=EmbeddingCheckpoint(checkpoint_dir, settings, resume=True), name='body')
+        try:
+            writer.add(documents[1], "id-1")
+            raise AssertionError("Mismatched document was accepted")
+        except ValueError:
+            print("✓ A stream that differs from the checkpoint is rejected")
+
+
+if __name__ == '__main__':
+    test_resume()
+    print("\nAll tests passed!")
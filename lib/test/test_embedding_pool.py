@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Test that the embedding pool returns the vectors of the single-process path, in input order"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.rag.embedding_pool import EmbeddingPool, split_cores
+from lib.test.fixtures import HashEmbeddings, HashEncoder
+
+
+def test_split_cores():
+    assert split_cores([0, 1, 2, 3, 4, 5, 6, 7], 3) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert split_cores([4, 5], 4) == [[4], [5]]  # Fewer cores than workers: workers share groups
+    assert split_cores([0], 1) == [[0]]
+    print("✓ Cores are split into contiguous groups per worker")
+
+
+def test_embedding_pool():
+    # Newlines are replaced in the workers, as HuggingFaceEmbeddings does
+    texts = [f"Chunk {i}\nof page {i // 3}" for i in range(101)]
+    expected = HashEmbeddings().embed_documents([text.replace("\n", " ") for text in texts])
+
+    pool = EmbeddingPool('test/hash-embeddings', workers=2, batch_size=7, make_local=HashEmbeddings, encoder=HashEncoder)
+    try:
+        assert pool.embed_documents(texts) == expected
+        assert pool.embed_documents(texts[::-1]) == expected[::-1]
+        assert pool.embed_query(texts[5]) == expected[5] and pool.embed_documents([]) == []
+        assert sum(pool.worker_chunks) == 2 * len(texts) + 1
+        assert isinstance(pool.underlying, HashEmbeddings)
+        print(pool.report())
+    finally:
+        pool.close()
+    print(f"✓ {len(texts)} texts in batches of 7 over 2 pinned workers come back in input order")
+
+
+if __name__ == "__main__":
+    test_split_cores()
+    test_embedding_pool()
+    print("\nAll tests passed!")
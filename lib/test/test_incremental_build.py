@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test that an incremental build over a refreshed dump matches a full build of it"""
+
+import sys
+import os
+import tempfile
+import zlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.rag import lazy_load_mediawiki_documents, split_documents
+from lib.rag.index_manifest import IndexManifest, delete_from_store
+from lib.rag.pipeline import IndexWriter, run_streaming_pipeline
+from lib.test.fixtures import HashEmbeddings, write_dump
+
+SETTINGS = {'chunk_size': 200, 'chunk_overlap': 50}
+
+
+def page(page_id, text, keyed):
+    entry = {'title': f'Page {page_id}', 'ns': 0, 'id': page_id, 'text': text}
+    if keyed:
+        entry['revision_id'] = zlib.crc32(text.encode('utf-8'))  # A new revision whenever the text changes
+    else:
+        entry['revision_id'] = entry['sha1'] = None
+    return entry
+
+
+def build(xml_path, manifest, body_store=None, title_store=None):
+    """Stream a dump into the stores and remove stale pages, as xml2vec's create_both_vector_stores() does."""
+    embeddings = HashEmbeddings()
+    body_writer = IndexWriter(embeddings, batch_size=8, vector_store=body_store, name='body')
+    title_writer = IndexWriter(embeddings, batch_size=8, vector_store=title_store, name='title')
+    run_streaming_pipeline(
+        lazy_load_mediawiki_documents(xml_path),
+        split_func=lambda doc: split_documents([doc], **SETTINGS),
+        body_writer=body_writer,
+        title_writer=title_writer,
+        manifest=manifest
+    )
+    body_store, title_store = body_writer.close(), title_writer.close()
+    changes = manifest.finish()
+    delete_from_store(body_store, changes['chunk_ids'])
+    delete_from_store(title_store, changes['title_ids'])
+    return body_store, title_store, changes
+
+
+def contents(vector_store):
+    """(curid, text) of every document in the store, checking index and docstore agree."""
+    doc_ids = list(vector_store.index_to_docstore_id.values())
+    assert vector_store.index.ntotal == len(doc_ids) == len(vector_store.docstore._dict)
+    return sorted((doc.metadata['curid'], doc.page_content) for doc in map(vector_store.docstore.search, doc_ids))
+
+
+def test_incremental_build():
+    body = "Paragraph {i} of page {page_id}, long enough to be split into more than one chunk."
+    old_pages = {page_id: "\n\n".join(body.format(i=i, page_id=page_id) for i in range(6)) for page_id in range(1, 6)}
+    new_pages = dict(old_pages)
+    new_pages[2] += "\n\nAn added paragraph."  # changed
+    del new_pages[3]  # deleted
+    new_pages[6] = "A new page."  # added
+
+    for keyed in (True, False):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            old_path = os.path.join(tmp_dir, 'old.xml')
+            new_path = os.path.join(tmp_dir, 'new.xml')
+            write_dump(old_path, [page(page_id, text, keyed) for page_id, text in old_pages.items()])
+            write_dump(new_path, [page(page_id, text, keyed) for page_id, text in new_pages.items()])
+
+            # The manifest is saved with the full build and loaded by the incremental one
+            manifest_path = os.path.join(tmp_dir, 'vector_store_manifest.json')
+            manifest = IndexManifest(SETTINGS)
+            body_store, title_store, _ = build(old_path, manifest)
+            manifest.save(manifest_path)
+            manifest = IndexManifest.load(manifest_path)
+            body_store, title_store, changes = build(new_path, manifest, body_store, title_store)
+            full_body, full_title, _ = build(new_path, IndexManifest(SETTINGS))
+
+            assert contents(body_store) == contents(full_body)
+            assert contents(title_store) == contents(full_title)
+            assert sorted(manifest.pages) == ['1', '2', '4', '5', '6']
+
+            # Pages without a revision key cannot be compared, so all of them are re-indexed
+            expected = {'added': 1, 'changed': 1, 'deleted': 1, 'unchanged': 3} if keyed else \
+                {'added': 1, 'changed': 4, 'deleted': 1, 'unchanged': 0}
+            assert {key: changes[key] for key in expected} == expected, changes
+        label = "with revision IDs" if keyed else "without revision IDs or sha1"
+        print(f"✓ Incremental build matches a full build ({label}): {expected}")
+
+
+if __name__ == "__main__":
+    test_incremental_build()
+    print("\nAll tests passed!")
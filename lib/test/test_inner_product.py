@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Test that stores hold unit vectors in an inner-product index and search scores are cosine similarities"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from lib.rag.vectorstore import add_to_faiss_store, convert_to_inner_product, search_documents
+from lib.test.fixtures import HashEmbeddings
+
+
+def assert_same_results(results, expected):
+    assert [doc.page_content for doc, _ in results] == [doc.page_content for doc, _ in expected]
+    assert np.allclose([score for _, score in results], [score for _, score in expected], atol=1e-5)
+
+
+def test_inner_product():
+    embeddings = HashEmbeddings()
+    texts = [f"chunk {i}" for i in range(200)]
+    documents = [Document(page_content=text, metadata={'curid': str(i)}) for i, text in enumerate(texts)]
+    ids = [str(i) for i in range(len(texts))]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    # Rows that are not unit length are rescaled before they are indexed
+    scaled = vectors * np.linspace(0.5, 3, len(vectors), dtype=np.float32)[:, None]
+    vector_store = add_to_faiss_store(embeddings, documents, ids, scaled)
+    assert vector_store.index.metric_type == faiss.METRIC_INNER_PRODUCT
+    assert np.allclose(np.linalg.norm(vector_store.index.reconstruct_n(0, len(texts)), axis=1), 1, atol=1e-5)
+    print("✓ New stores index unit vectors by inner product")
+
+    query = "chunk 42"
+    results = search_documents(vector_store, query, k=10)
+    query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+    cosine = {doc.page_content: float(vectors[int(doc.metadata['curid'])] @ query_vector) for doc, _ in results}
+    assert results[0][0].page_content == query and abs(results[0][1] - 1) < 1e-5
+    assert all(abs(score - cosine[doc.page_content]) < 1e-5 for doc, score in results)
+    threshold = results[4][1]
+    assert [doc for doc, _ in search_documents(vector_store, query, k=10, score_threshold=threshold)] == \
+        [doc for doc, _ in results[:5]]
+    print("✓ Scores are cosine similarities and score_threshold keeps the most similar")
+
+    # Stores built with an IndexFlatL2 report the same similarities, before and after conversion
+    legacy = add_to_faiss_store(embeddings, documents, ids, vectors)
+    legacy.index = faiss.IndexFlatL2(vectors.shape[1])
+    legacy.index.add(vectors)
+    assert_same_results(search_documents(legacy, query, k=10), results)
+    assert convert_to_inner_product(legacy) and legacy.index.metric_type == faiss.METRIC_INNER_PRODUCT
+    assert_same_results(search_documents(legacy, query, k=10), results)
+    assert not convert_to_inner_product(legacy)
+    print("✓ L2 stores convert to inner product with unchanged similarities")
+
+
+if __name__ == '__main__':
+    test_inner_product()
+    print("\nAll tests passed!")
@@ -1,61 +1,63 @@
 #!/usr/bin/env python3
-"""Test namespace exclusion based on EXCLUDED_NAMESPACES"""
+"""Test namespace exclusion and redirect handling of the MediaWiki loaders on a fixture dump"""
 
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from lib.rag import load_mediawiki_documents
-from lib.io_utils import find_xml_file
-from lib.xml_parser import parse_namespaces
 import config
-from collections import defaultdict
+from lib.rag import lazy_load_mediawiki_documents
+from lib.rag.custom_loader import EnhancedMWDumpLoader
+from lib.test.fixtures import write_dump
+
+EXCLUDED = config.EXCLUDED_NAMESPACES[0]
+
+NAMESPACES = {'0': '', '2': 'User', '6': EXCLUDED, '10': 'Template'}
+
+PAGES = [
+    {'title': 'Graham number', 'ns': 0, 'id': 1, 'text': "'''Graham's number''' is large."},
+    {'title': 'Graham', 'ns': 0, 'id': 2, 'text': "#REDIRECT [[Graham number]]"},
+    {'title': 'User:Tester', 'ns': 2, 'id': 3, 'text': "Hello, I am a ''tester''."},
+    {'title': f'{EXCLUDED}:Image.png', 'ns': 6, 'id': 4, 'text': "An image page."},
+    {'title': 'Template:Stub', 'ns': 10, 'id': 5, 'text': "This article is a stub."},
+    {'title': f'{EXCLUDED}:Pseudo', 'ns': 0, 'id': 6, 'text': "Excluded prefix in the main namespace."},
+]
+
+
+def titles(documents):
+    return [doc.metadata['title'] for doc in documents]
+
 
 def test_namespace_exclusion():
-    xml_path = find_xml_file()
-    print(f"Testing namespace exclusion from: {xml_path}")
-    print(f"EXCLUDED_NAMESPACES: {config.EXCLUDED_NAMESPACES}")
-    
-    # First, show what namespaces exist
-    namespace_mapping = parse_namespaces(xml_path)
-    print(f"\nAvailable namespaces:")
-    for ns_id, ns_name in sorted(namespace_mapping.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 999):
-        excluded = "EXCLUDED" if ns_name in config.EXCLUDED_NAMESPACES else "included"
-        print(f"  {ns_id}: {ns_name} ({excluded})")
-    
-    # Load documents with new filtering
-    try:
-        print(f"\nLoading documents...")
-        documents = load_mediawiki_documents(xml_path)
-        
-        # Analyze namespace distribution
-        namespace_counts = defaultdict(int)
-        examples = defaultdict(list)
-        
-        for doc in documents[:2000]:  # Sample first 2000
-            title = doc.metadata.get('title', '')
-            
-            if ':' in title:
-                prefix = title.split(':', 1)[0]
-            else:
-                prefix = 'Main'
-            
-            namespace_counts[prefix] += 1
-            if len(examples[prefix]) < 3:
-                examples[prefix].append(title)
-        
-        print(f"\nNamespace distribution (first 2000 docs):")
-        for ns, count in sorted(namespace_counts.items(), key=lambda x: -x[1]):
-            excluded = "❌ SHOULD BE EXCLUDED" if ns in config.EXCLUDED_NAMESPACES else "✓"
-            print(f"  {ns}: {count} {excluded}")
-            for example in examples[ns][:2]:
-                print(f"    - {example}")
-            print()
-            
-    except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, PAGES, NAMESPACES)
+
+        # Namespace filter and redirect skipping, serial and in worker processes
+        for workers in (1, 2):
+            loader = EnhancedMWDumpLoader(xml_path, namespaces=[0, 2], skip_redirects=True, workers=workers)
+            documents = loader.load()
+            assert titles(documents) == ['Graham number', 'User:Tester', f'{EXCLUDED}:Pseudo'], titles(documents)
+            assert [doc.metadata['namespace'] for doc in documents] == [0, 2, 0]
+            assert [doc.metadata['curid'] for doc in documents] == ['1', '3', '6']
+
+            loader = EnhancedMWDumpLoader(xml_path, namespaces=[0], skip_redirects=False, workers=workers)
+            assert titles(loader.load()) == ['Graham number', 'Graham', f'{EXCLUDED}:Pseudo']
+        print("✓ Namespace filter and skip_redirects apply (serial and parallel parsing)")
+
+        loader = EnhancedMWDumpLoader(xml_path, skip_redirects=False)
+        assert loader.namespaces is None and loader.stop_on_error
+        assert titles(loader.load()) == [page['title'] for page in PAGES]
+        print("✓ Without a filter every page loads")
+
+        # EXCLUDED_NAMESPACES drops the namespace and its prefix in other namespaces; redirects are kept
+        documents = list(lazy_load_mediawiki_documents(xml_path))
+        assert titles(documents) == ['Graham number', 'Graham', 'User:Tester', 'Template:Stub']
+        assert documents[0].page_content == "Graham's number is large."
+        print(f"✓ EXCLUDED_NAMESPACES ({EXCLUDED}) are excluded by namespace and title prefix")
+
 
 if __name__ == "__main__":
-    test_namespace_exclusion()
\ No newline at end of file
+    test_namespace_exclusion()
+    print("\nAll tests passed!")
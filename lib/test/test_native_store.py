@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test that a native (memory-mapped) store returns the same documents and scores as the pickled FAISS store"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lib.rag.native_store import NativeVectorStore, find_native_store, get_native_store_path, save_native_store
+from lib.rag.vectorstore import add_to_faiss_store
+from lib.test.fixtures import HashEmbeddings
+
+
+def make_documents(count):
+    documents = []
+    for i in range(count):
+        metadata = {
+            'title': f"ページ {i // 3}",
+            'curid': str(i // 3),
+            'namespace': 0,
+            'chunk_index': i % 3,
+            'chunk_start': (i % 3) * 900,
+            'chunk_end': (i % 3) * 900 + 1200,
+            'section_titles': [f"節 {i % 5}"],
+        }
+        if i % 7 == 0:
+            metadata['duplicates'] = [[str(i + 1000), 0, 1200]]
+        documents.append(Document(page_content=f"チャンク {i} の本文 " * (1 + i % 4), metadata=metadata))
+    return documents
+
+
+def test_native_store():
+    embeddings = HashEmbeddings()
+    documents = make_documents(300)
+    ids = [f"{doc.metadata['curid']}:rev:{doc.metadata['chunk_index']}" for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in documents]), dtype=np.float32)
+    vector_store = add_to_faiss_store(embeddings, documents, ids, vectors)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = get_native_store_path(os.path.join(tmp_dir, 'vector_store.pkl'))
+        info = save_native_store(vector_store, directory)
+        assert info['columns']['chunk_index'] == 'int' and info['columns']['title'] == 'str'
+        assert info['columns']['duplicates'] == 'json'
+        assert find_native_store(os.path.join(tmp_dir, 'vector_store.pkl')) == directory
+
+        store = NativeVectorStore.load(directory)
+        assert len(store) == len(documents)
+        for position in (0, 7, 150, 299):
+            doc = store.document(position)
+            assert doc.page_content == documents[position].page_content
+            assert doc.metadata == documents[position].metadata, (doc.metadata, documents[position].metadata)
+            assert store.index_to_docstore_id[position] == ids[position]
+        assert store.docstore.search(ids[42]).page_content == documents[42].page_content
+        print(f"✓ Texts, IDs and metadata round-trip for {len(store)} chunks")
+
+        # Same neighbours and scores as the in-memory index
+        store.embedding_function = embeddings
+        for query in ("ページ 3", "巨大数", "チャンク 12"):
+            query_vector = np.asarray([embeddings.embed_query(query)], dtype=np.float32)
+            expected_scores, expected_positions = vector_store.index.search(query_vector, 5)
+            results = store.similarity_search_with_score(query, k=5)
+            assert [doc.page_content for doc, _ in results] == [documents[p].page_content for p in expected_positions[0]]
+            assert np.allclose([score for _, score in results], expected_scores[0])
+        print("✓ Search results match the pickled store")
+
+        # The lazy query model exposes the cache key without loading anything
+        lazy = NativeVectorStore.load(directory).embedding_function
+        assert lazy.model_name == 'test/hash-embeddings' and lazy._embeddings is None
+        print("✓ Query model is not loaded when the store is opened")
+
+        rebuilt = store.to_faiss()
+        assert rebuilt.index.ntotal == len(documents)
+        assert rebuilt.docstore.search(ids[10]).metadata == documents[10].metadata
+        print("✓ to_faiss() rebuilds a LangChain store")
+
+
+if __name__ == '__main__':
+    test_native_store()
+    print("\nAll tests passed!")
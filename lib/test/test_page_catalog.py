@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test that the page catalog matches a direct XML parse"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.io_utils import compute_file_sha256
+from lib.xml_parser import iterate_pages, parse_namespaces
+from lib.scan import ScanEngine
+from lib.page_catalog import PageCatalog, CatalogBuilder
+from lib.test.fixtures import write_dump
+
+PAGES = [
+    {'title': 'グラハム数', 'ns': 0, 'id': 1, 'text': "グラハム数は巨大数である。"},
+    {'title': 'Graham number', 'ns': 0, 'id': 2, 'text': "Graham's number is large."},
+    {'title': 'User:Ωmega', 'ns': 2, 'id': 3, 'text': "Ω → ∞", 'revision_id': None, 'sha1': None},
+    {'title': 'Template:Stub', 'ns': 10, 'id': 4, 'text': "", 'revision_id': None},
+    {'title': '巨大数の一覧', 'ns': 0, 'id': 5, 'text': "* 10^100\n* 10^10^100", 'sha1': None},
+]
+
+
+def test_page_catalog():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, PAGES)
+        catalog_dir = Path(tmp_dir) / 'catalog'
+        print(f"Testing page catalog with: {xml_path}")
+        
+        engine = ScanEngine(show_progress=False, build_catalog=False)
+        engine.register(CatalogBuilder(catalog_dir))
+        stats = engine.run(xml_path)
+        
+        # The dump is hashed during the parse
+        assert stats.sha256 == compute_file_sha256(xml_path)
+        
+        catalog = PageCatalog(catalog_dir)
+        assert catalog.namespace_map == parse_namespaces(xml_path)
+        assert catalog.manifest['dump']['sha256'] == stats.sha256
+        
+        rows = list(catalog.iter_pages())
+        pages = [elements for _, elements in iterate_pages(xml_path, show_progress=False)]
+        assert len(rows) == len(pages) == catalog.page_count == len(PAGES)
+        
+        for row, elements in zip(rows, pages):
+            assert row['id'] == elements['id']
+            assert row['title'] == (elements['title'] or '')
+            assert row['ns'] == elements['ns']
+            assert row['revision_id'] == elements['revision_id']
+            assert row['timestamp'] == elements['timestamp']
+            assert row['contributor'] == elements['contributor']
+            if elements['text'] is not None:
+                assert row['text_chars'] == len(elements['text'])
+                assert row['text_bytes'] == len(elements['text'].encode('utf-8'))
+        
+        # Non-ASCII titles survive the string tables; missing revision IDs stay missing
+        assert [row['title'] for row in rows] == [page['title'] for page in PAGES]
+        assert [row['revision_id'] for row in rows] == ['10', '20', None, None, '50']
+        assert catalog.title_to_id()['巨大数の一覧'] == '5'
+        
+        print(f"✓ {catalog.page_count:,} pages match the XML")
+
+
+if __name__ == "__main__":
+    test_page_catalog()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test that PageStore returns the same pages as a full XML parse"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.xml_parser import iterate_pages
+from lib.page_store import PageStore, is_index_valid
+from lib.test.fixtures import write_dump
+
+PAGES = [
+    {'title': f'巨大数 {i}' if i % 5 else f'User:Tester {i}', 'ns': 0 if i % 5 else 2, 'id': i,
+     'text': f"Page {i} quotes <page> and </page> in its text. グラハム数. " * (i % 9 + 1)}
+    for i in range(1, 401)
+]
+
+
+def test_page_store():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        index_dir = Path(tmp_dir) / 'page_index'
+        write_dump(xml_path, PAGES)
+        print(f"Testing page store with: {xml_path}")
+        
+        with PageStore(xml_path, index_dir=index_dir) as store:
+            assert is_index_valid(xml_path, index_dir)
+            
+            page_count = 0
+            for _, elements in iterate_pages(xml_path, show_progress=False):
+                assert store.get(elements['id']) == elements, f"Page {elements['id']} differs"
+                page_count += 1
+            
+            assert len(store) == page_count == len(PAGES)
+            assert store.get(-1) is None
+            assert 'not-a-curid' not in store
+            print(f"✓ {page_count:,} pages fetched by curid match the XML")
+            
+            raw = store.get_raw('7')
+            assert raw.startswith(b'<page>') and raw.rstrip().endswith(b'</page>')
+            assert raw.count(b'<page>') == 1 and '巨大数 7'.encode('utf-8') in raw
+            assert store.get_text(7) == PAGES[6]['text']
+            assert store.get_raw(10_000) is None and store.get_text(10_000) is None
+            print("✓ get_raw() and get_text() return the single page")
+        
+        # A changed dump invalidates the index; it is rebuilt unless build=False
+        write_dump(xml_path, PAGES + [{'title': 'New page', 'ns': 0, 'id': 401, 'text': "Added."}])
+        assert not is_index_valid(xml_path, index_dir)
+        try:
+            PageStore(xml_path, index_dir=index_dir, build=False)
+            assert False, "expected FileNotFoundError"
+        except FileNotFoundError:
+            pass
+        with PageStore(xml_path, index_dir=index_dir) as store:
+            assert is_index_valid(xml_path, index_dir)
+            assert len(store) == len(PAGES) + 1 and store.get_text('401') == "Added."
+        print("✓ A stale index is detected and rebuilt")
+
+
+if __name__ == "__main__":
+    test_page_store()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test that the quantized export formats round-trip and keep the cosine neighbours of float32"""
+
+import sys
+import os
+import base64
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+
+from lib.rag.quantization import VECTOR_FORMATS, create_quantizer, encode_base64, quantization_recall
+from lib.test.fixtures import clustered_vectors
+
+# Minimum recall@10 against float32 on clustered vectors
+MIN_RECALL = {'float32': 1.0, 'float16': 0.99, 'int8': 0.9, 'pq': 0.2}
+
+
+def test_quantization():
+    vectors = clustered_vectors(6000, 64)
+    bytes_per_vector = {'float32': 256, 'float16': 128, 'int8': 64, 'pq': 8}
+
+    for vector_format in VECTOR_FORMATS:
+        quantizer = create_quantizer(vector_format, 64)
+        quantizer.fit(vectors)
+        codes = quantizer.encode(vectors[:5])
+        assert len(base64.b64decode(encode_base64(codes[0]))) == bytes_per_vector[vector_format]
+
+        decoded = quantizer.decode(codes)
+        assert decoded.shape == (5, 64) and decoded.dtype == np.float32
+        cosine = np.sum(decoded * vectors[:5], axis=1) / np.linalg.norm(decoded, axis=1)
+        assert cosine.min() > (0.99 if vector_format != 'pq' else 0.8), (vector_format, cosine)
+
+        recall = quantization_recall(vectors, quantizer)
+        assert recall['recall'] >= MIN_RECALL[vector_format], (vector_format, recall)
+        print(f"✓ {vector_format}: {bytes_per_vector[vector_format]} bytes per vector, recall@{recall['k']} {recall['recall']:.3f}")
+
+    # Values outside the fitted range are clipped instead of wrapping around
+    quantizer = create_quantizer('int8', 64)
+    quantizer.fit(vectors)
+    codes = quantizer.encode(np.vstack([vectors.max(axis=0) + 1, vectors.min(axis=0) - 1]))
+    assert (codes[0] == 127).all() and (codes[1] == -128).all()
+    print("✓ int8 codes are clipped to the fitted range")
+
+
+if __name__ == '__main__':
+    test_quantization()
+    print("\nAll tests passed!")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test that the single-pass scan engine sees the same pages as iterate_pages"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import lib.io_utils
+from lib.xml_parser import iterate_pages, parse_namespaces
+from lib.page_catalog import get_catalog_dir
+from lib.scan import Analyzer, run_analyzers
+from lib.test.fixtures import write_dump
+
+PAGES = [
+    {'title': f'Page {i}' if i % 3 else f'User:Tester {i}', 'ns': 0 if i % 3 else 2, 'id': i, 'text': f"Text of page {i}."}
+    for i in range(1, 31)
+]
+
+
+class PageIdCollector(Analyzer):
+    """Collects page IDs and the namespace map seen by the engine."""
+    
+    def __init__(self, name):
+        self.name = name
+        self.page_ids = []
+        self.namespace_map = None
+    
+    def start(self, context):
+        self.namespace_map = context.namespace_map
+    
+    def process_page(self, elements, page_elem):
+        self.page_ids.append(elements['id'])
+
+
+class CatalogPageIdCollector(PageIdCollector):
+    """PageIdCollector that can also be served from the page catalog."""
+    
+    supports_catalog = True
+    
+    def process_catalog(self, catalog):
+        self.page_ids.extend(row['id'] for row in catalog.iter_pages())
+
+
+class HashCounter:
+    """Counts whole-file hashes of the dump (lib.io_utils.compute_file_sha256 calls)."""
+    
+    def __init__(self):
+        self.calls = 0
+        self._original = lib.io_utils.compute_file_sha256
+    
+    def __enter__(self):
+        def counting(*args, **kwargs):
+            self.calls += 1
+            return self._original(*args, **kwargs)
+        lib.io_utils.compute_file_sha256 = counting
+        return self
+    
+    def __exit__(self, *exc_info):
+        lib.io_utils.compute_file_sha256 = self._original
+
+
+def test_scan_engine():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, PAGES)
+        print(f"Testing scan engine with: {xml_path}")
+        
+        expected_ids = [elements['id'] for _, elements in iterate_pages(xml_path, show_progress=False)]
+        
+        # Two analyzers must share one parse and both see every page
+        first, second = PageIdCollector('first'), PageIdCollector('second')
+        stats = run_analyzers(xml_path, [first, second], show_progress=False)
+        
+        assert stats.page_count == len(expected_ids) == len(PAGES), f"{stats.page_count} != {len(expected_ids)}"
+        assert first.page_ids == expected_ids
+        assert second.page_ids == expected_ids
+        assert first.namespace_map == parse_namespaces(xml_path)
+        # The page catalog builder joins the scan when no catalog exists yet, and writes next to the dump
+        assert set(stats.analyzer_times) == {'first', 'second', 'page-catalog'}
+        assert (get_catalog_dir(xml_path) / 'manifest.json').exists()
+        
+        print(f"✓ {stats.page_count:,} pages, parse {stats.parse_seconds:.2f}s, analyzers {stats.analyzer_seconds:.2f}s")
+        
+        collector = CatalogPageIdCollector('catalog')
+        stats = run_analyzers(xml_path, [collector], show_progress=False)
+        assert stats.source == 'catalog' and collector.page_ids == expected_ids
+        print("✓ Catalog-capable analyzers are served from the catalog")
+        
+        # Same size, new content and mtime: the stale catalog is detected with a single hash of the dump
+        with open(xml_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(xml_path, 'w', encoding='utf-8') as f:
+            f.write(content.replace('Text of page 1.', 'Text of page X.'))
+        os.utime(xml_path, (0, 0))
+        
+        with HashCounter() as counter:
+            collector = CatalogPageIdCollector('catalog')
+            stats = run_analyzers(xml_path, [collector], show_progress=False)
+        assert stats.source == 'xml' and 'page-catalog' in stats.analyzer_times
+        assert counter.calls == 1, f"dump hashed {counter.calls} times"
+        
+        with HashCounter() as counter:
+            stats = run_analyzers(xml_path, [CatalogPageIdCollector('catalog')], show_progress=False)
+        assert stats.source == 'catalog' and counter.calls == 0
+        print("✓ A stale catalog is checked once per scan and rebuilt")
+
+
+if __name__ == "__main__":
+    test_scan_engine()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Test that OffsetTextSplitter chunks like RecursiveCharacterTextSplitter and keeps exact offsets, in characters and tokens"""
+
+import sys
+import os
+import random
+import re
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from lib.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from lib.rag.splitter import (OffsetTextSplitter, TokenBudgetSplitter, WIKI_SEPARATORS, get_model_tokenizer,
+                              split_documents, token_starts)
+from lib.rag.strip_cache import strip_sections
+from lib.test.fixtures import HashEmbeddings
+
+WORDS = ["googol", "Graham's", "number", "is", "a", "large", "巨大数", "の", "定義", "f_ω(n)", "=", "hierarchy"]
+JOINERS = [" ", " ", " ", ", ", ". ", "\n", "\n\n", "\n* ", "\n- ", "\n\n## ", "  "]
+SIZES = [(100, 20), (300, 80), (50, 0), (1200, 300)]
+
+
+class StubTokenizer:
+    """Fast-tokenizer stand-in: words and single symbols (each CJK character) are tokens."""
+
+    is_fast = True
+    TOKEN = re.compile(r'[A-Za-z0-9_]+|\S')
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2  # [CLS] and [SEP]
+
+    def __call__(self, texts, add_special_tokens=True, return_offsets_mapping=False, **kwargs):
+        assert not add_special_tokens and return_offsets_mapping
+        return {'offset_mapping': [[match.span() for match in self.TOKEN.finditer(text)] for text in texts]}
+
+
+class StubSentenceTransformer:
+    tokenizer = StubTokenizer()
+    max_seq_length = 64
+
+
+class StubEmbeddings(HashEmbeddings):
+    """HashEmbeddings backed by a sentence-transformers-like client, as HuggingFaceEmbeddings is."""
+
+    client = StubSentenceTransformer()
+
+
+def random_text(rng):
+    """Wiki-like plain text with every kind of separator, or a run without any."""
+    if rng.random() < 0.1:
+        return "数" * rng.randint(1, 3000)
+    return "".join(rng.choice(WORDS) + rng.choice(JOINERS) for _ in range(rng.randint(1, 400)))
+
+
+def random_wikitext(rng):
+    """Wikitext with nested headings and sections of very different sizes."""
+    parts = [random_text(rng)]
+    for i in range(rng.randint(0, 8)):
+        level = rng.choice([2, 2, 3, 4])
+        parts.append(f"{'=' * level} Heading {i} {'=' * level}\n{random_text(rng)}")
+    return "\n".join(parts)
+
+
+def test_matches_recursive_splitter():
+    rng = random.Random(0)
+    texts = [random_text(rng) for _ in range(200)]
+    for chunk_size, chunk_overlap in SIZES:
+        reference = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=WIKI_SEPARATORS
+        )
+        splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        for text in texts:
+            spans = splitter.split_spans(text)
+            assert [text[start:end] for start, end in spans] == reference.split_text(text)
+            assert all(start < end for start, end in spans)
+            assert spans == sorted(spans)
+    print(f"✓ Same chunks as RecursiveCharacterTextSplitter for {len(texts)} texts × {len(SIZES)} sizes")
+
+
+def test_split_sections():
+    rng = random.Random(1)
+    splitter = OffsetTextSplitter(chunk_size=300, chunk_overlap=80)
+    chunk_count = 0
+    for _ in range(100):
+        text, sections = strip_sections(random_wikitext(rng))
+        chunks = splitter.split_sections(text, sections)
+        chunk_count += len(chunks)
+
+        covered = set()
+        for start, end, first, last in chunks:
+            chunk = text[start:end]
+            assert chunk and chunk == chunk.strip() and len(chunk) <= splitter.chunk_size
+            # A chunk stays inside its sections and only packs whole sections together
+            assert sections[first][0] <= start and end <= sections[last][1]
+            if first != last:
+                assert (start, end) == (sections[first][0], sections[last][1])
+            covered.update(range(first, last + 1))
+        assert covered == set(range(len(sections)))
+
+        document = Document(page_content=text, metadata={'title': 'Test', 'section_spans': sections})
+        for chunk in split_documents([document], chunk_size=300, chunk_overlap=80):
+            metadata = chunk.metadata
+            assert text[metadata['chunk_start']:metadata['chunk_end']] == chunk.page_content
+            assert 'section_spans' not in metadata and metadata['section_titles']
+    print(f"✓ split_sections() keeps section boundaries and exact offsets ({chunk_count} chunks)")
+
+
+def test_split_documents_offsets():
+    rng = random.Random(2)
+    documents = [Document(page_content=random_text(rng), metadata={'title': f'Page {i}'}) for i in range(50)]
+    for chunk_size, chunk_overlap in SIZES:
+        chunks = split_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        for chunk in chunks:
+            text = documents[int(chunk.metadata['title'].split()[1])].page_content
+            assert text[chunk.metadata['chunk_start']:chunk.metadata['chunk_end']] == chunk.page_content
+    print("✓ split_documents() offsets satisfy text[chunk_start:chunk_end] == chunk")
+
+
+def test_get_model_tokenizer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = EmbeddingCache(os.path.join(tmp_dir, 'embedding_cache.sqlite'))
+        tokenizer, max_seq_length = get_model_tokenizer(CachedEmbeddings(StubEmbeddings(), cache))
+        assert tokenizer is StubSentenceTransformer.tokenizer and max_seq_length == 64
+        cache.close()
+    try:
+        get_model_tokenizer(HashEmbeddings())
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert token_starts(StubTokenizer(), ["f_ω(3) = 巨大数", ""]) == [[0, 2, 3, 4, 5, 7, 9, 10, 11], []]
+    print("✓ get_model_tokenizer() unwraps cached embeddings; token_starts() batches offsets")
+
+
+def test_token_budget_splitter():
+    rng = random.Random(3)
+    tokenizer, max_seq_length = get_model_tokenizer(StubEmbeddings())
+    documents = [Document(page_content=random_text(rng), metadata={'title': f'Page {i}'}) for i in range(40)]
+    for i in range(40):
+        text, sections = strip_sections(random_wikitext(rng))
+        documents.append(Document(page_content=text, metadata={'title': f'Page {40 + i}', 'section_spans': sections}))
+
+    splitter = TokenBudgetSplitter(tokenizer, max_seq_length)
+    assert splitter.token_limit == splitter.chunk_tokens == 62
+    chunks = splitter.split_documents(documents)
+    assert len(chunks) == splitter.chunks and splitter.char_truncated_chunks > 0
+
+    starts = {doc.metadata['title']: starts for doc, starts in
+              zip(documents, token_starts(tokenizer, [doc.page_content for doc in documents]))}
+    for chunk in chunks:
+        metadata = chunk.metadata
+        document = documents[int(metadata['title'].split()[1])]
+        start, end = metadata['chunk_start'], metadata['chunk_end']
+        assert document.page_content[start:end] == chunk.page_content
+        assert metadata['chunk_tokens'] == sum(start <= s < end for s in starts[metadata['title']])
+        assert 0 < metadata['chunk_tokens'] <= splitter.token_limit
+
+    # Documents with section spans are still chunked by split_sections(), with token lengths
+    for document in documents[40:]:
+        text, sections = document.page_content, document.metadata['section_spans']
+        title = document.metadata['title']
+        own = [chunk for chunk in chunks if chunk.metadata['title'] == title]
+        expected = splitter.splitter.split_sections(
+            text, sections, lambda start, end: sum(start <= s < end for s in starts[title]))
+        assert [(c.metadata['chunk_start'], c.metadata['chunk_end']) for c in own] == \
+            [(start, end) for start, end, _, _ in expected]
+        assert [c.metadata['section_titles'] for c in own] == \
+            [[title for _, _, title in sections[first:last + 1]] for _, _, first, last in expected]
+    print(f"✓ TokenBudgetSplitter keeps {len(chunks)} chunks within {splitter.token_limit} tokens "
+          f"({splitter.char_truncated_chunks} character chunks would have been truncated)")
+
+
+if __name__ == "__main__":
+    test_matches_recursive_splitter()
+    test_split_sections()
+    test_split_documents_offsets()
+    test_get_model_tokenizer()
+    test_token_budget_splitter()
+    print("\nAll tests passed!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test that parallel, cached stripping matches serial mwparserfromhell stripping"""
+
+import sys
+import os
+import gzip
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.xml_parser import iterate_pages
+from lib.rag import lazy_load_mediawiki_documents
+from lib.rag.pipeline import JsonlPageWriter, run_streaming_pipeline
+from lib.rag.strip_cache import ParallelStripper, StripCache, strip_sections, strip_wikitext
+from lib.test.fixtures import write_dump
+
+WIKITEXT = [
+    "'''{title}''' is a [[large number]] ({{{{val|10|e=100}}}}).<ref>Source {i}</ref>",
+    "== Definition ==\n{title} is defined by [[Knuth's up-arrow notation|arrows]]: 3↑↑↑3.",
+    "{{{{Infobox number|name={title}}}}}\n* Item one\n* Item ''two''\n\n=== 歴史 ===\n[[Category:巨大数]]",
+    "<math>f_{{\\omega}}(n)</math> grows fast.<!-- comment --> [https://example.com link] {i}",
+]
+PAGES = [
+    {'title': f'巨大数 {i}', 'ns': 0, 'id': i,
+     'text': "\n".join(WIKITEXT[(i + j) % 4].format(title=f'巨大数 {i}', i=i) for j in range(i % 4 + 1)),
+     # Pages without a revision ID are cached under their sha1
+     'revision_id': None if i % 3 == 0 else i * 10}
+    for i in range(1, 61)
+]
+
+
+def load_pages(xml_path, limit=200):
+    """Page dicts in the shape EnhancedMWDumpLoader._load_pages() yields."""
+    pages = []
+    for _, elements in iterate_pages(xml_path, show_progress=False):
+        if not elements['text']:
+            continue
+        pages.append({
+            'title': elements['title'],
+            'page_id': elements['id'],
+            'revision_id': elements['revision_id'],
+            'sha1': elements['sha1'],
+            'content': elements['text'],
+        })
+        if len(pages) >= limit:
+            break
+    return pages
+
+
+def test_strip_cache():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, PAGES)
+        print(f"Testing strip cache with: {xml_path}")
+
+        pages = load_pages(xml_path)
+        expected = [strip_wikitext(page['content']) for page in pages]
+        assert len(pages) == len(PAGES) and any(page['revision_id'] is None for page in pages)
+
+        cache = StripCache(os.path.join(tmp_dir, 'strip_cache.sqlite'))
+
+        # Cold cache, process pool
+        stripper = ParallelStripper(workers=2, cache=cache, chunksize=4)
+        texts = [text for _, text in stripper.strip_pages(pages)]
+        assert texts == expected
+        assert stripper.cache_hits == 0
+        assert len(cache) == len(pages)
+        print(f"✓ Parallel stripping matches serial for {len(pages)} pages")
+        print(stripper.report())
+
+        # Warm cache: nothing is re-stripped
+        stripper = ParallelStripper(workers=1, cache=cache)
+        texts = [text for _, text in stripper.strip_pages(pages)]
+        assert texts == expected
+        assert stripper.cache_hits == len(pages) and stripper.stripped == 0
+        print("✓ Unchanged revisions are served from the cache")
+
+        # A new revision of a page misses the cache and replaces the old row
+        changed = dict(pages[0], revision_id='new-revision', content=pages[0]['content'] + "\n'''new'''")
+        stripper = ParallelStripper(workers=1, cache=cache)
+        texts = [text for _, text in stripper.strip_pages([changed] + pages[1:])]
+        assert stripper.stripped == 1
+        assert texts[0] == strip_wikitext(changed['content'])
+        assert len(cache) == len(pages)
+        print("✓ Changed revisions are re-stripped")
+
+        # Section-by-section stripping misses plain rows, then is served from the cache with its spans
+        expected_sections = [strip_sections(page['content']) for page in pages]
+        for _ in range(2):
+            stripper = ParallelStripper(workers=2, cache=cache, chunksize=4, sections=True)
+            results = [(text, page['sections']) for page, text in stripper.strip_pages([dict(page) for page in pages])]
+            assert results == [(text, spans) for text, spans in expected_sections]
+        assert stripper.cache_hits == len(pages)
+        for text, spans in expected_sections:
+            assert all(0 <= start < end <= len(text) for start, end, _ in spans)
+        print("✓ Section spans are stripped in parallel and cached")
+        cache.close()
+
+
+def read_page_texts(jsonl_gz_path):
+    with gzip.open(jsonl_gz_path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line)['text'] for line in f]
+
+
+def test_strip_cache_in_pipeline():
+    pages = [
+        {'title': f'Page {i}', 'ns': 0, 'id': i,
+         'text': f"Lead of '''page {i}'''.\n== History ==\nSee [[Page {i + 1}|the next page]].\n=== Notes ===\n{{{{stub}}}} {i}"}
+        for i in range(1, 41)
+    ]
+    expected = [strip_sections(page['text'])[0] for page in pages]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'fixture.xml')
+        write_dump(xml_path, pages)
+        cache = StripCache(os.path.join(tmp_dir, 'strip_cache.sqlite'))
+
+        # The cache is opened here and used by the loader in the pipeline's producer thread
+        for run in ('cold', 'warm'):
+            jsonl_path = os.path.join(tmp_dir, f'{run}.jsonl.gz')
+            stats = run_streaming_pipeline(
+                lazy_load_mediawiki_documents(xml_path, strip_cache=cache),
+                page_writer=JsonlPageWriter(jsonl_path)
+            )
+            assert stats['documents'] == len(pages)
+            assert read_page_texts(jsonl_path) == expected
+            assert len(cache) == len(pages)
+        print("✓ The strip cache is filled and read from the pipeline's producer thread")
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_strip_cache()
+    test_strip_cache_in_pipeline()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test that export parts are written once to identical plain and gzip files with aligned sections"""
+
+import sys
+import os
+import gzip
+import pickle
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import numpy as np
+from langchain_core.documents import Document
+
+from lib.rag.quantization import create_quantizer
+from lib.rag.vector_export import BINARY_SECTION_ALIGNMENT, TeeWriter, binary_part_sections, write_binary_part
+
+
+def test_vector_export():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000, 32)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'part01.bin')
+        sections = [
+            ('vectors', vectors[:3]),
+            ('records', np.frombuffer(b'{"a":1}', dtype=np.uint8)),
+            ('curid', np.arange(3, dtype='<i4'))
+        ]
+        with TeeWriter(path) as f:
+            offsets = write_binary_part(f, sections)
+        with open(path, 'rb') as f:
+            data = f.read()
+        with gzip.open(path + '.gz', 'rb') as f:
+            assert f.read() == data
+
+    for name, array in sections:
+        offset, length = offsets[name]
+        assert offset % BINARY_SECTION_ALIGNMENT == 0 and length == array.nbytes
+        assert data[offset:offset + length] == array.tobytes()
+    print("✓ Plain and .gz files are identical; sections are 8-byte aligned")
+
+    # Quantizers are pickled into the worker processes with their fitted parameters
+    quantizer = create_quantizer('pq', 32, 4)
+    quantizer.fit(vectors)
+    restored = pickle.loads(pickle.dumps(quantizer))
+    assert np.array_equal(restored.encode(vectors), quantizer.encode(vectors))
+    assert restored.meta() == quantizer.meta()
+    print("✓ A pickled PQ quantizer encodes like the original")
+
+    # Missing and non-numeric curids are written as -1, which the reader treats as "no curid"
+    documents = [Document(page_content="a", metadata={'curid': '12'}), Document(page_content="b", metadata={'curid': None}),
+                 Document(page_content="c", metadata={'curid': 'N/A'}), Document(page_content="d", metadata={})]
+    sections = dict(binary_part_sections(['a', 'b', 'c', 'd'], documents, vectors[:4],
+                                         create_quantizer('float32', 32), binary_signatures=False))
+    assert sections['curid'].tolist() == [12, -1, -1, -1]
+    assert 'chunk_index' not in sections and 'signatures' not in sections
+    print("✓ Documents without a numeric curid are exported with curid -1")
+
+
+if __name__ == '__main__':
+    test_vector_export()
+    print("\nAll tests passed!")
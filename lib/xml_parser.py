@@ -2,12 +2,18 @@
 XML parsing utilities for MediaWiki exports.
 """
 
+import mmap
+import os
+import re
 import xml.etree.ElementTree as ET
-from typing import Dict, Generator, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Generator, List, Optional, Tuple
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
+from .io_utils import open_dump, is_compressed
 
 
 def parse_namespaces(xml_file_path: str) -> Dict[str, str]:
@@ -15,27 +21,28 @@ def parse_namespaces(xml_file_path: str) -> Dict[str, str]:
     Parse namespace definitions from MediaWiki XML file.
     
     Args:
-        xml_file_path: Path to the MediaWiki XML export file
+        xml_file_path: Path to the MediaWiki XML export file (plain or compressed)
         
     Returns:
         Dictionary mapping namespace IDs to names
     """
     namespace_map = {}
     
-    for event, elem in ET.iterparse(xml_file_path, events=('start', 'end')):
-        if event == 'end' and elem.tag.endswith('}namespace'):
-            key = elem.get('key')
-            name = elem.text
-            if key is not None:
-                # Handle main namespace (key="0" has no text content)
-                if name is None or name.strip() == '':
-                    namespace_map[key] = 'Main'
-                else:
-                    namespace_map[key] = name
-            elem.clear()
-        elif event == 'end' and elem.tag.endswith('}page'):
-            # Stop parsing after first page (namespaces are defined before pages)
-            break
+    with open_dump(xml_file_path) as xml_file:
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'end' and elem.tag.endswith('}namespace'):
+                key = elem.get('key')
+                name = elem.text
+                if key is not None:
+                    # Handle main namespace (key="0" has no text content)
+                    if name is None or name.strip() == '':
+                        namespace_map[key] = 'Main'
+                    else:
+                        namespace_map[key] = name
+                elem.clear()
+            elif event == 'end' and elem.tag.endswith('}page'):
+                # Stop parsing after first page (namespaces are defined before pages)
+                break
     
     return namespace_map
 
@@ -70,7 +77,7 @@ def extract_page_elements(page_elem) -> Dict[str, Optional[str]]:
         page_elem: XML element representing a page
         
     Returns:
-        Dictionary with extracted elements (id, title, ns, text, etc.)
+        Dictionary with extracted elements (id, title, ns, text, revision_id, sha1, etc.)
     """
     elements = {}
     
@@ -100,9 +107,20 @@ def extract_page_elements(page_elem) -> Dict[str, Optional[str]]:
     elements['contributor'] = None
     elements['contributor_id'] = None
     elements['timestamp'] = None
+    elements['revision_id'] = None
+    elements['sha1'] = None
     
     revision_elem = page_elem.find(f'.//{config.MEDIAWIKI_NS}revision')
     if revision_elem is not None:
+        # Extract revision ID and content hash
+        rev_id_elem = revision_elem.find(f'{config.MEDIAWIKI_NS}id')
+        if rev_id_elem is not None:
+            elements['revision_id'] = rev_id_elem.text
+        
+        sha1_elem = revision_elem.find(f'{config.MEDIAWIKI_NS}sha1')
+        if sha1_elem is not None:
+            elements['sha1'] = sha1_elem.text
+        
         # Extract timestamp
         timestamp_elem = revision_elem.find(f'.//{config.MEDIAWIKI_NS}timestamp')
         if timestamp_elem is not None:
@@ -130,8 +148,10 @@ def iterate_pages(xml_file_path: str, show_progress: bool = True) -> Generator[T
     """
     Iterator over pages in MediaWiki XML file with progress reporting.
     
+    Compressed dumps (.7z, .gz, .bz2, .zst) are decompressed while parsing.
+    
     Args:
-        xml_file_path: Path to the MediaWiki XML export file
+        xml_file_path: Path to the MediaWiki XML export file (plain or compressed)
         show_progress: Whether to show progress messages
         
     Yields:
@@ -139,17 +159,202 @@ def iterate_pages(xml_file_path: str, show_progress: bool = True) -> Generator[T
     """
     page_count = 0
     
-    for event, elem in ET.iterparse(xml_file_path, events=('start', 'end')):
-        if event == 'end' and elem.tag.endswith('}page'):
+    with open_dump(xml_file_path) as xml_file:
+        for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'end' and elem.tag.endswith('}page'):
+                page_count += 1
+                
+                if show_progress and page_count % config.PROGRESS_INTERVAL == 0:
+                    print(f"Processed {page_count:,} pages...")
+                
+                # Extract page elements
+                elements = extract_page_elements(elem)
+                
+                yield page_count, elements
+                
+                # Clear element to save memory
+                elem.clear()
+
+
+# Byte ranges handed to one worker by iterate_pages_parallel()
+DEFAULT_RANGE_BYTES = 16 * 1024 * 1024
+
+ROOT_NAMESPACE_PATTERN = re.compile(rb'<mediawiki[^>]*\sxmlns="([^"]*)"')
+
+
+def read_root_namespace(xml_file_path: str) -> str:
+    """
+    Read the default XML namespace URI declared on the <mediawiki> root element.
+    
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        
+    Returns:
+        Namespace URI, or an empty string if none is declared
+    """
+    with open_dump(xml_file_path) as f:
+        header = f.read(4096)
+    match = ROOT_NAMESPACE_PATTERN.search(header)
+    return match.group(1).decode('utf-8') if match else ''
+
+
+def split_page_ranges(xml_file_path: str, range_bytes: int = DEFAULT_RANGE_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split a dump into byte ranges that each start at a <page> tag.
+    
+    Page text is XML-escaped, so the literal bytes <page> only occur as tags
+    and boundaries can be found without parsing.
+    
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        range_bytes: Approximate size of each range
+        
+    Returns:
+        List of (start, end) byte offsets covering every page in order
+    """
+    if is_compressed(xml_file_path):
+        raise ValueError(f"Byte ranges require an uncompressed dump: {xml_file_path}")
+    
+    file_size = os.path.getsize(xml_file_path)
+    if file_size == 0:
+        return []
+    
+    starts = []
+    with open(xml_file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            position = data.find(b'<page>')
+            while position != -1:
+                starts.append(position)
+                position = data.find(b'<page>', position + range_bytes)
+    
+    ends = starts[1:] + [file_size]
+    return list(zip(starts, ends))
+
+
+def _parse_page_range(xml_file_path: str, start: int, end: int, xmlns: str,
+                      page_func: Optional[Callable] = None) -> List:
+    """
+    Parse the pages in one byte range (runs in a worker process).
+    
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        start: Offset of the first <page> tag in the range
+        end: Offset just past the range
+        xmlns: Default namespace URI of the dump
+        page_func: Optional function applied to each elements dict in the worker;
+            pages for which it returns None are dropped
+        
+    Returns:
+        List of (page_index, result) tuples, page_index counting from 0 within the range
+    """
+    with open(xml_file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    
+    # The last range also contains the closing </mediawiki> tag
+    last_page_end = data.rfind(b'</page>')
+    if last_page_end == -1:
+        return []
+    data = data[:last_page_end + len(b'</page>')]
+    
+    root_open = f'<mediawiki xmlns="{xmlns}">' if xmlns else '<mediawiki>'
+    parser = ET.XMLPullParser(events=('end',))
+    parser.feed(root_open.encode('utf-8'))
+    parser.feed(data)
+    parser.feed(b'</mediawiki>')
+    
+    results = []
+    page_index = 0
+    for event, elem in parser.read_events():
+        if elem.tag.endswith('}page') or elem.tag == 'page':
+            elements = extract_page_elements(elem)
+            result = page_func(elements) if page_func is not None else elements
+            if result is not None:
+                results.append((page_index, result))
+            page_index += 1
+            elem.clear()
+    parser.close()
+    
+    return results
+
+
+def iterate_pages_parallel(xml_file_path: str, workers: Optional[int] = None, ordered: bool = True,
+                           show_progress: bool = True, range_bytes: int = DEFAULT_RANGE_BYTES,
+                           page_func: Optional[Callable] = None) -> Generator[Tuple[int, Dict[str, Optional[str]]], None, None]:
+    """
+    Iterator over pages parsed in parallel worker processes.
+    
+    The dump is split into byte ranges aligned to <page> tags and each range
+    is parsed by a ProcessPoolExecutor worker. Yields the same values as
+    iterate_pages(), so callers can switch between the two. Compressed dumps
+    cannot be split and are parsed in the calling process.
+    
+    Args:
+        xml_file_path: Path to the MediaWiki XML export file
+        workers: Number of worker processes (default: CPU count)
+        ordered: Yield pages in dump order; if False, ranges are yielded as they finish
+        show_progress: Whether to show progress messages
+        range_bytes: Approximate size of each worker's byte range
+        page_func: Optional picklable (module-level) function applied to each
+            elements dict in the worker; its result is yielded instead, and
+            pages for which it returns None are skipped
+        
+    Yields:
+        Tuple of (page_count, extracted_elements_dict or page_func result)
+    """
+    if is_compressed(xml_file_path):
+        # A compressed stream cannot be split, so parse it in this process
+        if show_progress:
+            print("Compressed dump: parsing in a single process")
+        page_count = 0
+        for _, elements in iterate_pages(xml_file_path, show_progress=False):
+            result = page_func(elements) if page_func is not None else elements
+            if result is None:
+                continue
             page_count += 1
-            
             if show_progress and page_count % config.PROGRESS_INTERVAL == 0:
                 print(f"Processed {page_count:,} pages...")
+            yield page_count, result
+        return
+    
+    workers = workers or os.cpu_count() or 1
+    ranges = split_page_ranges(xml_file_path, range_bytes)
+    xmlns = read_root_namespace(xml_file_path)
+    page_count = 0
+    
+    if show_progress:
+        print(f"Parsing {len(ranges):,} byte ranges with {workers} worker(s)...")
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = iter(ranges)
+        in_flight = deque()
+        
+        def submit_next() -> bool:
+            for start, end in pending:
+                in_flight.append(executor.submit(_parse_page_range, xml_file_path, start, end, xmlns, page_func))
+                return True
+            return False
+        
+        # Keep a bounded window of ranges in flight so parsed pages do not pile up in memory
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+        
+        while in_flight:
+            if ordered:
+                future = in_flight.popleft()
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                in_flight.remove(future)
             
-            # Extract page elements
-            elements = extract_page_elements(elem)
-            
-            yield page_count, elements
+            results = future.result()
+            submit_next()
             
-            # Clear element to save memory
-            elem.clear()
\ No newline at end of file
+            for _, result in results:
+                page_count += 1
+                
+                if show_progress and page_count % config.PROGRESS_INTERVAL == 0:
+                    print(f"Processed {page_count:,} pages...")
+                
+                yield page_count, result
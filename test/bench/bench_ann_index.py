@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark approximate FAISS index types against the exact flat index: recall@k and per-query latency
+
+A fixed query set (a seeded sample of the store's own vectors, held out of
+the indexes, or the phrases of --query-file embedded with the store's
+model) is searched one query at a time, as rag_search.py does. For each
+index type (including the int8, float16 and PQ compressed flat indexes
+and the sign-bit binary prefilter with exact rerank) and search setting
+(nprobe for IVF, efSearch for HNSW, reranked candidates for binary) the
+table shows recall@k against the flat index's exact top k and the
+p50/p99 latency, so the tradeoff can be chosen per site and passed to
+xml2vec.py --index-type.
+"""
+
+import sys
+import os
+import time
+import pickle
+import argparse
+
+import faiss
+import numpy as np
+
+# Add parent directories to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+from lib.rag.ann_index import INDEX_TYPES, index_params, set_search_params, timed_build_index
+from lib.rag.binary_index import BinaryPrefilterIndex, sign_bits
+from lib.rag.native_store import NativeVectorStore, find_native_store
+
+NPROBE_SWEEP = [1, 4, 8, 16, 32, 64]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256]
+RERANK_CANDIDATES_SWEEP = [50, 100, 300, 1000]
+
+
+def load_store(cache_path: str):
+    """Native store if there is one, else the pickled LangChain store."""
+    native_path = find_native_store(cache_path)
+    if native_path:
+        return NativeVectorStore.load(native_path)
+    with open(cache_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def exact_vectors(store) -> np.ndarray:
+    if isinstance(store, NativeVectorStore):
+        return np.ascontiguousarray(store.exact_vectors(), dtype=np.float32)
+    return store.index.reconstruct_n(0, store.index.ntotal)
+
+
+def load_queries(store, vectors: np.ndarray, query_file: str, count: int, seed: int):
+    """
+    Query vectors and the corpus to index.
+
+    Returns:
+        (queries, corpus); sampled queries are removed from the corpus
+    """
+    if query_file:
+        with open(query_file, 'r', encoding='utf-8') as f:
+            phrases = [line.strip() for line in f if line.strip()]
+        queries = np.asarray(store.embedding_function.embed_documents(phrases), dtype=np.float32)
+        return queries, vectors
+    rng = np.random.default_rng(seed)
+    held_out = rng.choice(len(vectors), min(count, len(vectors) // 10), replace=False)
+    keep = np.ones(len(vectors), dtype=bool)
+    keep[held_out] = False
+    return vectors[held_out], vectors[keep]
+
+
+def timed_searches(index, queries: np.ndarray, k: int):
+    """Search one query at a time; returns (result positions, per-query milliseconds)."""
+    positions = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        positions[i] = found[0]
+    return positions, latencies
+
+
+def recall_at_k(found: np.ndarray, exact: np.ndarray) -> float:
+    """Mean fraction of the exact top k that the approximate search returned."""
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)]))
+
+
+def index_size_mb(index) -> float:
+    return faiss.serialize_index(index).nbytes / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark approximate FAISS indexes (recall@k, latency)')
+    parser.add_argument('--cache', default=str(config.DATA_DIR / 'vector_store.pkl'),
+                        help=f'Vector store (pickle or native store; default: {config.DATA_DIR}/vector_store.pkl)')
+    parser.add_argument('--index-types', nargs='+', choices=INDEX_TYPES, default=[t for t in INDEX_TYPES if t != 'flat'],
+                        help='Index types to compare with flat (default: all)')
+    parser.add_argument('--queries', type=int, default=1000, help='Held-out query vectors (default: 1000)')
+    parser.add_argument('--query-file', help='Query phrases, one per line, embedded with the store\'s model')
+    parser.add_argument('--top-k', type=int, default=10, help='k of recall@k (default: 10)')
+    parser.add_argument('--nlist', type=int, help='IVF inverted lists (default: 4 * sqrt(chunks))')
+    parser.add_argument('--pq-m', type=int, help='PQ and IVF-PQ sub-quantizers (default: dimension / 8)')
+    parser.add_argument('--hnsw-m', type=int, default=32, help='HNSW neighbours per node (default: 32)')
+    parser.add_argument('--no-binary', action='store_true', help='Skip the sign-bit binary prefilter rows')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Site: {config.CURRENT_SITE}")
+    store = load_store(args.cache)
+    vectors = exact_vectors(store)
+    queries, corpus = load_queries(store, vectors, args.query_file, args.queries, args.seed)
+    metric = store.index.metric_type
+    print(f"Corpus: {len(corpus):,} vectors x {corpus.shape[1]}, {len(queries):,} queries, k={args.top_k}")
+
+    flat, _ = timed_build_index(corpus, 'flat', {}, metric)
+    exact, flat_latencies = timed_searches(flat, queries, args.top_k)
+
+    rows = [('flat', '', 0.0, index_size_mb(flat), 1.0, flat_latencies)]
+    for index_type in args.index_types:
+        params = index_params(index_type, len(corpus), corpus.shape[1], nlist=args.nlist, pq_m=args.pq_m,
+                              hnsw_m=args.hnsw_m)
+        index, build_seconds = timed_build_index(corpus, index_type, params, metric)
+        size = index_size_mb(index)
+        if index_type == 'hnsw':
+            sweep = [('ef_search', value) for value in EF_SEARCH_SWEEP]
+        elif 'nlist' in params:
+            sweep = [('nprobe', value) for value in NPROBE_SWEEP if value <= params['nlist']]
+        else:
+            sweep = [(None, None)]  # Flat scan over int8, float16 or PQ codes
+        for key, value in sweep:
+            if key:
+                set_search_params(index, {key: value})
+            found, latencies = timed_searches(index, queries, args.top_k)
+            setting = f"{key}={value}" if key else ''
+            rows.append((index_type, setting, build_seconds, size, recall_at_k(found, exact), latencies))
+    
+    if not args.no_binary:
+        start = time.perf_counter()
+        signatures = sign_bits(corpus)
+        build_seconds = time.perf_counter() - start
+        for candidates in RERANK_CANDIDATES_SWEEP:
+            index = BinaryPrefilterIndex(flat, signatures, vectors=corpus, candidates=candidates)
+            found, latencies = timed_searches(index, queries, args.top_k)
+            rows.append(('binary', f"rerank={candidates}", build_seconds, signatures.nbytes / 1024 / 1024,
+                         recall_at_k(found, exact), latencies))
+
+    print()
+    print(f"{'index':<9} {'search':<14} {'build s':>8} {'size MB':>8} {f'recall@{args.top_k}':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for index_type, setting, build_seconds, size, recall, latencies in rows:
+        print(f"{index_type:<9} {setting:<14} {build_seconds:>8.1f} {size:>8.1f} {recall:>10.3f} "
+              f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark OffsetTextSplitter against the old find()-based chunk position recovery
+
+Runs on the largest pages listed in data/<site>/analysis/large-pages.md
+(falling back to the largest pages in the dump if the titles are not
+found), read through PageStore and stripped like the RAG loader does.
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+
+# Add parent directories to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+from lib.io_utils import find_xml_file
+from lib.page_store import PageStore
+from lib.xml_parser import iterate_pages
+from lib.rag.splitter import OffsetTextSplitter, WIKI_SEPARATORS
+from lib.rag.strip_cache import strip_wikitext
+
+LARGE_PAGES_FILE = config.DATA_DIR / 'analysis' / 'large-pages.md'
+ROW_PATTERN = re.compile(r'^\| \d+ \| [\d,]+ \| \[(.+?)\]\(')
+
+
+def read_large_page_titles(path):
+    """Titles from the table in large-pages.md, largest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [match.group(1) for match in map(ROW_PATTERN.match, f) if match]
+
+
+def select_pages(xml_path, count):
+    """Pick (curid, title) for the largest pages, by large-pages.md when its titles are in the dump."""
+    title_to_id = {}
+    sizes = []
+    for _, elements in iterate_pages(xml_path, show_progress=False):
+        if elements['id'] and elements['title']:
+            title_to_id[elements['title']] = elements['id']
+            sizes.append((len(elements['text'] or ''), elements['id'], elements['title']))
+
+    listed = [(title_to_id[title], title) for title in read_large_page_titles(LARGE_PAGES_FILE) if title in title_to_id]
+    if listed:
+        print(f"Using {min(count, len(listed))} pages from {LARGE_PAGES_FILE}")
+        return listed[:count]
+
+    print(f"⚠ No titles from {LARGE_PAGES_FILE} found in the dump, using its largest pages")
+    sizes.sort(reverse=True)
+    return [(curid, title) for _, curid, title in sizes[:count]]
+
+
+def find_positions(text, chunks):
+    """Old split_documents() position recovery: re-search each chunk from just after the previous start."""
+    positions = []
+    current_pos = 0
+    for chunk_text in chunks:
+        chunk_start = text.find(chunk_text, current_pos)
+        if chunk_start == -1:
+            chunk_start = current_pos
+        positions.append((chunk_start, chunk_start + len(chunk_text)))
+        current_pos = chunk_start + 1
+    return positions
+
+
+def load_langchain_splitter(chunk_size, chunk_overlap):
+    """The old RecursiveCharacterTextSplitter configuration, or None if langchain is not installed."""
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        return None
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+        separators=WIKI_SEPARATORS
+    )
+
+
+def _timed(func, *args):
+    """Run func once and return the elapsed seconds."""
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the offset-preserving text splitter')
+    parser.add_argument('--pages', type=int, default=20, help='Number of largest pages to split (default: 20)')
+    parser.add_argument('--chunk-size', type=int, default=1200)
+    parser.add_argument('--chunk-overlap', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per page (best is kept)')
+    args = parser.parse_args()
+
+    xml_path = find_xml_file()
+    print(f"Dump: {xml_path}")
+
+    splitter = OffsetTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    langchain_splitter = load_langchain_splitter(args.chunk_size, args.chunk_overlap)
+    if langchain_splitter is None:
+        print("⚠ langchain_text_splitters not installed, timing only the find() position recovery")
+
+    pages = select_pages(xml_path, args.pages)
+    totals = {'offset': 0.0, 'find': 0.0, 'old': 0.0}
+    with PageStore(xml_path) as store:
+        print()
+        print(f"{'chars':>10} {'chunks':>7} {'offset ms':>10} {'find ms':>9} {'old ms':>9} {'misplaced':>9}  title")
+
+        for curid, title in pages:
+            text = strip_wikitext(store.get_text(curid) or '')
+
+            offset_seconds = min(_timed(splitter.split_spans, text) for _ in range(args.repeat))
+            spans = splitter.split_spans(text)
+            assert all(end - start <= args.chunk_size for start, end in spans)
+            chunks = [text[start:end] for start, end in spans]
+
+            find_seconds = min(_timed(find_positions, text, chunks) for _ in range(args.repeat))
+            misplaced = sum(1 for found, exact in zip(find_positions(text, chunks), spans) if found != exact)
+
+            old_seconds = 0.0
+            if langchain_splitter is not None:
+                old_seconds = min(
+                    _timed(lambda: find_positions(text, langchain_splitter.split_text(text)))
+                    for _ in range(args.repeat)
+                )
+
+            totals['offset'] += offset_seconds
+            totals['find'] += find_seconds
+            totals['old'] += old_seconds
+            print(f"{len(text):>10,} {len(spans):>7,} {offset_seconds * 1000:>10.1f} {find_seconds * 1000:>9.1f} "
+                  f"{old_seconds * 1000:>9.1f} {misplaced:>9}  {title}")
+
+    print()
+    print(f"Total: offset splitter {totals['offset'] * 1000:.1f} ms, "
+          f"find() recovery alone {totals['find'] * 1000:.1f} ms"
+          + (f", old split + find {totals['old'] * 1000:.1f} ms" if langchain_splitter is not None else ""))
+
+
+if __name__ == '__main__':
+    main()
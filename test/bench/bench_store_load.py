@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark rag_search.py cold start: pickle.load of the LangChain store vs opening the native store
+
+Each format is opened in a fresh interpreter, which then runs a few
+searches with random query vectors (no embedding model is loaded), so the
+open time and the resident memory after the searches can be compared. The
+native store maps its files instead of reading them, so its RSS only
+grows by the pages the searches touch.
+"""
+
+import sys
+import os
+import json
+import time
+import pickle
+import argparse
+import subprocess
+
+import numpy as np
+
+# Add parent directories to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (Linux), or 0 if unavailable."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return 0.0
+
+
+def measure(store_format: str, cache_path: str, searches: int, k: int) -> dict:
+    """Open the store in this process and run `searches` random-vector searches."""
+    from lib.rag.native_store import NativeVectorStore, find_native_store
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    if store_format == 'native':
+        store = NativeVectorStore.load(find_native_store(cache_path))
+    else:
+        with open(cache_path, 'rb') as f:
+            store = pickle.load(f)
+    open_seconds = time.perf_counter() - start
+    rss_open = current_rss_mb()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(searches):
+        vector = rng.standard_normal(store.index.d).astype(np.float32)
+        store.similarity_search_with_score_by_vector(vector.tolist(), k=k)
+    search_seconds = (time.perf_counter() - start) / max(searches, 1)
+
+    return {
+        'format': store_format,
+        'open_seconds': open_seconds,
+        'search_ms': search_seconds * 1000,
+        'rss_open_mb': rss_open - rss_before,
+        'rss_search_mb': current_rss_mb() - rss_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vector store cold start (pickle vs native)')
+    parser.add_argument('--cache', default=str(config.DATA_DIR / 'vector_store.pkl'),
+                        help=f'Pickled store; its native store is <name>_native/ (default: {config.DATA_DIR}/vector_store.pkl)')
+    parser.add_argument('--searches', type=int, default=10, help='Searches after opening (default: 10)')
+    parser.add_argument('--top-k', type=int, default=10, help='Results per search (default: 10)')
+    parser.add_argument('--measure', choices=['pickle', 'native'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.cache, args.searches, args.top_k)))
+        return
+
+    print(f"Site: {config.CURRENT_SITE}")
+    print(f"Store: {args.cache}")
+    results = []
+    for store_format in ('pickle', 'native'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--measure', store_format, '--cache', args.cache,
+             '--searches', str(args.searches), '--top-k', str(args.top_k)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print()
+    print(f"{'format':<8} {'open s':>9} {'search ms':>10} {'RSS open MB':>12} {'RSS search MB':>14}")
+    for result in results:
+        print(f"{result['format']:<8} {result['open_seconds']:>9.3f} {result['search_ms']:>10.2f} "
+              f"{result['rss_open_mb']:>12.1f} {result['rss_search_mb']:>14.1f}")
+    pickle_result, native_result = results
+    print(f"Cold start speedup: {pickle_result['open_seconds'] / max(native_result['open_seconds'], 1e-9):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark vector store construction: per-batch FAISS.from_documents + merge_from vs one preallocated pass
+
+The chunks are embedded once with the real model (length-sorted batches,
+timed), then both construction strategies are timed on the same vectors,
+so the comparison isolates the index/docstore cost that grows with corpus
+size. With --full, the old path is also run end to end with the model
+(unsorted batches), which adds the padding cost of unsorted batches.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+
+# Add parent directories to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import config
+from lib.io_utils import find_xml_file
+from lib.rag.loader import lazy_load_mediawiki_documents
+from lib.rag.splitter import split_documents
+from lib.rag.vectorstore import DEFAULT_EMBED_BATCH_SIZE, add_to_faiss_store, create_embeddings, embed_texts
+from langchain_community.vectorstores import FAISS
+
+
+class PrecomputedEmbeddings:
+    """Serves vectors computed earlier by text, so construction can be timed without the model."""
+
+    def __init__(self, texts, vectors):
+        self._vectors = dict(zip(texts, vectors))
+
+    def embed_documents(self, texts):
+        return [self._vectors[text].tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self._vectors[text].tolist()
+
+
+def load_chunks(xml_path, count):
+    """Split pages from the dump until `count` chunks are collected (unique texts)."""
+    chunks = []
+    seen = set()
+    for doc in lazy_load_mediawiki_documents(xml_path):
+        for chunk in split_documents([doc]):
+            if chunk.page_content not in seen:
+                seen.add(chunk.page_content)
+                chunks.append(chunk)
+        if len(chunks) >= count:
+            break
+    return chunks[:count]
+
+
+def build_merged(documents, embeddings, batch_size):
+    """The old create_vector_store(): one store per batch, merged into the accumulated store."""
+    vector_store = None
+    for i in range(0, len(documents), batch_size):
+        batch = documents[i:i + batch_size]
+        if i == 0:
+            vector_store = FAISS.from_documents(batch, embeddings)
+        else:
+            vector_store.merge_from(FAISS.from_documents(batch, embeddings))
+    return vector_store
+
+
+def build_preallocated(documents, embeddings, batch_size):
+    """The new create_vector_store(): one float32 matrix, one index.add(), one docstore update."""
+    vectors = embed_texts(embeddings, [doc.page_content for doc in documents], batch_size)
+    ids = [str(i) for i in range(len(documents))]
+    return add_to_faiss_store(embeddings, documents, ids, vectors)
+
+
+def _timed(func, *args):
+    """Run func once and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def check_same_vectors(store_a, store_b):
+    """Largest difference between the vectors the two stores hold for the same chunk text."""
+    def by_text(store):
+        return {
+            store.docstore.search(doc_id).page_content: store.index.reconstruct(position)
+            for position, doc_id in store.index_to_docstore_id.items()
+        }
+    a, b = by_text(store_a), by_text(store_b)
+    assert a.keys() == b.keys()
+    return max(float(np.abs(a[text] - b[text]).max()) for text in a)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FAISS vector store construction')
+    parser.add_argument('--xml-file', help='Dump to read chunks from (default: current site, see config.yml)')
+    parser.add_argument('--chunks', type=int, default=100000, help='Number of chunks to index (default: 100000)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_EMBED_BATCH_SIZE,
+                        help=f'Embedding batch size (default: {DEFAULT_EMBED_BATCH_SIZE})')
+    parser.add_argument('--embedding-model', default='sentence-transformers/paraphrase-multilingual-mpnet-base-v2')
+    parser.add_argument('--full', action='store_true', help='Also run the old path end to end with the model')
+    args = parser.parse_args()
+
+    xml_path = args.xml_file or find_xml_file()
+    print(f"Site: {config.CURRENT_SITE}")
+    print(f"Dump: {xml_path}")
+
+    documents, load_seconds = _timed(load_chunks, xml_path, args.chunks)
+    print(f"Loaded {len(documents):,} chunks in {load_seconds:.1f}s")
+    if len(documents) < args.chunks:
+        print(f"⚠ The dump has only {len(documents):,} unique chunks")
+
+    embeddings = create_embeddings(args.embedding_model)
+    texts = [doc.page_content for doc in documents]
+    vectors, embed_seconds = _timed(embed_texts, embeddings, texts, args.batch_size)
+    print(f"Embedded in {embed_seconds:.1f}s with length-sorted batches of {args.batch_size}")
+
+    # Construction only, on the same vectors
+    precomputed = PrecomputedEmbeddings(texts, vectors)
+    merged, merged_seconds = _timed(build_merged, documents, precomputed, args.batch_size)
+    preallocated, preallocated_seconds = _timed(build_preallocated, documents, precomputed, args.batch_size)
+    assert merged.index.ntotal == preallocated.index.ntotal == len(documents)
+    difference = check_same_vectors(merged, preallocated)
+
+    print()
+    print(f"{'construction':<34} {'seconds':>9}")
+    print(f"{'from_documents + merge_from':<34} {merged_seconds:>9.2f}")
+    print(f"{'preallocated matrix, one add':<34} {preallocated_seconds:>9.2f}")
+    print(f"Speedup: {merged_seconds / max(preallocated_seconds, 1e-9):.1f}x (max vector difference {difference:.2e})")
+
+    if args.full:
+        _, old_seconds = _timed(build_merged, documents, embeddings, args.batch_size)
+        _, new_seconds = _timed(build_preallocated, documents, embeddings, args.batch_size)
+        print()
+        print(f"End to end with the model: old {old_seconds:.1f}s, new {new_seconds:.1f}s "
+              f"({old_seconds / max(new_seconds, 1e-9):.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtimeバックエンドとtorch（sentence-transformers）のembedding一致性テスト
+
+同じテキストをtorchとONNX（fp32、int8量子化）でembeddingし、
+テキストごとのコサイン類似度と処理速度を比較する。
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Add parent directories to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lib.rag.onnx_embeddings import ONNX_QUANTIZED_FILE, OnnxEmbeddings, find_onnx_file
+from lib.rag.vectorstore import create_embeddings
+
+MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-mpnet-base-v2'
+
+# 合格ライン（テキストごとの最小コサイン類似度）
+MIN_COSINE = {'fp32': 0.999, 'int8': 0.97}
+
+
+def load_texts(xml_file, count):
+    """テストテキスト（固定テキスト + ダンプのチャンク）"""
+    texts = [
+        "グラハム数",
+        "巨大数は、気の遠くなるほど大きな有限の数である。",
+        "Hello World",  # 英語（基準）
+        "数学",  # 短い日本語
+    ]
+    if xml_file and count:
+        from lib.rag.loader import lazy_load_mediawiki_documents
+        from lib.rag.splitter import split_documents
+        for doc in lazy_load_mediawiki_documents(xml_file):
+            texts.extend(chunk.page_content for chunk in split_documents([doc]))
+            if len(texts) >= count + 4:
+                break
+    return texts
+
+
+def embed_timed(embeddings, texts):
+    """embeddingと処理時間（秒）"""
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    return vectors, time.perf_counter() - start
+
+
+def compare(label, torch_vectors, onnx_vectors, texts):
+    """テキストごとのコサイン類似度（どちらも正規化済みなので内積）"""
+    cosines = np.sum(torch_vectors * onnx_vectors, axis=1)
+    worst = int(np.argmin(cosines))
+    print(f"\n=== torch vs ONNX {label} ===")
+    print(f"コサイン類似度: 最小 {cosines.min():.6f}, 平均 {cosines.mean():.6f}")
+    print(f"最小のテキスト: '{texts[worst][:40]}'")
+    print(f"最大絶対差: {np.max(np.abs(torch_vectors - onnx_vectors)):.6f}")
+
+    # 近傍の一致（各テキストの最近傍が同じか）
+    torch_neighbors = np.argsort(-(torch_vectors @ torch_vectors.T), axis=1)[:, 1]
+    onnx_neighbors = np.argsort(-(onnx_vectors @ onnx_vectors.T), axis=1)[:, 1]
+    print(f"最近傍の一致率: {np.mean(torch_neighbors == onnx_neighbors):.1%}")
+    return float(cosines.min())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ONNX Runtime embeddings with sentence-transformers')
+    parser.add_argument('--onnx-model', required=True,
+                        help='Local ONNX export (e.g. Xenova/paraphrase-multilingual-mpnet-base-v2)')
+    parser.add_argument('--xml-file', help='Dump to take additional chunks from')
+    parser.add_argument('--chunks', type=int, default=0, help='Number of dump chunks to add (default: 0)')
+    args = parser.parse_args()
+
+    texts = load_texts(args.xml_file, args.chunks)
+    print(f"テキスト数: {len(texts)}")
+
+    torch_vectors, torch_seconds = embed_timed(create_embeddings(MODEL_NAME), texts)
+    print(f"torch: {torch_seconds:.2f}s ({len(texts) / torch_seconds:.1f} texts/s)")
+
+    variants = [('fp32', False)]
+    try:
+        find_onnx_file(Path(args.onnx_model), quantized=True)
+        variants.append(('int8', True))
+    except FileNotFoundError:
+        print(f"⚠ {ONNX_QUANTIZED_FILE} がないため int8 は比較しません")
+
+    failed = False
+    for label, quantized in variants:
+        onnx_vectors, onnx_seconds = embed_timed(OnnxEmbeddings(args.onnx_model, quantized=quantized), texts)
+        print(f"\nONNX {label}: {onnx_seconds:.2f}s ({len(texts) / onnx_seconds:.1f} texts/s, "
+              f"torch比 {torch_seconds / onnx_seconds:.2f}x)")
+        min_cosine = compare(label, torch_vectors, onnx_vectors, texts)
+        if min_cosine < MIN_COSINE[label]:
+            print(f"❌ 最小コサイン類似度 {min_cosine:.6f} < {MIN_COSINE[label]}")
+            failed = True
+        else:
+            print(f"✅ 一致（最小コサイン類似度 >= {MIN_COSINE[label]}）")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
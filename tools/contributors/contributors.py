@@ -6,11 +6,9 @@ This script analyzes MediaWiki XML exports to identify
 contributors with the highest page creation counts for content curation purposes.
 """
 
-import os
 import random
 import urllib.parse
-import xml.etree.ElementTree as ET
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from collections import defaultdict
 
 # Import shared library modules
@@ -18,10 +16,9 @@ import sys
 sys.path.append('../../')
 import config
 from lib.exclusions import load_exclusions, should_exclude_page_by_namespace_id, convert_excluded_namespaces_to_ids, should_exclude_contributor
-from lib.xml_parser import iterate_pages, extract_page_elements
-from lib.formatting import format_number
-from lib.io_utils import get_fetch_date, get_xml_file, check_xml_exists
-from lib.reporting import generate_license_footer, write_markdown_report
+from lib.io_utils import get_xml_file, check_xml_exists
+from lib.reporting import format_scan_cost
+from lib.scan import Analyzer, ScanContext, ScanStats, run_analyzers
 
 # Local configuration - output to site-specific analysis directory
 OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'contributors.md')
@@ -37,6 +34,96 @@ HIGH_VOLUME_THRESHOLD = 1000  # Minimum pages to be considered high-volume contr
 # Removed - now imported from lib.exclusions
 
 
+class ContributorsAnalyzer(Analyzer):
+    """Scan engine plugin that counts page creations per contributor."""
+    
+    name = 'contributors'
+    
+    def __init__(self, output_file: str = OUTPUT_FILE):
+        self.output_file = output_file
+        self.contributors = defaultdict(int)
+        self.contributor_pages = defaultdict(list)
+        self.excluded_namespace_ids = []
+        self.excluded_usernames = []
+    
+    def start(self, context: ScanContext) -> None:
+        # Load excluded namespaces and usernames
+        excluded_namespaces, self.excluded_usernames = load_exclusions()
+        if excluded_namespaces:
+            print(f"Excluding namespaces: {excluded_namespaces}")
+        if self.excluded_usernames:
+            print(f"Excluding usernames: {self.excluded_usernames}")
+        
+        # Namespace definitions come from the same scan
+        self.excluded_namespace_ids = convert_excluded_namespaces_to_ids(excluded_namespaces, context.namespace_map)
+    
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        namespace_uri = config.MEDIAWIKI_NS
+        
+        # Find all revisions and get the earliest one (original creator)
+        revisions = page_elem.findall(f'{namespace_uri}revision')
+        if not revisions or elements['title'] is None or elements['id'] is None:
+            return
+        
+        title = elements['title'] or "Unknown"
+        page_id = elements['id'] or "0"
+        namespace = elements['ns'] or "0"
+        
+        # Skip excluded pages using namespace ID
+        if should_exclude_page_by_namespace_id(namespace, self.excluded_namespace_ids):
+            return
+        
+        # Sort revisions by timestamp to find the first one
+        revision_data = []
+        for revision in revisions:
+            timestamp_elem = revision.find(f'{namespace_uri}timestamp')
+            contributor_elem = revision.find(f'{namespace_uri}contributor')
+            
+            if timestamp_elem is not None and contributor_elem is not None:
+                timestamp = timestamp_elem.text or ""
+                
+                # Get contributor name (either username or IP)
+                username_elem = contributor_elem.find(f'{namespace_uri}username')
+                ip_elem = contributor_elem.find(f'{namespace_uri}ip')
+                
+                if username_elem is not None and username_elem.text:
+                    contributor_name = username_elem.text
+                elif ip_elem is not None and ip_elem.text:
+                    contributor_name = f"IP:{ip_elem.text}"
+                else:
+                    contributor_name = "Unknown"
+                
+                revision_data.append((timestamp, contributor_name))
+        
+        # Find the earliest revision (page creator)
+        if revision_data:
+            revision_data.sort()  # Sort by timestamp
+            earliest_contributor = revision_data[0][1]
+            
+            # Skip excluded contributors
+            if should_exclude_contributor(earliest_contributor, self.excluded_usernames):
+                return
+            
+            self.contributors[earliest_contributor] += 1
+            self.contributor_pages[earliest_contributor].append((title, page_id))
+    
+    def finish(self, stats: ScanStats) -> None:
+        print(f"Total pages processed: {stats.page_count}")
+        print(f"Unique contributors found: {len(self.contributors)}")
+        
+        if not self.contributors:
+            print("No contributors found in XML file")
+            return
+        
+        # No output file means the caller only wants the collected data
+        if self.output_file is None:
+            return
+        
+        print("Generating contributors report...")
+        generate_markdown_report(dict(self.contributors), dict(self.contributor_pages), self.output_file, scan_stats=stats)
+        print(f"Found {len(self.contributors)} contributors")
+
+
 def analyze_contributors(xml_file_path: str) -> Tuple[Dict[str, int], Dict[str, List[Tuple[str, str]]]]:
     """
     Analyze XML file to extract contributor page creation counts and page examples.
@@ -49,101 +136,13 @@ def analyze_contributors(xml_file_path: str) -> Tuple[Dict[str, int], Dict[str,
         - contributor_counts: Dictionary mapping contributor names to page creation counts
         - contributor_pages: Dictionary mapping contributor names to lists of (page_title, page_id) tuples
     """
-    contributors = defaultdict(int)
-    contributor_pages = defaultdict(list)
-    
     print(f"Analyzing {xml_file_path}...")
-    
-    # Load excluded namespaces and usernames
-    excluded_namespaces, excluded_usernames = load_exclusions()
-    if excluded_namespaces:
-        print(f"Excluding namespaces: {excluded_namespaces}")
-    if excluded_usernames:
-        print(f"Excluding usernames: {excluded_usernames}")
-    
-    # Parse namespace definitions for ID conversion
-    from lib.xml_parser import parse_namespaces
-    namespace_map = parse_namespaces(xml_file_path)
-    excluded_namespace_ids = convert_excluded_namespaces_to_ids(excluded_namespaces, namespace_map)
-    
-    # Use iterparse for memory-efficient parsing of large XML files
-    context = ET.iterparse(xml_file_path, events=('start', 'end'))
-    context = iter(context)
-    event, root = next(context)
-    
-    # Get namespace URI from root element
-    namespace_uri = root.tag.split('}')[0] + '}' if root.tag.startswith('{') else ''
-    
-    page_count = 0
-    
-    for event, elem in context:
-        if event == 'end' and elem.tag == f'{namespace_uri}page':
-            page_count += 1
-            if page_count % 10000 == 0:
-                print(f"Processed {page_count} pages...")
-            
-            # Extract page information
-            title_elem = elem.find(f'{namespace_uri}title')
-            ns_elem = elem.find(f'{namespace_uri}ns')
-            id_elem = elem.find(f'{namespace_uri}id')
-            
-            # Find all revisions and get the earliest one (original creator)
-            revisions = elem.findall(f'{namespace_uri}revision')
-            if revisions and title_elem is not None and id_elem is not None:
-                title = title_elem.text or "Unknown"
-                page_id = id_elem.text or "0"
-                namespace = ns_elem.text or "0"
-                
-                # Skip excluded pages using namespace ID
-                if should_exclude_page_by_namespace_id(namespace, excluded_namespace_ids):
-                    elem.clear()
-                    continue
-                
-                # Sort revisions by timestamp to find the first one
-                revision_data = []
-                for revision in revisions:
-                    timestamp_elem = revision.find(f'{namespace_uri}timestamp')
-                    contributor_elem = revision.find(f'{namespace_uri}contributor')
-                    
-                    if timestamp_elem is not None and contributor_elem is not None:
-                        timestamp = timestamp_elem.text or ""
-                        
-                        # Get contributor name (either username or IP)
-                        username_elem = contributor_elem.find(f'{namespace_uri}username')
-                        ip_elem = contributor_elem.find(f'{namespace_uri}ip')
-                        
-                        if username_elem is not None and username_elem.text:
-                            contributor_name = username_elem.text
-                        elif ip_elem is not None and ip_elem.text:
-                            contributor_name = f"IP:{ip_elem.text}"
-                        else:
-                            contributor_name = "Unknown"
-                        
-                        revision_data.append((timestamp, contributor_name))
-                
-                # Find the earliest revision (page creator)
-                if revision_data:
-                    revision_data.sort()  # Sort by timestamp
-                    earliest_contributor = revision_data[0][1]
-                    
-                    # Skip excluded contributors
-                    if should_exclude_contributor(earliest_contributor, excluded_usernames):
-                        elem.clear()
-                        continue
-                    
-                    contributors[earliest_contributor] += 1
-                    contributor_pages[earliest_contributor].append((title, page_id))
-            
-            # Clear element to free memory
-            elem.clear()
-    
-    print(f"Total pages processed: {page_count}")
-    print(f"Unique contributors found: {len(contributors)}")
-    
-    return dict(contributors), dict(contributor_pages)
+    analyzer = ContributorsAnalyzer(output_file=None)
+    run_analyzers(xml_file_path, [analyzer])
+    return dict(analyzer.contributors), dict(analyzer.contributor_pages)
 
 
-def generate_markdown_report(contributors_data: Dict[str, int], contributor_pages: Dict[str, List[Tuple[str, str]]], output_file: str, top_n: int = 100):
+def generate_markdown_report(contributors_data: Dict[str, int], contributor_pages: Dict[str, List[Tuple[str, str]]], output_file: str, top_n: int = 100, scan_stats=None):
     """
     Generate markdown report with top contributors by page creation count.
     
@@ -152,6 +151,7 @@ def generate_markdown_report(contributors_data: Dict[str, int], contributor_page
         contributor_pages: Dictionary of contributor names to lists of (title, id) tuples
         output_file: Path to output markdown file
         top_n: Number of top contributors to include in report
+        scan_stats: Optional ScanStats with the parse cost of the scan
     """
     # Sort contributors by page count (descending)
     sorted_contributors = sorted(contributors_data.items(), key=lambda x: x[1], reverse=True)
@@ -250,6 +250,8 @@ Contributors who created more than {HIGH_VOLUME_THRESHOLD} pages may warrant rev
     markdown_content += f"- **Registered users**: {registered_users:,}\n"
     markdown_content += f"- **Anonymous users (IP addresses)**: {anonymous_users:,}\n"
     
+    markdown_content += format_scan_cost(scan_stats)
+    
     markdown_content += f"""
 ---
 
@@ -302,20 +304,11 @@ def main():
         return
     
     try:
-        # Analyze contributors
+        # Analyze contributors and generate the report in a single scan
         print("Analyzing contributors...")
-        contributors_data, contributor_pages = analyze_contributors(xml_file)
-        
-        if not contributors_data:
-            print("No contributors found in XML file")
-            return
-        
-        # Generate report
-        print("Generating report...")
-        generate_markdown_report(contributors_data, contributor_pages, output_file)
+        run_analyzers(xml_file, [ContributorsAnalyzer(output_file)])
         
         print(f"\nAnalysis complete!")
-        print(f"Found {len(contributors_data)} contributors")
         print(f"Report saved to: {output_file}")
         
     except Exception as e:
@@ -1,47 +1,20 @@
 #!/bin/bash
 
-# dothemall.bash - Run all analysis tools in sequence
-# This script executes all the googology wiki analysis tools in the correct order
+# dothemall.bash - Run all analysis tools
+# This script executes all the googology wiki analysis tools with a single XML parse
 
 set -e  # Exit on any error
 
 echo "Starting all analysis tools..."
 echo "=============================="
 
-# Run contributors analysis
-echo "1. Running contributors analysis..."
-cd contributors
-python3 contributors.py
+# Run contributors, large pages, namespace, random check and token analyses
+# as plugins of the scan engine so the XML dump is parsed only once
+echo "Running all analyzers in a single pass..."
+cd scan
+python3 scan.py
 cd ..
-echo "✓ Contributors analysis completed"
-
-# Run large pages analysis  
-echo "2. Running large pages analysis..."
-cd large-pages
-python3 large-pages.py
-cd ..
-echo "✓ Large pages analysis completed"
-
-# Run namespace analysis
-echo "3. Running namespace analysis..."
-cd namespaces
-python3 namespaces.py
-cd ..
-echo "✓ Namespace analysis completed"
-
-# Run random check
-echo "4. Running random check..."
-cd random
-python3 random-check.py
-cd ..
-echo "✓ Random check completed"
-
-# Run token analysis
-echo "5. Running token analysis..."
-cd tokens
-python3 tokens.py
-cd ..
-echo "✓ Token analysis completed"
+echo "✓ Single-pass analysis completed (per-analyzer results above)"
 
 echo "=============================="
 echo "All analysis tools completed successfully!"
@@ -51,4 +24,4 @@ echo "- tools/contributors/contributors.md"
 echo "- tools/large-pages/large-pages.md"
 echo "- tools/namespaces/namespaces.md"
 echo "- tools/random/index.html"
-echo "- tools/tokens/tokens.md"
\ No newline at end of file
+echo "- tools/tokens/tokens.md"
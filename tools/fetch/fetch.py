@@ -4,8 +4,12 @@ MediaWiki Archive Fetcher
 
 This script downloads and extracts MediaWiki XML exports from
 official archive location and places it in the data directory.
+With --keep-compressed the archive is kept as-is and the tools stream
+it directly, so no extracted copy is kept on disk (without the 7z command,
+py7zr extracts a temporary copy once per run).
 """
 
+import argparse
 import os
 import sys
 import urllib.request
@@ -16,6 +20,7 @@ import datetime
 # Add parent directory to path for imports
 sys.path.append('../../')
 import config
+from lib.io_utils import open_dump
 FETCH_LOG_FILE = 'fetch_log.txt'
 
 
@@ -121,6 +126,31 @@ def verify_xml_file(xml_path: str) -> bool:
     return True
 
 
+def verify_compressed_archive(archive_path: str) -> bool:
+    """
+    Verify that a compressed archive streams a MediaWiki XML export.
+    
+    Args:
+        archive_path: Path to the compressed archive
+        
+    Returns:
+        True if the archive can be decompressed and looks like XML, False otherwise
+    """
+    try:
+        with open_dump(archive_path) as f:
+            header = f.read(4096).decode('utf-8', errors='replace').lstrip()
+    except Exception as e:
+        print(f"Error reading compressed archive: {e}")
+        return False
+    
+    if not (header.startswith('<?xml') or header.startswith('<mediawiki')):
+        print("Warning: Archive may not contain a valid XML file")
+        return False
+    
+    print(f"Compressed archive verified: {os.path.getsize(archive_path):,} bytes")
+    return True
+
+
 def cleanup_archive(archive_path: str) -> None:
     """
     Remove the downloaded archive file.
@@ -163,11 +193,20 @@ def save_fetch_log(data_dir: Path, xml_filename: str) -> None:
 
 def main():
     """Main function to fetch and extract the MediaWiki archive."""
+    parser = argparse.ArgumentParser(
+        description=f'Download the {config.SITE_NAME} XML archive'
+    )
+    parser.add_argument(
+        '--keep-compressed',
+        action='store_true',
+        help='Keep only the compressed archive; tools decompress it while parsing'
+    )
+    args = parser.parse_args()
     
     # Setup paths - data is now stored directly in site's config directory
     data_dir = config.DATA_DIR
     archive_filename = Path(config.ARCHIVE_URL).name
-    xml_filename = archive_filename.replace('.7z', '')
+    xml_filename = archive_filename if args.keep_compressed else archive_filename.replace('.7z', '')
     
     archive_path = data_dir / archive_filename
     xml_path = data_dir / xml_filename
@@ -196,6 +235,22 @@ def main():
     
     print(f"Archive downloaded: {archive_path}")
     
+    if args.keep_compressed:
+        # Stream from the archive instead of extracting it
+        if not verify_compressed_archive(str(archive_path)):
+            print("Archive verification failed")
+            cleanup_archive(str(archive_path))
+            sys.exit(1)
+        
+        save_fetch_log(data_dir, xml_filename)
+        
+        print()
+        print(f"SUCCESS: {config.SITE_NAME} XML archive has been downloaded (kept compressed)")
+        print(f"Location: {archive_path}")
+        print()
+        print("You can now run analysis tools that require the XML data.")
+        return
+    
     # Extract the archive to data directory
     if not extract_7z_archive(str(archive_path), str(data_dir)):
         print("Failed to extract archive")
@@ -6,14 +6,15 @@ This script analyzes MediaWiki XML exports to identify
 pages with large content sizes and generates a markdown report.
 """
 
-import xml.etree.ElementTree as ET
 import os
 import sys
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.append('../../')
 import config
+from lib.reporting import format_scan_cost
+from lib.scan import Analyzer, ScanContext, ScanStats, run_analyzers
 
 # Configuration - output to site-specific analysis directory
 OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'large-pages.md')
@@ -63,6 +64,66 @@ def should_exclude_page(title: str, excluded_namespaces: List[str]) -> bool:
     return False
 
 
+class LargePagesAnalyzer(Analyzer):
+    """Scan engine plugin that collects page sizes for the large pages report."""
+    
+    name = 'large-pages'
+    supports_catalog = True
+    
+    def __init__(self, output_file: str = OUTPUT_FILE):
+        self.output_file = output_file
+        self.pages_data = []
+        self.excluded_namespaces = []
+    
+    def start(self, context: ScanContext) -> None:
+        # Load excluded namespaces
+        self.excluded_namespaces = load_excluded_namespaces(config.EXCLUDE_FILE)
+        if self.excluded_namespaces:
+            print(f"Excluding namespaces: {self.excluded_namespaces}")
+    
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        if elements['title'] is None or page_elem.find(f'{config.MEDIAWIKI_NS}revision') is None:
+            return
+        
+        title = elements['title'] or "Unknown"
+        namespace = elements['ns'] or "0"
+        
+        # Skip excluded pages
+        if should_exclude_page(title, self.excluded_namespaces):
+            return
+        
+        # Get text content from revision
+        if elements['text']:
+            page_size = len(elements['text'])
+            self.pages_data.append((page_size, title, namespace))
+    
+    def process_catalog(self, catalog) -> None:
+        # Only pages with non-empty text, as in process_page()
+        for i in range(catalog.page_count):
+            page_size = int(catalog.text_chars[i])
+            if page_size <= 0:
+                continue
+            title = catalog.get_title(i)
+            if not title or should_exclude_page(title, self.excluded_namespaces):
+                continue
+            self.pages_data.append((page_size, title, str(int(catalog.ns[i]))))
+    
+    def finish(self, stats: ScanStats) -> None:
+        print(f"Total pages processed: {stats.page_count}")
+        print(f"Pages with content: {len(self.pages_data)}")
+        
+        if not self.pages_data:
+            print("No pages found in XML file")
+            return
+        
+        # No output file means the caller only wants the collected data
+        if self.output_file is None:
+            return
+        
+        generate_markdown_report(self.pages_data, self.output_file, scan_stats=stats)
+        print(f"Found {len(self.pages_data)} pages with content")
+
+
 def analyze_xml_pages(xml_file_path: str) -> List[Tuple[int, str, str]]:
     """
     Analyze XML file to extract page sizes and titles.
@@ -73,61 +134,13 @@ def analyze_xml_pages(xml_file_path: str) -> List[Tuple[int, str, str]]:
     Returns:
         List of tuples containing (page_size, page_title, namespace)
     """
-    pages_data = []
-    
     print(f"Analyzing {xml_file_path}...")
-    
-    # Load excluded namespaces
-    excluded_namespaces = load_excluded_namespaces(config.EXCLUDE_FILE)
-    if excluded_namespaces:
-        print(f"Excluding namespaces: {excluded_namespaces}")
-    
-    # Use iterparse for memory-efficient parsing of large XML files
-    context = ET.iterparse(xml_file_path, events=('start', 'end'))
-    context = iter(context)
-    event, root = next(context)
-    
-    # Get namespace URI from root element
-    namespace_uri = root.tag.split('}')[0] + '}' if root.tag.startswith('{') else ''
-    
-    page_count = 0
-    
-    for event, elem in context:
-        if event == 'end' and elem.tag == f'{namespace_uri}page':
-            page_count += 1
-            if page_count % 10000 == 0:
-                print(f"Processed {page_count} pages...")
-            
-            # Extract page information
-            title_elem = elem.find(f'{namespace_uri}title')
-            ns_elem = elem.find(f'{namespace_uri}ns')
-            revision_elem = elem.find(f'{namespace_uri}revision')
-            
-            if title_elem is not None and revision_elem is not None:
-                title = title_elem.text or "Unknown"
-                namespace = ns_elem.text or "0"
-                
-                # Skip excluded pages
-                if should_exclude_page(title, excluded_namespaces):
-                    elem.clear()
-                    continue
-                
-                # Get text content from revision
-                text_elem = revision_elem.find(f'{namespace_uri}text')
-                if text_elem is not None and text_elem.text:
-                    page_size = len(text_elem.text)
-                    pages_data.append((page_size, title, namespace))
-            
-            # Clear element to free memory
-            elem.clear()
-    
-    print(f"Total pages processed: {page_count}")
-    print(f"Pages with content: {len(pages_data)}")
-    
-    return pages_data
+    analyzer = LargePagesAnalyzer(output_file=None)
+    run_analyzers(xml_file_path, [analyzer])
+    return analyzer.pages_data
 
 
-def generate_markdown_report(pages_data: List[Tuple[int, str, str]], output_file: str, top_n: int = 100):
+def generate_markdown_report(pages_data: List[Tuple[int, str, str]], output_file: str, top_n: int = 100, scan_stats=None):
     """
     Generate markdown report with largest pages.
     
@@ -135,6 +148,7 @@ def generate_markdown_report(pages_data: List[Tuple[int, str, str]], output_file
         pages_data: List of (page_size, page_title, namespace) tuples
         output_file: Path to output markdown file
         top_n: Number of top pages to include in report
+        scan_stats: Optional ScanStats with the parse cost of the scan
     """
     # Sort by page size (descending)
     sorted_pages = sorted(pages_data, key=lambda x: x[0], reverse=True)
@@ -196,6 +210,8 @@ Analysis of the largest pages in the {config.SITE_NAME} XML export.
     for ns_name, count in sorted(namespace_counts.items(), key=lambda x: x[1], reverse=True):
         markdown_content += f"- **{ns_name}**: {count} pages\n"
     
+    markdown_content += format_scan_cost(scan_stats)
+    
     markdown_content += f"""
 ---
 
@@ -273,18 +289,10 @@ def main():
         return
     
     try:
-        # Analyze XML file
-        pages_data = analyze_xml_pages(xml_file)
-        
-        if not pages_data:
-            print("No pages found in XML file")
-            return
-        
-        # Generate report
-        generate_markdown_report(pages_data, output_file)
+        # Analyze XML file and generate the report in a single scan
+        run_analyzers(xml_file, [LargePagesAnalyzer(output_file)])
         
         print(f"\nAnalysis complete!")
-        print(f"Found {len(pages_data)} pages with content")
         print(f"Report saved to: {output_file}")
         
     except Exception as e:
@@ -7,19 +7,18 @@ content by namespace, showing the distribution of bytes and pages across
 different types of wiki content.
 """
 
-import os
 import random
-from datetime import datetime
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 # Import shared library modules
 import sys
 sys.path.append('../../')
 import config
-from lib.xml_parser import parse_namespaces, get_namespace_name, iterate_pages
-from lib.formatting import format_number, format_bytes
-from lib.io_utils import get_fetch_date, check_xml_exists, get_xml_file
+from lib.xml_parser import get_namespace_name
+from lib.formatting import format_bytes
+from lib.io_utils import check_xml_exists, get_xml_file
 from lib.reporting import generate_license_footer, write_markdown_report
+from lib.scan import Analyzer, ScanContext, ScanStats, run_analyzers
 
 # Local configuration - output to site-specific analysis directory
 OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'namespaces.md')
@@ -28,6 +27,73 @@ OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'namespaces.md')
 
 # Removed - now imported from lib.xml_parser
 
+class NamespacesAnalyzer(Analyzer):
+    """Scan engine plugin that accumulates bytes and pages per namespace."""
+    
+    name = 'namespaces'
+    supports_catalog = True
+    
+    def __init__(self, output_file: str = OUTPUT_FILE):
+        self.output_file = output_file
+        self.namespace_map = {}
+        # Dictionary to store namespace data: namespace -> (total_bytes, page_count)
+        self.namespace_stats = {}
+        # Dictionary to store sample pages: namespace -> list of (page_id, title)
+        self.namespace_samples = {}
+    
+    def start(self, context: ScanContext) -> None:
+        # Namespace definitions come from the same scan
+        self.namespace_map = context.namespace_map
+        print(f"Found {len(self.namespace_map)} namespace definitions")
+    
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        if not (elements['ns'] and elements['title'] and elements['id']):
+            return
+        
+        # Get namespace name from parsed definitions
+        namespace_name = get_namespace_name(elements['ns'], elements['title'], self.namespace_map)
+        
+        # Get page content size
+        content_size = 0
+        if elements['text']:
+            content_size = len(elements['text'].encode('utf-8'))
+        
+        # Update namespace statistics
+        if namespace_name not in self.namespace_stats:
+            self.namespace_stats[namespace_name] = (0, 0)
+            self.namespace_samples[namespace_name] = []
+        
+        current_bytes, current_pages = self.namespace_stats[namespace_name]
+        self.namespace_stats[namespace_name] = (current_bytes + content_size, current_pages + 1)
+        
+        # Collect page samples for examples
+        self.namespace_samples[namespace_name].append((elements['id'], elements['title']))
+    
+    def process_catalog(self, catalog) -> None:
+        for i in range(catalog.page_count):
+            title = catalog.get_title(i)
+            if not title or catalog.ids[i] < 0:
+                continue
+            
+            namespace_name = get_namespace_name(str(int(catalog.ns[i])), title, self.namespace_map)
+            
+            if namespace_name not in self.namespace_stats:
+                self.namespace_stats[namespace_name] = (0, 0)
+                self.namespace_samples[namespace_name] = []
+            
+            current_bytes, current_pages = self.namespace_stats[namespace_name]
+            self.namespace_stats[namespace_name] = (current_bytes + int(catalog.text_bytes[i]), current_pages + 1)
+            self.namespace_samples[namespace_name].append((str(int(catalog.ids[i])), title))
+    
+    def finish(self, stats: ScanStats) -> None:
+        # No output file means the caller only wants the collected data
+        if self.output_file is None:
+            return
+        
+        generate_report(self.namespace_stats, self.namespace_samples, self.output_file, scan_stats=stats)
+        print(f"Found {len(self.namespace_stats)} namespaces")
+
+
 def analyze_namespaces(xml_file_path: str) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, List[Tuple[str, str]]]]:
     """
     Analyze XML file to extract namespace statistics and sample pages.
@@ -41,46 +107,15 @@ def analyze_namespaces(xml_file_path: str) -> Tuple[Dict[str, Tuple[int, int]],
         - namespace_samples: Dictionary mapping namespace names to lists of (page_id, title) tuples
     """
     print(f"Analyzing {xml_file_path}...")
-    
-    # Parse namespace definitions from XML
-    print("Parsing namespace definitions...")
-    namespace_map = parse_namespaces(xml_file_path)
-    print(f"Found {len(namespace_map)} namespace definitions")
-    
-    # Dictionary to store namespace data: namespace -> (total_bytes, page_count)
-    namespace_stats = {}
-    # Dictionary to store sample pages: namespace -> list of (page_id, title)
-    namespace_samples = {}
-    
-    # Process XML file using shared iterator
-    for page_count, elements in iterate_pages(xml_file_path):
-        if elements['ns'] and elements['title'] and elements['id']:
-            # Get namespace name from parsed definitions
-            namespace_name = get_namespace_name(elements['ns'], elements['title'], namespace_map)
-            
-            # Get page content size
-            content_size = 0
-            if elements['text']:
-                content_size = len(elements['text'].encode('utf-8'))
-            
-            # Update namespace statistics
-            if namespace_name not in namespace_stats:
-                namespace_stats[namespace_name] = (0, 0)
-                namespace_samples[namespace_name] = []
-            
-            current_bytes, current_pages = namespace_stats[namespace_name]
-            namespace_stats[namespace_name] = (current_bytes + content_size, current_pages + 1)
-            
-            # Collect page samples for examples
-            namespace_samples[namespace_name].append((elements['id'], elements['title']))
-    
-    return namespace_stats, namespace_samples
+    analyzer = NamespacesAnalyzer(output_file=None)
+    run_analyzers(xml_file_path, [analyzer])
+    return analyzer.namespace_stats, analyzer.namespace_samples
 
 # Removed - now imported from lib.xml_parser
 
 # Removed - now imported from lib.formatting
 
-def generate_report(namespace_stats: Dict[str, Tuple[int, int]], namespace_samples: Dict[str, List[Tuple[str, str]]], output_file: str):
+def generate_report(namespace_stats: Dict[str, Tuple[int, int]], namespace_samples: Dict[str, List[Tuple[str, str]]], output_file: str, scan_stats=None):
     """
     Generate markdown report from namespace statistics.
     
@@ -88,6 +123,7 @@ def generate_report(namespace_stats: Dict[str, Tuple[int, int]], namespace_sampl
         namespace_stats: Dictionary of namespace -> (bytes, pages) data
         namespace_samples: Dictionary of namespace -> list of (page_id, title) samples
         output_file: Path to output markdown file
+        scan_stats: Optional ScanStats with the parse cost of the scan
     """
     # Sort by total bytes (descending)
     sorted_namespaces = sorted(namespace_stats.items(), key=lambda x: x[1][0], reverse=True)
@@ -185,7 +221,7 @@ The top 5 namespaces by total content size:
 """
     
     # Add license footer
-    report_content += generate_license_footer('namespaces.py')
+    report_content += generate_license_footer('namespaces.py', scan_stats)
     
     # Write report to file
     write_markdown_report(output_file, report_content)
@@ -198,15 +234,11 @@ def main():
     if not check_xml_exists():
         return
     
-    # Analyze namespaces
+    # Analyze namespaces and generate the report in a single scan
     xml_file = get_xml_file()
-    namespace_stats, namespace_samples = analyze_namespaces(xml_file)
-    
-    # Generate report
-    generate_report(namespace_stats, namespace_samples, OUTPUT_FILE)
+    run_analyzers(xml_file, [NamespacesAnalyzer(OUTPUT_FILE)])
     
     print(f"\nAnalysis complete!")
-    print(f"Found {len(namespace_stats)} namespaces")
     print(f"Report saved to: {OUTPUT_FILE}")
 
 if __name__ == '__main__':
@@ -25,6 +25,11 @@ from lib.rag import (
     search_documents
 )
 from lib.rag.prompt_builder import create_full_prompt, format_results_with_citations
+from lib.rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from lib.rag.onnx_embeddings import OnnxEmbeddings
+from lib.rag.native_store import NativeVectorStore, find_native_store, load_native_store
+from lib.rag.ann_index import INDEX_TYPES, describe_index, index_params, index_type_of, set_search_params, timed_build_index
+from lib.rag.binary_index import DEFAULT_RERANK_CANDIDATES, BinaryPrefilterIndex, index_signatures, vector_signatures
 from lib.io_utils import find_xml_file
 from lib.formatting import format_number
 import config
@@ -42,7 +47,17 @@ def show_loading_spinner():
 
 
 def load_vector_store(cache_path: str) -> object:
-    """Load vector store from cache file."""
+    """
+    Load vector store from cache file.
+    
+    A native store (the <name>_native/ directory xml2vec.py writes next to
+    the pickle, or the directory itself) is memory-mapped instead of
+    unpickled; the pickle is only loaded if there is no native store.
+    """
+    native_path = find_native_store(cache_path)
+    if native_path:
+        return load_native_store(native_path)
+    
     if not os.path.exists(cache_path):
         raise FileNotFoundError(f"Vector store not found: {cache_path}")
     
@@ -65,8 +80,81 @@ def load_vector_store(cache_path: str) -> object:
     return result
 
 
-def format_search_results(results, show_prompt=False):
-    """Format search results for display with optional LLM prompt."""
+def configure_index(vector_store, index_type: Optional[str], nprobe: Optional[int], ef_search: Optional[int]):
+    """
+    Switch the store to another index type (built in memory from its exact vectors) or override search parameters.
+    
+    Args:
+        vector_store: Pickled LangChain FAISS store or NativeVectorStore
+        index_type: Index type to search with (None keeps the store's)
+        nprobe: IVF lists searched per query (None keeps the stored value)
+        ef_search: HNSW candidate list size (None keeps the stored value)
+    """
+    native = isinstance(vector_store, NativeVectorStore)
+    current = vector_store.index_type if native else index_type_of(vector_store.index)
+    
+    if index_type and index_type != current:
+        vectors = vector_store.exact_vectors() if native else vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+        options = {key: value for key, value in (('nprobe', nprobe), ('ef_search', ef_search)) if value is not None}
+        params = index_params(index_type, len(vectors), vectors.shape[1], **options)
+        index, seconds = timed_build_index(vectors, index_type, params, vector_store.index.metric_type)
+        vector_store.index = index
+        if native:
+            vector_store.index_type, vector_store.index_params = index_type, params
+        print(f"Built {describe_index(index_type, params, seconds)}")
+    elif native:
+        vector_store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+    else:
+        set_search_params(vector_store.index, {
+            key: value for key, value, types in (('nprobe', nprobe, ('ivf-flat', 'ivf-pq')), ('ef_search', ef_search, ('hnsw',)))
+            if value is not None and current in types
+        })
+
+
+def enable_binary_prefilter(vector_store, candidates: int):
+    """
+    Search with a Hamming-distance first stage over sign-bit signatures and rerank the candidates with exact vectors.
+    
+    Args:
+        vector_store: Pickled LangChain FAISS store or NativeVectorStore
+        candidates: Rows reranked with exact vectors per query
+    """
+    native = isinstance(vector_store, NativeVectorStore)
+    signatures = vector_store.signatures if native else None
+    if signatures is None:
+        print("⚠ No stored binary signatures (xml2vec.py --binary-signatures), computing them from the vectors")
+        if native and vector_store.vectors is not None:
+            signatures = vector_signatures(vector_store.vectors)
+        else:
+            signatures = index_signatures(vector_store.index)
+    
+    vectors = vector_store.vectors if native else None
+    vector_store.index = BinaryPrefilterIndex(vector_store.index, signatures, vectors=vectors, candidates=candidates)
+    print(f"Binary prefilter: {signatures.shape[1]} bytes per vector, reranking {candidates} candidates")
+
+
+def open_page_store() -> Optional[object]:
+    """Open the byte-offset page store for the dump, or None if unavailable."""
+    xml_path = find_xml_file()
+    if not xml_path:
+        print("⚠ XML dump not found, page info disabled")
+        return None
+    
+    try:
+        from lib.page_store import PageStore
+    except ImportError as e:
+        print(f"⚠ Page store unavailable ({e}), page info disabled")
+        return None
+    
+    try:
+        return PageStore(xml_path)
+    except ValueError as e:
+        print(f"⚠ {e}, page info disabled")
+        return None
+
+
+def format_search_results(results, show_prompt=False, page_store=None):
+    """Format search results for display with optional LLM prompt and page info."""
     output = []
     
     # Convert results to the format expected by prompt_builder
@@ -95,6 +183,15 @@ def format_search_results(results, show_prompt=False):
         output.append(f"URL: {url}")
         output.append(f"ID: {metadata.get('id', 'N/A')}")
         
+        # Load the full page lazily from the dump only for the results shown
+        if page_store is not None and metadata.get('id'):
+            page = page_store.get(metadata['id'])
+            if page is not None:
+                page_chars = len(page['text']) if page['text'] else 0
+                output.append(f"Page size: {format_number(page_chars)} chars")
+                if page['timestamp']:
+                    output.append(f"Last revision: {page['timestamp']} by {page['contributor'] or 'Unknown'}")
+        
         # Display content preview
         content = doc.page_content
         preview_length = 500
@@ -139,7 +236,8 @@ def main():
     parser.add_argument(
         '--cache',
         default=str(config.DATA_DIR / 'vector_store.pkl'),
-        help=f'Path to vector store file (default: {config.DATA_DIR}/vector_store.pkl)'
+        help=f'Path to vector store file or native store directory; {config.DATA_DIR}/vector_store_native/ '
+             f'is used when it exists (default: {config.DATA_DIR}/vector_store.pkl)'
     )
     parser.add_argument(
         '--top-k',
@@ -150,19 +248,83 @@ def main():
     parser.add_argument(
         '--score-threshold',
         type=float,
-        help='Minimum similarity score threshold'
+        help='Minimum cosine similarity of a result (L2 distances of older stores are converted)'
+    )
+    parser.add_argument(
+        '--index-type',
+        choices=INDEX_TYPES,
+        help='Search with this index type, built at startup from the store\'s exact vectors '
+             '(default: the index the store was saved with)'
+    )
+    parser.add_argument(
+        '--nprobe',
+        type=int,
+        help='IVF lists searched per query (default: the value stored with the index)'
+    )
+    parser.add_argument(
+        '--ef-search',
+        type=int,
+        help='HNSW candidate list size per query (default: the value stored with the index)'
+    )
+    parser.add_argument(
+        '--binary-prefilter',
+        action='store_true',
+        help='Rank by Hamming distance over sign-bit signatures first and rerank the closest '
+             '--rerank-candidates chunks with their exact vectors (instead of the store\'s index)'
+    )
+    parser.add_argument(
+        '--rerank-candidates',
+        type=int,
+        default=DEFAULT_RERANK_CANDIDATES,
+        help=f'Candidates reranked with exact vectors after the binary prefilter (default: {DEFAULT_RERANK_CANDIDATES})'
     )
     parser.add_argument(
         '--show-prompt',
         action='store_true',
         help='Show the LLM prompt context with citations'
     )
+    parser.add_argument(
+        '--no-embedding-cache',
+        action='store_true',
+        help=f'Embed every query instead of reusing {config.DATA_DIR}/embedding_cache.sqlite'
+    )
+    parser.add_argument(
+        '--onnx-model',
+        help='Embed queries with onnxruntime from this local ONNX export of the store\'s model '
+             '(directory with tokenizer files and onnx/model.onnx)'
+    )
+    parser.add_argument(
+        '--onnx-quantized',
+        action='store_true',
+        help='Use the int8 onnx/model_quantized.onnx of the --onnx-model export'
+    )
+    parser.add_argument(
+        '--page-info',
+        action='store_true',
+        help='Show page size and last revision of each result, read from the XML dump on demand'
+    )
     
     args = parser.parse_args()
+    if args.binary_prefilter and args.index_type:
+        parser.error('--binary-prefilter replaces the first-stage index; it cannot be combined with --index-type')
     
     try:
         # Load vector store first
         vector_store = load_vector_store(args.cache)
+        page_store = open_page_store() if args.page_info else None
+        configure_index(vector_store, args.index_type, args.nprobe, args.ef_search)
+        if args.binary_prefilter:
+            enable_binary_prefilter(vector_store, args.rerank_candidates)
+        
+        # Query vectors from onnxruntime instead of the model pickled with the store
+        if args.onnx_model:
+            vector_store.embedding_function = OnnxEmbeddings(args.onnx_model, quantized=args.onnx_quantized)
+        
+        # Repeated queries are served from the embedding cache
+        embedding_cache = None
+        if not args.no_embedding_cache:
+            embedding_cache = EmbeddingCache()
+            vector_store.embedding_function = CachedEmbeddings(vector_store.embedding_function, embedding_cache)
         
         # Single query mode if argument provided
         if args.query is not None:
@@ -176,7 +338,7 @@ def main():
             if not results:
                 print("No results found.")
             else:
-                print(format_search_results(results, show_prompt=args.show_prompt))
+                print(format_search_results(results, show_prompt=args.show_prompt, page_store=page_store))
         
         # Interactive mode if no argument
         else:
@@ -201,7 +363,7 @@ def main():
                     if not results:
                         print("No results found.")
                     else:
-                        print(format_search_results(results, show_prompt=args.show_prompt))
+                        print(format_search_results(results, show_prompt=args.show_prompt, page_store=page_store))
                     
                     print()  # Empty line before next prompt
                     
@@ -209,6 +371,10 @@ def main():
                     break
                 except EOFError:
                     break
+        
+        if embedding_cache is not None:
+            print(embedding_cache.report())
+            embedding_cache.close()
             
     except FileNotFoundError as e:
         print(f"Error: {e}")
@@ -2,26 +2,26 @@
 """
 Export Vector Store to JSON
 
-This tool exports the FAISS vector store to JSON format for JavaScript consumption.
+This tool exports the FAISS vector store for JavaScript consumption: a JSON metadata file plus
+binary (or JSON) part files.
 """
 
 import os
 import sys
 import json
 import pickle
-import gzip
 import argparse
-import numpy as np
-import struct
-import importlib.util
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 import config
-from lib.io_utils import find_xml_file
-from lib.formatting import format_number
+from lib.rag.ann_index import unit_normalize
+from lib.rag.native_store import NativeVectorStore, find_native_store
+from lib.rag.binary_index import DEFAULT_RERANK_CANDIDATES
+from lib.rag.quantization import VECTOR_FORMATS, create_quantizer, quantization_recall, sample_vectors
+from lib.rag.vector_export import LAYOUTS, export_parts
 
 # Import site-specific configuration
 try:
@@ -32,26 +32,43 @@ except (ImportError, FileNotFoundError) as e:
     site_config = None
 
 
-def float64_to_float32_base64(float_list):
-    """Convert float64 list to base64-encoded float32 binary"""
-    import base64
-    # Convert to float32 numpy array
-    float32_array = np.array(float_list, dtype=np.float32)
-    # Get binary representation
-    binary_data = float32_array.tobytes()
-    # Encode to base64 for JSON compatibility
-    base64_data = base64.b64encode(binary_data).decode('utf-8')
-    return base64_data
+def vector_store_exists(vector_store_path: str) -> bool:
+    """Whether the pickle or the native store (<name>_native/) of a vector store exists."""
+    return os.path.exists(vector_store_path) or find_native_store(vector_store_path) is not None
 
 
-def export_vector_store_to_json(vector_store_path: str, output_path: str, max_chunks: int = None, force_single_part: bool = False, use_binary: bool = False):
+def load_vector_store(vector_store_path: str):
+    """
+    Open the native store (memory-mapped, <name>_native/) if there is one, else load the pickle.
+    
+    Returns:
+        (vector store, native store directory or None)
+    """
+    native_path = find_native_store(vector_store_path)
+    if native_path is not None:
+        return NativeVectorStore.load(native_path), native_path
+    with open(vector_store_path, 'rb') as f:
+        return pickle.load(f), None
+
+
+def export_vector_store_to_json(vector_store_path: str, output_path: str, max_chunks: int = None, force_single_part: bool = False, use_binary: bool = False, layout: str = 'binary', vector_format: str = 'float32', pq_m: int = None, binary_signatures: bool = False, rerank_candidates: int = DEFAULT_RERANK_CANDIDATES, workers: int = 1):
     """
     Export vector store to JSON format.
     
+    Each part is read with one bulk vector slice and written once, to the part file and its .gz
+    together; parts are written by worker processes that memory-map the native store.
+    
     Args:
         vector_store_path: Path to the vector store pickle file
         output_path: Path for the output JSON file
         max_chunks: Maximum number of chunks to export (None for all)
+        layout: With use_binary, 'binary' writes one .bin file per part (vector blob plus sidecar
+            arrays, described in the metadata file); 'json' writes a base64 string per chunk
+        vector_format: Binary embedding encoding (float32, float16, int8 or pq), recorded in the metadata file
+        pq_m: PQ sub-quantizers (default: dimension / 8)
+        binary_signatures: Also export a packed sign-bit signature per chunk for the Hamming-distance prefilter
+        rerank_candidates: Candidates per part the web search reranks after the prefilter (stored in the metadata file)
+        workers: Processes writing parts in parallel (0 = all CPU cores); needs the native store
     """
     print(f"Loading vector store from: {vector_store_path}")
     
@@ -59,20 +76,11 @@ def export_vector_store_to_json(vector_store_path: str, output_path: str, max_ch
     if isinstance(output_path, str):
         output_path = Path(output_path)
     
-    with open(vector_store_path, 'rb') as f:
-        vector_store = pickle.load(f)
-    
-    print("Extracting chunks and embeddings...")
-    
-    # Extract documents with their embeddings
-    documents = []
-    
-    # Get the docstore (contains metadata)
-    docstore = vector_store.docstore
+    vector_store, native_path = load_vector_store(vector_store_path)
     index = vector_store.index
     
-    # Get index to docstore ID mapping
-    index_to_docstore_id = vector_store.index_to_docstore_id
+    # Native stores with an approximate index keep the exact vectors next to it
+    reconstruct = getattr(vector_store, 'reconstruct', index.reconstruct)
     
     # Determine number of chunks to process
     total_chunks = index.ntotal
@@ -113,126 +121,119 @@ def export_vector_store_to_json(vector_store_path: str, output_path: str, max_ch
         'embedding_dimension': embedding_dimension
     }
     
-    # Create metadata file with appropriate name
+    # Quantizer for the binary embeddings, fitted on a sample of the exported vectors
+    quantizer = create_quantizer(vector_format, embedding_dimension, pq_m)
+    if use_binary:
+        meta_data['vector_format'] = vector_format
+    if use_binary and vector_format != 'float32':
+        print(f"Fitting {vector_format} quantizer...")
+        sample, _ = unit_normalize(sample_vectors(reconstruct, num_chunks))
+        quantizer.fit(sample)
+        recall = quantization_recall(sample, quantizer)
+        print(f"  Recall@{recall['k']} against float32: {recall['recall']:.3f} "
+              f"({recall['queries']} queries over {recall['corpus']} sampled chunks)")
+        meta_data['quantization'] = quantizer.meta()
+        meta_data['quantization_recall'] = recall
+    if use_binary and binary_signatures:
+        meta_data['binary_signatures'] = {
+            'bytes_per_vector': (embedding_dimension + 7) // 8,
+            'rerank_candidates': rerank_candidates
+        }
+    
+    # Metadata file name
     if '_titles.json' in str(output_path):
         meta_path = output_path.parent / 'vector_store_titles_meta.json'
     else:
         meta_path = output_path.parent / 'vector_store_meta.json'
-    with open(meta_path, 'w', encoding='utf-8') as f:
-        # No indentation for smaller file size
-        json.dump(meta_data, f, separators=(',', ':'))
-    print(f"Metadata written to: {meta_path}")
     
-    # Track total file sizes
-    total_json_size = 0
-    total_gz_size = 0
+    # Determine file prefix and extension of the part files
+    file_prefix = "vector_store_titles_part" if '_titles.json' in str(output_path) else "vector_store_part"
+    binary_layout = use_binary and layout == 'binary'
+    part_extension = 'bin' if binary_layout else 'json'
+    if binary_layout:
+        # Dtypes of the sections the parts contain (filled in as the files are written, since title
+        # stores have no chunk offsets and signatures are optional); byte offsets go to 'parts'
+        meta_data['layout'] = 'binary'
+        meta_data['sections'] = {}
+        meta_data['parts'] = []
+        section_dtypes = {
+            'vectors': vector_format,
+            'signatures': 'uint8',
+            'curid': 'int32',
+            'chunk_index': 'int32',
+            'chunk_start': 'int32',
+            'chunk_end': 'int32',
+            'records': 'json'
+        }
     
-    # Process chunks in parts
+    # One task per part: index positions and everything a worker needs to write it
+    tasks = []
     for part_idx in range(num_parts):
         part_start = part_idx * chunks_per_part
-        part_end = min(part_start + chunks_per_part, num_chunks)
-        part_size = part_end - part_start
-        
-        print(f"\nProcessing part {part_idx + 1}/{num_parts} ({part_size} chunks)...")
-        
-        part_chunks = []
-        
-        for idx in range(part_start, part_end):
-            # Get document ID from index
-            if idx in index_to_docstore_id:
-                doc_id = index_to_docstore_id[idx]
-                doc = docstore.search(doc_id)
-                
-                if doc:
-                    # Get the embedding vector for this document
-                    embedding = index.reconstruct(idx)
-                    
-                    # Create minimal document entry - content will be fetched from XML
-                    if use_binary:
-                        # Convert to float32 binary format
-                        doc_entry = {
-                            'id': doc_id,
-                            'curid': doc.metadata.get('curid'),
-                            'embedding_binary': float64_to_float32_base64(embedding),
-                            'embedding_format': 'float32_base64'
-                        }
-                        # Add chunk info only for body chunks
-                        if 'chunk_index' in doc.metadata:
-                            doc_entry['chunk_index'] = doc.metadata.get('chunk_index', 0)
-                            doc_entry['chunk_start'] = doc.metadata.get('chunk_start', 0)
-                            doc_entry['chunk_end'] = doc.metadata.get('chunk_end', len(doc.page_content))
-                    else:
-                        # Original float list format (legacy support)
-                        doc_entry = {
-                            'id': doc_id,
-                            'curid': doc.metadata.get('curid'),
-                            'embedding': embedding.tolist()  # Convert numpy array to list
-                        }
-                        # Add chunk info only for body chunks
-                        if 'chunk_index' in doc.metadata:
-                            doc_entry['chunk_index'] = doc.metadata.get('chunk_index', 0)
-                            doc_entry['chunk_start'] = doc.metadata.get('chunk_start', 0)
-                            doc_entry['chunk_end'] = doc.metadata.get('chunk_end', len(doc.page_content))
-                    part_chunks.append(doc_entry)
-        
-        print(f"  Part {part_idx + 1}: Extracted {len(part_chunks)} chunks")
-        
-        # Create the JSON structure for this part
-        part_json_data = {
-            'site': site_config.SITE_NAME if site_config else 'Unknown Site',
+        tasks.append({
             'part_index': part_idx,
-            'part_documents': len(part_chunks),  # Keep key name for backward compatibility
-            'embedding_dimension': embedding_dimension,
-            'documents': part_chunks  # Keep key name for backward compatibility
-        }
-        
-        # Save part to JSON with appropriate prefix
-        if '_titles.json' in str(output_path):
-            part_output_path = output_path.parent / f'vector_store_titles_part{part_idx + 1:02d}.json'
-        else:
-            part_output_path = output_path.parent / f'vector_store_part{part_idx + 1:02d}.json'
-        print(f"  Saving part to JSON: {part_output_path}")
-        with open(part_output_path, 'w', encoding='utf-8') as f:
-            # No indentation for smaller file size
-            json.dump(part_json_data, f, ensure_ascii=False, separators=(',', ':'))
-        
-        part_file_size = os.path.getsize(part_output_path) / 1024 / 1024
-        total_json_size += part_file_size
-        print(f"  ✓ Part {part_idx + 1} JSON complete! Size: {part_file_size:.1f} MB")
-        
-        # Also create a compressed version for this part
-        part_gz_path = str(part_output_path) + '.gz'
-        print(f"  Creating compressed version: {part_gz_path}")
-        with gzip.open(part_gz_path, 'wt', encoding='utf-8') as f:
-            json.dump(part_json_data, f, ensure_ascii=False)
-        
-        part_gz_size = os.path.getsize(part_gz_path) / 1024 / 1024
-        total_gz_size += part_gz_size
-        print(f"  ✓ Part {part_idx + 1} compression complete! Size: {part_gz_size:.1f} MB")
+            'start': part_start,
+            'end': min(part_start + chunks_per_part, num_chunks),
+            'path': str(output_path.parent / f'{file_prefix}{part_idx + 1:02d}.{part_extension}'),
+            'layout': 'binary' if binary_layout else 'json',
+            'use_binary': use_binary,
+            'quantizer': quantizer,
+            'binary_signatures': binary_signatures,
+            'site': site_config.SITE_NAME if site_config else 'Unknown Site',
+            'embedding_dimension': embedding_dimension
+        })
+    
+    workers = min(workers if workers > 0 else (os.cpu_count() or 1), num_parts)
+    if workers > 1 and native_path is None:
+        print(f"⚠ No native store next to {vector_store_path}; writing parts in this process "
+              f"(re-run xml2vec.py to write one for parallel export)")
+        workers = 1
+    print(f"\nWriting {num_parts} part(s) with {workers} process(es)...")
+    
+    # Track total file sizes
+    total_json_size = 0
+    total_gz_size = 0
+    rescaled = 0
+    
+    for result in export_parts(tasks, vector_store, native_path, workers):
+        total_json_size += result['size_mb']
+        total_gz_size += result['gz_size_mb']
+        rescaled += result['rescaled']
+        if binary_layout:
+            meta_data['parts'].append({'file': result['file'], 'documents': result['documents'], 'offsets': result['offsets']})
+            for name in result['offsets']:
+                meta_data['sections'].setdefault(name, section_dtypes[name])
+        print(f"  ✓ Part {result['part_index'] + 1}/{num_parts}: {result['documents']} chunks, "
+              f"{result['size_mb']:.1f} MB ({result['gz_size_mb']:.1f} MB compressed)")
     
     print(f"\n✓ All {num_parts} parts created successfully!")
+    # Every exported vector has been checked (and if needed rescaled) to unit length: dot product = cosine similarity
+    meta_data['normalized'] = True
+    if rescaled:
+        print(f"⚠ {rescaled:,} of {num_chunks:,} vectors were not unit length and were rescaled in the export")
+    else:
+        print(f"✓ All {num_chunks:,} vectors are unit length")
     print(f"Total sizes:")
-    print(f"  - JSON files: {total_json_size:.1f} MB")
+    print(f"  - {'Binary' if binary_layout else 'JSON'} files: {total_json_size:.1f} MB")
     print(f"  - Compressed files: {total_gz_size:.1f} MB")
     
-    # Update metadata with size information
+    # Size information (key names kept for the binary layout)
     meta_data['total_json_size_mb'] = round(total_json_size, 1)
     meta_data['total_gz_size_mb'] = round(total_gz_size, 1)
     
-    # Rewrite metadata with size information
-    with open(meta_path, 'w', encoding='utf-8') as f:
+    # Written once, after every part, and replaced atomically so readers never see a partial file
+    temp_meta_path = meta_path.with_name(meta_path.name + '.tmp')
+    with open(temp_meta_path, 'w', encoding='utf-8') as f:
         # No indentation for smaller file size
         json.dump(meta_data, f, separators=(',', ':'))
-    print(f"\nMetadata updated with size information: {meta_path}")
-    
-    # Determine file prefix for display
-    file_prefix = "vector_store_titles_part" if '_titles.json' in str(output_path) else "vector_store_part"
+    os.replace(temp_meta_path, meta_path)
+    print(f"\nMetadata written to: {meta_path}")
     
     print(f"Files created:")
     print(f"  - {meta_path}")
     for i in range(num_parts):
-        print(f"  - {file_prefix}{i + 1:02d}.json")
-        print(f"  - {file_prefix}{i + 1:02d}.json.gz")
+        print(f"  - {file_prefix}{i + 1:02d}.{part_extension}")
+        print(f"  - {file_prefix}{i + 1:02d}.{part_extension}.gz")
     
     return meta_data
 
@@ -280,6 +281,49 @@ def main():
         help=help_text
     )
     
+    parser.add_argument(
+        '--layout',
+        choices=LAYOUTS,
+        default='binary',
+        help='Part file layout: binary (one vector blob plus sidecar arrays per part, vector_store_partNN.bin) '
+             'or json (a base64 embedding per chunk, vector_store_partNN.json; default: binary)'
+    )
+    
+    parser.add_argument(
+        '--vector-format',
+        choices=VECTOR_FORMATS,
+        default='float32',
+        help='Encoding of the exported embeddings: float32, float16, int8 (per-dimension scale and offset) '
+             'or pq codes (default: float32); the recall against float32 is printed and stored in the metadata file'
+    )
+    
+    parser.add_argument(
+        '--pq-m',
+        type=int,
+        help='PQ sub-quantizers of --vector-format pq; must divide the embedding dimension (default: dimension / 8)'
+    )
+    
+    parser.add_argument(
+        '--binary-signatures',
+        action='store_true',
+        help='Also export a 1-bit-per-dimension signature of every chunk; the web search ranks by Hamming '
+             'distance first and reranks the closest candidates with the full embeddings'
+    )
+    
+    parser.add_argument(
+        '--rerank-candidates',
+        type=int,
+        default=DEFAULT_RERANK_CANDIDATES,
+        help=f'Candidates per part reranked after the binary prefilter (default: {DEFAULT_RERANK_CANDIDATES})'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Processes writing part files in parallel from the memory-mapped native store (default: 1, 0 = all CPU cores)'
+    )
+    
     parser.add_argument(
         '--title-only',
         action='store_true',
@@ -311,26 +355,32 @@ def main():
         elif not output_path.endswith('_titles.json'):
             output_path = output_path.replace('.json', '_titles.json')
         
-        if not os.path.exists(input_path):
+        if not vector_store_exists(input_path):
             print(f"Error: Title vector store not found at {input_path}")
             print("Please run xml2vec.py --title-only first to create the title vector store.")
             sys.exit(1)
         
         print("Processing title vector store only...")
-        export_vector_store_to_json(input_path, output_path, args.max_chunks, force_single_part=True, use_binary=True)
+        export_vector_store_to_json(input_path, output_path, args.max_chunks, force_single_part=True, use_binary=True, layout=args.layout,
+                                    vector_format=args.vector_format, pq_m=args.pq_m,
+                                    binary_signatures=args.binary_signatures, rerank_candidates=args.rerank_candidates,
+                                    workers=args.workers)
         
     elif args.body_only:
         # Process body vector store only
         body_input = args.input
         body_output = args.output
         
-        if not os.path.exists(body_input):
+        if not vector_store_exists(body_input):
             print(f"Error: Body vector store not found at {body_input}")
             print("Please run xml2vec.py --body-only first to create the body vector store.")
             sys.exit(1)
         
         print("Processing body vector store only...")
-        export_vector_store_to_json(body_input, body_output, args.max_chunks, use_binary=True)
+        export_vector_store_to_json(body_input, body_output, args.max_chunks, use_binary=True, layout=args.layout,
+                                    vector_format=args.vector_format, pq_m=args.pq_m,
+                                    binary_signatures=args.binary_signatures, rerank_candidates=args.rerank_candidates,
+                                    workers=args.workers)
         
     else:
         # Default: Process both body and title vector stores
@@ -341,20 +391,26 @@ def main():
         body_input = args.input
         body_output = args.output
         
-        if not os.path.exists(body_input):
+        if not vector_store_exists(body_input):
             print(f"Error: Body vector store not found at {body_input}")
             print("Please run xml2vec.py first to create the vector stores.")
             sys.exit(1)
         
-        export_vector_store_to_json(body_input, body_output, args.max_chunks, use_binary=True)
+        export_vector_store_to_json(body_input, body_output, args.max_chunks, use_binary=True, layout=args.layout,
+                                    vector_format=args.vector_format, pq_m=args.pq_m,
+                                    binary_signatures=args.binary_signatures, rerank_candidates=args.rerank_candidates,
+                                    workers=args.workers)
         
         # Process title vector store
         print("\n=== Processing title vector store ===")
         title_input = args.input.replace('.pkl', '_titles.pkl')
         title_output = args.output.replace('.json', '_titles.json')
         
-        if os.path.exists(title_input):
-            export_vector_store_to_json(title_input, title_output, args.max_chunks, force_single_part=True, use_binary=True)
+        if vector_store_exists(title_input):
+            export_vector_store_to_json(title_input, title_output, args.max_chunks, force_single_part=True, use_binary=True, layout=args.layout,
+                                        vector_format=args.vector_format, pq_m=args.pq_m,
+                                        binary_signatures=args.binary_signatures, rerank_candidates=args.rerank_candidates,
+                                    workers=args.workers)
             print(f"\n✓ Both vector stores processed successfully!")
         else:
             print(f"Warning: Title vector store not found at {title_input}")
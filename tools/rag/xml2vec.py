@@ -19,68 +19,273 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from lib.rag import (
-    load_mediawiki_documents,
-    split_documents,
-    create_vector_store
+    lazy_load_mediawiki_documents,
+    split_documents
 )
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from lib.io_utils import find_xml_file
+from lib.rag.vectorstore import (
+    DEFAULT_EMBED_BATCH_SIZE, EMBEDDING_BACKENDS, convert_to_inner_product, create_embeddings, embedding_pool
+)
+from lib.rag.embedding_cache import DEFAULT_MAX_MB, EmbeddingCache
+from lib.rag.splitter import TokenBudgetSplitter, get_model_tokenizer
+from lib.rag.dedup import ChunkDeduplicator, DEFAULT_BANDS, DEFAULT_THRESHOLD
+from lib.rag.pipeline import (
+    DEFAULT_INFLIGHT_WINDOW,
+    IndexWriter,
+    JsonlPageWriter,
+    run_streaming_pipeline
+)
+from lib.io_utils import find_xml_file, open_dump, strip_compression_suffix
 from lib.formatting import format_number
-from lib.config_loader import get_site_config
 from lib.xml_parser import iterate_pages
+from lib.rag.loader import load_mediawiki_documents_legacy
+from lib.rag.strip_cache import StripCache
+from lib.rag.index_manifest import IndexManifest, get_manifest_path, delete_from_store
+from lib.rag.checkpoint import EmbeddingCheckpoint, dump_source, get_checkpoint_dir
+from lib.rag.native_store import NativeVectorStore, find_native_store, get_native_store_path, save_native_store
+from lib.rag.ann_index import (
+    DEFAULT_EF_CONSTRUCTION, DEFAULT_EF_SEARCH, DEFAULT_HNSW_M, DEFAULT_NPROBE, DEFAULT_PQ_BITS, INDEX_TYPES, index_params
+)
 import config
 
 
-def create_and_save_vector_store(
+def load_documents(
     xml_path: str,
-    output_path: str,
-    chunk_size: int = 1000,
-    chunk_overlap: int = 200,
-    use_openai: bool = False,
-    embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+    workers: int = 1,
+    legacy_loader: bool = False,
+    strip_workers: int = 1,
+    use_strip_cache: bool = True,
+    section_chunks: bool = True
 ):
-    """Create vector store from XML and save to disk."""
-    
-    # Use multilingual model directly (no preprocessing needed)
-    print(f"Using multilingual embedding model: {embedding_model}")
+    """Stream documents with the single-pass loader, or load them with the legacy MWDumpLoader path for comparison."""
+    if legacy_loader:
+        print("Using legacy MWDumpLoader (multiple XML passes)")
+        return load_mediawiki_documents_legacy(xml_path, workers=workers)
     
-    print(f"Loading documents from: {xml_path}")
-    documents = load_mediawiki_documents(xml_path)  # Use default namespace_filter (all except excluded)
-    print(f"✓ Loaded {format_number(len(documents))} documents")
+    strip_cache = None
+    if use_strip_cache:
+        strip_cache = StripCache()
+        print(f"Using strip cache: {strip_cache.db_path} ({format_number(len(strip_cache))} pages)")
+    return lazy_load_mediawiki_documents(
+        xml_path,
+        workers=workers,
+        strip_workers=strip_workers,
+        strip_cache=strip_cache,
+        sections=section_chunks
+    )
+
+
+def create_splitter(
+    embeddings,
+    chunk_size: int,
+    chunk_overlap: int,
+    token_chunks: bool = False,
+    chunk_tokens: int = None,
+    chunk_overlap_tokens: int = None
+):
+    """
+    Create the per-document split function for body chunks.
     
-    print(f"Splitting documents (chunk_size={chunk_size}, overlap={chunk_overlap})")
-    chunks = split_documents(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    print(f"✓ Created {format_number(len(chunks))} chunks")
+    Returns:
+        (split_func, token_splitter) tuple; token_splitter is None for character chunks
+    """
+    if not token_chunks:
+        print(f"Splitting documents (chunk_size={chunk_size}, overlap={chunk_overlap} characters, "
+              f"along wikitext sections when available)")
+        return (lambda doc: split_documents([doc], chunk_size=chunk_size, chunk_overlap=chunk_overlap)), None
     
-    print(f"Creating vector store...")
+    tokenizer, max_seq_length = get_model_tokenizer(embeddings)
+    token_splitter = TokenBudgetSplitter(
+        tokenizer,
+        max_seq_length,
+        chunk_tokens=chunk_tokens,
+        chunk_overlap_tokens=chunk_overlap_tokens,
+        char_chunk_size=chunk_size,
+        char_chunk_overlap=chunk_overlap
+    )
+    print(f"Splitting documents by tokens (budget={token_splitter.chunk_tokens}, "
+          f"overlap={token_splitter.splitter.chunk_overlap} tokens, model max_seq_length={max_seq_length})")
+    return (lambda doc: token_splitter.split_documents([doc])), token_splitter
+
+
+def create_deduplicator(dedup_threshold: float = None, dedup_bands: int = DEFAULT_BANDS):
+    """Create the near-duplicate chunk filter, or None when dedup is off."""
+    if not dedup_threshold:
+        return None
+    print(f"Collapsing near-duplicate chunks (MinHash/LSH, threshold={dedup_threshold}, bands={dedup_bands})")
+    return ChunkDeduplicator(threshold=dedup_threshold, bands=dedup_bands)
+
+
+def print_embedding_backend(use_openai: bool, embedding_model: str, embedding_backend: str = 'torch'):
+    """Print which embedding backend is used."""
     if use_openai:
         print("  Using OpenAI embeddings")
+    elif embedding_backend == 'onnx':
+        print(f"  Using ONNX Runtime embeddings: {embedding_model}")
     else:
         print(f"  Using HuggingFace embeddings: {embedding_model}")
+
+
+def close_embedding_pool(embeddings):
+    """Print per-worker throughput and stop the encoder processes if --embed-workers started a pool."""
+    pool = embedding_pool(embeddings)
+    if pool is not None:
+        print(pool.report())
+        pool.close()
+
+
+def directory_size_mb(path: str) -> float:
+    """Total size of the files under a directory in MB."""
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    ) / 1024 / 1024
+
+
+def save_vector_store(
+    vector_store,
+    output_path: str,
+    label: str,
+    write_pickle: bool = True,
+    compressed: bool = False,
+    index_type: str = 'flat',
+    index_options: dict = None,
+    binary_signatures: bool = False
+):
+    """
+    Save a vector store as a native store directory (read by rag_search.py) and, unless disabled, as a pickle.
     
-    vector_store = create_vector_store(
-        chunks, 
-        embedding_model=embedding_model,
-        use_openai=use_openai
-    )
-    
-    print(f"Saving vector store to: {output_path}")
+    Args:
+        vector_store: LangChain FAISS store
+        output_path: Pickle path; the native store goes to <name>_native/ next to it
+        label: Store name for messages ('body', 'title')
+        write_pickle: Also write the pickle
+        compressed: Also write a gzipped pickle (<output_path>.gz)
+        index_type: Index type of the native store (the pickle always keeps the exact flat index)
+        index_options: Index parameters given on the command line (see ann_index.index_params())
+        binary_signatures: Also write sign-bit signatures for the binary prefilter (rag_search.py --binary-prefilter)
+    """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    # Save as regular pickle
+    native_path = get_native_store_path(output_path)
+    print(f"Saving {label} native vector store to: {native_path}")
+    params = index_params(index_type, vector_store.index.ntotal, vector_store.index.d, **(index_options or {}))
+    save_native_store(vector_store, native_path, index_type=index_type, params=params,
+                      binary_signatures=binary_signatures)
+    print(f"✓ Native {label} vector store saved ({directory_size_mb(native_path):.1f} MB)")
+    
+    if not write_pickle:
+        return
+    
+    print(f"Saving {label} vector store to: {output_path}")
     with open(output_path, 'wb') as f:
         pickle.dump(vector_store, f)
-    print(f"✓ Vector store saved successfully!")
+    print(f"✓ {label.capitalize()} vector store saved successfully!")
     print(f"  File size: {os.path.getsize(output_path) / 1024 / 1024:.1f} MB")
     
-    # Also save compressed version for web
-    gz_path = output_path + '.gz'
-    print(f"Creating compressed version: {gz_path}")
-    with gzip.open(gz_path, 'wb') as f:
-        pickle.dump(vector_store, f)
-    print(f"✓ Compressed vector store saved!")
-    print(f"  Compressed size: {os.path.getsize(gz_path) / 1024 / 1024:.1f} MB")
+    if compressed:
+        gz_path = output_path + '.gz'
+        print(f"Creating compressed version: {gz_path}")
+        with gzip.open(gz_path, 'wb') as f:
+            pickle.dump(vector_store, f)
+        print(f"✓ Compressed vector store saved!")
+        print(f"  Compressed size: {os.path.getsize(gz_path) / 1024 / 1024:.1f} MB")
+
+
+def load_saved_vector_store(output_path: str):
+    """Load a vector store written by save_vector_store() for modification: the pickle, else the native store."""
+    if os.path.exists(output_path):
+        with open(output_path, 'rb') as f:
+            return pickle.load(f)
+    return NativeVectorStore.load(get_native_store_path(output_path)).to_faiss()
+
+
+def create_and_save_vector_store(
+    xml_path: str,
+    output_path: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    use_openai: bool = False,
+    embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
+    workers: int = 1,
+    legacy_loader: bool = False,
+    window: int = DEFAULT_INFLIGHT_WINDOW,
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    embed_workers: int = 1,
+    strip_workers: int = 1,
+    use_strip_cache: bool = True,
+    embedding_cache: EmbeddingCache = None,
+    embedding_backend: str = 'torch',
+    onnx_model: str = None,
+    onnx_quantized: bool = False,
+    token_chunks: bool = False,
+    chunk_tokens: int = None,
+    chunk_overlap_tokens: int = None,
+    dedup_threshold: float = None,
+    dedup_bands: int = DEFAULT_BANDS,
+    section_chunks: bool = True,
+    resume: bool = False,
+    write_pickle: bool = True,
+    index_type: str = 'flat',
+    index_options: dict = None,
+    binary_signatures: bool = False
+):
+    """Create vector store from XML and save to disk."""
+    
+    # Use multilingual model directly (no preprocessing needed)
+    print(f"Using multilingual embedding model: {embedding_model}")
+    
+    print(f"Streaming documents from: {xml_path}")
+    print_embedding_backend(use_openai, embedding_model, embedding_backend)
+    
+    embeddings = create_embeddings(
+        embedding_model, use_openai, embedding_cache, embed_workers, embed_batch_size,
+        backend=embedding_backend, onnx_model_dir=onnx_model, onnx_quantized=onnx_quantized
+    )
+    split_func, token_splitter = create_splitter(
+        embeddings, chunk_size, chunk_overlap, token_chunks, chunk_tokens, chunk_overlap_tokens
+    )
+    checkpoint = EmbeddingCheckpoint(get_checkpoint_dir(output_path), {
+        'mode': 'body',
+        'dump': dump_source(xml_path),
+        'chunk_unit': 'tokens' if token_splitter else 'chars',
+        'chunk_size': token_splitter.chunk_tokens if token_splitter else chunk_size,
+        'chunk_overlap': token_splitter.splitter.chunk_overlap if token_splitter else chunk_overlap,
+        'embedding_model': 'openai' if use_openai else embedding_model,
+        'embedding_backend': embedding_backend,
+        'onnx_quantized': onnx_quantized,
+        'dedup': [dedup_threshold, dedup_bands] if dedup_threshold else None,
+        'sections': section_chunks and not legacy_loader
+    }, resume)
+    body_writer = IndexWriter(embeddings, batch_size=embed_batch_size, checkpoint=checkpoint, name='body')
+    deduplicator = create_deduplicator(dedup_threshold, dedup_bands)
+    stats = run_streaming_pipeline(
+        load_documents(
+            xml_path,
+            workers=workers,
+            legacy_loader=legacy_loader,
+            strip_workers=strip_workers,
+            use_strip_cache=use_strip_cache,
+            section_chunks=section_chunks
+        ),
+        split_func=split_func,
+        body_writer=body_writer,
+        window=window,
+        deduplicator=deduplicator
+    )
+    vector_store = body_writer.close()
+    close_embedding_pool(embeddings)
+    if embedding_cache is not None:
+        print(embedding_cache.report())
+    if token_splitter:
+        print(token_splitter.report())
+    if deduplicator:
+        deduplicator.apply(vector_store)
+        print(deduplicator.report(vector_store.index.d))
+    print(f"✓ Loaded {format_number(stats['documents'])} documents")
+    print(f"✓ Created {format_number(stats['chunks'])} chunks")
+    
+    save_vector_store(vector_store, output_path, 'body', write_pickle, compressed=True,
+                      index_type=index_type, index_options=index_options, binary_signatures=binary_signatures)
+    checkpoint.remove()
     
     return vector_store
 
@@ -90,42 +295,60 @@ def create_and_save_title_vector_store(
     output_path: str,
     use_openai: bool = False,
     embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
-    title_embedding_dim: int = 384  # Keep full dimension to match query embeddings
+    title_embedding_dim: int = 384,  # Keep full dimension to match query embeddings
+    workers: int = 1,
+    legacy_loader: bool = False,
+    window: int = DEFAULT_INFLIGHT_WINDOW,
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    embed_workers: int = 1,
+    strip_workers: int = 1,
+    use_strip_cache: bool = True,
+    embedding_cache: EmbeddingCache = None,
+    embedding_backend: str = 'torch',
+    onnx_model: str = None,
+    onnx_quantized: bool = False,
+    resume: bool = False,
+    write_pickle: bool = True,
+    binary_signatures: bool = False
 ):
     """Create title-only vector store from XML and save to disk."""
     
     print(f"Creating title vector store...")
     print(f"Using multilingual embedding model: {embedding_model}")
     
-    print(f"Loading documents from: {xml_path}")
-    documents = load_mediawiki_documents(xml_path)
-    print(f"✓ Loaded {format_number(len(documents))} documents")
-    
-    # Create title-based documents (title only for accurate title matching)
-    title_documents = []
-    for doc in documents:
-        if hasattr(doc, 'metadata') and doc.metadata and 'title' in doc.metadata:
-            # Create a document with title only for accurate title-based search
-            # This ensures title embeddings match query title embeddings
-            title_doc = type(doc)(
-                page_content=doc.metadata['title'],  # Use title only for embedding
-                metadata=doc.metadata
-            )
-            title_documents.append(title_doc)
-    
-    print(f"✓ Created {format_number(len(title_documents))} title documents")
+    print(f"Streaming documents from: {xml_path}")
+    print_embedding_backend(use_openai, embedding_model, embedding_backend)
     
-    print(f"Creating title vector store...")
-    if use_openai:
-        print("  Using OpenAI embeddings")
-    else:
-        print(f"  Using HuggingFace embeddings: {embedding_model}")
-    
-    title_vector_store = create_vector_store(
-        title_documents, 
-        embedding_model=embedding_model,
-        use_openai=use_openai
+    # Title-only documents for accurate title matching (title embeddings match query title embeddings)
+    embeddings = create_embeddings(
+        embedding_model, use_openai, embedding_cache, embed_workers, embed_batch_size,
+        backend=embedding_backend, onnx_model_dir=onnx_model, onnx_quantized=onnx_quantized
     )
+    checkpoint = EmbeddingCheckpoint(get_checkpoint_dir(output_path), {
+        'mode': 'title',
+        'dump': dump_source(xml_path),
+        'embedding_model': 'openai' if use_openai else embedding_model,
+        'embedding_backend': embedding_backend,
+        'onnx_quantized': onnx_quantized
+    }, resume)
+    title_writer = IndexWriter(embeddings, batch_size=embed_batch_size, checkpoint=checkpoint, name='title')
+    stats = run_streaming_pipeline(
+        load_documents(
+            xml_path,
+            workers=workers,
+            legacy_loader=legacy_loader,
+            strip_workers=strip_workers,
+            use_strip_cache=use_strip_cache
+        ),
+        title_writer=title_writer,
+        window=window
+    )
+    title_vector_store = title_writer.close()
+    close_embedding_pool(embeddings)
+    if embedding_cache is not None:
+        print(embedding_cache.report())
+    print(f"✓ Loaded {format_number(stats['documents'])} documents")
+    print(f"✓ Created {format_number(stats['titles'])} title documents")
     
     # Apply PCA dimension reduction for titles to reduce file size
     if title_embedding_dim < 384:  # Only if reduction is needed (disabled for now to avoid dimension mismatch)
@@ -167,21 +390,14 @@ def create_and_save_title_vector_store(
         else:
             print("Warning: No embeddings found for dimension reduction")
     
-    print(f"Saving title vector store to: {output_path}")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Save as regular pickle
-    with open(output_path, 'wb') as f:
-        pickle.dump(title_vector_store, f)
-    print(f"✓ Title vector store saved successfully!")
-    print(f"  File size: {os.path.getsize(output_path) / 1024 / 1024:.1f} MB")
+    save_vector_store(title_vector_store, output_path, 'title', write_pickle, binary_signatures=binary_signatures)
     
     # Create metadata file for title vector store
     actual_embedding_dim = title_vector_store.index.d if hasattr(title_vector_store.index, 'd') else title_embedding_dim
     meta_data = {
-        'total_documents': len(title_documents),
+        'total_documents': stats['titles'],
         'num_parts': 1,  # Title vector store is single file
-        'docs_per_part': len(title_documents),
+        'docs_per_part': stats['titles'],
         'embedding_dimension': actual_embedding_dim
     }
     
@@ -190,10 +406,42 @@ def create_and_save_title_vector_store(
     with open(meta_path, 'w', encoding='utf-8') as f:
         json.dump(meta_data, f, indent=2)
     print(f"✓ Title metadata saved: {meta_path}")
+    checkpoint.remove()
     
     return title_vector_store
 
 
+def load_previous_build(manifest_path: str, body_output: str, title_output: str, settings: dict):
+    """
+    Load the manifest and vector stores of the previous build for an incremental update.
+    
+    Returns:
+        (manifest, body_vector_store, title_vector_store), or (None, None, None) if a full build is needed
+    """
+    manifest = IndexManifest.load(manifest_path)
+    if manifest is None:
+        print(f"⚠ No build manifest found at {manifest_path}, running a full build")
+        return None, None, None
+    
+    if not manifest.is_compatible(settings):
+        print(f"⚠ Chunking or embedding settings changed since the last build, running a full build")
+        return None, None, None
+    
+    if not all(os.path.exists(path) or find_native_store(path) for path in (body_output, title_output)):
+        print(f"⚠ Previous vector stores not found, running a full build")
+        return None, None, None
+    
+    body_vector_store = load_saved_vector_store(body_output)
+    title_vector_store = load_saved_vector_store(title_output)
+    # Stores built before inner-product indexes are converted, so old and new chunks score alike
+    if any([convert_to_inner_product(store) for store in (body_vector_store, title_vector_store)]):
+        print("✓ Converted the previous L2 indexes to inner product")
+    
+    print(f"✓ Loaded previous build: {format_number(len(manifest.pages))} pages, "
+          f"{format_number(body_vector_store.index.ntotal)} body chunks")
+    return manifest, body_vector_store, title_vector_store
+
+
 def create_both_vector_stores(
     xml_path: str,
     body_output: str,
@@ -202,122 +450,147 @@ def create_both_vector_stores(
     chunk_overlap: int = 200,
     use_openai: bool = False,
     embedding_model: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
-    title_embedding_dim: int = 384
+    title_embedding_dim: int = 384,
+    workers: int = 1,
+    legacy_loader: bool = False,
+    window: int = DEFAULT_INFLIGHT_WINDOW,
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    embed_workers: int = 1,
+    strip_workers: int = 1,
+    use_strip_cache: bool = True,
+    embedding_cache: EmbeddingCache = None,
+    embedding_backend: str = 'torch',
+    onnx_model: str = None,
+    onnx_quantized: bool = False,
+    incremental: bool = False,
+    token_chunks: bool = False,
+    chunk_tokens: int = None,
+    chunk_overlap_tokens: int = None,
+    dedup_threshold: float = None,
+    dedup_bands: int = DEFAULT_BANDS,
+    section_chunks: bool = True,
+    resume: bool = False,
+    write_pickle: bool = True,
+    index_type: str = 'flat',
+    index_options: dict = None,
+    binary_signatures: bool = False
 ):
-    """Create both body and title vector stores from single XML read, and generate JSONL.gz file."""
+    """
+    Create both body and title vector stores from a single XML read, and generate the JSONL.gz file.
+    
+    Documents are streamed once through the JSONL writer, the body splitter and
+    both index writers; at most `window` parsed documents are held between the
+    loader and the embedders. A build manifest is written next to the body
+    store; with `incremental`, only pages added or changed since that build
+    are embedded, and deleted or replaced pages are removed from the stores.
+    Embedded batches are checkpointed next to the body store; with `resume`,
+    a build that died is continued after its last completed batch.
+    """
     
-    print(f"Loading documents from: {xml_path}")
+    print(f"Streaming documents from: {xml_path}")
     print(f"Using multilingual embedding model: {embedding_model}")
     
     # Create JSONL.gz file path
-    jsonl_gz_path = str(xml_path).replace('.xml', '.jsonl.gz')
+    jsonl_gz_path = strip_compression_suffix(xml_path).replace('.xml', '.jsonl.gz')
     print(f"Will create JSONL.gz file: {jsonl_gz_path}")
     
-    # Get site configuration for excluded namespaces
-    site_config = get_site_config(config.CURRENT_SITE)
-    excluded_prefixes = [ns + ':' for ns in site_config.EXCLUDED_NAMESPACES]
-    
-    # Single XML read for both body and title processing
-    documents = load_mediawiki_documents(xml_path)
-    print(f"✓ Loaded {format_number(len(documents))} documents")
-    
-    # Create JSONL.gz file with essential fields from loaded documents
-    print("\n=== Creating JSONL.gz file ===")
-    with gzip.open(jsonl_gz_path, 'wt', encoding='utf-8') as jsonl_file:
-        # Group documents by curid to get full page content
-        page_map = {}
-        for doc in documents:
-            curid = doc.metadata.get('curid')
-            if curid:
-                if curid not in page_map:
-                    page_map[curid] = {
-                        'curid': curid,
-                        'title': doc.metadata.get('title', 'Unknown'),
-                        'text': doc.page_content,  # Full page content
-                        'metadata': doc.metadata
-                    }
-                else:
-                    # If multiple documents with same curid (shouldn't happen), keep the first one
-                    pass
-        
-        # Write pages to JSONL
-        page_count = 0
-        for curid, page_data in page_map.items():
-            # Create JSONL entry with essential fields
-            jsonl_entry = {
-                'curid': page_data['curid'],
-                'title': page_data['title'],
-                'text': page_data['text']
-            }
-            
-            # Note: timestamp is not available in the Document objects from load_mediawiki_documents
-            # If needed, we would need to parse the XML directly
-            
-            # Write to JSONL file
-            jsonl_file.write(json.dumps(jsonl_entry, ensure_ascii=False) + '\n')
-            page_count += 1
-            
-            if page_count % 100 == 0:
-                print(f"Written {page_count:,} pages to JSONL...", end='\r')
-        
-        print(f"\n✓ Created JSONL.gz with {format_number(page_count)} pages")
+    embeddings = create_embeddings(
+        embedding_model, use_openai, embedding_cache, embed_workers, embed_batch_size,
+        backend=embedding_backend, onnx_model_dir=onnx_model, onnx_quantized=onnx_quantized
+    )
+    split_func, token_splitter = create_splitter(
+        embeddings, chunk_size, chunk_overlap, token_chunks, chunk_tokens, chunk_overlap_tokens
+    )
     
-    # Check JSONL.gz file size
-    jsonl_size = os.path.getsize(jsonl_gz_path) / (1024 * 1024)  # MB
-    print(f"  JSONL.gz file size: {jsonl_size:.1f} MB")
+    settings = {
+        'splitter': 'offset',  # OffsetTextSplitter with WIKI_SEPARATORS
+        'chunk_unit': 'tokens' if token_splitter else 'chars',
+        'chunk_size': token_splitter.chunk_tokens if token_splitter else chunk_size,
+        'chunk_overlap': token_splitter.splitter.chunk_overlap if token_splitter else chunk_overlap,
+        'embedding_model': 'openai' if use_openai else embedding_model,
+        'title_embedding_dim': title_embedding_dim,
+        'dedup': [dedup_threshold, dedup_bands] if dedup_threshold else None,
+        'sections': section_chunks and not legacy_loader
+    }
+    if embedding_backend == 'onnx' and not use_openai:
+        # ONNX vectors differ slightly from torch ones; do not mix them in incremental builds
+        settings['embedding_backend'] = 'onnx-int8' if onnx_quantized else 'onnx'
+    manifest_path = get_manifest_path(body_output)
+    manifest, previous_body_store, previous_title_store = None, None, None
+    if incremental:
+        manifest, previous_body_store, previous_title_store = load_previous_build(
+            manifest_path, body_output, title_output, settings
+        )
+    if manifest is None:
+        manifest = IndexManifest(settings)
     
-    # Split documents for body chunks and title processing
-    print("\n=== Processing body chunks ===")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
+    print(f"\n=== Streaming JSONL.gz, body chunks and titles (in-flight window: {window} documents) ===")
+    print_embedding_backend(use_openai, embedding_model, embedding_backend)
+    checkpoint = EmbeddingCheckpoint(
+        get_checkpoint_dir(body_output),
+        {**settings, 'mode': 'both', 'incremental': incremental, 'dump': dump_source(xml_path)},
+        resume
+    )
+    body_writer = IndexWriter(
+        embeddings, batch_size=embed_batch_size, vector_store=previous_body_store, checkpoint=checkpoint, name='body'
+    )
+    deduplicator = create_deduplicator(dedup_threshold, dedup_bands)
+    title_writer = IndexWriter(
+        embeddings, batch_size=embed_batch_size, vector_store=previous_title_store, checkpoint=checkpoint, name='title'
     )
     
-    body_chunks = text_splitter.split_documents(documents)
-    print(f"✓ Created {format_number(len(body_chunks))} body chunks")
+    # Single XML read feeds all three outputs
+    stats = run_streaming_pipeline(
+        load_documents(
+            xml_path,
+            workers=workers,
+            legacy_loader=legacy_loader,
+            strip_workers=strip_workers,
+            use_strip_cache=use_strip_cache,
+            section_chunks=section_chunks
+        ),
+        split_func=split_func,
+        body_writer=body_writer,
+        title_writer=title_writer,
+        page_writer=JsonlPageWriter(jsonl_gz_path),
+        window=window,
+        manifest=manifest,
+        deduplicator=deduplicator
+    )
+    body_vector_store = body_writer.close()
+    title_vector_store = title_writer.close()
+    if token_splitter:
+        print(token_splitter.report())
+    if deduplicator:
+        deduplicator.apply(body_vector_store)
+        print(deduplicator.report(body_vector_store.index.d))
     
-    print("\n=== Processing title documents ===")
-    title_documents = []
-    for doc in documents:
-        if hasattr(doc, 'metadata') and doc.metadata and 'title' in doc.metadata:
-            title_doc = Document(
-                page_content=doc.metadata['title'],  # Use title only for accurate matching
-                metadata=doc.metadata.copy()
-            )
-            title_documents.append(title_doc)
+    # Remove replaced and deleted pages in one batch per store
+    changes = manifest.finish()
+    deleted_chunks = delete_from_store(body_vector_store, changes['chunk_ids'])
+    deleted_titles = delete_from_store(title_vector_store, changes['title_ids'])
+    if incremental:
+        print(f"✓ Pages: {format_number(changes['added'])} added, {format_number(changes['changed'])} changed, "
+              f"{format_number(changes['deleted'])} deleted, {format_number(changes['unchanged'])} unchanged")
+        print(f"  Removed {format_number(deleted_chunks)} stale body chunks and {format_number(deleted_titles)} stale titles")
     
-    print(f"✓ Created {format_number(len(title_documents))} title documents")
+    print(f"✓ Loaded {format_number(stats['documents'])} documents")
+    print(f"✓ Created JSONL.gz with {format_number(stats['pages'])} pages")
     
-    # Create body vector store
-    print(f"\n=== Creating body vector store ===")
-    if use_openai:
-        print("  Using OpenAI embeddings")
-    else:
-        print(f"  Using HuggingFace embeddings: {embedding_model}")
-    
-    body_vector_store = create_vector_store(
-        body_chunks,
-        embedding_model=embedding_model,
-        use_openai=use_openai
-    )
+    # Check JSONL.gz file size
+    jsonl_size = os.path.getsize(jsonl_gz_path) / (1024 * 1024)  # MB
+    print(f"  JSONL.gz file size: {jsonl_size:.1f} MB")
+    print(f"✓ Embedded {format_number(stats['chunks'])} body chunks ({format_number(body_vector_store.index.ntotal)} in store)")
+    print(f"✓ Embedded {format_number(stats['titles'])} title documents ({format_number(title_vector_store.index.ntotal)} in store)")
+    print(f"  Embedding time: body {body_writer.embed_seconds:.1f}s, titles {title_writer.embed_seconds:.1f}s")
+    print(f"  Indexing time: body {body_writer.index_seconds:.1f}s, titles {title_writer.index_seconds:.1f}s")
+    if embedding_cache is not None:
+        print(f"  {embedding_cache.report()}")
+    close_embedding_pool(embeddings)
     
     # Save body vector store
-    print(f"Saving body vector store to: {body_output}")
-    os.makedirs(os.path.dirname(body_output), exist_ok=True)
-    
-    with open(body_output, 'wb') as f:
-        pickle.dump(body_vector_store, f)
-    print(f"✓ Body vector store saved successfully!")
-    print(f"  File size: {os.path.getsize(body_output) / 1024 / 1024:.1f} MB")
-    
-    # Create title vector store with dimension reduction
-    print(f"\n=== Creating title vector store ===")
-    title_vector_store = create_vector_store(
-        title_documents, 
-        embedding_model=embedding_model,
-        use_openai=use_openai
-    )
+    save_vector_store(body_vector_store, body_output, 'body', write_pickle,
+                      index_type=index_type, index_options=index_options, binary_signatures=binary_signatures)
     
     # Apply PCA dimension reduction for titles (disabled for now to avoid dimension mismatch)
     if title_embedding_dim < 384:
@@ -358,20 +631,14 @@ def create_both_vector_stores(
             print(f"✓ PCA model saved: {pca_path}")
     
     # Save title vector store
-    print(f"Saving title vector store to: {title_output}")
-    os.makedirs(os.path.dirname(title_output), exist_ok=True)
-    
-    with open(title_output, 'wb') as f:
-        pickle.dump(title_vector_store, f)
-    print(f"✓ Title vector store saved successfully!")
-    print(f"  File size: {os.path.getsize(title_output) / 1024 / 1024:.1f} MB")
+    save_vector_store(title_vector_store, title_output, 'title', write_pickle, binary_signatures=binary_signatures)
     
     # Create metadata files
     # Body metadata
     body_meta_data = {
-        'total_documents': len(body_chunks),
+        'total_documents': body_vector_store.index.ntotal,
         'num_parts': 1,
-        'docs_per_part': len(body_chunks),
+        'docs_per_part': body_vector_store.index.ntotal,
         'embedding_dimension': body_vector_store.index.d if hasattr(body_vector_store.index, 'd') else 384
     }
     
@@ -383,9 +650,9 @@ def create_both_vector_stores(
     # Title metadata
     actual_title_dim = title_vector_store.index.d if hasattr(title_vector_store.index, 'd') else title_embedding_dim
     title_meta_data = {
-        'total_documents': len(title_documents),
+        'total_documents': title_vector_store.index.ntotal,
         'num_parts': 1,
-        'docs_per_part': len(title_documents),
+        'docs_per_part': title_vector_store.index.ntotal,
         'embedding_dimension': actual_title_dim
     }
     
@@ -394,26 +661,32 @@ def create_both_vector_stores(
         json.dump(title_meta_data, f, indent=2)
     print(f"✓ Title metadata saved: {title_meta_path}")
     
+    manifest.save(manifest_path)
+    print(f"✓ Build manifest saved: {manifest_path} ({format_number(len(manifest.pages))} pages)")
+    checkpoint.remove()
+    
     return body_vector_store, title_vector_store
 
 
 def compress_xml_file(xml_path: str):
-    """Create a gzipped version of the XML file for web use."""
-    gz_path = str(xml_path) + '.gz'
+    """Create a gzipped version of the XML file for web use (streams compressed sources)."""
+    gz_path = strip_compression_suffix(xml_path) + '.gz'
+    
+    if str(xml_path) == gz_path:
+        print(f"\nSource is already gzipped, skipping XML compression: {xml_path}")
+        return gz_path
     
     print(f"\nCreating compressed XML file for web use...")
     print(f"  Source: {xml_path}")
     print(f"  Output: {gz_path}")
     
-    # Get original file size
-    original_size = os.path.getsize(xml_path) / (1024 * 1024)  # MB
-    
-    # Compress the file
-    with open(xml_path, 'rb') as f_in:
+    # Compress the file, decompressing the source on the fly if needed
+    with open_dump(xml_path) as f_in:
         with gzip.open(gz_path, 'wb', compresslevel=9) as f_out:
             shutil.copyfileobj(f_in, f_out)
     
-    # Get compressed file size
+    # Get file sizes (source size is the on-disk size, compressed or not)
+    original_size = os.path.getsize(xml_path) / (1024 * 1024)  # MB
     compressed_size = os.path.getsize(gz_path) / (1024 * 1024)  # MB
     compression_ratio = (1 - compressed_size / original_size) * 100
     
@@ -431,7 +704,7 @@ def main():
     )
     parser.add_argument(
         '--xml-file',
-        help='Path to XML file (auto-detected if not specified)'
+        help='Path to XML file, plain or compressed (.7z, .gz, .bz2, .zst; auto-detected if not specified)'
     )
     parser.add_argument(
         '--output',
@@ -450,6 +723,44 @@ def main():
         default=300,
         help='Chunk overlap for text splitting (default: 300, 25%% overlap for concept continuity)'
     )
+    parser.add_argument(
+        '--token-chunks',
+        action='store_true',
+        help='Size chunks by the embedding model\'s tokenizer to fit its max sequence length '
+             '(--chunk-size/--chunk-overlap are then only used for the truncation report)'
+    )
+    parser.add_argument(
+        '--chunk-tokens',
+        type=int,
+        help='Token budget per chunk with --token-chunks (default: model max_seq_length minus special tokens)'
+    )
+    parser.add_argument(
+        '--chunk-overlap-tokens',
+        type=int,
+        help='Overlap between chunks in tokens with --token-chunks (default: a quarter of the budget)'
+    )
+    parser.add_argument(
+        '--no-section-chunks',
+        action='store_true',
+        help='Split the stripped page text as a whole instead of packing wikitext sections (== Heading ==) into chunks'
+    )
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Embed near-duplicate body chunks once and keep references to all their sources'
+    )
+    parser.add_argument(
+        '--dedup-threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f'Estimated Jaccard similarity of character shingles above which chunks are collapsed (default: {DEFAULT_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--dedup-bands',
+        type=int,
+        default=DEFAULT_BANDS,
+        help=f'LSH bands of the 128-value MinHash signature; more bands find more candidates (default: {DEFAULT_BANDS})'
+    )
     parser.add_argument(
         '--use-openai',
         action='store_true',
@@ -461,6 +772,156 @@ def main():
         help='HuggingFace embedding model (default: paraphrase-multilingual-mpnet-base-v2)'
     )
     
+    parser.add_argument(
+        '--embedding-backend',
+        choices=EMBEDDING_BACKENDS,
+        default='torch',
+        help='Run the HuggingFace model with sentence-transformers (torch) or onnxruntime (onnx) (default: torch)'
+    )
+    parser.add_argument(
+        '--onnx-model',
+        help='Local ONNX export of the embedding model for --embedding-backend onnx '
+             '(directory with tokenizer files and onnx/model.onnx, e.g. Xenova/paraphrase-multilingual-mpnet-base-v2)'
+    )
+    parser.add_argument(
+        '--onnx-quantized',
+        action='store_true',
+        help='Use the int8 onnx/model_quantized.onnx of the export'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes for parallel XML parsing (default: 1, 0 = all CPU cores)'
+    )
+    
+    parser.add_argument(
+        '--strip-workers',
+        type=int,
+        default=1,
+        help='Worker processes for wikitext-to-plaintext stripping (default: 1, 0 = all CPU cores)'
+    )
+    
+    parser.add_argument(
+        '--no-strip-cache',
+        action='store_true',
+        help=f'Re-strip every page instead of reusing {config.DATA_DIR}/strip_cache.sqlite'
+    )
+    
+    parser.add_argument(
+        '--no-embedding-cache',
+        action='store_true',
+        help=f'Embed every chunk and title instead of reusing {config.DATA_DIR}/embedding_cache.sqlite'
+    )
+    
+    parser.add_argument(
+        '--embedding-cache-mb',
+        type=float,
+        default=DEFAULT_MAX_MB,
+        help=f'Size limit of the embedding cache; least recently used vectors are evicted (default: {DEFAULT_MAX_MB})'
+    )
+    
+    parser.add_argument(
+        '--inflight-window',
+        type=int,
+        default=DEFAULT_INFLIGHT_WINDOW,
+        help=f'Maximum parsed documents buffered ahead of embedding (default: {DEFAULT_INFLIGHT_WINDOW})'
+    )
+    
+    parser.add_argument(
+        '--embed-batch-size',
+        type=int,
+        default=DEFAULT_EMBED_BATCH_SIZE,
+        help=f'Chunks per embedding batch; batches are length-sorted (default: {DEFAULT_EMBED_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--embed-workers',
+        type=int,
+        default=1,
+        help='Encoder processes for HuggingFace embeddings, each pinned to its own cores (default: 1 = in-process, 0 = one per core)'
+    )
+    
+    parser.add_argument(
+        '--legacy-loader',
+        action='store_true',
+        help='Load documents with the old MWDumpLoader path (parses the XML twice; for comparison)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Only embed pages added or changed since the last build (uses vector_store_manifest.json)'
+    )
+    
+    parser.add_argument(
+        '--index-type',
+        choices=INDEX_TYPES,
+        default='flat',
+        help='Index of the native body store: exact flat search, approximate IVF-Flat, IVF-PQ or HNSW, '
+             'or a flat scan over int8, float16 or PQ codes (default: flat; compare with test/bench/bench_ann_index.py)'
+    )
+    parser.add_argument(
+        '--nlist',
+        type=int,
+        help='IVF inverted lists (default: 4 * sqrt(chunks))'
+    )
+    parser.add_argument(
+        '--nprobe',
+        type=int,
+        default=DEFAULT_NPROBE,
+        help=f'IVF lists searched per query, stored with the index (default: {DEFAULT_NPROBE})'
+    )
+    parser.add_argument(
+        '--pq-m',
+        type=int,
+        help='PQ and IVF-PQ sub-quantizers; must divide the embedding dimension (default: dimension / 8)'
+    )
+    parser.add_argument(
+        '--pq-bits',
+        type=int,
+        default=DEFAULT_PQ_BITS,
+        help=f'PQ and IVF-PQ bits per sub-quantizer code (default: {DEFAULT_PQ_BITS})'
+    )
+    parser.add_argument(
+        '--hnsw-m',
+        type=int,
+        default=DEFAULT_HNSW_M,
+        help=f'HNSW neighbours per node (default: {DEFAULT_HNSW_M})'
+    )
+    parser.add_argument(
+        '--ef-construction',
+        type=int,
+        default=DEFAULT_EF_CONSTRUCTION,
+        help=f'HNSW candidate list size while building (default: {DEFAULT_EF_CONSTRUCTION})'
+    )
+    parser.add_argument(
+        '--ef-search',
+        type=int,
+        default=DEFAULT_EF_SEARCH,
+        help=f'HNSW candidate list size per query, stored with the index (default: {DEFAULT_EF_SEARCH})'
+    )
+    
+    parser.add_argument(
+        '--binary-signatures',
+        action='store_true',
+        help='Also store a packed sign-bit signature (1 bit per dimension) of every body and title vector '
+             'in the native stores, for rag_search.py --binary-prefilter'
+    )
+    
+    parser.add_argument(
+        '--no-pickle',
+        action='store_true',
+        help='Only write the memory-mapped native stores (<name>_native/), not the LangChain pickles'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted build from its last checkpointed embedding batch (same dump and settings)'
+    )
+    
     parser.add_argument(
         '--title-only',
         action='store_true',
@@ -475,6 +936,33 @@ def main():
     
     args = parser.parse_args()
     
+    if args.token_chunks and args.use_openai:
+        print("Error: --token-chunks requires a HuggingFace embedding model")
+        sys.exit(1)
+    
+    if args.use_openai and args.embed_workers != 1:
+        print("Error: --embed-workers requires a HuggingFace embedding model")
+        sys.exit(1)
+    
+    if args.embedding_backend == 'onnx':
+        if args.use_openai:
+            print("Error: --embedding-backend onnx cannot be combined with --use-openai")
+            sys.exit(1)
+        if not args.onnx_model:
+            print("Error: --embedding-backend onnx requires --onnx-model")
+            sys.exit(1)
+        if args.embed_workers != 1:
+            print("Error: --embed-workers starts sentence-transformers processes; the onnx backend uses onnxruntime threads")
+            sys.exit(1)
+    
+    if args.incremental and args.dedup:
+        print("Error: --dedup cannot be combined with --incremental (duplicates may point at replaced chunks)")
+        sys.exit(1)
+    
+    if args.incremental and (args.title_only or args.body_only):
+        print("Error: --incremental updates both vector stores and cannot be combined with --title-only or --body-only")
+        sys.exit(1)
+    
     # Always overwrite existing vector store
     if os.path.exists(args.output):
         print(f"Overwriting existing vector store: {args.output}")
@@ -492,6 +980,33 @@ def main():
         print(f"Error: XML file not found: {xml_path}")
         sys.exit(1)
     
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if workers > 1:
+        print(f"Parallel XML parsing with {workers} workers")
+    
+    strip_workers = args.strip_workers if args.strip_workers > 0 else (os.cpu_count() or 1)
+    if strip_workers > 1:
+        print(f"Parallel wikitext stripping with {strip_workers} workers")
+    
+    embed_workers = args.embed_workers if args.embed_workers > 0 else (os.cpu_count() or 1)
+    if embed_workers > 1:
+        print(f"Parallel embedding with {embed_workers} encoder processes")
+    
+    embedding_cache = None
+    if not args.no_embedding_cache:
+        embedding_cache = EmbeddingCache(max_mb=args.embedding_cache_mb)
+        print(f"Using embedding cache: {embedding_cache.db_path} ({format_number(len(embedding_cache))} vectors)")
+    
+    index_options = {
+        'nlist': args.nlist,
+        'pq_m': args.pq_m,
+        'pq_bits': args.pq_bits,
+        'hnsw_m': args.hnsw_m,
+        'ef_construction': args.ef_construction,
+        'nprobe': args.nprobe,
+        'ef_search': args.ef_search
+    }
+    
     try:
         if args.title_only:
             # Create title-only vector store
@@ -501,7 +1016,21 @@ def main():
                 title_output,
                 use_openai=args.use_openai,
                 embedding_model=args.embedding_model,
-                title_embedding_dim=384  # Keep full dimension to match query embeddings
+                title_embedding_dim=384,  # Keep full dimension to match query embeddings
+                workers=workers,
+                legacy_loader=args.legacy_loader,
+                window=args.inflight_window,
+                embed_batch_size=args.embed_batch_size,
+                embed_workers=embed_workers,
+                strip_workers=strip_workers,
+                use_strip_cache=not args.no_strip_cache,
+                embedding_cache=embedding_cache,
+                embedding_backend=args.embedding_backend,
+                onnx_model=args.onnx_model,
+                onnx_quantized=args.onnx_quantized,
+                resume=args.resume,
+                write_pickle=not args.no_pickle,
+                binary_signatures=args.binary_signatures
             )
             print(f"\\nTitle vector store created successfully!")
             print(f"Output: {title_output}")
@@ -513,7 +1042,29 @@ def main():
                 chunk_size=args.chunk_size,
                 chunk_overlap=args.chunk_overlap,
                 use_openai=args.use_openai,
-                embedding_model=args.embedding_model
+                embedding_model=args.embedding_model,
+                workers=workers,
+                legacy_loader=args.legacy_loader,
+                window=args.inflight_window,
+                embed_batch_size=args.embed_batch_size,
+                embed_workers=embed_workers,
+                strip_workers=strip_workers,
+                use_strip_cache=not args.no_strip_cache,
+                embedding_cache=embedding_cache,
+                embedding_backend=args.embedding_backend,
+                onnx_model=args.onnx_model,
+                onnx_quantized=args.onnx_quantized,
+                token_chunks=args.token_chunks,
+                chunk_tokens=args.chunk_tokens,
+                chunk_overlap_tokens=args.chunk_overlap_tokens,
+                dedup_threshold=args.dedup_threshold if args.dedup else None,
+                dedup_bands=args.dedup_bands,
+                section_chunks=not args.no_section_chunks,
+                resume=args.resume,
+                write_pickle=not args.no_pickle,
+                index_type=args.index_type,
+                index_options=index_options,
+                binary_signatures=args.binary_signatures
             )
             print(f"\\nBody vector store created successfully!")
             print(f"Output: {args.output}")
@@ -529,7 +1080,30 @@ def main():
                 chunk_overlap=args.chunk_overlap,
                 use_openai=args.use_openai,
                 embedding_model=args.embedding_model,
-                title_embedding_dim=384  # Keep full dimension to match query embeddings
+                title_embedding_dim=384,  # Keep full dimension to match query embeddings
+                workers=workers,
+                legacy_loader=args.legacy_loader,
+                window=args.inflight_window,
+                embed_batch_size=args.embed_batch_size,
+                embed_workers=embed_workers,
+                strip_workers=strip_workers,
+                use_strip_cache=not args.no_strip_cache,
+                embedding_cache=embedding_cache,
+                embedding_backend=args.embedding_backend,
+                onnx_model=args.onnx_model,
+                onnx_quantized=args.onnx_quantized,
+                incremental=args.incremental,
+                token_chunks=args.token_chunks,
+                chunk_tokens=args.chunk_tokens,
+                chunk_overlap_tokens=args.chunk_overlap_tokens,
+                dedup_threshold=args.dedup_threshold if args.dedup else None,
+                dedup_bands=args.dedup_bands,
+                section_chunks=not args.no_section_chunks,
+                resume=args.resume,
+                write_pickle=not args.no_pickle,
+                index_type=args.index_type,
+                index_options=index_options,
+                binary_signatures=args.binary_signatures
             )
             
             print(f"\n✓ Both vector stores created successfully!")
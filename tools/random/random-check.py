@@ -7,15 +7,15 @@ a random page selector that generates an HTML page with a button to jump
 to random wiki pages (excluding pages specified in site configuration).
 """
 
-import xml.etree.ElementTree as ET
 import os
 import random
 import sys
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.append('../../')
 import config
+from lib.scan import Analyzer, ScanContext, ScanStats, run_analyzers
 
 # Configuration - output to site-specific analysis directory
 OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'random.html')
@@ -52,6 +52,66 @@ def should_exclude_page(title: str, excluded_namespaces: List[str]) -> bool:
     return False
 
 
+class RandomCheckAnalyzer(Analyzer):
+    """Scan engine plugin that collects candidate pages for the random check page."""
+    
+    name = 'random-check'
+    supports_catalog = True
+    
+    def __init__(self, output_file: str = OUTPUT_FILE):
+        self.output_file = output_file
+        self.pages_data = []
+        self.excluded_namespaces = []
+    
+    def start(self, context: ScanContext) -> None:
+        # Load excluded namespaces
+        self.excluded_namespaces, excluded_usernames = load_excluded_namespaces()
+        if self.excluded_namespaces:
+            print(f"Excluding namespaces: {self.excluded_namespaces}")
+        if excluded_usernames:
+            print(f"Excluding usernames: {excluded_usernames}")
+    
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        if elements['title'] is None or elements['id'] is None:
+            return
+        
+        title = elements['title'] or "Unknown"
+        page_id = elements['id'] or "0"
+        namespace = elements['ns'] or "0"
+        
+        # Skip excluded pages
+        if should_exclude_page(title, self.excluded_namespaces):
+            return
+        
+        # Add valid page to list
+        self.pages_data.append((page_id, title, namespace))
+    
+    def process_catalog(self, catalog) -> None:
+        for i in range(catalog.page_count):
+            title = catalog.get_title(i)
+            if not title or catalog.ids[i] < 0:
+                continue
+            if should_exclude_page(title, self.excluded_namespaces):
+                continue
+            self.pages_data.append((str(int(catalog.ids[i])), title, str(int(catalog.ns[i]))))
+    
+    def finish(self, stats: ScanStats) -> None:
+        print(f"Total pages processed: {stats.page_count}")
+        print(f"Valid pages for random selection: {len(self.pages_data)}")
+        
+        if not self.pages_data:
+            print("No valid pages found in XML file")
+            return
+        
+        # No output file means the caller only wants the collected data
+        if self.output_file is None:
+            return
+        
+        print("Generating HTML page...")
+        generate_html_page(self.pages_data, self.output_file, scan_stats=stats)
+        print(f"Found {len(self.pages_data)} valid pages")
+
+
 def extract_random_pages(xml_file_path: str) -> List[Tuple[str, str, str]]:
     """
     Extract all valid pages from XML file for random selection.
@@ -62,67 +122,20 @@ def extract_random_pages(xml_file_path: str) -> List[Tuple[str, str, str]]:
     Returns:
         List of tuples containing (page_id, page_title, namespace)
     """
-    pages_data = []
-    
     print(f"Extracting pages from {xml_file_path}...")
-    
-    # Load excluded namespaces
-    excluded_namespaces, excluded_usernames = load_excluded_namespaces()
-    if excluded_namespaces:
-        print(f"Excluding namespaces: {excluded_namespaces}")
-    if excluded_usernames:
-        print(f"Excluding usernames: {excluded_usernames}")
-    
-    # Use iterparse for memory-efficient parsing of large XML files
-    context = ET.iterparse(xml_file_path, events=('start', 'end'))
-    context = iter(context)
-    event, root = next(context)
-    
-    # Get namespace URI from root element
-    namespace_uri = root.tag.split('}')[0] + '}' if root.tag.startswith('{') else ''
-    
-    page_count = 0
-    
-    for event, elem in context:
-        if event == 'end' and elem.tag == f'{namespace_uri}page':
-            page_count += 1
-            if page_count % 10000 == 0:
-                print(f"Processed {page_count} pages...")
-            
-            # Extract page information
-            title_elem = elem.find(f'{namespace_uri}title')
-            ns_elem = elem.find(f'{namespace_uri}ns')
-            id_elem = elem.find(f'{namespace_uri}id')
-            
-            if title_elem is not None and id_elem is not None:
-                title = title_elem.text or "Unknown"
-                page_id = id_elem.text or "0"
-                namespace = ns_elem.text or "0"
-                
-                # Skip excluded pages
-                if should_exclude_page(title, excluded_namespaces):
-                    elem.clear()
-                    continue
-                
-                # Add valid page to list
-                pages_data.append((page_id, title, namespace))
-            
-            # Clear element to free memory
-            elem.clear()
-    
-    print(f"Total pages processed: {page_count}")
-    print(f"Valid pages for random selection: {len(pages_data)}")
-    
-    return pages_data
+    analyzer = RandomCheckAnalyzer(output_file=None)
+    run_analyzers(xml_file_path, [analyzer])
+    return analyzer.pages_data
 
 
-def generate_html_page(pages_data: List[Tuple[str, str, str]], output_file: str):
+def generate_html_page(pages_data: List[Tuple[str, str, str]], output_file: str, scan_stats=None):
     """
     Generate HTML page with random page selector functionality.
     
     Args:
         pages_data: List of (page_id, page_title, namespace) tuples
         output_file: Path to output HTML file
+        scan_stats: Optional ScanStats with the parse cost of the scan
     """
     # Generate random sample for links list with both ID and title
     random_sample = random.sample(pages_data, min(RANDOM_LINKS_COUNT, len(pages_data)))
@@ -140,6 +153,15 @@ def generate_html_page(pages_data: List[Tuple[str, str, str]], output_file: str)
     random_links_html = random_links_html.rstrip('\n            ')
     random_links_js_array = '[' + ','.join(random_links_js) + ']'
     
+    # Shared parse cost of the scan that produced this page
+    parse_cost_html = ""
+    if scan_stats is not None:
+        parse_cost_html = (
+            f"⏱️ Parse cost: {scan_stats.page_count:,} pages in {scan_stats.elapsed:.1f}s "
+            f"({'page catalog, ' if scan_stats.source == 'catalog' else ''}"
+            f"shared by {len(scan_stats.analyzer_names)} analyzers)<br>\n            "
+        )
+    
     html_content = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -293,7 +315,7 @@ def generate_html_page(pages_data: List[Tuple[str, str, str]], output_file: str)
             📊 Total available pages: {len(pages_data):,}<br>
             🚫 Excluded {73776 - len(pages_data):,} pages by site configuration rules<br>
             📅 Generated: {get_fetch_date()}<br>
-            🤖 Created by random-check.py
+            {parse_cost_html}🤖 Created by random-check.py
         </div>
         
         <div class="license">
@@ -345,20 +367,11 @@ def main():
         return
     
     try:
-        # Extract pages from XML
+        # Extract pages from XML and generate the HTML page in a single scan
         print("Extracting valid pages...")
-        pages_data = extract_random_pages(xml_file)
-        
-        if not pages_data:
-            print("No valid pages found in XML file")
-            return
-        
-        # Generate HTML page
-        print("Generating HTML page...")
-        generate_html_page(pages_data, output_file)
+        run_analyzers(xml_file, [RandomCheckAnalyzer(output_file)])
         
         print(f"\nRandom page generator complete!")
-        print(f"Found {len(pages_data)} valid pages")
         print(f"HTML page saved to: {output_file}")
         print(f"Open {output_file} in a web browser to use the random page selector.")
         
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Analysis Runner for MediaWiki XML Export
+
+This script parses the MediaWiki XML export once and runs every analysis
+tool (contributors, large pages, namespaces, random check, tokens) as a
+plugin of the shared scan engine.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+
+# Add project root to path for imports
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+import config
+from lib.io_utils import get_xml_file, check_xml_exists
+from lib.scan import ScanEngine
+
+TOOLS_DIR = os.path.join(PROJECT_ROOT, 'tools')
+
+# Analyzer plugins: name -> (tool script relative to tools/, factory function)
+ANALYZER_PLUGINS = {
+    'contributors': ('contributors/contributors.py', lambda module: module.ContributorsAnalyzer()),
+    'large-pages': ('large-pages/large-pages.py', lambda module: module.LargePagesAnalyzer()),
+    'namespaces': ('namespaces/namespaces.py', lambda module: module.NamespacesAnalyzer()),
+    'random-check': ('random/random-check.py', lambda module: module.RandomCheckAnalyzer()),
+    'tokens': ('tokens/tokens.py', lambda module: module.TokensAnalyzer(module.load_excluded_namespaces())),
+}
+
+
+def load_tool_module(relative_path: str):
+    """
+    Import a tool script by file path (tool file names are not valid module names).
+
+    Args:
+        relative_path: Script path relative to the tools directory
+
+    Returns:
+        Imported module object
+    """
+    script_path = os.path.join(TOOLS_DIR, relative_path)
+    module_name = os.path.splitext(os.path.basename(script_path))[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    """Main function to run all analyzers in a single scan."""
+    parser = argparse.ArgumentParser(
+        description=f'Run all {config.SITE_NAME} analysis tools with a single XML parse'
+    )
+    parser.add_argument(
+        '--only',
+        nargs='+',
+        choices=list(ANALYZER_PLUGINS.keys()),
+        help='Run only the listed analyzers (default: all)'
+    )
+    args = parser.parse_args()
+
+    if not check_xml_exists():
+        sys.exit(1)
+
+    selected = args.only or list(ANALYZER_PLUGINS.keys())
+
+    engine = ScanEngine()
+    for name in selected:
+        relative_path, factory = ANALYZER_PLUGINS[name]
+        engine.register(factory(load_tool_module(relative_path)))
+
+    stats = engine.run(get_xml_file())
+
+    print(f"\nAll analyzers completed with a single parse!")
+    for name in selected:
+        print(f"✓ {name}: {stats.analyzer_times.get(name, 0.0):.1f}s")
+    print(f"Parsed {stats.page_count:,} pages once for {len(selected)} analyzers in {stats.elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
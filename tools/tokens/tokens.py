@@ -7,20 +7,18 @@ using different tokenization methods and compares the results.
 """
 
 import tiktoken
-import os
 import time
-from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Import shared library modules
 import sys
 sys.path.append('../../')
 import config
 from lib.exclusions import load_excluded_namespaces, should_exclude_page_by_namespace_id, convert_excluded_namespaces_to_ids
-from lib.xml_parser import parse_namespaces, get_namespace_name, extract_page_elements, iterate_pages
 from lib.formatting import format_number, format_bytes
-from lib.io_utils import get_fetch_date, check_xml_exists, get_xml_file
+from lib.io_utils import check_xml_exists, get_xml_file
 from lib.reporting import generate_license_footer, write_markdown_report
+from lib.scan import Analyzer, ScanContext, ScanStats, run_analyzers
 
 # Local configuration - output to site-specific analysis directory
 OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'tokens.md')
@@ -33,53 +31,75 @@ OUTPUT_FILE = str(config.DATA_DIR / 'analysis' / 'tokens.md')
 
 # Removed - now imported from lib.exclusions
 
-def filter_and_analyze_xml(xml_file_path: str, excluded_namespaces: List[str]) -> Tuple[str, int, str, int]:
-    """
-    Filter XML content by excluding pages from specified namespaces.
-    
-    Returns:
-        Tuple of (original_content, original_page_count, filtered_content, filtered_page_count)
-    """
-    print("Parsing XML and filtering content...")
+class TokensAnalyzer(Analyzer):
+    """Scan engine plugin that collects page text for token counting."""
     
-    # Parse namespace definitions
-    namespace_map = parse_namespaces(xml_file_path)
+    name = 'tokens'
     
-    # Convert excluded namespace strings to IDs
-    excluded_namespace_ids = convert_excluded_namespaces_to_ids(excluded_namespaces, namespace_map)
+    def __init__(self, excluded_namespaces: List[str], output_file: str = OUTPUT_FILE):
+        self.output_file = output_file
+        self.excluded_namespaces = excluded_namespaces
+        self.excluded_namespace_ids = []
+        self.original_pages = []
+        self.filtered_pages = []
+        self.page_count = 0
+        self.filtered_page_count = 0
     
-    original_pages = []
-    filtered_pages = []
+    def start(self, context: ScanContext) -> None:
+        # Convert excluded namespace strings to IDs using definitions from the same scan
+        self.excluded_namespace_ids = convert_excluded_namespaces_to_ids(self.excluded_namespaces, context.namespace_map)
     
-    # Build XML header
-    xml_header = """<?xml version="1.0" encoding="UTF-8"?>
-<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.mediawiki.org/xml/export-0.11/ http://www.mediawiki.org/xml/export-0.11.xsd" version="0.11" xml:lang="en">
-"""
-    
-    # Process pages using shared iterator
-    filtered_page_count = 0
-    
-    for page_count, elements in iterate_pages(xml_file_path):
+    def process_page(self, elements: Dict[str, Optional[str]], page_elem) -> None:
+        self.page_count += 1
         if elements['title'] and elements['ns']:
             # Store original page content (simplified - would need full page XML)
             # For now, just use the text content for token counting
             page_text = elements['text'] or ''
-            original_pages.append(page_text)
+            self.original_pages.append(page_text)
             
             # Check if page should be excluded using namespace ID
-            if not should_exclude_page_by_namespace_id(elements['ns'], excluded_namespace_ids):
-                filtered_pages.append(page_text)
-                filtered_page_count += 1
+            if not should_exclude_page_by_namespace_id(elements['ns'], self.excluded_namespace_ids):
+                self.filtered_pages.append(page_text)
+                self.filtered_page_count += 1
     
-    # Build complete content (simplified for token counting)
-    original_content = "\n".join(original_pages)
-    filtered_content = "\n".join(filtered_pages)
+    def get_results(self) -> Tuple[str, int, str, int]:
+        """
+        Build the joined content from the collected pages.
+        
+        Returns:
+            Tuple of (original_content, original_page_count, filtered_content, filtered_page_count)
+        """
+        # Build complete content (simplified for token counting)
+        original_content = "\n".join(self.original_pages)
+        filtered_content = "\n".join(self.filtered_pages)
+        
+        print(f"Total pages: {self.page_count}")
+        print(f"Filtered pages: {self.filtered_page_count}")
+        print(f"Excluded pages: {self.page_count - self.filtered_page_count}")
+        
+        return original_content, self.page_count, filtered_content, self.filtered_page_count
     
-    print(f"Total pages: {page_count}")
-    print(f"Filtered pages: {filtered_page_count}")
-    print(f"Excluded pages: {page_count - filtered_page_count}")
+    def finish(self, stats: ScanStats) -> None:
+        # No output file means the caller only wants the collected data
+        if self.output_file is None:
+            return
+        
+        content, page_count, filtered_content, filtered_page_count = self.get_results()
+        report_token_counts(content, page_count, filtered_content, filtered_page_count,
+                            stats.xml_file_path, self.output_file, scan_stats=stats)
+
+
+def filter_and_analyze_xml(xml_file_path: str, excluded_namespaces: List[str]) -> Tuple[str, int, str, int]:
+    """
+    Filter XML content by excluding pages from specified namespaces.
     
-    return original_content, page_count, filtered_content, filtered_page_count
+    Returns:
+        Tuple of (original_content, original_page_count, filtered_content, filtered_page_count)
+    """
+    print("Parsing XML and filtering content...")
+    analyzer = TokensAnalyzer(excluded_namespaces, output_file=None)
+    run_analyzers(xml_file_path, [analyzer])
+    return analyzer.get_results()
 
 # Removed - now imported from lib.io_utils
 
@@ -98,7 +118,8 @@ def count_tokens_tiktoken(text):
 # Removed - now imported from lib.formatting
 
 def generate_report(file_size, char_count, page_count, tiktoken_count, tiktoken_time, 
-                   filtered_file_size, filtered_char_count, filtered_page_count, filtered_tiktoken_count, xml_file):
+                   filtered_file_size, filtered_char_count, filtered_page_count, filtered_tiktoken_count, xml_file,
+                   scan_stats=None):
     """Generate markdown report from token analysis results."""
     
     # Generate report content
@@ -155,28 +176,12 @@ Analysis of token counts for the {config.SITE_NAME} MediaWiki XML export using t
 """
     
     # Add license section
-    report_content += generate_license_footer('tokens.py')
+    report_content += generate_license_footer('tokens.py', scan_stats)
     
     return report_content
 
-def main():
-    """Main function to run the token analysis."""
-    print(f"Token Counter for {config.SITE_NAME} MediaWiki XML")
-    print("=" * 50)
-    
-    # Check if XML file exists
-    if not check_xml_exists():
-        return
-    
-    # Load exclusions and filter content
-    print("Loading exclusions...")
-    excluded_namespaces = load_excluded_namespaces()
-    print(f"Found {len(excluded_namespaces)} excluded namespaces")
-    
-    # Filter XML content properly by excluding entire pages
-    xml_file = get_xml_file()
-    content, page_count, filtered_content, filtered_page_count = filter_and_analyze_xml(xml_file, excluded_namespaces)
-    
+def report_token_counts(content, page_count, filtered_content, filtered_page_count, xml_file, output_file, scan_stats=None):
+    """Count tokens for the original and filtered content and write the report."""
     # File info
     file_size = len(content.encode('utf-8'))
     char_count = len(content)
@@ -206,11 +211,12 @@ def main():
     # Generate report
     report_content = generate_report(
         file_size, char_count, page_count, tiktoken_count, tiktoken_time,
-        filtered_file_size, filtered_char_count, filtered_page_count, filtered_tiktoken_count, xml_file
+        filtered_file_size, filtered_char_count, filtered_page_count, filtered_tiktoken_count, xml_file,
+        scan_stats=scan_stats
     )
     
     # Write report to file
-    write_markdown_report(OUTPUT_FILE, report_content)
+    write_markdown_report(output_file, report_content)
     
     # Display console results
     print("\n" + "=" * 50)
@@ -227,6 +233,26 @@ def main():
         # Calculate reduction percentage
         reduction_percent = (tiktoken_count - filtered_tiktoken_count) / tiktoken_count * 100
         print(f"Token reduction: {reduction_percent:.1f}%")
+
+
+def main():
+    """Main function to run the token analysis."""
+    print(f"Token Counter for {config.SITE_NAME} MediaWiki XML")
+    print("=" * 50)
+    
+    # Check if XML file exists
+    if not check_xml_exists():
+        return
+    
+    # Load exclusions and filter content
+    print("Loading exclusions...")
+    excluded_namespaces = load_excluded_namespaces()
+    print(f"Found {len(excluded_namespaces)} excluded namespaces")
+    
+    # Filter XML content properly by excluding entire pages, then count tokens and write the report
+    xml_file = get_xml_file()
+    print("Parsing XML and filtering content...")
+    run_analyzers(xml_file, [TokensAnalyzer(excluded_namespaces, OUTPUT_FILE)])
     
     print(f"\nAnalysis complete! Report saved to: {OUTPUT_FILE}")
 